@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Arama öncelik kuyruğu karşılaştırması: ikili yığın (`heapq`) ve radix yığın.
+
+Ölçülenler (her ağ için):
+- Dijkstra (`LandmarkPrecomputer._dijkstra`): "heap" ve "radix" kuyruklarıyla tek
+  kaynaklı tam tarama; mesafelerin birebir aynı olduğu denetlenir.
+- A* (`CompiledGraph.astar`): rastgele başlangıç/hedef çiftleri; satır içi heapq
+  ile radix yığın; süre farkının en büyüğü (niceleme hatası, <= çözünürlük) raporlanır.
+
+Ağlar: şehir ağı (`--net` ve `--landmarks` varsa) ve N x N sentetik ızgaralar
+(rastgele kenar süreleri, iki yönlü; köşe düğümleri landmark).
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.offline.landmarks import LandmarkPrecomputer  # noqa: E402
+from src.online.graph import CompiledGraph  # noqa: E402
+
+
+def synthetic_grid(n: int, seed: int) -> SimpleNamespace:
+	"""`CompiledGraph.from_router`ın beklediği alanlara sahip N x N ızgara."""
+	rng = random.Random(seed)
+	nodes = {f"{i}_{j}": (i * 100.0, j * 100.0) for i in range(n) for j in range(n)}
+	out_edges: Dict[str, List[Tuple[str, float, str]]] = {nid: [] for nid in nodes}
+	edge_base_time: Dict[str, float] = {}
+	edge_to_endpoints: Dict[str, Tuple[str, str]] = {}
+	for i in range(n):
+		for j in range(n):
+			u = f"{i}_{j}"
+			for di, dj in ((1, 0), (0, 1)):
+				if i + di >= n or j + dj >= n:
+					continue
+				v = f"{i + di}_{j + dj}"
+				t = rng.uniform(4.0, 20.0)
+				for a, b in ((u, v), (v, u)):
+					eid = f"{a}-{b}"
+					out_edges[a].append((b, t, eid))
+					edge_base_time[eid] = t
+					edge_to_endpoints[eid] = (a, b)
+	return SimpleNamespace(nodes=nodes, out_edges=out_edges, edge_base_time=edge_base_time, edge_to_endpoints=edge_to_endpoints)
+
+
+def city_network(net_path: str, landmark_path: str) -> SimpleNamespace:
+	from src.online.router import OnlineRouter
+	return OnlineRouter(network_path=net_path, landmark_json_path=landmark_path)
+
+
+def precomputer_for(router, queue_kind: str) -> LandmarkPrecomputer:
+	pre = LandmarkPrecomputer(network_path="", queue_kind=queue_kind)
+	pre.nodes = dict(router.nodes)
+	pre.out_edges = {u: [(v, t) for v, t, _e in outs] for u, outs in router.out_edges.items()}
+	return pre
+
+
+def bench_dijkstra(router, sources: List[str]) -> Dict[str, float]:
+	out: Dict[str, float] = {}
+	dists = {}
+	for kind in ("heap", "radix"):
+		pre = precomputer_for(router, kind)
+		t0 = time.perf_counter()
+		dists[kind] = [pre._dijkstra(s) for s in sources]
+		out[kind] = (time.perf_counter() - t0) / max(1, len(sources))
+	out["equal"] = float(dists["heap"] == dists["radix"])
+	return out
+
+
+def bench_astar(graph: CompiledGraph, pairs: List[Tuple[int, int]]) -> Dict[str, float]:
+	out: Dict[str, float] = {}
+	costs = {}
+	for kind in ("heap", "radix"):
+		graph.queue_kind = kind
+		t0 = time.perf_counter()
+		costs[kind] = [graph.astar(s, g)[0] for s, g in pairs]
+		out[kind] = (time.perf_counter() - t0) / max(1, len(pairs))
+	graph.queue_kind = "heap"
+	out["max_diff"] = max((abs(a - b) for a, b in zip(costs["heap"], costs["radix"]) if a != float("inf")), default=0.0)
+	return out
+
+
+def run_network(name: str, router, args, rng: random.Random) -> None:
+	node_ids = list(router.nodes.keys())
+	if not getattr(router, "landmarks", None):
+		# Sentetik ızgara: köşe düğümlerinden landmark tabloları
+		corners = [node_ids[0], node_ids[-1]]
+		n = int(round(len(node_ids) ** 0.5))
+		if n * n == len(node_ids) and n > 1:
+			corners += [node_ids[n - 1], node_ids[-n]]
+		pre = precomputer_for(router, "heap")
+		router.landmarks = corners
+		router.tables = {lm: pre._dijkstra(lm) for lm in corners}
+	graph = CompiledGraph.from_router(router)
+	sources = rng.sample(node_ids, min(args.dijkstra_sources, len(node_ids)))
+	pairs = [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes)) for _ in range(args.queries)]
+	dj = bench_dijkstra(router, sources)
+	ast = bench_astar(graph, pairs)
+	print(f"{name}: {graph.num_nodes} düğüm, {len(graph.arc_to)} yay")
+	print(f"  Dijkstra  heap {dj['heap'] * 1000:8.2f} ms   radix {dj['radix'] * 1000:8.2f} ms   (x{dj['heap'] / max(1e-12, dj['radix']):.2f}, mesafeler {'aynı' if dj['equal'] else 'FARKLI'})")
+	print(f"  A*        heap {ast['heap'] * 1000:8.2f} ms   radix {ast['radix'] * 1000:8.2f} ms   (x{ast['heap'] / max(1e-12, ast['radix']):.2f}, en büyük süre farkı {ast['max_diff']:.3f} s)")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+	p = argparse.ArgumentParser(description="heapq ve radix yığın arama kuyruklarını karşılaştır")
+	p.add_argument("--net", default="config/network_with_tl.net.xml", help="Şehir ağı (.net.xml); yoksa atlanır")
+	p.add_argument("--landmarks", default="data/landmarks.json", help="Şehir ağı landmark tabloları")
+	p.add_argument("--grid-sizes", type=int, nargs="*", default=[50, 150, 300], help="Sentetik ızgara kenar uzunlukları (N x N düğüm)")
+	p.add_argument("--queries", type=int, default=200, help="Ağ başına A* sorgu sayısı")
+	p.add_argument("--dijkstra-sources", type=int, default=3, help="Ağ başına tam Dijkstra sayısı")
+	p.add_argument("--seed", type=int, default=1, help="Rastgelelik tohumu")
+	return p
+
+
+def main() -> int:
+	args = build_arg_parser().parse_args()
+	rng = random.Random(args.seed)
+	if os.path.exists(args.net) and os.path.exists(args.landmarks):
+		run_network("şehir", city_network(args.net, args.landmarks), args, rng)
+	else:
+		print(f"Şehir ağı bulunamadı ({args.net}); yalnızca sentetik ızgaralar ölçülüyor")
+	for n in args.grid_sizes:
+		run_network(f"ızgara {n}x{n}", synthetic_grid(n, args.seed), args, rng)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+TraCI RPC bütçe regresyon denetimi (SUMO gerektirmez).
+
+Sıcak döngünün bileşenleri (`SumoAdapter.step`, `PriorityMaintenanceTask`,
+`FleetPriorityTask` ve `AmbulanceFleet` abonelikleri, `TrafficLightController`)
+`cmd_run` ile aynı zamanlayıcı düzeninde bir kayıt (`--replay` biçimi) üzerinde
+koşulur; `RpcAccounting` oynatma modülüne kurulur ve alan başına (vehicle,
+trafficlight, lane, simulation, simulationStep, ...) adım maksimumu ve toplam
+çağrı sayısı depodaki bütçe dosyasıyla (`config/rpc_budget.json`) karşılaştırılır.
+Herhangi bir alan bütçeyi aşarsa (veya bütçede olmayan bir alan çağrılırsa)
+çıkış kodu 1 olur: sıcak döngüye RPC ekleyen değişiklik denetimi geçemez.
+
+Varsayılan senaryo betik içinde deterministik olarak üretilir: tek koridorda üç
+ışıklı kavşak, arka plan araçları ve farklı zamanlarda giren iki ambulans. Kayıt,
+küçük bir senaryo nesnesi `traci` yerine konarak `ObservationRecorder` ile yazılır
+(yalnızca kayıt üretimi için; denetlenen kod `src.adapters.replay` üzerinden koşar).
+`--recording` ile gerçek bir `run --record` kaydı da kullanılabilir (bütçesi ayrı
+dosyada tutulmalıdır).
+
+Abonelik sonuçları (`vehicle.getAllSubscriptionResults`) bütçeye dahildir; bkz.
+`src/telemetry/rpc.py`.
+
+Kullanım:
+  python scripts/check_rpc_budget.py              # denetle
+  python scripts/check_rpc_budget.py --update     # bütçeyi bilinçli bir değişiklikten sonra yenile
+"""
+
+import os
+import sys
+import json
+import types
+import logging
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.adapters import SumoAdapter  # noqa: E402
+from src.adapters.recording import ObservationRecorder  # noqa: E402
+from src.telemetry.rpc import RpcAccounting  # noqa: E402
+
+DEFAULT_BUDGET = "config/rpc_budget.json"
+SCENARIO_STEPS = 120
+# Koridor: kenar k, x ∈ [300k, 300(k+1)); ışıklar kenar sonlarında
+TLS_IDS = ("J1", "J2", "J3")
+EDGE_LEN = 300.0
+
+
+class _CorridorScenario:
+	"""Kayıt üretimi için en küçük traci benzeri senaryo (yalnızca okunan sorgular)."""
+
+	def __init__(self):
+		self.t = 0.0
+		self.pos: Dict[str, float] = {}
+		self.speed: Dict[str, float] = {}
+		self.departed: List[str] = []
+		self.arrived: List[str] = []
+		sc = self
+
+		class Vehicle:
+			def getIDList(self):
+				return list(sc.pos)
+
+			def getTypeID(self, v):
+				return "ambulance" if v.startswith("amb") else "passenger"
+
+			def getPosition(self, v):
+				return (sc.pos[v], 0.0)
+
+			def getSpeed(self, v):
+				return sc.speed[v]
+
+			def getAngle(self, v):
+				return 90.0
+
+			def getRoadID(self, v):
+				return f"e{int(sc.pos[v] // EDGE_LEN)}"
+
+			def getLaneID(self, v):
+				return f"e{int(sc.pos[v] // EDGE_LEN)}_0"
+
+			def getLanePosition(self, v):
+				return sc.pos[v] % EDGE_LEN
+
+			def getNextTLS(self, v):
+				k = int(sc.pos[v] // EDGE_LEN)
+				if k >= len(TLS_IDS):
+					return []
+				tl = TLS_IDS[k]
+				return [(tl, 0, EDGE_LEN * (k + 1) - sc.pos[v], sc.state(tl)[0])]
+
+		class TrafficLight:
+			def getIDList(self):
+				return list(TLS_IDS)
+
+			def getControlledLinks(self, tl):
+				k = TLS_IDS.index(tl)
+				return [[(f"e{k}_0", f"e{k + 1}_0", "")], [(f"s{k}_0", f"n{k}_0", "")]]
+
+			def getProgram(self, tl):
+				return "0"
+
+			def getRedYellowGreenState(self, tl):
+				return sc.state(tl)
+
+			def getPhase(self, tl):
+				return 0 if sc.state(tl) == "rG" else 1
+
+			def getNextSwitch(self, tl):
+				return (int(sc.t) // 15 + 1) * 15.0
+
+		class Lane:
+			def getLastStepVehicleNumber(self, lane):
+				return 4
+
+			def getLastStepHaltingNumber(self, lane):
+				return 2
+
+			def getLastStepMeanSpeed(self, lane):
+				return 3.0
+
+		self.vehicle = Vehicle()
+		self.trafficlight = TrafficLight()
+		self.lane = Lane()
+		self.junction = types.SimpleNamespace(getPosition=lambda tl: (EDGE_LEN * (TLS_IDS.index(tl) + 1), 0.0))
+		self.simulation = types.SimpleNamespace(
+			getTime=lambda: sc.t,
+			getDeltaT=lambda: 1000.0,
+			getDepartedIDList=lambda: list(sc.departed),
+			getArrivedIDList=lambda: list(sc.arrived),
+		)
+
+	def state(self, tl: str) -> str:
+		phase = (int(self.t) + 5 * TLS_IDS.index(tl)) // 15
+		return "rG" if phase % 2 == 0 else "Gr"
+
+	def advance(self, step: int) -> None:
+		self.t = float(step + 1)
+		self.departed, self.arrived = [], []
+		for v in list(self.pos):
+			self.pos[v] += self.speed[v]
+			if self.pos[v] >= EDGE_LEN * (len(TLS_IDS) + 1):
+				del self.pos[v], self.speed[v]
+				self.arrived.append(v)
+		for vid, at, speed in (("car_0", 1, 8.0), ("amb_0", 3, 12.0), ("car_1", 10, 9.0), ("amb_1", 40, 14.0), ("car_2", 55, 7.0)):
+			if step == at:
+				self.pos[vid], self.speed[vid] = 0.0, speed
+				self.departed.append(vid)
+
+
+def synthetic_recording(path: str, steps: int = SCENARIO_STEPS) -> str:
+	scenario = _CorridorScenario()
+	previous = sys.modules.get("traci")
+	sys.modules["traci"] = scenario
+	try:
+		rec = ObservationRecorder(path)
+		for step in range(steps):
+			scenario.advance(step)
+			rec.capture()
+		rec.save()
+	finally:
+		if previous is None:
+			sys.modules.pop("traci", None)
+		else:
+			sys.modules["traci"] = previous
+	return path
+
+
+def measure(recording: str, work_dir: str) -> Dict[str, Any]:
+	"""Kaydı sıcak döngü bileşenleriyle oynat; alan başına RPC sayılarını döndür."""
+	from src.controllers import TrafficLightController
+	from src.online.fleet import AmbulanceFleet
+	from src.online.scheduler import SimScheduler
+	from src.online.tasks import FleetPriorityTask, PriorityMaintenanceTask
+
+	adapter = SumoAdapter()
+	if not adapter.connect_replay(recording):
+		raise RuntimeError(f"kayıt yüklenemedi: {recording}")
+	rpc = RpcAccounting()
+	try:
+		rpc.install(adapter.replay)
+		tlc = TrafficLightController(None, anfis_model_path="models/anfis.json", training_log_dir=work_dir)
+		scheduler = SimScheduler()
+		fleet = AmbulanceFleet(adapter, step_s=adapter.get_step_length_seconds())
+		scheduler.every("maintain", 0.0, PriorityMaintenanceTask(tlc), priority=10)
+		scheduler.every("fleet", 0.0, FleetPriorityTask(adapter, tlc, fleet, on_priority=lambda now: scheduler.wake("maintain", now)), priority=20)
+		rpc.begin()
+		while adapter.connected:
+			adapter.step()
+			if not adapter.connected:
+				break
+			scheduler.run_due(adapter.get_sim_time())
+		try:
+			tlc.close()
+		except Exception:
+			pass
+	finally:
+		rpc.uninstall()
+		adapter.close()
+	return {
+		"steps": rpc.steps,
+		"per_step_max": dict(sorted(rpc.max_step_by_domain.items())),
+		"total": dict(sorted(rpc.by_domain().items())),
+		"commands": {k: v.count for k, v in sorted(rpc.by_command().items())},
+	}
+
+
+def compare(observed: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+	problems = []
+	if observed["steps"] != budget.get("steps"):
+		problems.append(f"adım sayısı {observed['steps']} != bütçedeki {budget.get('steps')} (senaryo değişti mi?)")
+	for key in ("per_step_max", "total"):
+		limits = budget.get(key, {})
+		for domain, used in observed[key].items():
+			limit = limits.get(domain, 0)
+			if used > limit:
+				problems.append(f"{key} {domain}: {used} > {limit}")
+	return problems
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+	p = argparse.ArgumentParser(description="Kayıtlı senaryoda sıcak döngü TraCI RPC sayılarını bütçeyle karşılaştır")
+	p.add_argument("--budget", default=DEFAULT_BUDGET, help="Bütçe dosyası (JSON)")
+	p.add_argument("--recording", default=None, help="Kayıt (.npz, `run --record`); yoksa yerleşik koridor senaryosu üretilir")
+	p.add_argument("--update", action="store_true", help="Ölçülen değerleri bütçe olarak yaz")
+	return p
+
+
+def main() -> int:
+	args = build_arg_parser().parse_args()
+	logging.basicConfig(level=logging.WARNING)
+	with tempfile.TemporaryDirectory() as tmp:
+		recording = args.recording or synthetic_recording(os.path.join(tmp, "corridor.npz"))
+		observed = measure(recording, tmp)
+	if args.update:
+		data = {
+			"scenario": os.path.basename(args.recording) if args.recording else "corridor",
+			"steps": observed["steps"],
+			"per_step_max": observed["per_step_max"],
+			"total": observed["total"],
+			"commands": observed["commands"],
+		}
+		with open(args.budget, "w", encoding="utf-8") as f:
+			json.dump(data, f, ensure_ascii=False, indent=2)
+			f.write("\n")
+		print(f"Bütçe yazıldı: {args.budget}")
+		return 0
+	with open(args.budget, "r", encoding="utf-8") as f:
+		budget = json.load(f)
+	problems = compare(observed, budget)
+	for domain in sorted(set(observed["total"]) | set(budget.get("total", {}))):
+		print(f"{domain:>16}: adım başına en çok {observed['per_step_max'].get(domain, 0):3d} (bütçe {budget.get('per_step_max', {}).get(domain, 0):3d}), toplam {observed['total'].get(domain, 0):5d} (bütçe {budget.get('total', {}).get(domain, 0):5d})")
+	if problems:
+		print("RPC bütçesi aşıldı:")
+		for line in problems:
+			print(f"  - {line}")
+		changed = {k: (budget.get("commands", {}).get(k, 0), n) for k, n in observed["commands"].items() if n > budget.get("commands", {}).get(k, 0)}
+		for cmd, (old, new) in sorted(changed.items()):
+			print(f"    {cmd}: {old} -> {new}")
+		return 1
+	print(f"RPC bütçesi içinde ({observed['steps']} adım)")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,23 +1,45 @@
 #!/usr/bin/env python3
 """
-ANFIS parametre eğitimi:
+ANFIS parametre eğitimi (hibrit öğrenme):
 
-Girdi: data/signal_training.csv (feats + y_extend) ve/veya data/dir_training.csv (label_select)
-Çıktı: models/anfis.json (fuzzy_sets ve kuralların ağırlıkları)
+Girdi: data/signal_training_v2.csv (feats + y_extend + action) ve/veya eski
+       data/signal_training.csv
+Çıktı: models/anfis.json (fuzzy_sets, rules_trigger, rules_extend, params)
 
-Not: Bu minimal bir optimizasyon örneğidir. Üyelik fonksiyonlarının merkezlerini ve
-kuralların ağırlıklarını basitçe ayarlar. Gelişmiş eğitim için gradyan temelli
-yaklaşımlar veya ANFIS spesifik kütüphaneler tercih edilebilir.
+Yöntem (Jang'ın hibrit ANFIS öğrenmesi):
+- İleri geçiş: üyelik parametreleri sabitken kural sonuçları (consequent)
+  en küçük kareler ile bulunur. Uzatma kuralları için y - min_green ≈ F·w
+  (normal denklemler epoch boyunca birikir, sırt/ridge düzenlemesiyle çözülür);
+  tetikleme (max-birleştirme) için her kural, kazandığı örnekler üzerinde tek
+  değişkenli en küçük kareler ile güncellenir.
+- Geri geçiş: üyelik parametreleri (a, b, c) vektörel NumPy türevleriyle
+  Adam tabanlı gradyan inişiyle güncellenir.
+
+Veri CSV'lerden parça parça (chunk) okunur, `prep-training` ile aynı bölüm
+tekilleştirmesinden geçirilir ve mini-batch'lere bölünür; doğrulama
+kaybı iyileşmezse erken durdurulur. Eğitim hızı (satır/s) raporlanır.
+
+Arama modu (`--search N`): N aday model (MF yerleşimi, kural ağırlıkları,
+`trigger_threshold`, `near_force_distance_m`) süreç havuzunda, kayıtlı
+özelliklerin toplu çıkarımla yeniden oynatılmasıyla bölüm bazlı çapraz
+doğrulamada puanlanır; yalnızca Pareto-en iyi modeller yazılır.
 """
 
 import os
+import sys
 import json
-import math
-import random
-from typing import Dict, Any, List
+import time
+import argparse
+from typing import Dict, Any, List, Iterator, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai.anfis import AnfisModel, TriMF  # noqa: E402
+from src.offline.training_data import EpisodeDeduplicator, dataset_frame, expand_log_paths, iter_unified_chunks, load_dataset  # noqa: E402
+
 
 DEFAULT_MODEL = {
 	"min_green": 6.0,
@@ -44,65 +66,564 @@ DEFAULT_MODEL = {
 	}
 }
 
+SIGNAL_CSVS = ["data/signal_training_v2.csv", "data/signal_training.csv"]
+DEDUP_DATASET = "data/training_dedup.npz"
+
 
 def load_training() -> Dict[str, pd.DataFrame]:
+	"""Eğitim verisini ortak şemada, tekilleştirilmiş olarak belleğe okur (küçük veri/analiz için)."""
 	frames: Dict[str, pd.DataFrame] = {}
-	# Prefer new schema if exists
-	if os.path.exists("data/signal_training_v2.csv"):
-		frames["signal"] = pd.read_csv("data/signal_training_v2.csv")
-	elif os.path.exists("data/signal_training.csv"):
-		frames["signal"] = pd.read_csv("data/signal_training.csv")
+	if os.path.exists(DEDUP_DATASET):
+		frames["signal"] = dataset_frame(DEDUP_DATASET)
+	else:
+		paths = default_data_paths()
+		if paths:
+			dedup = EpisodeDeduplicator()
+			parts = [dedup.process(chunk) for chunk in iter_unified_chunks(paths)] + [dedup.finish()]
+			parts = [p for p in parts if len(p)]
+			if parts:
+				frames["signal"] = pd.concat(parts, ignore_index=True)
 	if os.path.exists("data/dir_training.csv"):
 		frames["dir"] = pd.read_csv("data/dir_training.csv")
 	return frames
 
 
+def default_data_paths() -> List[str]:
+	# Önce `main.py prep-training` çıktısı, yoksa mevcut tüm loglar (v2 ve v1 birlikte)
+	if os.path.exists(DEDUP_DATASET):
+		return [DEDUP_DATASET]
+	return [p for p in SIGNAL_CSVS if expand_log_paths([p])]
+
+
+def initial_model(model_in: Optional[str]) -> AnfisModel:
+	if model_in and os.path.exists(model_in):
+		model = AnfisModel(model_in)
+		if model.loaded:
+			return model
+	model = AnfisModel(None)
+	_apply_dict(model, DEFAULT_MODEL)
+	return model
+
+
+def _apply_dict(model: AnfisModel, data: Dict[str, Any]) -> None:
+	model.fuzzy_sets = {var: {name: TriMF(*p) for name, p in mfs.items()} for var, mfs in data["fuzzy_sets"].items()}
+	model.rules_trigger = [(r["if"], float(r.get("w", 1.0))) for r in data["rules_trigger"]]
+	model.rules_extend = [(r["if"], float(r.get("w", 1.0))) for r in data["rules_extend"]]
+	model.min_green = float(data.get("min_green", model.min_green))
+	model.max_green = float(data.get("max_green", model.max_green))
+	for k, v in data.get("params", {}).items():
+		model.params[k] = float(v)
+	model.compile()
+
+
+# -------------------- Veri akışı --------------------
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _labels(frame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""(y_extend, y_trigger, satır ağırlığı) — ağırlık tekilleştirmede toplanan satır sayısıdır."""
+	n = len(frame["action"])
+	y_ext = np.nan_to_num(np.asarray(frame["y_extend"], dtype=np.float64), nan=0.0) if "y_extend" in frame else np.zeros(n)
+	y_trig = (np.asarray(frame["action"]).astype(str) != "none").astype(np.float64)
+	w = np.asarray(frame["weight"], dtype=np.float64) if "weight" in frame else np.ones(n)
+	return y_ext, y_trig, w
+
+
+def _yield_batches(model: AnfisModel, frame, batch_size: int, rng: Optional[np.random.Generator]) -> Iterator[Batch]:
+	X = np.nan_to_num(model.features_to_matrix(frame), nan=0.0, posinf=1e6, neginf=-1e6)
+	y_ext, y_trig, w = _labels(frame)
+	ext_w = y_trig * w
+	order = rng.permutation(len(y_ext)) if rng is not None else np.arange(len(y_ext))
+	for s in range(0, len(order), batch_size):
+		idx = order[s:s + batch_size]
+		yield X[idx], y_ext[idx], ext_w[idx], y_trig[idx], w[idx]
+
+
+def _is_dataset(path: str) -> bool:
+	with np.load(path, allow_pickle=False) as data:
+		return "ep_start" in data.files
+
+
+def iter_batches(model: AnfisModel, paths: List[str], batch_size: int, chunk_size: int, val_every: int, want_val: bool, rng: Optional[np.random.Generator]) -> Iterator[Batch]:
+	"""Veriyi parça parça okuyup (X, y_extend, extend_ağırlığı, y_trigger, trigger_ağırlığı) mini-batch'leri üretir.
+
+	- `.npz` (prep-training çıktısı): tekilleştirilmiş satırlar; doğrulama ayrımı
+	  bölüm bazındadır (episode % val_every == 0), aynı bölüm iki kümeye bölünmez.
+	- CSV/log parçaları: tümü tek akışta ortak şemaya eşlenir ve `prep-training` ile
+	  aynı `EpisodeDeduplicator`dan geçirilir (satır ağırlıkları `weight`); ayrım
+	  yine bölüm bazındadır.
+	"""
+	k = max(2, val_every)
+	logs: List[str] = []
+	for path in paths:
+		if not (path.endswith(".npz") and _is_dataset(path)):
+			logs.append(path)
+			continue
+		data = load_dataset(path)
+		sel = (data["episode"] % k == 0) if want_val else (data["episode"] % k != 0)
+		rows = np.flatnonzero(sel)
+		if rng is not None:
+			rows = rows[rng.permutation(len(rows))]
+		for s in range(0, len(rows), chunk_size):
+			idx = rows[s:s + chunk_size]
+			frame = {c: v[idx] for c, v in data.items() if not c.startswith("ep_")}
+			yield from _yield_batches(model, frame, batch_size, rng)
+	if not logs:
+		return
+	dedup = EpisodeDeduplicator()
+	for frame in _dedup_chunks(dedup, logs, chunk_size):
+		if not len(frame):
+			continue
+		is_val = (frame["episode"].to_numpy() % k) == 0
+		sel = is_val if want_val else ~is_val
+		if sel.any():
+			yield from _yield_batches(model, frame.loc[sel], batch_size, rng)
+
+
+def _dedup_chunks(dedup: EpisodeDeduplicator, paths: List[str], chunk_size: int) -> Iterator[pd.DataFrame]:
+	for chunk in iter_unified_chunks(paths, chunksize=chunk_size):
+		yield dedup.process(chunk)
+	yield dedup.finish()
+
+
+# -------------------- Hibrit ANFIS eğitici --------------------
+class HybridAnfisTrainer:
+	"""AnfisModel'in derlenmiş dizileri üzerinde ileri/geri geçiş ve hibrit güncelleme."""
+
+	def __init__(self, model: AnfisModel, lr: float = 0.01, ridge: float = 1e-3, trigger_weight: float = 1.0):
+		self.model = model
+		self.lr = float(lr)
+		self.ridge = float(ridge)
+		self.trigger_weight = float(trigger_weight)
+		model.compile()
+		self.P = np.stack([model._mf_a, model._mf_b, model._mf_c], axis=1).astype(np.float64)
+		self.w_ext = np.array(model._ext_w, dtype=np.float64)
+		self.w_trig = np.array(model._trig_w, dtype=np.float64)
+		# Adam durumları ve değişken ölçekleri (metre ve saniye farklı büyüklükte)
+		self._m = np.zeros_like(self.P)
+		self._v = np.zeros_like(self.P)
+		self._t = 0
+		span = np.maximum(1.0, self.P[:, 2] - self.P[:, 0])
+		self._scale = span[:, None]
+		self._reset_accumulators()
+
+	def _reset_accumulators(self) -> None:
+		r = len(self.w_ext)
+		self._A = np.zeros((r, r))
+		self._b = np.zeros(r)
+		rt = len(self.w_trig)
+		self._trig_fy = np.zeros(rt)
+		self._trig_ff = np.zeros(rt)
+
+	# ---- ileri geçiş ----
+	def _memberships(self, X: np.ndarray) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+		x = X[:, self.model._mf_cols]
+		a, b, c = self.P[:, 0], self.P[:, 1], self.P[:, 2]
+		wl = np.maximum(1e-6, b - a)
+		wr = np.maximum(1e-6, c - b)
+		left = (x > a) & (x < b)
+		right = (x >= b) & (x > a) & (x < c)
+		mu = np.where(left, (x - a) / wl, 0.0) + np.where(right, (c - x) / wr, 0.0)
+		n = X.shape[0]
+		mu_ext = np.hstack([mu, np.zeros((n, 1)), np.ones((n, 1))])
+		return mu_ext, (x, left, right, wl, wr)
+
+	@staticmethod
+	def _fire(mu_ext: np.ndarray, idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		vals = mu_ext[:, idx]                 # (N, R, K)
+		k = vals.argmin(axis=2)              # hangi öncül minimumu verdi
+		fire = np.take_along_axis(vals, k[:, :, None], axis=2)[:, :, 0]
+		col = idx[np.arange(idx.shape[0])[None, :], k]  # (N, R) MF sütunu
+		return fire, col
+
+	def forward(self, X: np.ndarray):
+		mu_ext, cache = self._memberships(X)
+		f_ext, c_ext = self._fire(mu_ext, self.model._ext_idx)
+		f_trig, c_trig = self._fire(mu_ext, self.model._trig_idx)
+		raw_ext = self.model.min_green + np.maximum(0.0, f_ext * self.w_ext).sum(axis=1)
+		y_ext = np.clip(raw_ext, self.model.min_green, self.model.max_green)
+		contrib = f_trig * np.clip(self.w_trig, 0.0, 1.0)
+		if contrib.shape[1]:
+			win = contrib.argmax(axis=1)
+			p = np.clip(contrib[np.arange(len(win)), win], 0.0, 1.0)
+		else:
+			win = np.zeros(X.shape[0], dtype=np.intp)
+			p = np.zeros(X.shape[0])
+		return {"mu": mu_ext, "cache": cache, "f_ext": f_ext, "c_ext": c_ext, "f_trig": f_trig, "c_trig": c_trig,
+				"raw_ext": raw_ext, "y_ext": y_ext, "p": p, "win": win}
+
+	def loss(self, fw, y_ext: np.ndarray, ext_mask: np.ndarray, y_trig: np.ndarray, trig_w: np.ndarray) -> Tuple[float, float]:
+		n_ext = max(1.0, ext_mask.sum())
+		l_ext = float((ext_mask * (fw["y_ext"] - y_ext) ** 2).sum() / n_ext)
+		l_trig = float((trig_w * (fw["p"] - y_trig) ** 2).sum() / max(1.0, trig_w.sum())) if len(y_trig) else 0.0
+		return l_ext, l_trig
+
+	# ---- geri geçiş (üyelik parametreleri) ----
+	def backward(self, fw, y_ext: np.ndarray, ext_mask: np.ndarray, y_trig: np.ndarray, trig_w: np.ndarray) -> np.ndarray:
+		n = len(y_ext)
+		m = self.P.shape[0]
+		n_ext = max(1.0, ext_mask.sum())
+		unclipped = (fw["raw_ext"] > self.model.min_green) & (fw["raw_ext"] < self.model.max_green)
+		d_yext = 2.0 * ext_mask * (fw["y_ext"] - y_ext) * unclipped / n_ext          # (N,)
+		d_fext = d_yext[:, None] * self.w_ext[None, :] * ((fw["f_ext"] * self.w_ext) > 0)
+		d_p = self.trigger_weight * 2.0 * trig_w * (fw["p"] - y_trig) / max(1.0, trig_w.sum())
+		d_ftrig = np.zeros_like(fw["f_trig"])
+		if d_ftrig.shape[1]:
+			wt = np.clip(self.w_trig, 0.0, 1.0)
+			d_ftrig[np.arange(n), fw["win"]] = d_p * wt[fw["win"]] * (fw["p"] < 1.0)
+		# Kural ateşlemesinden, minimumu veren MF sütununa dağıt
+		d_mu = np.zeros((n, m + 2))
+		rows = np.repeat(np.arange(n), d_fext.shape[1])
+		np.add.at(d_mu, (rows, fw["c_ext"].ravel()), d_fext.ravel())
+		rows = np.repeat(np.arange(n), d_ftrig.shape[1])
+		np.add.at(d_mu, (rows, fw["c_trig"].ravel()), d_ftrig.ravel())
+		d_mu = d_mu[:, :m]
+		x, left, right, wl, wr = fw["cache"]
+		a, b, c = self.P[:, 0], self.P[:, 1], self.P[:, 2]
+		grad = np.zeros_like(self.P)
+		# sol kenar: mu = (x-a)/(b-a)
+		grad[:, 0] += (d_mu * np.where(left, (x - b) / wl ** 2, 0.0)).sum(axis=0)
+		grad[:, 1] += (d_mu * np.where(left, -(x - a) / wl ** 2, 0.0)).sum(axis=0)
+		# sağ kenar: mu = (c-x)/(c-b)
+		grad[:, 1] += (d_mu * np.where(right, (c - x) / wr ** 2, 0.0)).sum(axis=0)
+		grad[:, 2] += (d_mu * np.where(right, (x - b) / wr ** 2, 0.0)).sum(axis=0)
+		return grad
+
+	def premise_step(self, grad: np.ndarray) -> None:
+		self._t += 1
+		beta1, beta2 = 0.9, 0.999
+		g = grad * self._scale
+		self._m = beta1 * self._m + (1 - beta1) * g
+		self._v = beta2 * self._v + (1 - beta2) * g * g
+		m_hat = self._m / (1 - beta1 ** self._t)
+		v_hat = self._v / (1 - beta2 ** self._t)
+		self.P -= self.lr * self._scale * m_hat / (np.sqrt(v_hat) + 1e-8)
+		# Üçgen geçerliliği: a <= b <= c
+		self.P.sort(axis=1)
+
+	# ---- ileri geçiş (sonuç parametreleri, en küçük kareler) ----
+	def accumulate_consequents(self, fw, y_ext: np.ndarray, ext_mask: np.ndarray, y_trig: np.ndarray, trig_w: np.ndarray) -> None:
+		# Ağırlıklı en küçük kareler: satırlar sqrt(ağırlık) ile ölçeklenir
+		sw = np.sqrt(ext_mask)
+		F = fw["f_ext"] * sw[:, None]
+		self._A += F.T @ F
+		self._b += F.T @ ((y_ext - self.model.min_green) * sw)
+		if fw["f_trig"].shape[1]:
+			n = len(y_trig)
+			fwin = fw["f_trig"][np.arange(n), fw["win"]]
+			np.add.at(self._trig_fy, fw["win"], trig_w * fwin * y_trig)
+			np.add.at(self._trig_ff, fw["win"], trig_w * fwin * fwin)
+
+	def solve_consequents(self) -> None:
+		r = len(self.w_ext)
+		if r and np.trace(self._A) > 0:
+			A = self._A + self.ridge * np.eye(r) * max(1.0, np.trace(self._A) / r)
+			w = np.linalg.solve(A, self._b)
+			self.w_ext = np.maximum(0.0, w)
+		ok = self._trig_ff > 1e-9
+		self.w_trig[ok] = np.clip(self._trig_fy[ok] / self._trig_ff[ok], 0.0, 1.0)
+		self._reset_accumulators()
+
+	# ---- model aktarımı ----
+	def state(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+		return self.P.copy(), self.w_ext.copy(), self.w_trig.copy()
+
+	def load_state(self, st: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> None:
+		self.P, self.w_ext, self.w_trig = st[0].copy(), st[1].copy(), st[2].copy()
+
+	def export(self) -> Dict[str, Any]:
+		"""Eğitilmiş parametreleri modele yaz ve `models/anfis.json` şemasında döndür."""
+		model = self.model
+		for (var, label), i in model._mf_index.items():
+			a, b, c = (float(v) for v in self.P[i])
+			model.fuzzy_sets[var][label] = TriMF(a, b, c)
+		model.rules_extend = [(cond, float(w)) for (cond, _old), w in zip(model.rules_extend, self.w_ext)]
+		model.rules_trigger = [(cond, float(w)) for (cond, _old), w in zip(model.rules_trigger, self.w_trig)]
+		model.compile()
+		return model.to_dict()
+
+
+def evaluate(trainer: HybridAnfisTrainer, batches: Iterator) -> Tuple[float, float, int]:
+	tot_e = tot_t = 0.0
+	n_e = n_t = 0
+	for X, y_ext, mask, y_trig, w in batches:
+		fw = trainer.forward(X)
+		l_e, l_t = trainer.loss(fw, y_ext, mask, y_trig, w)
+		tot_e += l_e * max(1.0, mask.sum())
+		n_e += max(1.0, mask.sum())
+		tot_t += l_t * max(1.0, w.sum())
+		n_t += max(1.0, w.sum())
+	return (tot_e / max(1, n_e)), (tot_t / max(1, n_t)), int(n_t)
+
+
+def train(args) -> Dict[str, Any]:
+	paths = args.data or default_data_paths()
+	model = initial_model(args.model_in)
+	trainer = HybridAnfisTrainer(model, lr=args.lr, ridge=args.ridge, trigger_weight=args.trigger_weight)
+	rng = np.random.default_rng(args.seed)
+	ext_span = max(1e-6, model.max_green - model.min_green)
+
+	def val_loss() -> Tuple[float, float, int]:
+		return evaluate(trainer, iter_batches(model, paths, args.batch_size * 8, args.chunk_size, args.val_every, True, None))
+
+	best = trainer.state()
+	le, lt, _ = val_loss()
+	best_score = le / ext_span ** 2 + args.trigger_weight * lt
+	print(f"başlangıç: val_mse_extend={le:.4f} val_brier_trigger={lt:.4f}")
+	bad_epochs = 0
+	for epoch in range(1, args.epochs + 1):
+		t0 = time.perf_counter()
+		rows = 0
+		for X, y_ext, mask, y_trig, w in iter_batches(model, paths, args.batch_size, args.chunk_size, args.val_every, False, rng):
+			fw = trainer.forward(X)
+			trainer.accumulate_consequents(fw, y_ext, mask, y_trig, w)
+			trainer.premise_step(trainer.backward(fw, y_ext, mask, y_trig, w))
+			rows += len(y_ext)
+		trainer.solve_consequents()
+		dt = max(1e-9, time.perf_counter() - t0)
+		le, lt, n_val = val_loss()
+		score = le / ext_span ** 2 + args.trigger_weight * lt
+		print(f"epoch {epoch:3d}: train_rows={rows} ({rows / dt:,.0f} satır/s) val_mse_extend={le:.4f} val_brier_trigger={lt:.4f} (n={n_val})")
+		if score < best_score - 1e-6:
+			best_score = score
+			best = trainer.state()
+			bad_epochs = 0
+		else:
+			bad_epochs += 1
+			if bad_epochs >= args.patience:
+				print(f"erken durdurma: {args.patience} epoch boyunca iyileşme yok")
+				break
+	trainer.load_state(best)
+	return trainer.export()
+
+
 def train_model(frames: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
-	model = json.loads(json.dumps(DEFAULT_MODEL))
-	# Basit ayarlama: extend hedeflerinin medyanına göre dist_to_tls near üçgen merkezini güncelle
+	"""Geriye dönük uyumluluk: bellekteki çerçeveyi geçici CSV'ye yazıp akışlı eğitimi çalıştırır."""
+	import tempfile
 	sig = frames.get("signal")
-	if sig is not None and not sig.empty:
-		try:
-			med_extend = float(sig["y_extend"].median())
-			# medyan 6-20 arasında olmalı; dist_to_tls near merkezini (b) 30→(20..60) arasında ayarla
-			b = max(20.0, min(60.0, 80.0 - (med_extend - 6.0) * 2.0))
-			model["fuzzy_sets"]["dist_to_tls"]["near"][1] = b
-		except Exception:
-			pass
-	# Kural ağırlık basitleştirmesi: kuyruk büyükse daha fazla uzatma
-	if sig is not None and not sig.empty:
-		try:
-			ql = sig.get("queue_length")
-			ext = sig.get("y_extend")
-			if ql is not None and ext is not None:
-				corr = float(pd.Series(ql).corr(pd.Series(ext)))
-				# pozitif korelasyon varsa long kuralını kuvvetlendir
-				model["rules_extend"][1]["w"] = float(max(2.0, min(8.0, 4.0 + corr * 2.0)))
-		except Exception:
-			pass
-	# Eşik parametreleri (isteğe bağlı basit kalibrasyon)
-	model.setdefault("params", {})
-	params = model["params"]
-	params.setdefault("trigger_threshold", 0.5)
-	params.setdefault("near_force_distance_m", 200.0)
-	params.setdefault("release_distance_m", 50.0)
-	return model
+	if sig is None or sig.empty:
+		return json.loads(json.dumps(DEFAULT_MODEL))
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "signal.csv")
+		sig.to_csv(path, index=False)
+		args = build_arg_parser().parse_args(["--data", path, "--model-in", ""])
+		return train(args)
+
+
+# -------------------- Paralel hiperparametre araması --------------------
+# Aday modeller SUMO çalıştırmadan, kayıtlı özellikler toplu çıkarımla yeniden
+# oynatılarak puanlanır (karşı-olgusal/offline). Amaçlar (hepsi küçültülür):
+#   miss: kayıtta öncelik verilmiş satırlarda adayın tetiklememe oranı
+#   false: kayıtta öncelik verilmemiş satırlarda adayın tetikleme oranı
+#   ext_mae: öncelik satırlarında uzatma süresi mutlak hatası (s)
+# Controller ile aynı karar kuralı: p > trigger_threshold veya mesafe <= near_force_distance_m
+OBJECTIVES = ("miss", "false", "ext_mae")
+
+_SEARCH_DATA: Dict[str, np.ndarray] = {}
+
+
+def load_search_data(paths: List[str], folds: int) -> Dict[str, np.ndarray]:
+	"""Arama için tüm (tekilleştirilmiş) veriyi diziler halinde yükle; katlar bölüm bazında."""
+	if len(paths) == 1 and paths[0].endswith(".npz") and _is_dataset(paths[0]):
+		frame = dataset_frame(paths[0])
+	else:
+		dedup = EpisodeDeduplicator()
+		parts = [dedup.process(chunk) for chunk in iter_unified_chunks(paths)] + [dedup.finish()]
+		parts = [p for p in parts if len(p)]
+		if not parts:
+			return {}
+		frame = pd.concat(parts, ignore_index=True)
+	base = AnfisModel(None)
+	raw = base.features_to_matrix(frame)
+	y_ext, y_trig, w = _labels(frame)
+	dist = raw[:, list(base.feature_names).index("dist_to_tls")]
+	return {
+		"X": np.nan_to_num(raw, nan=0.0, posinf=1e6, neginf=-1e6),
+		# Mesafesi kaydedilmemiş (v1) satırlar zorlamalı tetiklemeye girmesin
+		"dist": np.where(np.isnan(dist), np.inf, dist),
+		"y_ext": y_ext,
+		"y_trig": y_trig,
+		"w": w,
+		"fold": (np.asarray(frame["episode"], dtype=np.int64) % max(1, folds)),
+	}
+
+
+def _init_search_worker(data: Dict[str, np.ndarray]) -> None:
+	global _SEARCH_DATA
+	_SEARCH_DATA = data
+
+
+def _refit_consequents(model: AnfisModel, data: Dict[str, np.ndarray], rows: np.ndarray, ridge: float) -> None:
+	trainer = HybridAnfisTrainer(model, ridge=ridge)
+	fw = trainer.forward(data["X"][rows])
+	w = data["w"][rows]
+	y_trig = data["y_trig"][rows]
+	trainer.accumulate_consequents(fw, data["y_ext"][rows], y_trig * w, y_trig, w)
+	trainer.solve_consequents()
+	trainer.export()
+
+
+def _fold_metrics(model: AnfisModel, data: Dict[str, np.ndarray], rows: np.ndarray) -> Tuple[float, float, float]:
+	X = data["X"][rows]
+	p = model.predict_trigger_prob_batch(X, exact=True)
+	ext = model.predict_extend_seconds_batch(X, exact=True)
+	thr = float(model.params.get("trigger_threshold", 0.5))
+	near = float(model.params.get("near_force_distance_m", 200.0))
+	dec = ((p > thr) | (data["dist"][rows] <= near)).astype(np.float64)
+	y = data["y_trig"][rows]
+	w = data["w"][rows]
+	pos = w * y
+	neg = w * (1.0 - y)
+	miss = float((pos * (1.0 - dec)).sum() / max(1e-9, pos.sum()))
+	false = float((neg * dec).sum() / max(1e-9, neg.sum()))
+	ext_mae = float((pos * np.abs(ext - data["y_ext"][rows])).sum() / max(1e-9, pos.sum()))
+	return miss, false, ext_mae
+
+
+def score_candidate(job: Tuple[int, Dict[str, Any], bool, float]) -> Dict[str, Any]:
+	"""Adayı katlar üzerinde puanla (işçi süreçte çalışır)."""
+	cid, cand, refit, ridge = job
+	data = _SEARCH_DATA
+	folds = np.unique(data["fold"])
+	per_fold = []
+	for k in folds:
+		test = np.flatnonzero(data["fold"] == k)
+		model = AnfisModel.from_dict(cand)
+		if refit and len(folds) > 1:
+			_refit_consequents(model, data, np.flatnonzero(data["fold"] != k), ridge)
+		per_fold.append(_fold_metrics(model, data, test))
+	arr = np.array(per_fold)
+	return {
+		"id": cid,
+		"model": cand,
+		"metrics": {name: float(arr[:, i].mean()) for i, name in enumerate(OBJECTIVES)},
+		"metrics_std": {name: float(arr[:, i].std()) for i, name in enumerate(OBJECTIVES)},
+	}
+
+
+def sample_candidate(base: Dict[str, Any], rng: np.random.Generator, mf_jitter: float, weight_jitter: float, thr_range: Tuple[float, float], near_range: Tuple[float, float]) -> Dict[str, Any]:
+	"""Temel modelden rastgele aday üret (MF yerleşimi, kural ağırlıkları, eşikler)."""
+	cand = json.loads(json.dumps(base))
+	for var, mfs in cand["fuzzy_sets"].items():
+		pts = np.array(list(mfs.values()), dtype=np.float64)
+		span = max(1e-6, float(pts.max() - pts.min()))
+		for name, abc in mfs.items():
+			new = np.sort(np.asarray(abc, dtype=np.float64) + rng.normal(0.0, mf_jitter * span, 3))
+			mfs[name] = [float(v) for v in np.maximum(new, min(0.0, float(pts.min())))]
+	for r in cand["rules_trigger"]:
+		r["w"] = float(np.clip(r["w"] * rng.lognormal(0.0, weight_jitter), 0.0, 1.0))
+	for r in cand["rules_extend"]:
+		r["w"] = float(max(0.0, r["w"] * rng.lognormal(0.0, weight_jitter)))
+	params = cand.setdefault("params", {})
+	params["trigger_threshold"] = float(rng.uniform(*thr_range))
+	params["near_force_distance_m"] = float(rng.uniform(*near_range))
+	return cand
+
+
+def pareto_front(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Baskılanmayan (non-dominated) adaylar; ext_mae'ye göre sıralı."""
+	if not results:
+		return []
+	F = np.array([[r["metrics"][o] for o in OBJECTIVES] for r in results])
+	keep = np.ones(len(results), dtype=bool)
+	for i in range(len(results)):
+		if not keep[i]:
+			continue
+		dominated = np.all(F <= F[i], axis=1) & np.any(F < F[i], axis=1)
+		if dominated.any():
+			keep[i] = False
+	front = [r for r, k in zip(results, keep) if k]
+	return sorted(front, key=lambda r: (r["metrics"]["ext_mae"], r["metrics"]["miss"]))
+
+
+def search(args) -> int:
+	from concurrent.futures import ProcessPoolExecutor
+	paths = args.data or default_data_paths()
+	data = load_search_data(paths, args.folds)
+	if not data or not len(data["X"]):
+		print("Arama için veri bulunamadı")
+		return 1
+	base = initial_model(args.model_in).to_dict()
+	rng = np.random.default_rng(args.seed)
+	thr_range = tuple(args.threshold_range)
+	near_range = tuple(args.near_force_range)
+	jobs = [(0, base, args.search_refit, args.ridge)]
+	jobs += [(i, sample_candidate(base, rng, args.mf_jitter, args.weight_jitter, thr_range, near_range), args.search_refit, args.ridge) for i in range(1, args.search)]
+	workers = args.workers or os.cpu_count() or 1
+	print(f"arama: {len(jobs)} aday, {workers} işçi, {args.folds} kat, {len(data['X'])} satır")
+	t0 = time.perf_counter()
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker, initargs=(data,)) as pool:
+		results = list(pool.map(score_candidate, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+	dt = max(1e-9, time.perf_counter() - t0)
+	front = pareto_front(results)
+	print(f"{len(results)} aday {dt:.1f} s ({len(results) / dt * 60:,.0f} aday/dk); Pareto cephesi: {len(front)}")
+	os.makedirs(args.pareto_dir, exist_ok=True)
+	summary = []
+	for r in front:
+		model = AnfisModel.from_dict(r["model"])
+		if args.search_refit:
+			_refit_consequents(model, data, np.arange(len(data["X"])), args.ridge)
+		path = os.path.join(args.pareto_dir, f"anfis_{r['id']:04d}.json")
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(model.to_dict(), f, ensure_ascii=False, indent=2)
+		m = r["metrics"]
+		summary.append({"id": r["id"], "path": path, "metrics": m, "metrics_std": r["metrics_std"],
+						"trigger_threshold": model.params.get("trigger_threshold"), "near_force_distance_m": model.params.get("near_force_distance_m")})
+		print(f"  #{r['id']:04d} miss={m['miss']:.3f} false={m['false']:.3f} ext_mae={m['ext_mae']:.2f}s -> {path}")
+	with open(os.path.join(args.pareto_dir, "pareto.json"), "w", encoding="utf-8") as f:
+		json.dump({"objectives": list(OBJECTIVES), "candidates": len(results), "folds": args.folds, "front": summary}, f, ensure_ascii=False, indent=2)
+	return 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+	p = argparse.ArgumentParser(description="ANFIS hibrit eğitim (LSE + gradyan inişi)")
+	p.add_argument("--data", nargs="*", default=None, help="Eğitim verisi: prep-training çıktısı (.npz) veya log dosyaları (vars: data/training_dedup.npz, yoksa signal_training_v2.csv + signal_training.csv, akışlı tekilleştirilerek)")
+	p.add_argument("--model-in", default="models/anfis.json", help="Başlangıç modeli (yoksa varsayılan kural tabanı)")
+	p.add_argument("--output", default="models/anfis.json", help="Çıktı model dosyası")
+	p.add_argument("--epochs", type=int, default=30)
+	p.add_argument("--batch-size", type=int, default=512)
+	p.add_argument("--chunk-size", type=int, default=50000, help="CSV okuma parça boyutu (satır)")
+	p.add_argument("--lr", type=float, default=0.01, help="Üyelik parametreleri için öğrenme oranı (değişken aralığına göre ölçekli)")
+	p.add_argument("--ridge", type=float, default=1e-3, help="Sonuç parametreleri için sırt düzenlemesi")
+	p.add_argument("--trigger-weight", type=float, default=1.0, help="Tetikleme kaybının toplam kayıptaki ağırlığı")
+	p.add_argument("--patience", type=int, default=5, help="Erken durdurma sabrı (epoch)")
+	p.add_argument("--val-every", type=int, default=10, help="Her N bölümden biri (episode %% N == 0) doğrulama için ayrılır; bir bölümün satırları iki kümeye bölünmez (en az 2)")
+	p.add_argument("--seed", type=int, default=42)
+	# Arama modu
+	p.add_argument("--search", type=int, default=0, help="N>0 ise eğitim yerine N aday modelle paralel offline arama yapılır")
+	p.add_argument("--workers", type=int, default=0, help="Arama işçi süreç sayısı (0: CPU sayısı)")
+	p.add_argument("--folds", type=int, default=5, help="Bölüm bazlı çapraz doğrulama kat sayısı")
+	p.add_argument("--search-refit", action="store_true", help="Her katta kural sonuçlarını eğitim katlarında en küçük karelerle yeniden uydur")
+	p.add_argument("--mf-jitter", type=float, default=0.05, help="MF köşe sarsıntısı (değişken aralığına oran, std)")
+	p.add_argument("--weight-jitter", type=float, default=0.3, help="Kural ağırlığı log-normal sarsıntısı (std)")
+	p.add_argument("--threshold-range", type=float, nargs=2, default=[0.3, 0.8], help="trigger_threshold arama aralığı")
+	p.add_argument("--near-force-range", type=float, nargs=2, default=[50.0, 300.0], help="near_force_distance_m arama aralığı (m)")
+	p.add_argument("--pareto-dir", default="models/pareto", help="Pareto-en iyi modellerin yazılacağı dizin")
+	return p
 
 
 def main() -> int:
-	frames = load_training()
-	if not frames:
+	args = build_arg_parser().parse_args()
+	paths = args.data or default_data_paths()
+	if not paths:
 		print("No training data found under data/. Run the simulation to accumulate logs.")
 		return 1
-	model = train_model(frames)
-	os.makedirs("models", exist_ok=True)
-	with open("models/anfis.json", "w", encoding="utf-8") as f:
+	args.data = paths
+	if args.search > 0:
+		return search(args)
+	model = train(args)
+	out_dir = os.path.dirname(args.output)
+	if out_dir:
+		os.makedirs(out_dir, exist_ok=True)
+	with open(args.output, "w", encoding="utf-8") as f:
 		json.dump(model, f, ensure_ascii=False, indent=2)
-	print("Saved models/anfis.json")
+	check = AnfisModel(args.output)
+	if not check.loaded:
+		print(f"Uyarı: {args.output} AnfisModel tarafından okunamadı")
+		return 1
+	print(f"Saved {args.output}")
 	return 0
 
 
 if __name__ == "__main__":
 	raise SystemExit(main())
-
-
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Simülasyon gözlemlerinin sütunlu kaydı (SUMO'suz tekrar oynatma için).
+
+Her adımdan sonra `capture()` gözlenen durumu sütun listelerine ekler; `save()`
+tek bir `.npz` dosyası yazar (metinler ortak bir tabloda, sütunlar indeks):
+- frame_t: adım zamanları
+- dep_*/arr_*: giren (tipiyle) / çıkan araçlar
+- veh_*: ambulans satırları (konum, hız, açı, kenar, şerit, şerit konumu, sonraki TLS)
+- tls_*: ilgili TLS'ler (ambulansların sonraki TLS'leri) için durum, faz, sonraki geçiş
+- lane_*: bu TLS'lerin giriş şeritleri için araç/duran sayısı ve ortalama hız
+- edge_*: adımda `get_edges_stats_subset` ile okunan kenar metrikleri
+- meta: adım uzunluğu, TLS listesi, bağlantılar, kavşak konumları, programlar (JSON)
+
+Kayıt yalnızca değişen/okunan değerleri tutar; tekrar oynatma son bilinen değeri
+taşır (bkz. `src.adapters.replay`).
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# ad -> dtype (kayıttaki sütunlar)
+COLUMNS: Dict[str, str] = {
+	"frame_t": "float64",
+	"dep_frame": "int32", "dep_veh": "int32", "dep_type": "int32",
+	"arr_frame": "int32", "arr_veh": "int32",
+	"veh_frame": "int32", "veh_id": "int32", "veh_x": "float64", "veh_y": "float64",
+	"veh_speed": "float32", "veh_angle": "float32", "veh_edge": "int32", "veh_lane": "int32",
+	"veh_lanepos": "float32", "veh_tls": "int32", "veh_tls_link": "int32", "veh_tls_dist": "float32", "veh_tls_state": "int32",
+	"tls_frame": "int32", "tls_id": "int32", "tls_state": "int32", "tls_phase": "int16",
+	"tls_next_switch": "float64", "tls_program": "int32",
+	"lane_frame": "int32", "lane_id": "int32", "lane_veh": "int16", "lane_halt": "int16", "lane_speed": "float32",
+	"edge_frame": "int32", "edge_id": "int32", "edge_veh": "float32", "edge_speed": "float32",
+}
+
+
+class ObservationRecorder:
+	def __init__(self, path: str, keywords: Tuple[str, ...] = ("emergency", "ambulance")):
+		self.path = path
+		self.keywords = tuple(k.lower() for k in keywords)
+		self.cols: Dict[str, list] = {name: [] for name in COLUMNS}
+		self.strings: Dict[str, int] = {"": 0}
+		self.meta: Dict[str, Any] = {}
+		self.frames = 0
+		self._live: Set[str] = set()
+		self._tracked: Set[str] = set()
+		self._bootstrapped = False
+		self._links: Dict[str, list] = {}
+		self._tls_last: Dict[str, Tuple] = {}
+
+	def _s(self, value) -> int:
+		key = str(value or "")
+		idx = self.strings.get(key)
+		if idx is None:
+			idx = self.strings[key] = len(self.strings)
+		return idx
+
+	def _is_tracked_type(self, vtype: str) -> bool:
+		vtype = vtype.lower()
+		return any(k in vtype for k in self.keywords)
+
+	def _start(self, traci) -> None:
+		tls_ids = [str(t) for t in traci.trafficlight.getIDList()]
+		junction_pos = {}
+		programs = {}
+		for tl in tls_ids:
+			try:
+				self._links[tl] = [[list(link) for link in group] for group in traci.trafficlight.getControlledLinks(tl)]
+			except Exception:
+				self._links[tl] = []
+			try:
+				junction_pos[tl] = list(traci.junction.getPosition(tl))
+			except Exception:
+				pass
+			try:
+				programs[tl] = str(traci.trafficlight.getProgram(tl))
+			except Exception:
+				pass
+		self.meta = {
+			"version": FORMAT_VERSION,
+			"step_length_ms": float(traci.simulation.getDeltaT()),
+			"tls_ids": tls_ids,
+			"links": self._links,
+			"junction_pos": junction_pos,
+			"programs": programs,
+			"keywords": list(self.keywords),
+		}
+
+	# -------------------- Adım kaydı --------------------
+	def capture(self, full_sync: bool = False) -> None:
+		"""Son adımın gözlemlerini ekle. `full_sync`: giren/çıkan yerine tam araç listesi (adım atlaması)."""
+		import traci
+		if not self._bootstrapped:
+			self._start(traci)
+		f = self.frames
+		cols = self.cols
+		cols["frame_t"].append(float(traci.simulation.getTime()))
+		if full_sync or not self._bootstrapped:
+			live = set(traci.vehicle.getIDList())
+			departed = [v for v in live if v not in self._live]
+			arrived = [v for v in self._live if v not in live]
+		else:
+			departed = list(traci.simulation.getDepartedIDList())
+			arrived = list(traci.simulation.getArrivedIDList())
+		self._bootstrapped = True
+		for vid in departed:
+			if vid in self._live:
+				continue
+			try:
+				vtype = str(traci.vehicle.getTypeID(vid))
+			except Exception:
+				vtype = ""
+			self._live.add(vid)
+			if self._is_tracked_type(vtype):
+				self._tracked.add(vid)
+			cols["dep_frame"].append(f)
+			cols["dep_veh"].append(self._s(vid))
+			cols["dep_type"].append(self._s(vtype))
+		for vid in arrived:
+			if vid not in self._live:
+				continue
+			self._live.discard(vid)
+			self._tracked.discard(vid)
+			cols["arr_frame"].append(f)
+			cols["arr_veh"].append(self._s(vid))
+		relevant_tls = []
+		for vid in self._tracked:
+			try:
+				x, y = traci.vehicle.getPosition(vid)
+				speed = float(traci.vehicle.getSpeed(vid))
+				angle = float(traci.vehicle.getAngle(vid))
+				edge = traci.vehicle.getRoadID(vid)
+				lane = traci.vehicle.getLaneID(vid)
+				lanepos = float(traci.vehicle.getLanePosition(vid))
+				nt = traci.vehicle.getNextTLS(vid)
+			except Exception:
+				continue
+			cols["veh_frame"].append(f)
+			cols["veh_id"].append(self._s(vid))
+			cols["veh_x"].append(float(x))
+			cols["veh_y"].append(float(y))
+			cols["veh_speed"].append(speed)
+			cols["veh_angle"].append(angle)
+			cols["veh_edge"].append(self._s(edge))
+			cols["veh_lane"].append(self._s(lane))
+			cols["veh_lanepos"].append(lanepos)
+			if nt:
+				tl, link, dist, state = nt[0]
+				relevant_tls.append(str(tl))
+				cols["veh_tls"].append(self._s(tl))
+				cols["veh_tls_link"].append(int(link))
+				cols["veh_tls_dist"].append(float(dist))
+				cols["veh_tls_state"].append(self._s(state))
+			else:
+				cols["veh_tls"].append(0)
+				cols["veh_tls_link"].append(-1)
+				cols["veh_tls_dist"].append(-1.0)
+				cols["veh_tls_state"].append(0)
+		for tl in dict.fromkeys(relevant_tls):
+			self._capture_tls(traci, f, tl)
+		self.frames += 1
+
+	def _capture_tls(self, traci, f: int, tl: str) -> None:
+		cols = self.cols
+		try:
+			row = (
+				str(traci.trafficlight.getRedYellowGreenState(tl)),
+				int(traci.trafficlight.getPhase(tl)),
+				float(traci.trafficlight.getNextSwitch(tl)),
+				str(traci.trafficlight.getProgram(tl)),
+			)
+		except Exception:
+			return
+		if self._tls_last.get(tl) != row:
+			self._tls_last[tl] = row
+			cols["tls_frame"].append(f)
+			cols["tls_id"].append(self._s(tl))
+			cols["tls_state"].append(self._s(row[0]))
+			cols["tls_phase"].append(row[1])
+			cols["tls_next_switch"].append(row[2])
+			cols["tls_program"].append(self._s(row[3]))
+		lanes = dict.fromkeys(in_lane for group in self._links.get(tl, []) for in_lane, _out, _via in group)
+		for lane in lanes:
+			try:
+				n = int(traci.lane.getLastStepVehicleNumber(lane))
+				halt = int(traci.lane.getLastStepHaltingNumber(lane))
+				speed = float(traci.lane.getLastStepMeanSpeed(lane))
+			except Exception:
+				continue
+			cols["lane_frame"].append(f)
+			cols["lane_id"].append(self._s(lane))
+			cols["lane_veh"].append(n)
+			cols["lane_halt"].append(halt)
+			cols["lane_speed"].append(speed)
+
+	def note_edges(self, stats: Dict[str, Dict[str, float]]) -> None:
+		"""Adımda okunan kenar metrikleri (bir sonraki `capture` çerçevesine değil, sonuncusuna yazılır)."""
+		f = max(0, self.frames - 1)
+		cols = self.cols
+		for edge_id, st in stats.items():
+			cols["edge_frame"].append(f)
+			cols["edge_id"].append(self._s(edge_id))
+			cols["edge_veh"].append(float(st.get("veh", 0.0)))
+			cols["edge_speed"].append(float(st.get("v", 0.0)))
+
+	# -------------------- Yazma --------------------
+	def save(self) -> Optional[str]:
+		if not self.frames:
+			return None
+		d = os.path.dirname(self.path)
+		if d:
+			os.makedirs(d, exist_ok=True)
+		arrays = {name: np.asarray(self.cols[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+		strings = [""] * len(self.strings)
+		for s, i in self.strings.items():
+			strings[i] = s
+		arrays["strings"] = np.asarray(strings, dtype=str)
+		arrays["meta"] = np.asarray(json.dumps(self.meta, ensure_ascii=False))
+		tmp = self.path + ".tmp.npz"
+		np.savez_compressed(tmp, **arrays)
+		os.replace(tmp, self.path)
+		logger.info(f"[Record] {self.frames} adım, {len(self.cols['veh_frame'])} araç satırı, {len(self.strings)} metin -> {self.path}")
+		return self.path
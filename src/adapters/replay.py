@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Kaydedilmiş gözlemlerle SUMO'suz tekrar oynatma.
+
+`ReplayTraci`, `ObservationRecorder` kaydını traci modülü biçiminde sunar
+(`vehicle`, `trafficlight`, `lane`, `edge`, `junction`, `simulation`, `route`,
+`person` alanları ve `simulationStep`). `install_replay` onu `sys.modules["traci"]`
+olarak yerleştirir; böylece `SumoAdapter`, `TrafficLightController` ve router
+akışı kod değişmeden kayıt üzerinde en yüksek hızda koşar.
+
+Oynatma açık çevrimlidir: gözlemler kayıttan gelir, yazma komutları (ışık durumu,
+rota, araç ekleme) uygulanmaz, yalnızca `commands` içinde sayılır. Kayıtta olmayan
+değerler için son bilinen değer taşınır; hiç görülmemişse traci gibi hata fırlatılır
+(`misses` sayacı). Böylece aynı kayıt üzerinde kontrolcü/rota değişiklikleri
+deterministik olarak karşılaştırılabilir.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import sys
+import types
+
+import numpy as np
+
+from src.adapters.recording import FORMAT_VERSION
+
+# Kayıtta bulunmayan traci.constants yerine (yalnızca abonelikte kullanılanlar)
+_CONSTANTS = {
+	"VAR_SPEED": 0x40,
+	"VAR_POSITION": 0x42,
+	"VAR_ANGLE": 0x43,
+	"VAR_ROAD_ID": 0x50,
+	"VAR_LANE_ID": 0x51,
+	"VAR_LANEPOSITION": 0x56,
+	"VAR_TYPE": 0x4f,
+	"VAR_NEXT_TLS": 0x70,
+}
+
+
+class ReplayError(Exception):
+	"""Kayıtta karşılığı olmayan sorgu (traci.TraCIException karşılığı)."""
+
+
+class ReplayEnded(Exception):
+	"""Kayıt sonu (bağlantı kapanması karşılığı)."""
+
+
+class Recording:
+	"""Kayıt dosyası; sütunlar çerçeve sırasına göre dilimlenmiş Python listeleri olarak."""
+
+	def __init__(self, path: str):
+		with np.load(path, allow_pickle=False) as data:
+			self.meta: Dict[str, Any] = json.loads(str(data["meta"]))
+			if int(self.meta.get("version", 0)) != FORMAT_VERSION:
+				raise ValueError(f"Desteklenmeyen kayıt sürümü: {self.meta.get('version')}")
+			self.strings: List[str] = data["strings"].tolist()
+			self.frame_t: List[float] = data["frame_t"].tolist()
+			self.tables: Dict[str, Dict[str, list]] = {}
+			self.bounds: Dict[str, List[int]] = {}
+			n = len(self.frame_t)
+			for prefix in ("dep", "arr", "veh", "tls", "lane", "edge"):
+				cols = {name[len(prefix) + 1:]: data[name] for name in data.files if name.startswith(prefix + "_")}
+				frames = cols.pop("frame")
+				# Satırlar çerçeve sırasıyla yazıldı; çerçeve başına [başlangıç, bitiş) sınırları
+				self.bounds[prefix] = np.searchsorted(frames, np.arange(n + 1), side="left").tolist()
+				self.tables[prefix] = {name: arr.tolist() for name, arr in cols.items()}
+		self.path = path
+
+	@property
+	def num_frames(self) -> int:
+		return len(self.frame_t)
+
+	def rows(self, prefix: str, frame: int):
+		lo, hi = self.bounds[prefix][frame], self.bounds[prefix][frame + 1]
+		table = self.tables[prefix]
+		names = list(table)
+		cols = [table[n] for n in names]
+		for i in range(lo, hi):
+			yield {n: c[i] for n, c in zip(names, cols)}
+
+
+class _Domain:
+	def __init__(self, replay: "ReplayTraci", name: str):
+		self._replay = replay
+		self._name = name
+
+	def _write(self, command: str) -> None:
+		key = f"{self._name}.{command}"
+		self._replay.commands[key] = self._replay.commands.get(key, 0) + 1
+
+	def _miss(self, command: str, obj_id: str):
+		key = f"{self._name}.{command}"
+		self._replay.misses[key] = self._replay.misses.get(key, 0) + 1
+		raise ReplayError(f"{key}({obj_id}) kayıtta yok")
+
+
+class _Simulation(_Domain):
+	def getTime(self) -> float:
+		return self._replay.time
+
+	def getDeltaT(self) -> float:
+		return float(self._replay.recording.meta.get("step_length_ms", 100.0))
+
+	def getDepartedIDList(self) -> List[str]:
+		return list(self._replay.departed)
+
+	def getArrivedIDList(self) -> List[str]:
+		return list(self._replay.arrived)
+
+	def getMinExpectedNumber(self) -> int:
+		r = self._replay
+		return len(r.live) + (1 if r.frame + 1 < r.recording.num_frames else 0)
+
+
+class _Vehicle(_Domain):
+	def _row(self, veh_id: str, command: str) -> Dict[str, Any]:
+		row = self._replay.vehicles.get(veh_id)
+		if row is None:
+			self._miss(command, veh_id)
+		return row
+
+	def getIDList(self) -> List[str]:
+		return list(self._replay.live)
+
+	def getTypeID(self, veh_id: str) -> str:
+		vtype = self._replay.types.get(veh_id)
+		if vtype is None:
+			self._miss("getTypeID", veh_id)
+		return vtype
+
+	def getPosition(self, veh_id: str) -> Tuple[float, float]:
+		row = self._row(veh_id, "getPosition")
+		return (row["x"], row["y"])
+
+	def getSpeed(self, veh_id: str) -> float:
+		return self._row(veh_id, "getSpeed")["speed"]
+
+	def getAngle(self, veh_id: str) -> float:
+		return self._row(veh_id, "getAngle")["angle"]
+
+	def getRoadID(self, veh_id: str) -> str:
+		return self._row(veh_id, "getRoadID")["edge"]
+
+	def getLaneID(self, veh_id: str) -> str:
+		return self._row(veh_id, "getLaneID")["lane"]
+
+	def getLanePosition(self, veh_id: str) -> float:
+		return self._row(veh_id, "getLanePosition")["lanepos"]
+
+	def getNextTLS(self, veh_id: str) -> List[Tuple[str, int, float, str]]:
+		row = self._row(veh_id, "getNextTLS")
+		if not row["tls"]:
+			return []
+		return [(row["tls"], row["tls_link"], row["tls_dist"], row["tls_state"])]
+
+	def subscribe(self, veh_id: str, varIDs=None, *args, **kwargs) -> None:
+		self._replay.subscriptions[veh_id] = list(varIDs or [])
+
+	def getAllSubscriptionResults(self) -> Dict[str, Dict[int, Any]]:
+		c = self._replay.constants
+		out = {}
+		for veh_id, var_ids in self._replay.subscriptions.items():
+			row = self._replay.vehicles.get(veh_id)
+			if row is None:
+				continue
+			values = {
+				c.VAR_ROAD_ID: row["edge"],
+				c.VAR_LANE_ID: row["lane"],
+				c.VAR_POSITION: (row["x"], row["y"]),
+				c.VAR_SPEED: row["speed"],
+				c.VAR_ANGLE: row["angle"],
+				c.VAR_LANEPOSITION: row["lanepos"],
+				c.VAR_NEXT_TLS: self.getNextTLS(veh_id),
+			}
+			out[veh_id] = {v: values[v] for v in var_ids if v in values}
+		return out
+
+	def add(self, *args, **kwargs) -> None:
+		self._write("add")
+
+	def setRoute(self, *args, **kwargs) -> None:
+		self._write("setRoute")
+
+
+class _TrafficLight(_Domain):
+	def _row(self, tl_id: str, command: str) -> Dict[str, Any]:
+		row = self._replay.signals.get(tl_id)
+		if row is None:
+			self._miss(command, tl_id)
+		return row
+
+	def getIDList(self) -> List[str]:
+		return list(self._replay.recording.meta.get("tls_ids", []))
+
+	def getControlledLinks(self, tl_id: str):
+		links = self._replay.recording.meta.get("links", {}).get(tl_id)
+		if links is None:
+			self._miss("getControlledLinks", tl_id)
+		return [[tuple(link) for link in group] for group in links]
+
+	def getRedYellowGreenState(self, tl_id: str) -> str:
+		return self._row(tl_id, "getRedYellowGreenState")["state"]
+
+	def getPhase(self, tl_id: str) -> int:
+		return self._row(tl_id, "getPhase")["phase"]
+
+	def getNextSwitch(self, tl_id: str) -> float:
+		return self._row(tl_id, "getNextSwitch")["next_switch"]
+
+	def getProgram(self, tl_id: str) -> str:
+		row = self._replay.signals.get(tl_id)
+		if row is not None:
+			return row["program"]
+		prog = self._replay.recording.meta.get("programs", {}).get(tl_id)
+		if prog is None:
+			self._miss("getProgram", tl_id)
+		return prog
+
+	def setRedYellowGreenState(self, *args) -> None:
+		self._write("setRedYellowGreenState")
+
+	def setPhaseDuration(self, *args) -> None:
+		self._write("setPhaseDuration")
+
+	def setPhase(self, *args) -> None:
+		self._write("setPhase")
+
+	def setProgram(self, *args) -> None:
+		self._write("setProgram")
+
+
+class _Lane(_Domain):
+	def _row(self, lane_id: str, command: str) -> Dict[str, Any]:
+		row = self._replay.lanes.get(lane_id)
+		if row is None:
+			self._miss(command, lane_id)
+		return row
+
+	def getLastStepVehicleNumber(self, lane_id: str) -> int:
+		return self._row(lane_id, "getLastStepVehicleNumber")["veh"]
+
+	def getLastStepHaltingNumber(self, lane_id: str) -> int:
+		return self._row(lane_id, "getLastStepHaltingNumber")["halt"]
+
+	def getLastStepMeanSpeed(self, lane_id: str) -> float:
+		return self._row(lane_id, "getLastStepMeanSpeed")["speed"]
+
+	def getEdgeID(self, lane_id: str) -> str:
+		return lane_id.rsplit("_", 1)[0]
+
+
+class _Edge(_Domain):
+	def _row(self, edge_id: str, command: str) -> Dict[str, Any]:
+		row = self._replay.edges.get(edge_id)
+		if row is None:
+			self._miss(command, edge_id)
+		return row
+
+	def getIDList(self) -> List[str]:
+		return list(self._replay.edges)
+
+	def getLastStepVehicleNumber(self, edge_id: str) -> float:
+		return self._row(edge_id, "getLastStepVehicleNumber")["veh"]
+
+	def getLastStepMeanSpeed(self, edge_id: str) -> float:
+		return self._row(edge_id, "getLastStepMeanSpeed")["speed"]
+
+
+class _Junction(_Domain):
+	def getPosition(self, junction_id: str) -> Tuple[float, float]:
+		pos = self._replay.recording.meta.get("junction_pos", {}).get(junction_id)
+		if pos is None:
+			self._miss("getPosition", junction_id)
+		return (float(pos[0]), float(pos[1]))
+
+
+class _Route(_Domain):
+	def add(self, *args, **kwargs) -> None:
+		self._write("add")
+
+
+class _Person(_Domain):
+	def getIDList(self) -> List[str]:
+		return []
+
+
+class ReplayTraci(types.ModuleType):
+	"""Kayıt üzerinde traci modülü arayüzü."""
+
+	def __init__(self, recording: Recording, constants=None):
+		super().__init__("traci")
+		self.recording = recording
+		self.constants = constants
+		self.frame = -1
+		self.time = recording.frame_t[0] if recording.frame_t else 0.0
+		self.live: Dict[str, None] = {}
+		self.types: Dict[str, str] = {}
+		self.departed: List[str] = []
+		self.arrived: List[str] = []
+		self.vehicles: Dict[str, Dict[str, Any]] = {}
+		self.signals: Dict[str, Dict[str, Any]] = {}
+		self.lanes: Dict[str, Dict[str, Any]] = {}
+		self.edges: Dict[str, Dict[str, Any]] = {}
+		self.subscriptions: Dict[str, list] = {}
+		self.commands: Dict[str, int] = {}
+		self.misses: Dict[str, int] = {}
+		self.simulation = _Simulation(self, "simulation")
+		self.vehicle = _Vehicle(self, "vehicle")
+		self.trafficlight = _TrafficLight(self, "trafficlight")
+		self.lane = _Lane(self, "lane")
+		self.edge = _Edge(self, "edge")
+		self.junction = _Junction(self, "junction")
+		self.route = _Route(self, "route")
+		self.person = _Person(self, "person")
+		self.TraCIException = ReplayError
+		self.FatalTraCIError = ReplayEnded
+
+	def start(self, *args, **kwargs) -> None:
+		pass
+
+	def close(self, *args, **kwargs) -> None:
+		pass
+
+	def simulationStep(self, step: float = 0.0) -> None:
+		"""Sonraki çerçeveye (veya `step` > 0 ise o zamana kadar) ilerle."""
+		rec = self.recording
+		self.departed = []
+		self.arrived = []
+		while True:
+			if self.frame + 1 >= rec.num_frames:
+				raise ReplayEnded("kayıt sonu")
+			self.frame += 1
+			self._apply(self.frame)
+			if not step or self.time >= float(step) - 1e-6:
+				return
+
+	def _apply(self, f: int) -> None:
+		rec = self.recording
+		s = rec.strings
+		self.time = rec.frame_t[f]
+		for row in rec.rows("dep", f):
+			vid = s[row["veh"]]
+			self.live[vid] = None
+			self.types[vid] = s[row["type"]]
+			self.departed.append(vid)
+		for row in rec.rows("arr", f):
+			vid = s[row["veh"]]
+			self.live.pop(vid, None)
+			self.vehicles.pop(vid, None)
+			self.subscriptions.pop(vid, None)
+			self.arrived.append(vid)
+		for row in rec.rows("veh", f):
+			self.vehicles[s[row["id"]]] = {
+				"x": row["x"], "y": row["y"], "speed": row["speed"], "angle": row["angle"],
+				"edge": s[row["edge"]], "lane": s[row["lane"]], "lanepos": row["lanepos"],
+				"tls": s[row["tls"]], "tls_link": row["tls_link"], "tls_dist": row["tls_dist"], "tls_state": s[row["tls_state"]],
+			}
+		for row in rec.rows("tls", f):
+			self.signals[s[row["id"]]] = {"state": s[row["state"]], "phase": row["phase"], "next_switch": row["next_switch"], "program": s[row["program"]]}
+		for row in rec.rows("lane", f):
+			self.lanes[s[row["id"]]] = {"veh": row["veh"], "halt": row["halt"], "speed": row["speed"]}
+		for row in rec.rows("edge", f):
+			self.edges[s[row["id"]]] = {"veh": row["veh"], "speed": row["speed"]}
+
+
+def _constants_module():
+	try:
+		import traci.constants as tc  # gerçek traci varsa aynı sabitler
+		return tc
+	except Exception:
+		mod = types.ModuleType("traci.constants")
+		for name, value in _CONSTANTS.items():
+			setattr(mod, name, value)
+		return mod
+
+
+def install_replay(path: str) -> ReplayTraci:
+	"""Kaydı yükle ve `traci` olarak yerleştir (önceki modül `uninstall_replay` ile geri gelir)."""
+	constants = _constants_module()
+	replay = ReplayTraci(Recording(path), constants=constants)
+	replay._previous = (sys.modules.get("traci"), sys.modules.get("traci.constants"))
+	replay.constants_module = constants
+	sys.modules["traci"] = replay
+	sys.modules["traci.constants"] = constants
+	return replay
+
+
+def uninstall_replay(replay: Optional[ReplayTraci]) -> None:
+	if replay is None or sys.modules.get("traci") is not replay:
+		return
+	prev_traci, prev_constants = getattr(replay, "_previous", (None, None))
+	for name, mod in (("traci", prev_traci), ("traci.constants", prev_constants)):
+		if mod is None:
+			sys.modules.pop(name, None)
+		else:
+			sys.modules[name] = mod
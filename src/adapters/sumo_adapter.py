@@ -1,23 +1,49 @@
 #!/usr/bin/env python3
 """
 SUMO Adapter: TraCI erişimi için sarıcı.
+
+`start_recording` ile her adımın gözlemleri kaydedilir; `connect_replay` SUMO yerine
+kaydı oynatır (bkz. `src.adapters.recording`, `src.adapters.replay`).
+`save_state`/`load_state` SUMO durum dosyası yazar/yükler (bkz. `src.online.snapshot`).
 """
 
 from typing import List, Dict, Tuple, Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class SumoAdapter:
 	def __init__(self):
 		self.connected = False
 		self.gui = True
+		self.label: Optional[str] = None
+		self.recorder = None
+		self.replay = None
 
-	def connect(self, config_path: str, gui: bool = True) -> bool:
+	def connect(self, config_path: str, gui: bool = True, port: Optional[int] = None, label: Optional[str] = None, extra_args: Optional[List[str]] = None, gui_delay_ms: float = 100.0) -> bool:
+		"""SUMO'yu başlat ve TraCI ile bağlan.
+
+		port/label: aynı makinede paralel çalışan simülasyonlar için ayrı TraCI
+		portu ve bağlantı etiketi (None: traci varsayılanı / boş port).
+		extra_args: komut satırına eklenecek SUMO seçenekleri (ör. tripinfo çıktısı).
+		gui_delay_ms: GUI oynatım gecikmesi; başsız modda verilmez.
+		"""
 		try:
 			import traci
 			sumo_bin = "sumo-gui" if gui else "sumo"
-			# Otomatik başlamasın: --start vermiyoruz. Delay GUI oynatım gecikmesi içindir.
-			cmd = [sumo_bin, "-c", config_path, "--delay", "100"]
-			traci.start(cmd)
+			# Otomatik başlamasın: --start vermiyoruz. Delay yalnızca GUI oynatımı içindir.
+			cmd = [sumo_bin, "-c", config_path]
+			if gui:
+				cmd += ["--delay", str(int(gui_delay_ms))]
+			cmd.extend(extra_args or [])
+			kwargs = {}
+			if port is not None:
+				kwargs["port"] = int(port)
+			if label is not None:
+				kwargs["label"] = str(label)
+			traci.start(cmd, **kwargs)
+			self.label = label
 			self.connected = True
 			self.gui = gui
 			return True
@@ -25,13 +51,42 @@ class SumoAdapter:
 			self.connected = False
 			return False
 
+	def connect_replay(self, recording_path: str) -> bool:
+		"""SUMO yerine kayıtlı gözlemleri oynat (traci arayüzü kayıttan sunulur)."""
+		try:
+			from src.adapters.replay import install_replay
+			self.replay = install_replay(recording_path)
+			self.connected = True
+			self.gui = False
+			return True
+		except Exception as e:
+			logger.warning(f"[Replay] kayıt yüklenemedi: {e}")
+			self.connected = False
+			return False
+
+	def start_recording(self, path: str, keywords: Tuple[str, ...] = ("emergency", "ambulance")) -> None:
+		from src.adapters.recording import ObservationRecorder
+		self.recorder = ObservationRecorder(path, keywords=keywords)
+
+	def _record(self, full_sync: bool = False) -> None:
+		try:
+			self.recorder.capture(full_sync=full_sync)
+		except Exception as e:
+			logger.debug(f"[Record] adım kaydedilemedi: {e}")
+
 	def close(self) -> None:
 		try:
-			import traci
 			if self.connected:
+				import traci
 				traci.close()
 		finally:
 			self.connected = False
+			if self.recorder is not None:
+				recorder, self.recorder = self.recorder, None
+				recorder.save()
+			if self.replay is not None:
+				from src.adapters.replay import uninstall_replay
+				uninstall_replay(self.replay)
 
 	def get_vehicle_ids(self) -> List[str]:
 		try:
@@ -45,10 +100,49 @@ class SumoAdapter:
 			import traci
 			if self.connected:
 				traci.simulationStep()
+				if self.recorder is not None:
+					self._record()
 		except Exception:
 			# Bağlantı kapandı veya kullanıcı GUI'yi kapattıysa döngü sonlansın
 			self.connected = False
 
+	def step_to(self, target_time: float) -> None:
+		"""Tek TraCI çağrısıyla `target_time` anına kadar (birden çok adım) ilerle."""
+		try:
+			import traci
+			if self.connected:
+				traci.simulationStep(float(target_time))
+				if self.recorder is not None:
+					self._record(full_sync=True)
+		except Exception:
+			self.connected = False
+
+	def save_state(self, path: str) -> bool:
+		"""SUMO simülasyon durumunu (araçlar, rotalar, ışık fazları) dosyaya yaz."""
+		try:
+			import traci
+			if not self.connected:
+				return False
+			traci.simulation.saveState(path)
+			return True
+		except Exception as e:
+			logger.warning(f"[State] kaydedilemedi ({path}): {e}")
+			return False
+
+	def load_state(self, path: str) -> bool:
+		"""Kaydedilmiş SUMO durumunu yükle; simülasyon zamanı kayıt anına atlar."""
+		try:
+			import traci
+			if not self.connected:
+				return False
+			traci.simulation.loadState(path)
+			if self.recorder is not None:
+				self._record(full_sync=True)
+			return True
+		except Exception as e:
+			logger.warning(f"[State] yüklenemedi ({path}): {e}")
+			return False
+
 	def get_time(self) -> float:
 		try:
 			import traci
@@ -67,6 +161,13 @@ class SumoAdapter:
 		except Exception:
 			return ""
 
+	def get_vehicle_route(self, veh_id: str) -> List[str]:
+		try:
+			import traci
+			return list(traci.vehicle.getRoute(veh_id))
+		except Exception:
+			return []
+
 	def get_vehicle_position(self, veh_id: str):
 		try:
 			import traci
@@ -126,6 +227,51 @@ class SumoAdapter:
 		except Exception:
 			return []
 
+	# -------------------- Fleet helpers (abonelik) --------------------
+	def get_departed_ids(self) -> List[str]:
+		"""Son adımda simülasyona giren araçlar."""
+		try:
+			import traci
+			return list(traci.simulation.getDepartedIDList()) if self.connected else []
+		except Exception:
+			return []
+
+	def get_arrived_ids(self) -> List[str]:
+		"""Son adımda simülasyondan çıkan araçlar."""
+		try:
+			import traci
+			return list(traci.simulation.getArrivedIDList()) if self.connected else []
+		except Exception:
+			return []
+
+	def subscribe_vehicle(self, veh_id: str) -> bool:
+		"""Araç için kenar/şerit/konum/hız/sonraki TLS aboneliği (her adım tek çağrıyla okunur)."""
+		try:
+			import traci
+			import traci.constants as tc
+			traci.vehicle.subscribe(veh_id, [tc.VAR_ROAD_ID, tc.VAR_LANE_ID, tc.VAR_POSITION, tc.VAR_SPEED, tc.VAR_NEXT_TLS])
+			return True
+		except Exception:
+			return False
+
+	def get_vehicle_subscriptions(self) -> Dict[str, Dict[str, object]]:
+		"""Abone araçların son adım değerleri: {veh_id: {edge, lane, pos, speed, next_tls}}."""
+		out: Dict[str, Dict[str, object]] = {}
+		try:
+			import traci
+			import traci.constants as tc
+			for veh_id, res in traci.vehicle.getAllSubscriptionResults().items():
+				out[veh_id] = {
+					"edge": str(res.get(tc.VAR_ROAD_ID, "")),
+					"lane": str(res.get(tc.VAR_LANE_ID, "")),
+					"pos": tuple(res.get(tc.VAR_POSITION, (0.0, 0.0))),
+					"speed": float(res.get(tc.VAR_SPEED, 0.0)),
+					"next_tls": list(res.get(tc.VAR_NEXT_TLS, ()) or ()),
+				}
+		except Exception:
+			pass
+		return out
+
 	# -------------------- Lane helpers --------------------
 	def get_lane_vehicle_ids(self, lane_id: str) -> List[str]:
 		try:
@@ -333,6 +479,8 @@ class SumoAdapter:
 					stats[edge_id] = {"veh": veh_n, "v": mean_v}
 				except Exception:
 					continue
+			if self.recorder is not None:
+				self.recorder.note_edges(stats)
 			return stats
 		except Exception:
 			return stats
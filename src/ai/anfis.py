@@ -7,9 +7,22 @@ fonksiyonları ve kural ağırlıklarını yükler. Aksi halde mantıklı varsay
 üçgensel üyelikler ve birkaç kural ile çalışır.
 """
 
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Sequence, Union
 import json
 import math
+import os
+
+import numpy as np
+
+# Toplu çıkarımda özellik sütunlarının varsayılan sırası
+FEATURE_NAMES: Tuple[str, ...] = (
+	"dist_to_tls",
+	"ambulance_speed",
+	"queue_length",
+	"eta_seconds",
+	"phase_index",
+	"phase_remaining",
+)
 
 
 class TriMF:
@@ -44,7 +57,7 @@ class AnfisModel:
 	Çıkış 2 (yeşil uzatma süresi): [min_sec, max_sec]
 	"""
 
-	def __init__(self, model_path: Optional[str] = None):
+	def __init__(self, model_path: Optional[str] = None, use_lut: bool = False, lut_resolution: int = 8, lut_error_bound: float = 0.02):
 		self.model_path = model_path
 		self.loaded = False
 		self.fuzzy_sets: Dict[str, Dict[str, TriMF]] = {}
@@ -52,17 +65,24 @@ class AnfisModel:
 		self.rules_extend: List[Tuple[Dict[str, str], float]] = []
 		self.min_green = 6.0
 		self.max_green = 20.0
-		self._init_default()
-		if model_path:
-			self._try_load(model_path)
-		# Ek model parametreleri (eşikler, histerezis)
+		self.feature_names: Tuple[str, ...] = FEATURE_NAMES
+		# Karar yüzeyi arama tablosu (opsiyonel): yüklemede üretilir/önbellekten okunur
+		self.use_lut = bool(use_lut)
+		self.lut_resolution = int(lut_resolution)
+		self.lut_error_bound = float(lut_error_bound)
+		self._lut = None
+		# Ek model parametreleri (eşikler, histerezis); dosyadaki "params" bunları ezer
 		self.params: Dict[str, float] = {
 			"trigger_threshold": 0.5,
 			"near_force_distance_m": 200.0,
 			"release_distance_m": 50.0,
-			"min_green": self.min_green,
-			"max_green": self.max_green,
 		}
+		self._init_default()
+		if model_path:
+			self._try_load(model_path)
+		self.params.setdefault("min_green", self.min_green)
+		self.params.setdefault("max_green", self.max_green)
+		self.compile()
 
 	def _init_default(self) -> None:
 		# Üyelik fonksiyonları (hedefe göre kaba değerler)
@@ -113,30 +133,51 @@ class AnfisModel:
 		try:
 			with open(path, "r", encoding="utf-8") as f:
 				data = json.load(f)
-			# Fuzzy sets
-			fs = {}
-			for var, mfs in data.get("fuzzy_sets", {}).items():
-				fs[var] = {}
-				for name, params in mfs.items():
-					fs[var][name] = TriMF(*params)
-			self.fuzzy_sets = fs or self.fuzzy_sets
-			# Rules
-			self.rules_trigger = [(r["if"], float(r.get("w", 1.0))) for r in data.get("rules_trigger", [])] or self.rules_trigger
-			self.rules_extend = [(r["if"], float(r.get("w", 1.0))) for r in data.get("rules_extend", [])] or self.rules_extend
-			self.min_green = float(data.get("min_green", self.min_green))
-			self.max_green = float(data.get("max_green", self.max_green))
-			# Opsiyonel parametreler
-			params = data.get("params", {})
-			if isinstance(params, dict):
-				for k, v in params.items():
-					try:
-						self.params[k] = float(v)
-					except Exception:
-						pass
+			self._load_dict(data)
 			self.loaded = True
 		except Exception:
 			self.loaded = False
 
+	def _load_dict(self, data: Dict[str, Any]) -> None:
+		# Fuzzy sets
+		fs = {}
+		for var, mfs in data.get("fuzzy_sets", {}).items():
+			fs[var] = {}
+			for name, params in mfs.items():
+				fs[var][name] = TriMF(*params)
+		self.fuzzy_sets = fs or self.fuzzy_sets
+		# Rules
+		self.rules_trigger = [(r["if"], float(r.get("w", 1.0))) for r in data.get("rules_trigger", [])] or self.rules_trigger
+		self.rules_extend = [(r["if"], float(r.get("w", 1.0))) for r in data.get("rules_extend", [])] or self.rules_extend
+		self.min_green = float(data.get("min_green", self.min_green))
+		self.max_green = float(data.get("max_green", self.max_green))
+		# Opsiyonel parametreler
+		params = data.get("params", {})
+		if isinstance(params, dict):
+			for k, v in params.items():
+				try:
+					self.params[k] = float(v)
+				except Exception:
+					pass
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any], model_path: Optional[str] = None, **kwargs) -> "AnfisModel":
+		"""`to_dict` çıktısından (veya `models/anfis.json` içeriğinden) model kur.
+
+		`model_path` verilirse LUT önbelleği (`anfis.lut.npz`) bu dosyanın yanında aranır.
+		Varsayılan kurallar için LUT kurulmaz; derleme yüklemeden sonra bir kez yapılır.
+		"""
+		use_lut = bool(kwargs.pop("use_lut", False))
+		model = cls(None, use_lut=False, **kwargs)
+		model.use_lut = use_lut
+		model.model_path = model_path
+		model._load_dict(data)
+		model.params["min_green"] = model.min_green
+		model.params["max_green"] = model.max_green
+		model.loaded = True
+		model.compile()
+		return model
+
 	def _mu(self, var: str, label: str, x: float) -> float:
 		try:
 			return self.fuzzy_sets[var][label].mu(x)
@@ -150,7 +191,20 @@ class AnfisModel:
 			f = min(f, self._mu(var, label, x))
 		return f
 
+	def to_dict(self) -> Dict[str, Any]:
+		"""Modeli `models/anfis.json` şemasında sözlüğe dök."""
+		return {
+			"min_green": self.min_green,
+			"max_green": self.max_green,
+			"fuzzy_sets": {var: {name: [mf.a, mf.b, mf.c] for name, mf in mfs.items()} for var, mfs in self.fuzzy_sets.items()},
+			"rules_trigger": [{"if": dict(cond), "w": float(w)} for cond, w in self.rules_trigger],
+			"rules_extend": [{"if": dict(cond), "w": float(w)} for cond, w in self.rules_extend],
+			"params": {k: float(v) for k, v in self.params.items() if k not in ("min_green", "max_green")},
+		}
+
 	def predict_trigger_prob(self, feats: Dict[str, float]) -> float:
+		if self._lut is not None:
+			return clamp(self._lut.lookup(feats)[0], 0.0, 1.0)
 		# Basit ağırlıklı maksimum (Sugeno benzeri):
 		# prob = max_i( fire_i * w_i )
 		best = 0.0
@@ -160,9 +214,146 @@ class AnfisModel:
 		return clamp(best, 0.0, 1.0)
 
 	def predict_extend_seconds(self, feats: Dict[str, float]) -> float:
+		if self._lut is not None:
+			return clamp(self._lut.lookup(feats)[1], self.min_green, self.max_green)
 		# Uzatma saniyesi: taban 6s + katkılar (kural ateşleme * w)
 		sec = self.min_green
 		for cond, w in self.rules_extend:
 			fire = self._rule_fire(cond, feats)
 			sec += max(0.0, fire * w)
 		return clamp(sec, self.min_green, self.max_green)
+
+	# -------------------- Toplu (vektörel) çıkarım --------------------
+	def compile(self) -> None:
+		"""Bulanık kümeleri ve kuralları dizilere derle.
+
+		- MF parametre matrisi: her (değişken, etiket) için a, b, c ve özellik sütunu
+		- Kural × öncül indeks matrisi: her kural için MF sütun indeksleri; eksik
+		  öncüller "1" sütunuyla, bilinmeyen (değişken, etiket) "0" sütunuyla doldurulur
+		Bulanık kümeler veya kurallar değiştirildikten sonra yeniden çağrılmalıdır.
+		"""
+		names = list(FEATURE_NAMES)
+		for var in self.fuzzy_sets.keys():
+			if var not in names:
+				names.append(var)
+		self.feature_names = tuple(names)
+		col_of = {n: i for i, n in enumerate(names)}
+		mf_index: Dict[Tuple[str, str], int] = {}
+		cols: List[int] = []
+		abc: List[Tuple[float, float, float]] = []
+		for var, mfs in self.fuzzy_sets.items():
+			for label, mf in mfs.items():
+				mf_index[(var, label)] = len(cols)
+				cols.append(col_of[var])
+				abc.append((mf.a, mf.b, mf.c))
+		m = len(cols)
+		self._mf_index = mf_index
+		self._mf_cols = np.asarray(cols, dtype=np.intp)
+		params = np.asarray(abc, dtype=np.float64).reshape(m, 3)
+		self._mf_a = params[:, 0]
+		self._mf_b = params[:, 1]
+		self._mf_c = params[:, 2]
+		self._zero_col = m       # her zaman 0 üyelik (bilinmeyen etiket)
+		self._one_col = m + 1    # her zaman 1 üyelik (dolgu)
+		self._trig_idx, self._trig_w = self._compile_rules(self.rules_trigger)
+		self._ext_idx, self._ext_w = self._compile_rules(self.rules_extend)
+		self._lut = None
+		if self.use_lut:
+			self._refresh_lut()
+
+	def _refresh_lut(self) -> None:
+		"""LUT'u önbellekten yükle; model değiştiyse (anahtar uyuşmazlığı) yeniden üret ve kaydet."""
+		from src.ai.anfis_lut import AnfisLookupTable, build_lut, lut_key, lut_path_for
+		key = lut_key(self, self.lut_resolution, self.lut_error_bound)
+		cache_path = lut_path_for(self.model_path) if self.model_path else None
+		lut = AnfisLookupTable.load(cache_path, key) if cache_path and os.path.exists(cache_path) else None
+		if lut is None:
+			lut = build_lut(self, resolution=self.lut_resolution, error_bound=self.lut_error_bound)
+			if lut is not None and cache_path:
+				try:
+					lut.save(cache_path)
+				except Exception:
+					pass
+		self._lut = lut
+
+	def _compile_rules(self, rules: List[Tuple[Dict[str, str], float]]) -> Tuple[np.ndarray, np.ndarray]:
+		width = max([len(cond) for cond, _w in rules] + [1])
+		idx = np.full((len(rules), width), self._one_col, dtype=np.intp)
+		weights = np.zeros(len(rules), dtype=np.float64)
+		for r, (cond, w) in enumerate(rules):
+			for k, (var, label) in enumerate(cond.items()):
+				idx[r, k] = self._mf_index.get((var, label), self._zero_col)
+			weights[r] = float(w)
+		return idx, weights
+
+	def features_to_matrix(self, X: Union[np.ndarray, Sequence[Dict[str, float]], Dict[str, Any]]) -> np.ndarray:
+		"""Girdiyi (N, F) float64 matrisine çevir; sütunlar `feature_names` sırasında.
+
+		Kabul edilenler: hazır matris, özellik sözlükleri listesi veya sütun
+		eşlemesi (ör. pandas DataFrame). Eksik özellikler 0.0 kabul edilir.
+		"""
+		if isinstance(X, np.ndarray):
+			arr = np.asarray(X, dtype=np.float64)
+			if arr.ndim == 1:
+				arr = arr.reshape(1, -1)
+			if arr.shape[1] < len(self.feature_names):
+				pad = np.zeros((arr.shape[0], len(self.feature_names) - arr.shape[1]))
+				arr = np.hstack([arr, pad])
+			return arr
+		if hasattr(X, "keys") and not isinstance(X, (list, tuple)):
+			cols = list(X.keys())
+			n = len(X[cols[0]]) if cols else 0
+			arr = np.zeros((n, len(self.feature_names)), dtype=np.float64)
+			for j, name in enumerate(self.feature_names):
+				if name in X:
+					arr[:, j] = np.asarray(X[name], dtype=np.float64)
+			return arr
+		rows = list(X)
+		arr = np.zeros((len(rows), len(self.feature_names)), dtype=np.float64)
+		for i, feats in enumerate(rows):
+			for j, name in enumerate(self.feature_names):
+				arr[i, j] = float(feats.get(name, 0.0))
+		return arr
+
+	def _membership_matrix(self, X: np.ndarray) -> np.ndarray:
+		"""(N, M+2) üyelik matrisi; son iki sütun sabit 0 ve 1. `TriMF.mu` ile birebir."""
+		x = X[:, self._mf_cols]
+		a, b, c = self._mf_a, self._mf_b, self._mf_c
+		with np.errstate(invalid="ignore", divide="ignore"):
+			left = (x - a) / np.maximum(1e-6, b - a)
+			right = (c - x) / np.maximum(1e-6, c - b)
+			mu = np.where(x < b, left, right)
+			mu = np.maximum(mu, 0.0)
+			mu = np.where(x == b, 1.0, mu)
+			mu = np.where((x <= a) | (x >= c) | np.isnan(x), 0.0, mu)
+		n = X.shape[0]
+		return np.hstack([mu, np.zeros((n, 1)), np.ones((n, 1))])
+
+	def _fire_matrix(self, mu: np.ndarray, idx: np.ndarray) -> np.ndarray:
+		if idx.shape[0] == 0:
+			return np.zeros((mu.shape[0], 0))
+		return mu[:, idx].min(axis=2)
+
+	def _lut_batch(self, arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		cols = {name: arr[:, j] for j, name in enumerate(self.feature_names)}
+		return self._lut.lookup_batch(cols)
+
+	def predict_trigger_prob_batch(self, X: Union[np.ndarray, Sequence[Dict[str, float]], Dict[str, Any]], exact: bool = False) -> np.ndarray:
+		"""`predict_trigger_prob`un vektörel sürümü; (N,) olasılık dizisi döndürür."""
+		arr = self.features_to_matrix(X)
+		if self._lut is not None and not exact:
+			return np.clip(self._lut_batch(arr)[0], 0.0, 1.0)
+		fire = self._fire_matrix(self._membership_matrix(arr), self._trig_idx)
+		if fire.shape[1] == 0:
+			return np.zeros(arr.shape[0])
+		best = np.maximum(0.0, (fire * np.clip(self._trig_w, 0.0, 1.0)).max(axis=1))
+		return np.clip(best, 0.0, 1.0)
+
+	def predict_extend_seconds_batch(self, X: Union[np.ndarray, Sequence[Dict[str, float]], Dict[str, Any]], exact: bool = False) -> np.ndarray:
+		"""`predict_extend_seconds`un vektörel sürümü; (N,) saniye dizisi döndürür."""
+		arr = self.features_to_matrix(X)
+		if self._lut is not None and not exact:
+			return np.clip(self._lut_batch(arr)[1], self.min_green, self.max_green)
+		fire = self._fire_matrix(self._membership_matrix(arr), self._ext_idx)
+		sec = self.min_green + np.maximum(0.0, fire * self._ext_w).sum(axis=1)
+		return np.clip(sec, self.min_green, self.max_green)
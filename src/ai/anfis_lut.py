@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+ANFIS karar yüzeyi için önceden hesaplanmış arama tablosu (LUT).
+
+Sabit bir model için çıktılar yalnızca kurallarda geçen, sınırlı aralıktaki
+birkaç özelliğe bağlıdır. Her boyut için ızgara düğümleri = MF kırılma
+noktaları (a, b, c) + düzgün dolgu; değerler ızgarada toplu çıkarımla bir kez
+hesaplanır ve sorgu çok-doğrusal (multilinear) interpolasyonla yapılır. Sorgu
+maliyeti kural sayısından bağımsızdır (2^D köşe).
+
+Izgara dışındaki girdiler kırpılır: en küçük `a` altında ve en büyük `c`
+üstünde tüm üyelikler 0 olduğundan kırpma kesindir.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_right
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LUT_VERSION = 1
+
+
+def lut_path_for(model_path: str) -> str:
+	"""`models/anfis.json` -> `models/anfis.lut.npz`"""
+	root, _ext = os.path.splitext(model_path)
+	return root + ".lut.npz"
+
+
+def _axis_nodes(mfs: Sequence[Tuple[float, float, float]], resolution: int) -> np.ndarray:
+	"""Bir eksenin ızgara düğümleri.
+
+	Her üçgenin yükselen [a, b] ve alçalan [b, c] kenarı `resolution` eşit parçaya
+	bölünür; böylece düğümler üyeliklerin değiştiği yerlerde yoğunlaşır, düz
+	bölgelerde (ör. 200-500 m arası boşluklar) seyrek kalır.
+	"""
+	lo = min(a for a, _b, _c in mfs)
+	hi = max(c for _a, _b, c in mfs)
+	if hi <= lo:
+		hi = lo + 1.0
+	k = max(1, int(resolution))
+	nodes = {lo, hi}
+	eps = 1e-6 * (hi - lo)
+	for a, b, c in mfs:
+		if b > a:
+			nodes.update(np.linspace(a, b, k + 1).tolist())
+		else:
+			# Dejenere kenar (a == b): x == a'da 0, hemen sağında ~1
+			nodes.update((a, a + eps))
+		if c > b:
+			nodes.update(np.linspace(b, c, k + 1).tolist())
+		else:
+			nodes.update((c - eps, c))
+	arr = np.array(sorted(n for n in nodes if lo <= n <= hi), dtype=np.float64)
+	return arr
+
+
+class AnfisLookupTable:
+	"""Çok boyutlu ızgara + çok-doğrusal interpolasyon."""
+
+	def __init__(self, dims: List[str], grids: List[np.ndarray], trigger: np.ndarray, extend: np.ndarray, key: str, max_error: float):
+		self.dims = list(dims)
+		self.grids = [np.asarray(g, dtype=np.float64) for g in grids]
+		self.trigger = np.asarray(trigger, dtype=np.float32)
+		self.extend = np.asarray(extend, dtype=np.float32)
+		self.key = key
+		self.max_error = float(max_error)
+		self._grid_lists = [g.tolist() for g in self.grids]
+		self._lo = [g[0] for g in self._grid_lists]
+		self._hi = [g[-1] for g in self._grid_lists]
+		shape = self.trigger.shape
+		strides = []
+		acc = 1
+		for n in reversed(shape):
+			strides.append(acc)
+			acc *= n
+		self._strides = list(reversed(strides))
+		self._flat_trigger = self.trigger.ravel().tolist()
+		self._flat_extend = self.extend.ravel().tolist()
+		# 2^D köşe ofsetleri (bit maskesi ile)
+		self._corners = [[(mask >> d) & 1 for d in range(len(self.dims))] for mask in range(1 << len(self.dims))]
+
+	@property
+	def num_cells(self) -> int:
+		return int(self.trigger.size)
+
+	# -------------------- Sorgu --------------------
+	def _locate(self, d: int, x: float) -> Tuple[int, float]:
+		g = self._grid_lists[d]
+		if not (x > self._lo[d]):  # NaN dahil
+			return 0, 0.0
+		if x >= self._hi[d]:
+			return len(g) - 2, 1.0
+		i = bisect_right(g, x) - 1
+		return i, (x - g[i]) / (g[i + 1] - g[i])
+
+	def lookup(self, feats: Dict[str, float]) -> Tuple[float, float]:
+		"""Tek satır için (tetikleme olasılığı, uzatma saniyesi)."""
+		base = 0
+		locs = []
+		for d, name in enumerate(self.dims):
+			i, f = self._locate(d, float(feats.get(name, 0.0)))
+			base += i * self._strides[d]
+			locs.append(f)
+		trig = 0.0
+		ext = 0.0
+		for corner in self._corners:
+			w = 1.0
+			off = base
+			for d, bit in enumerate(corner):
+				if bit:
+					w *= locs[d]
+					off += self._strides[d]
+				else:
+					w *= 1.0 - locs[d]
+			if w:
+				trig += w * self._flat_trigger[off]
+				ext += w * self._flat_extend[off]
+		return trig, ext
+
+	def lookup_batch(self, cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+		"""Sütun eşlemesi (özellik adı -> (N,) dizi) için vektörel sorgu."""
+		n = len(next(iter(cols.values()))) if cols else 0
+		base = np.zeros(n, dtype=np.intp)
+		fracs = []
+		for d, name in enumerate(self.dims):
+			g = self.grids[d]
+			x = np.asarray(cols.get(name, np.zeros(n)), dtype=np.float64)
+			x = np.where(np.isnan(x), g[0], np.clip(x, g[0], g[-1]))
+			i = np.clip(np.searchsorted(g, x, side="right") - 1, 0, len(g) - 2)
+			f = (x - g[i]) / (g[i + 1] - g[i])
+			base += i * self._strides[d]
+			fracs.append(f)
+		flat_t = self.trigger.ravel()
+		flat_e = self.extend.ravel()
+		trig = np.zeros(n)
+		ext = np.zeros(n)
+		for corner in self._corners:
+			w = np.ones(n)
+			off = base.copy()
+			for d, bit in enumerate(corner):
+				if bit:
+					w *= fracs[d]
+					off += self._strides[d]
+				else:
+					w *= 1.0 - fracs[d]
+			trig += w * flat_t[off]
+			ext += w * flat_e[off]
+		return trig, ext
+
+	# -------------------- Kalıcılık --------------------
+	def save(self, path: str) -> None:
+		arrays = {f"grid_{d}": g for d, g in enumerate(self.grids)}
+		meta = json.dumps({"dims": self.dims, "key": self.key, "max_error": self.max_error, "version": LUT_VERSION})
+		tmp = path + ".tmp"
+		with open(tmp, "wb") as f:
+			np.savez_compressed(f, trigger=self.trigger, extend=self.extend, meta=np.array(meta), **arrays)
+		os.replace(tmp, path)
+
+	@classmethod
+	def load(cls, path: str, expected_key: str) -> Optional["AnfisLookupTable"]:
+		"""Dosyadaki tablo modelle eşleşiyorsa yükle; aksi halde None."""
+		try:
+			with np.load(path, allow_pickle=False) as data:
+				meta = json.loads(str(data["meta"]))
+				if meta.get("version") != LUT_VERSION or meta.get("key") != expected_key:
+					return None
+				dims = list(meta["dims"])
+				grids = [data[f"grid_{d}"] for d in range(len(dims))]
+				return cls(dims, grids, data["trigger"], data["extend"], meta["key"], meta.get("max_error", 0.0))
+		except Exception:
+			return None
+
+
+def lut_key(model, resolution: int, error_bound: float) -> str:
+	payload = json.dumps({"model": model.to_dict(), "resolution": int(resolution), "error_bound": float(error_bound), "version": LUT_VERSION}, sort_keys=True)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lut_dims(model) -> List[str]:
+	"""Kurallarda geçen ve bulanık kümesi olan değişkenler (LUT boyutları)."""
+	used = set()
+	for cond, _w in list(model.rules_trigger) + list(model.rules_extend):
+		for var in cond.keys():
+			if var in model.fuzzy_sets and model.fuzzy_sets[var]:
+				used.add(var)
+	return [n for n in model.feature_names if n in used]
+
+
+def build_lut(model, resolution: int = 8, error_bound: float = 0.02, max_cells: int = 4_000_000, samples: int = 4096, seed: int = 0) -> Optional[AnfisLookupTable]:
+	"""Model için LUT üret; doğrulama hatası `error_bound`u aşarsa çözünürlüğü artır.
+
+	`resolution`: her MF kenarının bölündüğü parça sayısı (başlangıç değeri).
+
+	Hata, tetikleme olasılığı için mutlak, uzatma süresi için (max_green - min_green)
+	aralığına göre normalize edilmiş farkın en büyüğüdür. Sınır `max_cells` içinde
+	sağlanamazsa None döner (kesin çıkarım kullanılmalı).
+	"""
+	dims = lut_dims(model)
+	key = lut_key(model, resolution, error_bound)
+	ext_span = max(1e-6, float(model.max_green) - float(model.min_green))
+	rng = np.random.default_rng(seed)
+	res = max(2, int(resolution))
+	while True:
+		grids = []
+		for var in dims:
+			mfs = [(mf.a, mf.b, mf.c) for mf in model.fuzzy_sets[var].values()]
+			grids.append(_axis_nodes(mfs, res))
+		shape = tuple(len(g) for g in grids)
+		cells = int(np.prod(shape)) if shape else 1
+		if cells > max_cells:
+			logger.warning(f"[ANFIS-LUT] {error_bound} hata sınırı {max_cells} hücre içinde sağlanamadı; kesin çıkarım kullanılacak")
+			return None
+		trig = np.empty(cells, dtype=np.float32)
+		ext = np.empty(cells, dtype=np.float32)
+		chunk = 262144
+		for start in range(0, cells, chunk):
+			flat = np.arange(start, min(cells, start + chunk))
+			cols = {}
+			if shape:
+				idx = np.unravel_index(flat, shape)
+				for d, var in enumerate(dims):
+					cols[var] = grids[d][idx[d]]
+			else:
+				cols = {n: np.zeros(len(flat)) for n in model.feature_names[:1]}
+			trig[start:start + len(flat)] = model.predict_trigger_prob_batch(cols, exact=True)
+			ext[start:start + len(flat)] = model.predict_extend_seconds_batch(cols, exact=True)
+		table = AnfisLookupTable(dims, grids, trig.reshape(shape), ext.reshape(shape), key, 0.0)
+		# Doğrulama: kutu içinde rastgele noktalar + ızgara hücre merkezleri
+		cols = {}
+		for d, var in enumerate(dims):
+			g = grids[d]
+			u = rng.uniform(g[0], g[-1], samples)
+			mids = 0.5 * (g[:-1] + g[1:])
+			cols[var] = np.concatenate([u, rng.choice(mids, samples)])
+		n = 2 * samples
+		if not dims:
+			cols = {n_: np.zeros(n) for n_ in model.feature_names[:1]}
+		exact_t = model.predict_trigger_prob_batch(cols, exact=True)
+		exact_e = model.predict_extend_seconds_batch(cols, exact=True)
+		approx_t, approx_e = table.lookup_batch(cols) if dims else (np.full(n, trig[0]), np.full(n, ext[0]))
+		err = float(max(np.max(np.abs(approx_t - exact_t)), np.max(np.abs(approx_e - exact_e)) / ext_span))
+		if err <= error_bound:
+			table.max_error = err
+			logger.info(f"[ANFIS-LUT] {len(dims)} boyut, {cells} hücre, maks. hata={err:.4f}")
+			return table
+		res = res * 2
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+ANFIS model kayıt defteri: sürümleme, sıcak yeniden yükleme ve A/B ataması.
+
+- Her varyantın (ör. "A": `models/anfis.json`, "B": `models/anfis_b.json`) dosyası
+  arka plan iş parçacığında izlenir (mtime/boyut). Değişiklikte dosya okunur,
+  model kurulur (LUT dahil) ve doğrulanır; simülasyon döngüsü beklemez.
+- Sürüm kimliği dosya içeriğinin sha256 önekidir; karar log satırlarına yazılır.
+- Doğrulanan model bekleyen sürüm olarak tutulur, `swap_pending()` ile iki
+  simülasyon adımı arasında tek referans atamasıyla devreye alınır.
+- A/B: her TLS, kimliğinin kararlı özetine göre bir varyanta atanır.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from src.ai.anfis import AnfisModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VERSION = "default"
+
+
+def content_version(raw: bytes) -> str:
+	return hashlib.sha256(raw).hexdigest()[:12]
+
+
+def model_version_of(path: Optional[str]) -> str:
+	"""Model dosyasının sürüm kimliği (dosya yoksa "default")."""
+	if not path or not os.path.exists(path):
+		return DEFAULT_VERSION
+	try:
+		with open(path, "rb") as f:
+			return content_version(f.read())
+	except Exception:
+		return DEFAULT_VERSION
+
+
+def validate_model(model: AnfisModel, probes: int = 256, seed: int = 0) -> Optional[str]:
+	"""Modeli devreye almadan önce denetle; sorun varsa açıklama, yoksa None."""
+	if not model.rules_trigger or not model.rules_extend:
+		return "kural tabanı boş"
+	if not (model.min_green <= model.max_green):
+		return f"min_green ({model.min_green}) > max_green ({model.max_green})"
+	for var, mfs in model.fuzzy_sets.items():
+		for label, mf in mfs.items():
+			if not (np.isfinite([mf.a, mf.b, mf.c]).all() and mf.a <= mf.b <= mf.c):
+				return f"geçersiz üyelik fonksiyonu: {var}.{label} = ({mf.a}, {mf.b}, {mf.c})"
+	rng = np.random.default_rng(seed)
+	X = np.column_stack([
+		rng.uniform(0.0, 500.0, probes),   # dist_to_tls
+		rng.uniform(0.0, 20.0, probes),    # ambulance_speed
+		rng.uniform(0.0, 100.0, probes),   # queue_length
+		rng.uniform(0.0, 40.0, probes),    # eta_seconds
+		rng.integers(0, 8, probes),        # phase_index
+		rng.uniform(0.0, 30.0, probes),    # phase_remaining
+	])
+	p = model.predict_trigger_prob_batch(X)
+	ext = model.predict_extend_seconds_batch(X)
+	if not (np.isfinite(p).all() and np.isfinite(ext).all()):
+		return "çıkarım sonlu olmayan değer üretti"
+	if p.min() < 0.0 or p.max() > 1.0:
+		return "tetikleme olasılığı [0, 1] dışında"
+	if ext.min() < model.min_green - 1e-6 or ext.max() > model.max_green + 1e-6:
+		return "uzatma süresi [min_green, max_green] dışında"
+	return None
+
+
+class ModelVersion:
+	"""Yüklenmiş ve doğrulanmış bir model sürümü."""
+
+	def __init__(self, variant: str, version: str, model: AnfisModel, path: Optional[str] = None):
+		self.variant = variant
+		self.version = version
+		self.model = model
+		self.path = path
+
+	def __repr__(self) -> str:
+		return f"ModelVersion({self.variant}:{self.version})"
+
+
+class ModelRegistry:
+	"""Varyant -> etkin sürüm eşlemesi ve arka plan dosya izleyici.
+
+	variants: {"A": yol, "B": yol, ...}; weights: A/B oranları (vars. eşit).
+	model_kwargs: `AnfisModel` için ek argümanlar (ör. LUT seçenekleri).
+	"""
+
+	def __init__(self, variants: Dict[str, str], weights: Optional[Dict[str, float]] = None, poll_interval_s: float = 2.0, model_kwargs: Optional[Dict[str, Any]] = None):
+		if not variants:
+			raise ValueError("En az bir model varyantı gerekli")
+		self.variants = dict(variants)
+		w = {v: float((weights or {}).get(v, 1.0)) for v in self.variants}
+		total = sum(max(0.0, x) for x in w.values()) or 1.0
+		self.weights = {v: max(0.0, x) / total for v, x in w.items()}
+		self.poll_interval_s = max(0.1, float(poll_interval_s))
+		self.model_kwargs = dict(model_kwargs or {})
+		self.active: Dict[str, ModelVersion] = {}
+		self.swaps = 0
+		self.rejected = 0
+		self._pending: Dict[str, ModelVersion] = {}
+		self._lock = threading.Lock()
+		self._stat: Dict[str, Tuple[float, int]] = {}
+		self._assign: Dict[str, str] = {}
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		# İlk yükleme senkron: döngü başlamadan her varyantın etkin bir modeli olsun
+		for variant, path in self.variants.items():
+			mv = self._load(variant, path)
+			if mv is None:
+				mv = ModelVersion(variant, DEFAULT_VERSION, AnfisModel(None, **self.model_kwargs), path)
+				logger.warning(f"[Models] {variant}: {path} yüklenemedi; varsayılan kural tabanı kullanılıyor")
+			self.active[variant] = mv
+			logger.info(f"[Models] {variant} etkin sürüm: {mv.version} ({path})")
+
+	# -------------------- Yükleme / doğrulama --------------------
+	def _load(self, variant: str, path: str) -> Optional[ModelVersion]:
+		try:
+			st = os.stat(path)
+			with open(path, "rb") as f:
+				raw = f.read()
+			version = content_version(raw)
+			current = self.active.get(variant)
+			if current is not None and current.version == version:
+				self._stat[variant] = (st.st_mtime, st.st_size)
+				return None
+			# Yazımı süren (yarım) dosya: JSON çözülemezse durum kaydedilmez, sonraki turda tekrar denenir
+			data = json.loads(raw.decode("utf-8"))
+			self._stat[variant] = (st.st_mtime, st.st_size)
+			model = AnfisModel.from_dict(data, model_path=path, **self.model_kwargs)
+			problem = validate_model(model)
+			if problem:
+				self.rejected += 1
+				logger.warning(f"[Models] {variant}: {path} sürüm {version} reddedildi: {problem}")
+				return None
+			return ModelVersion(variant, version, model, path)
+		except FileNotFoundError:
+			return None
+		except Exception as e:
+			self.rejected += 1
+			logger.warning(f"[Models] {variant}: {path} okunamadı: {e}")
+			return None
+
+	def poll_once(self) -> int:
+		"""Değişen dosyaları yükle ve bekleyen sürüm olarak sıraya al; sıraya alınan sayısını döndür."""
+		staged = 0
+		for variant, path in self.variants.items():
+			try:
+				st = os.stat(path)
+			except OSError:
+				continue
+			if self._stat.get(variant) == (st.st_mtime, st.st_size):
+				continue
+			mv = self._load(variant, path)
+			if mv is not None:
+				self.stage(variant, mv.model, mv.version, path)
+				staged += 1
+		return staged
+
+	def stage(self, variant: str, model: AnfisModel, version: str, path: Optional[str] = None) -> None:
+		"""Bir sonraki `swap_pending` çağrısında devreye alınacak modeli bırak."""
+		with self._lock:
+			self._pending[variant] = ModelVersion(variant, version, model, path)
+
+	def swap_pending(self) -> List[Tuple[str, str, str]]:
+		"""Bekleyen sürümleri etkinleştir (adımlar arasında çağrılır): [(varyant, eski, yeni)]."""
+		if not self._pending:
+			return []
+		with self._lock:
+			pending, self._pending = self._pending, {}
+		changes = []
+		for variant, mv in pending.items():
+			old = self.active.get(variant)
+			self.active[variant] = mv
+			self.swaps += 1
+			changes.append((variant, old.version if old else "", mv.version))
+		return changes
+
+	# -------------------- A/B ataması --------------------
+	def variant_for(self, tl_id: str) -> str:
+		variant = self._assign.get(tl_id)
+		if variant is None:
+			h = int(hashlib.sha1(str(tl_id).encode("utf-8")).hexdigest()[:8], 16) / float(0xFFFFFFFF)
+			acc = 0.0
+			variant = next(iter(self.variants))
+			for v, w in self.weights.items():
+				acc += w
+				if h <= acc:
+					variant = v
+					break
+			self._assign[tl_id] = variant
+		return variant
+
+	def model_for(self, tl_id: str) -> ModelVersion:
+		return self.active[self.variant_for(tl_id)]
+
+	def assignments(self) -> Dict[str, str]:
+		return dict(self._assign)
+
+	# -------------------- Arka plan izleyici --------------------
+	def start(self) -> None:
+		if self._thread is not None:
+			return
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+		self._thread.start()
+
+	def _run(self) -> None:
+		while not self._stop.wait(self.poll_interval_s):
+			try:
+				self.poll_once()
+			except Exception as e:
+				logger.debug(f"[Models] izleme hatası: {e}")
+
+	def stop(self, timeout: float = 5.0) -> None:
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join(timeout)
+			self._thread = None
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Simülasyon sırasında çevrimiçi (artımlı) ANFIS uyarlaması.
+
+Uzatma kurallarının sonuç ağırlıkları özyinelemeli en küçük kareler (RLS) ile
+her gözlemde güncellenir; maliyet kural sayısının karesiyle sınırlıdır, diskten
+yeniden eğitim gerekmez. Üyelik fonksiyonları ve tetikleme kuralları sabit kalır.
+
+Gözlem (outcome): önceliğin ilk uygulandığı andaki özellikler ve ambulansın
+kavşağı geçmesine kadar geçen süre (+ pay). Hedef yeşil süresi bu süredir.
+
+Güncel ağırlıklarla kurulan yeni model, `publish_every` gözlemde bir bütün
+halinde üretilir ve geri çağrıyla (ör. `TrafficLightController.set_model`) tek
+referans atamasıyla devreye alınır; yarım güncellenmiş model hiç görünmez.
+Model ve RLS durumu periyodik olarak geçici dosya + `os.replace` ile yazılır.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import json
+import logging
+import os
+
+import numpy as np
+
+from src.ai.anfis import AnfisModel
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write_json(path: str, data: Dict[str, Any]) -> None:
+	d = os.path.dirname(path)
+	if d:
+		os.makedirs(d, exist_ok=True)
+	tmp = path + ".tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(data, f, ensure_ascii=False, indent=2)
+	os.replace(tmp, path)
+
+
+def rls_state_path(checkpoint_path: str) -> str:
+	"""`models/anfis.online.json` -> `models/anfis.online.rls.npz`"""
+	root, _ext = os.path.splitext(checkpoint_path)
+	return root + ".rls.npz"
+
+
+class OnlineAnfisLearner:
+	"""Uzatma kuralı sonuçları için RLS öğrenici.
+
+	forgetting: unutma çarpanı λ (1.0: tüm geçmiş eşit; <1: yeni gözlemler ağır basar)
+	delta: başlangıç kovaryansı P = delta·I (büyük: ilk gözlemlere hızlı uyum)
+	"""
+
+	def __init__(
+		self,
+		model: AnfisModel,
+		on_swap: Optional[Callable[[AnfisModel], None]] = None,
+		forgetting: float = 0.999,
+		delta: float = 100.0,
+		publish_every: int = 10,
+		checkpoint_path: Optional[str] = None,
+		checkpoint_interval_s: float = 300.0,
+		pass_margin_s: float = 1.0,
+	):
+		self.base = model.to_dict()
+		self.min_green = float(model.min_green)
+		self.max_green = float(model.max_green)
+		self.on_swap = on_swap
+		self.forgetting = min(1.0, max(0.9, float(forgetting)))
+		self.publish_every = max(1, int(publish_every))
+		self.checkpoint_path = checkpoint_path
+		self.checkpoint_interval_s = max(1.0, float(checkpoint_interval_s))
+		self.pass_margin_s = float(pass_margin_s)
+		# Öncül (premise) hesabı için sabit, LUT'suz kopya
+		self._premise = AnfisModel.from_dict(self.base)
+		r = len(self._premise.rules_extend)
+		self.theta = np.array([float(w) for _c, w in self._premise.rules_extend], dtype=np.float64)
+		self.P = np.eye(r) * float(delta)
+		self.samples = 0
+		self.swaps = 0
+		self._since_publish = 0
+		if checkpoint_path:
+			self._load_rls_state(rls_state_path(checkpoint_path))
+
+	# -------------------- RLS --------------------
+	def _regressor(self, feats: Dict[str, float]) -> np.ndarray:
+		m = self._premise
+		x = m.features_to_matrix([feats])
+		return m._fire_matrix(m._membership_matrix(x), m._ext_idx)[0]
+
+	def update(self, feats: Dict[str, float], target_seconds: float) -> float:
+		"""Tek gözlemle RLS adımı; önceki tahminin hatasını (s) döndürür."""
+		f = self._regressor(feats)
+		if not len(f) or not np.any(f > 0):
+			return 0.0
+		y = float(np.clip(target_seconds, self.min_green, self.max_green)) - self.min_green
+		lam = self.forgetting
+		Pf = self.P @ f
+		k = Pf / (lam + float(f @ Pf))
+		err = y - float(f @ np.maximum(0.0, self.theta))
+		self.theta = self.theta + k * err
+		self.P = (self.P - np.outer(k, Pf)) / lam
+		self.samples += 1
+		self._since_publish += 1
+		if self._since_publish >= self.publish_every:
+			self.publish()
+		return err
+
+	def observe_outcome(self, feats: Dict[str, float], applied_at_s: float, passed_at_s: float) -> float:
+		"""Öncelik başlangıcından kavşak geçişine kadar geçen süreyi hedef al."""
+		return self.update(feats, max(0.0, float(passed_at_s) - float(applied_at_s)) + self.pass_margin_s)
+
+	# -------------------- Yayın ve kalıcılık --------------------
+	def current_dict(self) -> Dict[str, Any]:
+		data = json.loads(json.dumps(self.base))
+		for rule, w in zip(data.get("rules_extend", []), self.theta):
+			rule["w"] = float(max(0.0, w))
+		return data
+
+	def publish(self) -> Optional[AnfisModel]:
+		"""Güncel ağırlıklarla yeni model kur ve geri çağrıyla devreye al."""
+		self._since_publish = 0
+		try:
+			model = AnfisModel.from_dict(self.current_dict())
+		except Exception as e:
+			logger.warning(f"[ANFIS-online] model kurulamadı: {e}")
+			return None
+		if self.on_swap is not None:
+			self.on_swap(model)
+		self.swaps += 1
+		return model
+
+	def checkpoint(self) -> bool:
+		if not self.checkpoint_path or not self.samples:
+			return False
+		try:
+			_atomic_write_json(self.checkpoint_path, self.current_dict())
+			state_path = rls_state_path(self.checkpoint_path)
+			tmp = state_path + ".tmp"
+			with open(tmp, "wb") as f:
+				np.savez(f, theta=self.theta, P=self.P, samples=np.array(self.samples))
+			os.replace(tmp, state_path)
+			logger.info(f"[ANFIS-online] checkpoint: {self.checkpoint_path} ({self.samples} gözlem)")
+			return True
+		except Exception as e:
+			logger.warning(f"[ANFIS-online] checkpoint yazılamadı: {e}")
+			return False
+
+	def _load_rls_state(self, path: str) -> None:
+		"""Aynı kural tabanı için önceki RLS durumundan devam et."""
+		if not os.path.exists(path):
+			return
+		try:
+			with np.load(path) as data:
+				theta, P = data["theta"], data["P"]
+				if theta.shape == self.theta.shape and P.shape == self.P.shape:
+					self.theta, self.P = theta.astype(np.float64), P.astype(np.float64)
+					self.samples = int(data["samples"])
+					logger.info(f"[ANFIS-online] RLS durumu yüklendi: {path} ({self.samples} gözlem)")
+		except Exception as e:
+			logger.debug(f"[ANFIS-online] RLS durumu okunamadı ({path}): {e}")
+
+	def close(self) -> None:
+		if self._since_publish:
+			self.publish()
+		self.checkpoint()
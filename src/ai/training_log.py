@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+ANFIS eğitim logları için tamponlu arka plan yazıcı.
+
+Kontrol döngüsü satırları yalnızca bellek içi kuyruğa bırakır (bloklamaz);
+arka plan iş parçacığı satırları partiler halinde diske yazar. Çıktı biçimleri:
+
+- csv: mevcut `data/signal_training_v2.csv` ile uyumlu (varsayılan)
+- parquet: pyarrow kuruluysa sütunsal Parquet (opsiyonel bağımlılık)
+- npz: parçalı sütunsal NumPy arşivleri (`<kök>.00000.npz`, `<kök>.00001.npz`, ...)
+
+Boyut tabanlı döndürme: dosya `max_bytes`ı aşınca `<kök>.<n>.<uzantı>` olarak
+kenara alınır ve yeni dosya açılır. npz zaten parçalıdır; parça en fazla
+`chunk_rows` satırdır ve bir parça `max_bytes`ı aşarsa sonraki parçaların satır
+sayısı orantılı küçültülür (parça sayısı, döndürülmüş dosyalar gibi sınırsızdır).
+"""
+
+from typing import Any, Dict, List, Optional
+import atexit
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "parquet", "npz")
+
+# Kuyruk işaretleri
+_STOP = object()
+_FLUSH = object()
+
+
+def _rotated_path(path: str, index: int) -> str:
+	root, ext = os.path.splitext(path)
+	return f"{root}.{index}{ext}"
+
+
+def _next_rotation_index(path: str) -> int:
+	idx = 1
+	while os.path.exists(_rotated_path(path, idx)):
+		idx += 1
+	return idx
+
+
+def _columns_from_rows(fieldnames: List[str], rows: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+	cols: Dict[str, List[Any]] = {k: [] for k in fieldnames}
+	for row in rows:
+		for k in fieldnames:
+			cols[k].append(row.get(k))
+	return cols
+
+
+def _is_numeric_column(values: List[Any]) -> bool:
+	for v in values:
+		if v is None:
+			continue
+		if isinstance(v, bool) or not isinstance(v, (int, float)):
+			return False
+	return True
+
+
+class _CsvWriter:
+	def __init__(self, path: str, max_bytes: Optional[int]):
+		self.path = path
+		self.max_bytes = max_bytes
+		self.fieldnames: Optional[List[str]] = None
+		self._fh = None
+		self._writer = None
+
+	def _open(self, fieldnames: List[str]) -> None:
+		d = os.path.dirname(self.path)
+		if d:
+			os.makedirs(d, exist_ok=True)
+		exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+		if exists and self.fieldnames is None:
+			# Mevcut dosyanın başlığıyla hizalan; yeni sütun eklendiyse (şema değişimi)
+			# eski dosya döndürülür ve yeni başlıkla baştan başlanır
+			with open(self.path, "r", newline="", encoding="utf-8") as f:
+				header = next(csv.reader(f), None)
+			if header and not set(fieldnames) - set(header):
+				self.fieldnames = list(header)
+			else:
+				os.replace(self.path, _rotated_path(self.path, _next_rotation_index(self.path)))
+				exists = False
+				self.fieldnames = list(fieldnames)
+		elif self.fieldnames is None:
+			self.fieldnames = list(fieldnames)
+		self._fh = open(self.path, "a", newline="", encoding="utf-8")
+		self._writer = csv.DictWriter(self._fh, fieldnames=self.fieldnames, extrasaction="ignore", restval="")
+		if not exists:
+			self._writer.writeheader()
+
+	def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+		if self._fh is None:
+			self._open(list(rows[0].keys()))
+		self._writer.writerows(rows)
+		self._fh.flush()
+		if self.max_bytes and self._fh.tell() >= self.max_bytes:
+			self._rotate()
+
+	def _rotate(self) -> None:
+		self.close()
+		os.replace(self.path, _rotated_path(self.path, _next_rotation_index(self.path)))
+
+	def close(self) -> None:
+		if self._fh is not None:
+			try:
+				self._fh.close()
+			finally:
+				self._fh = None
+				self._writer = None
+
+
+class _NpzWriter:
+	"""Satırları `chunk_rows` büyüklüğünde sütunsal .npz parçalarına yazar."""
+
+	def __init__(self, path: str, chunk_rows: int, max_bytes: Optional[int] = None):
+		root, _ext = os.path.splitext(path)
+		self.root = root
+		self.chunk_rows = max(1, int(chunk_rows))
+		self.max_bytes = max_bytes
+		self.fieldnames: Optional[List[str]] = None
+		self._pending: List[Dict[str, Any]] = []
+		self._index = 0
+		while os.path.exists(self._chunk_path(self._index)):
+			self._index += 1
+
+	def _chunk_path(self, index: int) -> str:
+		return f"{self.root}.{index:05d}.npz"
+
+	def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+		if self.fieldnames is None:
+			self.fieldnames = list(rows[0].keys())
+		self._pending.extend(rows)
+		while len(self._pending) >= self.chunk_rows:
+			chunk, self._pending = self._pending[:self.chunk_rows], self._pending[self.chunk_rows:]
+			self._write_chunk(chunk)
+
+	def _write_chunk(self, rows: List[Dict[str, Any]]) -> None:
+		import numpy as np
+		cols = _columns_from_rows(self.fieldnames or [], rows)
+		arrays = {}
+		for k, values in cols.items():
+			if _is_numeric_column(values):
+				arrays[k] = np.array([float("nan") if v is None else float(v) for v in values], dtype=np.float64)
+			else:
+				arrays[k] = np.array(["" if v is None else str(v) for v in values], dtype=str)
+		d = os.path.dirname(self.root)
+		if d:
+			os.makedirs(d, exist_ok=True)
+		tmp = self._chunk_path(self._index) + ".tmp"
+		with open(tmp, "wb") as f:
+			np.savez_compressed(f, **arrays)
+		os.replace(tmp, self._chunk_path(self._index))
+		if self.max_bytes:
+			size = os.path.getsize(self._chunk_path(self._index))
+			if size > self.max_bytes:
+				self.chunk_rows = max(1, int(len(rows) * self.max_bytes / size))
+		self._index += 1
+
+	def close(self) -> None:
+		if self._pending:
+			chunk, self._pending = self._pending, []
+			self._write_chunk(chunk)
+
+
+class _ParquetWriter:
+	def __init__(self, path: str, max_bytes: Optional[int]):
+		import pyarrow  # noqa: F401  (kurulu değilse burada ImportError)
+		root, ext = os.path.splitext(path)
+		self.path = root + ".parquet" if ext != ".parquet" else path
+		self.max_bytes = max_bytes
+		self.fieldnames: Optional[List[str]] = None
+		self._writer = None
+		self._schema = None
+
+	def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+		if self.fieldnames is None:
+			self.fieldnames = list(rows[0].keys())
+		cols = _columns_from_rows(self.fieldnames, rows)
+		arrays = {}
+		for k, values in cols.items():
+			if _is_numeric_column(values):
+				arrays[k] = pa.array([None if v is None else float(v) for v in values], type=pa.float64())
+			else:
+				arrays[k] = pa.array(["" if v is None else str(v) for v in values], type=pa.string())
+		table = pa.table(arrays)
+		if self._writer is None:
+			if os.path.exists(self.path):
+				os.replace(self.path, _rotated_path(self.path, _next_rotation_index(self.path)))
+			d = os.path.dirname(self.path)
+			if d:
+				os.makedirs(d, exist_ok=True)
+			self._schema = table.schema
+			self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+		self._writer.write_table(table.cast(self._schema))
+		if self.max_bytes and os.path.getsize(self.path) >= self.max_bytes:
+			self.close()
+
+	def close(self) -> None:
+		if self._writer is not None:
+			try:
+				self._writer.close()
+			finally:
+				self._writer = None
+
+
+class TrainingLogSink:
+	"""Bloklamayan eğitim logu hedefi.
+
+	`put` yalnızca kuyruğa ekler; kuyruk doluysa satır düşürülür ve `dropped`
+	sayacı artar (kontrol döngüsü asla beklemez). Sayaç hem üretici hem yazıcı iş
+	parçacığından artırıldığı için kilitle güncellenir. Yazım, `batch_size` satır
+	birikince veya `flush_interval_s` dolunca arka planda yapılır.
+	"""
+
+	def __init__(
+		self,
+		path: str,
+		fmt: str = "csv",
+		batch_size: int = 256,
+		flush_interval_s: float = 1.0,
+		max_queue: int = 100000,
+		max_bytes: Optional[int] = 64 * 1024 * 1024,
+		chunk_rows: int = 8192,
+	):
+		fmt = (fmt or "csv").lower()
+		if fmt not in FORMATS:
+			raise ValueError(f"Bilinmeyen log biçimi: {fmt} (seçenekler: {', '.join(FORMATS)})")
+		self.path = path
+		self.fmt = fmt
+		self.batch_size = max(1, int(batch_size))
+		self.flush_interval_s = max(0.01, float(flush_interval_s))
+		self.written = 0
+		self.dropped = 0
+		self._dropped_lock = threading.Lock()
+		self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+		self._writer = self._make_writer(fmt, path, max_bytes, chunk_rows)
+		self._closed = False
+		self._flushed = threading.Event()
+		self._thread = threading.Thread(target=self._run, name=f"training-log:{os.path.basename(path)}", daemon=True)
+		self._thread.start()
+		atexit.register(self.close)
+
+	@staticmethod
+	def _make_writer(fmt: str, path: str, max_bytes: Optional[int], chunk_rows: int):
+		if fmt == "parquet":
+			try:
+				return _ParquetWriter(path, max_bytes)
+			except ImportError:
+				logger.warning("pyarrow bulunamadı; eğitim logları .npz parçalarına yazılacak")
+				return _NpzWriter(path, chunk_rows, max_bytes)
+		if fmt == "npz":
+			return _NpzWriter(path, chunk_rows, max_bytes)
+		return _CsvWriter(path, max_bytes)
+
+	def put(self, row: Dict[str, Any]) -> bool:
+		if self._closed:
+			return False
+		try:
+			self._queue.put_nowait(row)
+			return True
+		except queue.Full:
+			self._count_dropped(1)
+			return False
+
+	def _count_dropped(self, n: int) -> None:
+		with self._dropped_lock:
+			self.dropped += n
+
+	def _write(self, batch: List[Dict[str, Any]]) -> None:
+		if not batch:
+			return
+		try:
+			self._writer.write_batch(batch)
+			self.written += len(batch)
+		except Exception as e:
+			self._count_dropped(len(batch))
+			logger.debug(f"[TrainingLog] yazım hatası ({self.path}): {e}")
+
+	def _run(self) -> None:
+		batch: List[Dict[str, Any]] = []
+		deadline = time.monotonic() + self.flush_interval_s
+		while True:
+			try:
+				item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+			except queue.Empty:
+				item = None
+			stop = item is _STOP
+			flush = item is _FLUSH
+			if item is not None and not stop and not flush:
+				batch.append(item)
+			if stop or flush or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+				self._write(batch)
+				batch = []
+				deadline = time.monotonic() + self.flush_interval_s
+				if stop or flush:
+					self._flushed.set()
+				if stop:
+					return
+
+	def flush(self, timeout: float = 5.0) -> None:
+		"""Kuyruktaki satırların diske yazılmasını bekle (kontrol döngüsünde kullanmayın)."""
+		if self._closed:
+			return
+		self._flushed.clear()
+		try:
+			self._queue.put(_FLUSH, timeout=timeout)
+		except queue.Full:
+			return
+		self._flushed.wait(timeout)
+
+	def close(self, timeout: float = 5.0) -> None:
+		if self._closed:
+			return
+		self._closed = True
+		try:
+			self._flushed.clear()
+			self._queue.put(_STOP, timeout=timeout)
+		except queue.Full:
+			pass
+		self._thread.join(timeout)
+		try:
+			self._writer.close()
+		except Exception:
+			pass
+		try:
+			atexit.unregister(self.close)
+		except Exception:
+			pass
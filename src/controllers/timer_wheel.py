@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Hiyerarşik zamanlayıcı çarkı (timer wheel).
+
+Amaç: ambulans/TLS çiftleri için bir sonraki karar kontrolünü simülasyon
+zamanında planlamak. Her adımda tüm adayları yoklamak yerine yalnızca vadesi
+gelen anahtarlar döner; ekleme/iptal O(1), ilerletme tik başına O(1) (amortize).
+
+Yapı: `levels` seviye, her seviyede `slots` yuva. Seviye l'deki bir yuva
+slots**l tik kapsar. Üst seviyedeki yuvalar, alt seviye tur tamamladıkça
+aşağıya "cascade" edilir (Linux çekirdeği zamanlayıcılarındaki gibi).
+"""
+
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class TimerWheel:
+	"""Simülasyon zamanlı hiyerarşik zamanlayıcı çarkı.
+
+	- tick_s: çözünürlük (s); simülasyon adımıyla aynı tutulması önerilir (0.1 s)
+	- slots: seviye başına yuva sayısı (2'nin kuvveti)
+	- levels: seviye sayısı; ufuk = slots**levels tik, ötesi taşma listesine gider
+	"""
+
+	def __init__(self, tick_s: float = 0.1, slots: int = 64, levels: int = 4):
+		if slots < 2 or (slots & (slots - 1)) != 0:
+			raise ValueError("slots 2'nin kuvveti olmalı")
+		self.tick_s = float(tick_s)
+		self.slots = int(slots)
+		self.levels = max(1, int(levels))
+		self._bits = self.slots.bit_length() - 1
+		self._mask = self.slots - 1
+		self._wheel: List[List[List[Tuple[int, Hashable, int]]]] = [
+			[[] for _ in range(self.slots)] for _ in range(self.levels)
+		]
+		self._overflow: List[Tuple[int, Hashable, int]] = []
+		self._now = 0  # son işlenen tik
+		self._started = False
+		# anahtar -> (vade tiki, nesil); iptal/yeniden planlama tembel yapılır
+		self._entries: Dict[Hashable, Tuple[int, int]] = {}
+		self._gen = 0
+
+	# -------------------- Zaman dönüşümleri --------------------
+	def _to_tick(self, t: float) -> int:
+		# Kayan nokta gürültüsüne karşı küçük pay (27.700000000000003 gibi)
+		return int(float(t) / self.tick_s + 1e-6)
+
+	def now(self) -> float:
+		return self._now * self.tick_s
+
+	# -------------------- Ekleme / iptal --------------------
+	def _place(self, expiry: int, key: Hashable, gen: int) -> None:
+		delta = expiry - self._now
+		if delta < 0:
+			delta = 0
+			expiry = self._now
+		for level in range(self.levels):
+			if delta < (1 << (self._bits * (level + 1))):
+				slot = (expiry >> (self._bits * level)) & self._mask
+				self._wheel[level][slot].append((expiry, key, gen))
+				return
+		self._overflow.append((expiry, key, gen))
+
+	def schedule(self, key: Hashable, due_time: float) -> None:
+		"""`key` için vadeyi (s) ayarla; önceki vade varsa geçersiz olur."""
+		expiry = self._to_tick(due_time)
+		# Aynı tikte zaten işlenmiş yuvaya düşmemek için en erken bir sonraki tik
+		if expiry <= self._now:
+			expiry = self._now + 1
+		self._gen += 1
+		self._entries[key] = (expiry, self._gen)
+		self._place(expiry, key, self._gen)
+
+	def cancel(self, key: Hashable) -> None:
+		self._entries.pop(key, None)
+
+	def is_scheduled(self, key: Hashable) -> bool:
+		return key in self._entries
+
+	def due_time(self, key: Hashable) -> Optional[float]:
+		ent = self._entries.get(key)
+		return ent[0] * self.tick_s if ent else None
+
+	def next_due_time(self) -> Optional[float]:
+		"""En erken vade (s). O(n) – sadece adım atlama kararları için kullanılır."""
+		if not self._entries:
+			return None
+		return min(exp for exp, _ in self._entries.values()) * self.tick_s
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	# -------------------- İlerletme --------------------
+	def _cascade(self, level: int) -> None:
+		slot = (self._now >> (self._bits * level)) & self._mask
+		bucket = self._wheel[level][slot]
+		if not bucket:
+			return
+		self._wheel[level][slot] = []
+		for expiry, key, gen in bucket:
+			self._place(expiry, key, gen)
+
+	def _fire_slot(self, fired: List[Hashable]) -> None:
+		slot = self._now & self._mask
+		bucket = self._wheel[0][slot]
+		if not bucket:
+			return
+		self._wheel[0][slot] = []
+		for expiry, key, gen in bucket:
+			ent = self._entries.get(key)
+			if ent is None or ent[1] != gen:
+				continue  # iptal edilmiş veya yeniden planlanmış
+			if expiry > self._now:
+				self._place(expiry, key, gen)
+				continue
+			del self._entries[key]
+			fired.append(key)
+
+	def advance(self, now_s: float) -> List[Hashable]:
+		"""Çarkı `now_s` anına kadar ilerlet; vadesi gelen anahtarları döndür."""
+		target = self._to_tick(now_s)
+		fired: List[Hashable] = []
+		if not self._started:
+			# İlk ilerletmede saat `target`a sıçrar; önceden planlananları yeniden yerleştir
+			self._started = True
+			self._now = target
+			self._wheel = [[[] for _ in range(self.slots)] for _ in range(self.levels)]
+			self._overflow = []
+			for key, (expiry, gen) in list(self._entries.items()):
+				self._place(expiry, key, gen)
+			self._fire_slot(fired)
+			return fired
+		if target <= self._now:
+			return fired
+		# Boş çarkta tik tik gitmeye gerek yok
+		if not self._entries:
+			self._now = target
+			return fired
+		while self._now < target:
+			self._now += 1
+			# Alt seviye tur tamamladıysa üst seviyeleri aşağı indir
+			level = 1
+			while level < self.levels and (self._now & ((1 << (self._bits * level)) - 1)) == 0:
+				self._cascade(level)
+				level += 1
+			if level == self.levels and self._overflow:
+				pending, self._overflow = self._overflow, []
+				for expiry, key, gen in pending:
+					self._place(expiry, key, gen)
+			self._fire_slot(fired)
+			if not self._entries:
+				self._now = target
+				break
+		return fired
+
+
+def next_check_delay(dist_m: float, speed_ms: float, threshold_m: float, min_delay_s: float, max_delay_s: float, speed_floor_ms: float = 2.0) -> float:
+	"""Mesafe eşiği aşılana kadar geçecek en kısa süreyi (s) kestir.
+
+	Ambulans `threshold_m` dışındaysa eşiğe en erken ne zaman varacağı; içindeyse
+	en kısa aralık döner. Hızlanmaya karşı güvenlik için hıza alt sınır uygulanır
+	ve sonuç [min_delay_s, max_delay_s] aralığına kırpılır.
+	"""
+	try:
+		d = float(dist_m)
+		v = max(float(speed_floor_ms), float(speed_ms))
+	except Exception:
+		return float(min_delay_s)
+	if d != d:  # NaN
+		return float(min_delay_s)
+	gap = d - float(threshold_m)
+	if gap <= 0.0:
+		return float(min_delay_s)
+	return float(max(min_delay_s, min(max_delay_s, gap / v)))
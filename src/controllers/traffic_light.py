@@ -6,25 +6,57 @@ Amaç: Ambulans yaklaşımı için fazı ayarlamak ve yeşili korumak. XGBoost k
 tetikleme ve yeşil uzatmayı ANFIS çıkarımı ile yapıyoruz.
 """
 
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Tuple
 import os
 import logging
 
 from src.ai.anfis import AnfisModel
+from src.ai.model_registry import ModelRegistry, model_version_of
+from src.ai.online_anfis import OnlineAnfisLearner
+from src.ai.training_log import TrainingLogSink
+from src.controllers.timer_wheel import TimerWheel, next_check_delay
+from src.telemetry.profiler import PROFILER
+from src.telemetry import trace
+from src.telemetry.trace import TRACE
 
 logger = logging.getLogger(__name__)
 
 
 class TrafficLightController:
-	def __init__(self, main_junction_id: Optional[str] = None, anfis_model_path: Optional[str] = None):
+	def __init__(self, main_junction_id: Optional[str] = None, anfis_model_path: Optional[str] = None, event_driven_checks: bool = True, check_tick_s: float = 0.1, max_check_interval_s: float = 2.0, training_log_format: str = "csv", anfis_lut: Optional[Dict[str, float]] = None, training_log_dir: str = "data"):
 		self.main_junction_id = main_junction_id
 		self.normal_programs: Dict[str, str] = {}
 		self.last_actions: Dict[str, Tuple[float, str]] = {}
 		self.last_state_applied: Dict[str, str] = {}
 		self.active_priority: Dict[str, Dict[str, Any]] = {}
+		self._links_cache: Dict[str, Any] = {}
+		# Olay güdümlü kontrol: (ambulans, TLS) çiftleri kararın değişebileceği ana
+		# kadar yeniden sorgulanmaz. Vade, ETA/hızdan `check_wheel` üzerinde planlanır.
+		self.event_driven_checks = bool(event_driven_checks)
+		self.check_wheel = TimerWheel(tick_s=check_tick_s)
+		self.min_check_interval_s = float(check_tick_s)
+		self.max_check_interval_s = float(max_check_interval_s)
+		self.check_stats: Dict[str, int] = {
+			"trigger_checks": 0,
+			"trigger_skipped": 0,
+			"maintain_checks": 0,
+			"maintain_skipped": 0,
+		}
+		# Eğitim logları: satırlar kuyruğa bırakılır, arka planda partiler halinde yazılır
+		self.training_log_format = training_log_format
+		self.training_log_dir = training_log_dir
+		self._training_sinks: Dict[str, TrainingLogSink] = {}
 		try:
 			model_file = anfis_model_path or os.environ.get("ANFIS_MODEL", "models/anfis.json")
-			self.anfis_model = AnfisModel(model_file if os.path.exists(model_file) else None)
+			# anfis_lut: {"resolution": ..., "error_bound": ...} verilirse karar yüzeyi tablosu kullanılır
+			lut_opts = {}
+			if anfis_lut is not None:
+				lut_opts = {
+					"use_lut": True,
+					"lut_resolution": int(anfis_lut.get("resolution", 8)),
+					"lut_error_bound": float(anfis_lut.get("error_bound", 0.02)),
+				}
+			self.anfis_model = AnfisModel(model_file if os.path.exists(model_file) else None, **lut_opts)
 			if self.anfis_model and self.anfis_model.loaded:
 				logger.info(f"ANFIS model yüklendi: {model_file}")
 			else:
@@ -32,6 +64,113 @@ class TrafficLightController:
 		except Exception as e:
 			logger.warning(f"ANFIS init hatası: {e}")
 			self.anfis_model = AnfisModel(None)
+			model_file = None
+		# Karar loglarındaki model sürümü (dosya içeriği özeti)
+		self.model_version = model_version_of(model_file if self.anfis_model.loaded else None)
+		# Sürümlü kayıt defteri (opsiyonel): sıcak yeniden yükleme ve TLS başına A/B
+		self.model_registry: Optional[ModelRegistry] = None
+		# Çevrimiçi öğrenme (opsiyonel): öncelik başlangıcı -> kavşak geçişi gözlemleri
+		self.online_learner: Optional[OnlineAnfisLearner] = None
+		self._online_base_version = self.model_version
+		self._pending_outcomes: Dict[Tuple[str, str], Tuple[Dict[str, float], float]] = {}
+
+	# -------------------- Model yönetimi --------------------
+	def attach_model_registry(self, registry: ModelRegistry) -> None:
+		"""Kararlar bundan sonra TLS'nin A/B varyantındaki etkin modelle verilir."""
+		self.model_registry = registry
+
+	def _model_for(self, junction_id: str) -> Tuple[AnfisModel, str]:
+		"""TLS için (model, sürüm); kayıt defteri yoksa tek model."""
+		if self.model_registry is not None:
+			mv = self.model_registry.model_for(str(junction_id))
+			return mv.model, f"{mv.variant}:{mv.version}"
+		return self.anfis_model, self.model_version
+
+	def set_model(self, model: AnfisModel, version: Optional[str] = None) -> None:
+		"""Yeni modeli devreye al (tek referans ataması; sonraki kararlar yeni modeli kullanır).
+
+		Kayıt defteri bağlıysa model varsayılan varyanta bekleyen sürüm olarak
+		bırakılır ve bir sonraki `swap_pending` ile adımlar arasında etkinleşir.
+		"""
+		if version is None and self.online_learner is not None:
+			version = f"{self._online_base_version}+rls{self.online_learner.swaps + 1}"
+		version = version or "manual"
+		if self.model_registry is not None:
+			variant = next(iter(self.model_registry.variants))
+			self.model_registry.stage(variant, model, version)
+			return
+		self.anfis_model = model
+		self.model_version = version
+
+	def enable_online_learning(self, **opts: Any) -> OnlineAnfisLearner:
+		"""Uzatma kuralları için RLS tabanlı çevrimiçi öğrenmeyi başlat."""
+		base = self.anfis_model
+		self._online_base_version = self.model_version
+		if self.model_registry is not None:
+			mv = self.model_registry.active[next(iter(self.model_registry.variants))]
+			base, self._online_base_version = mv.model, mv.version
+		if getattr(base, "use_lut", False):
+			logger.info("[ANFIS-online] güncellenen modeller LUT'suz (kesin çıkarım) çalışır")
+		self.online_learner = OnlineAnfisLearner(base, on_swap=self.set_model, **opts)
+		return self.online_learner
+
+	def _note_priority_start(self, junction_id: str, ambulance_id: Optional[str], feats: Dict[str, float], sim_time: float) -> None:
+		if self.online_learner is None or not ambulance_id:
+			return
+		self._pending_outcomes.setdefault((str(junction_id), str(ambulance_id)), (dict(feats), float(sim_time)))
+
+	def _note_priority_passed(self, junction_id: str, ambulance_id: str, sim_time: Optional[float]) -> None:
+		pending = self._pending_outcomes.pop((str(junction_id), str(ambulance_id)), None)
+		if pending is None or self.online_learner is None:
+			return
+		try:
+			if sim_time is None:
+				import traci
+				sim_time = float(traci.simulation.getTime())
+			feats, t0 = pending
+			err = self.online_learner.observe_outcome(feats, t0, sim_time)
+			logger.debug(f"[ANFIS-online] tl={junction_id} amb={ambulance_id} geçiş={sim_time - t0:.1f}s hata={err:+.2f}s")
+		except Exception as e:
+			logger.debug(f"[ANFIS-online] güncelleme hatası: {e}")
+
+	# -------------------- Durum anlık görüntüsü --------------------
+	def state_dict(self) -> Dict[str, Any]:
+		"""Işık öncelik durumu (JSON'a yazılabilir); sıcak başlatmada `load_state_dict` ile geri yüklenir."""
+		return {
+			"normal_programs": dict(self.normal_programs),
+			"active_priority": {str(tl): dict(info) for tl, info in self.active_priority.items()},
+			"last_state_applied": dict(self.last_state_applied),
+			"check_stats": dict(self.check_stats),
+		}
+
+	def load_state_dict(self, state: Dict[str, Any]) -> None:
+		"""Öncelik durumunu geri yükle. Kontrol vadeleri boşaltılır: süren öncelikler ilk
+		bakımda yeniden uygulanır, tetikleme kontrolleri hemen vadelidir."""
+		self.normal_programs = {str(k): str(v) for k, v in (state.get("normal_programs") or {}).items()}
+		self.active_priority = {str(k): dict(v) for k, v in (state.get("active_priority") or {}).items()}
+		self.last_state_applied = {str(k): str(v) for k, v in (state.get("last_state_applied") or {}).items()}
+		self.check_stats.update({k: int(v) for k, v in (state.get("check_stats") or {}).items() if k in self.check_stats})
+		self.check_wheel = TimerWheel(tick_s=self.check_wheel.tick_s)
+		self._pending_outcomes.clear()
+
+	# -------------------- Olay güdümlü kontrol planlama --------------------
+	def _check_due(self, key: Tuple[str, ...], sim_time: float) -> bool:
+		"""Anahtar için kontrol zamanı geldi mi? Planlanmamış anahtar hemen vadelidir."""
+		if not self.event_driven_checks:
+			return True
+		self.check_wheel.advance(sim_time)
+		return not self.check_wheel.is_scheduled(key)
+
+	def _schedule_check(self, key: Tuple[str, ...], sim_time: float, delay_s: float) -> None:
+		if self.event_driven_checks:
+			self.check_wheel.schedule(key, float(sim_time) + max(self.min_check_interval_s, float(delay_s)))
+
+	def is_trigger_check_due(self, junction_id: str, ambulance_id: str, sim_time: float) -> bool:
+		"""`should_trigger_priority` bu adımda çağrılmalı mı?"""
+		if self._check_due(("trigger", str(junction_id), str(ambulance_id)), sim_time):
+			return True
+		self.check_stats["trigger_skipped"] += 1
+		return False
 
 	def _list_approach_edges(self, junction_id: str) -> Dict[int, str]:
 		try:
@@ -127,30 +266,36 @@ class TrafficLightController:
 			pass
 		return feats
 
-	def _log_dir_training_row(self, feats: Dict[str, float], label_select: int, y_extend: float, junction_id: str, approach_edge_id: str, sim_time: float) -> None:
-		import os, csv
-		log_path = os.path.join("data", "dir_training.csv")
-		os.makedirs(os.path.dirname(log_path), exist_ok=True)
-		row = {**feats, "label_select": int(label_select), "y_extend": float(y_extend), "junction_id": junction_id, "approach_edge_id": approach_edge_id, "t": float(sim_time)}
-		write_header = not os.path.exists(log_path) or os.path.getsize(log_path) == 0
-		with open(log_path, "a", newline="", encoding="utf-8") as f:
-			w = csv.DictWriter(f, fieldnames=list(row.keys()))
-			if write_header:
-				w.writeheader()
-			w.writerow(row)
-
-	def _log_signal_training_row(self, feats: Dict[str, float], y_extend: float, junction_id: str, approach_edge_id: str, sim_time: float, action: str = "extend") -> None:
-		import os, csv
+	def _training_sink(self, log_path: str) -> TrainingLogSink:
+		sink = self._training_sinks.get(log_path)
+		if sink is None:
+			sink = TrainingLogSink(log_path, fmt=self.training_log_format)
+			self._training_sinks[log_path] = sink
+		return sink
+
+	def close(self) -> None:
+		"""Eğitim log kuyruklarını boşalt, yazıcıları kapat ve çevrimiçi modeli kaydet."""
+		if self.online_learner is not None:
+			try:
+				self.online_learner.close()
+			except Exception as e:
+				logger.warning(f"[ANFIS-online] kapanış hatası: {e}")
+		for path, sink in list(self._training_sinks.items()):
+			sink.close()
+			if sink.dropped:
+				logger.warning(f"[TrainingLog] {path}: {sink.dropped} satır düşürüldü")
+		self._training_sinks.clear()
+
+	def _log_dir_training_row(self, feats: Dict[str, float], label_select: int, y_extend: float, junction_id: str, approach_edge_id: str, sim_time: float, model_version: str = "") -> None:
+		log_path = os.path.join(self.training_log_dir, "dir_training.csv")
+		row = {**feats, "label_select": int(label_select), "y_extend": float(y_extend), "junction_id": junction_id, "approach_edge_id": approach_edge_id, "t": float(sim_time), "model_version": model_version}
+		self._training_sink(log_path).put(row)
+
+	def _log_signal_training_row(self, feats: Dict[str, float], y_extend: float, junction_id: str, approach_edge_id: str, sim_time: float, action: str = "extend", model_version: str = "") -> None:
 		# v2: Yeni şema (ANFIS) — eski dosyayla karışmayı önlemek için ayrı dosya
-		log_path = os.path.join("data", "signal_training_v2.csv")
-		os.makedirs(os.path.dirname(log_path), exist_ok=True)
-		row = {**feats, "y_extend": float(y_extend), "action": str(action), "junction_id": junction_id, "approach_edge_id": approach_edge_id, "t": float(sim_time)}
-		write_header = not os.path.exists(log_path) or os.path.getsize(log_path) == 0
-		with open(log_path, "a", newline="", encoding="utf-8") as f:
-			w = csv.DictWriter(f, fieldnames=list(row.keys()))
-			if write_header:
-				w.writeheader()
-			w.writerow(row)
+		log_path = os.path.join(self.training_log_dir, "signal_training_v2.csv")
+		row = {**feats, "y_extend": float(y_extend), "action": str(action), "junction_id": junction_id, "approach_edge_id": approach_edge_id, "t": float(sim_time), "model_version": model_version}
+		self._training_sink(log_path).put(row)
 
 	def _safe_apply(self, junction_id: str, state_str: str, green_seconds: float) -> bool:
 		try:
@@ -167,8 +312,10 @@ class TrafficLightController:
 			except Exception:
 				edges_by_idx = {}
 			traci.trafficlight.setRedYellowGreenState(junction_id, state_str)
+			PROFILER.count("tls_commands")
 			try:
 				traci.trafficlight.setPhaseDuration(junction_id, float(green_seconds))
+				PROFILER.count("tls_commands")
 			except Exception as e:
 				logger.debug(f"[TL] _safe_apply: setPhaseDuration failed: {e}")
 				try:
@@ -176,10 +323,12 @@ class TrafficLightController:
 					traci.trafficlight.setPhase(junction_id, current_phase)
 				except Exception:
 					pass
+			if TRACE.enabled and prev_state != state_str:
+				TRACE.emit(trace.TL_STATE, tl=junction_id, edge=state_str, a=sum(1 for ch in state_str if ch in 'Gg'), b=sum(1 for ch in state_str if ch in 'rR'))
 			try:
 				greens_on: list = []
 				reds_on: list = []
-				if isinstance(prev_state, str) and len(prev_state) == len(state_str):
+				if logger.isEnabledFor(logging.INFO) and isinstance(prev_state, str) and len(prev_state) == len(state_str):
 					for i, ch in enumerate(state_str):
 						prev_ch = prev_state[i]
 						edge_id = edges_by_idx.get(i, f"idx:{i}")
@@ -241,9 +390,10 @@ class TrafficLightController:
 			prev_state = self.last_state_applied.get(traffic_light_id)
 			if prev_state != state_str:
 				logger.info(f"[TL] TRAFİK IŞIĞI DEĞİŞİMİ: tl={traffic_light_id} mesafe={dist_to_tls:.1f}m | Yeşil: {green_count} yön, Kırmızı: {red_count} yön | State: {state_str}")
-			# ANFIS tahminli yeşil süresi
+			# ANFIS tahminli yeşil süresi (TLS'nin A/B varyantındaki etkin model)
+			model, model_version = self._model_for(traffic_light_id)
 			try:
-				if self.anfis_model is not None:
+				if model is not None:
 					feats_for_extend = {
 						"dist_to_tls": dist_to_tls,
 						"ambulance_speed": float(traci.vehicle.getSpeed(ambulance_id)) if ambulance_id else 0.0,
@@ -262,12 +412,18 @@ class TrafficLightController:
 						feats_for_extend["queue_length"] = qsum
 					except Exception:
 						pass
-					green_seconds = float(self.anfis_model.predict_extend_seconds(feats_for_extend))
+					green_seconds = float(model.predict_extend_seconds(feats_for_extend))
 			except Exception:
 				pass
 			ok = self._safe_apply(traffic_light_id, state_str, green_seconds)
 			if ok:
+				prev = self.active_priority.get(traffic_light_id)
+				if prev is not None and str(prev.get("ambulance_id") or "") != str(ambulance_id or ""):
+					# Sahip değişti: eski sahibin ETA'sına göre kurulmuş bakım vadesi geçersiz.
+					# İptal edilen anahtar hemen vadelidir; bakım yeni sahibe göre yeniden kurar.
+					self.check_wheel.cancel(("maintain", str(traffic_light_id)))
 				self.active_priority[traffic_light_id] = {"ambulance_id": ambulance_id, "state": state_str}
+				TRACE.emit(trace.PRIORITY, veh=ambulance_id, tl=traffic_light_id, edge=approach_edge_id, a=float(green_seconds))
 				# Eğitim verisi: uygulanan yeşil süresi ve o anki özellikler
 				try:
 					feats_for_log = {
@@ -289,7 +445,8 @@ class TrafficLightController:
 						feats_for_log["queue_length"] = qsum
 					except Exception:
 						pass
-					self._log_signal_training_row(feats_for_log, green_seconds, traffic_light_id, approach_edge_id, float(sim_time) if 'sim_time' in locals() else 0.0, action="extend")
+					self._log_signal_training_row(feats_for_log, green_seconds, traffic_light_id, approach_edge_id, float(sim_time) if 'sim_time' in locals() else 0.0, action="extend", model_version=model_version)
+					self._note_priority_start(traffic_light_id, ambulance_id, feats_for_log, float(sim_time))
 				except Exception:
 					pass
 			return ok
@@ -297,15 +454,24 @@ class TrafficLightController:
 			logger.debug(f"[TL] set_ambulance_priority error: {e}")
 			return False
 
-	def maintain_active_priorities(self, release_distance_m: float = 50.0, keep_green_seconds: float = 1.5) -> None:
+	def maintain_active_priorities(self, release_distance_m: float = 50.0, keep_green_seconds: float = 1.5, sim_time: Optional[float] = None) -> None:
 		try:
 			import traci, math
 			to_restore = []
+			if sim_time is None and self.event_driven_checks and self.active_priority:
+				sim_time = float(traci.simulation.getTime())
+			veh_ids = None
 			for tl_id, info in list(self.active_priority.items()):
 				amb_id = str(info.get("ambulance_id") or "")
 				state_str = str(info.get("state") or "")
+				m_key = ("maintain", str(tl_id))
+				if sim_time is not None and not self._check_due(m_key, sim_time):
+					self.check_stats["maintain_skipped"] += 1
+					continue
+				self.check_stats["maintain_checks"] += 1
 				try:
-					veh_ids = set(traci.vehicle.getIDList())
+					if veh_ids is None:
+						veh_ids = set(traci.vehicle.getIDList())
 					if not amb_id or amb_id not in veh_ids:
 						to_restore.append(tl_id)
 						continue
@@ -326,15 +492,33 @@ class TrafficLightController:
 				except Exception:
 					to_restore.append(tl_id)
 					continue
+				if not is_upcoming:
+					self._note_priority_passed(tl_id, amb_id, sim_time)
 				if is_upcoming or (d <= float(release_distance_m)):
 					if state_str:
 						self._safe_apply(tl_id, state_str, float(keep_green_seconds))
+					if sim_time is not None:
+						# Yeşil, keep_green süresi dolmadan yenilenmeli; kavşağı geçmiş
+						# ambulans için serbest bırakma mesafesine varış da beklenmez.
+						delay = 0.5 * float(keep_green_seconds)
+						if not is_upcoming:
+							try:
+								v = max(1.0, float(traci.vehicle.getSpeed(amb_id)))
+								delay = min(delay, max(0.0, float(release_distance_m) - d) / v)
+							except Exception:
+								pass
+						self._schedule_check(m_key, sim_time, delay)
 				else:
 					to_restore.append(tl_id)
 			for tl_id in to_restore:
-				if self.restore(tl_id):
+				amb_id = str(self.active_priority.get(tl_id, {}).get("ambulance_id") or "")
+				self._pending_outcomes.pop((str(tl_id), amb_id), None)
+				restored = self.restore(tl_id)
+				TRACE.emit(trace.RELEASE, veh=amb_id, tl=tl_id, c=int(restored))
+				if restored:
 					logger.info(f"[TL] Öncelik sonlandırıldı ve normale döndü: tl={tl_id}")
 				self.active_priority.pop(tl_id, None)
+				self.check_wheel.cancel(("maintain", str(tl_id)))
 		except Exception as e:
 			logger.debug(f"[TL] maintain_active_priorities error: {e}")
 
@@ -345,6 +529,7 @@ class TrafficLightController:
 			if prog is None:
 				return True
 			traci.trafficlight.setProgram(junction_id, prog)
+			PROFILER.count("tls_commands")
 			return True
 		except Exception:
 			return False
@@ -362,6 +547,15 @@ class TrafficLightController:
 		except Exception:
 			return ""
 
+	def _controlled_links(self, junction_id: str):
+		"""TLS bağlantıları statik; TLS başına bir kez sorgulanır."""
+		links = self._links_cache.get(junction_id)
+		if links is None:
+			import traci
+			links = traci.trafficlight.getControlledLinks(junction_id)
+			self._links_cache[junction_id] = links
+		return links
+
 	def should_trigger_priority(self, junction_id: str, approach_edge_id: str, sim_time: float, ambulance_id: str = None) -> bool:
 		try:
 			import traci
@@ -369,7 +563,7 @@ class TrafficLightController:
 				return False
 			dist_to_tls = float('inf')
 			v_ms = 0.0
-			queue_len_m = 0.0
+			ambulance_lane = None
 			try:
 				next_tls = traci.vehicle.getNextTLS(ambulance_id)
 				if next_tls:
@@ -381,41 +575,112 @@ class TrafficLightController:
 			except Exception:
 				pass
 			try:
-				ambulance_lane = None
+				ambulance_lane = traci.vehicle.getLaneID(ambulance_id)
+			except Exception:
+				pass
+			return self.should_trigger_priority_batch([(junction_id, approach_edge_id, ambulance_id, dist_to_tls, v_ms, ambulance_lane)], sim_time)[0]
+		except Exception:
+			return False
+
+	def should_trigger_priority_batch(self, candidates: List[Tuple[str, str, str, float, float, Optional[str]]], sim_time: float) -> List[bool]:
+		"""Birden çok (TLS, yaklaşım, ambulans) için tetikleme kararı.
+
+		candidates: [(tl_id, approach_edge, ambulance_id, dist_to_tls, speed, lane_id)];
+		mesafe/hız çağıranın elindeki (ör. abonelik) değerlerdir. TLS faz bilgisi ve
+		şerit doluluğu çağrı içinde bir kez okunur; çıkarım model başına tek partidir.
+		"""
+		decisions = [False] * len(candidates)
+		try:
+			import traci
+		except Exception:
+			return decisions
+		tls_info: Dict[str, Optional[Tuple[float, float]]] = {}
+		lane_veh: Dict[str, float] = {}
+
+		def lane_count(lane_id: str) -> float:
+			n = lane_veh.get(lane_id)
+			if n is None:
 				try:
-					ambulance_lane = traci.vehicle.getLaneID(ambulance_id)
+					n = float(traci.lane.getLastStepVehicleNumber(lane_id))
 				except Exception:
-					pass
-				links_loc = traci.trafficlight.getControlledLinks(junction_id)
-				for group in links_loc:
+					n = 0.0
+				lane_veh[lane_id] = n
+			return n
+
+		feats: List[Optional[Dict[str, float]]] = []
+		for junction_id, approach_edge_id, ambulance_id, dist_to_tls, v_ms, ambulance_lane in candidates:
+			if junction_id not in tls_info:
+				try:
+					tls_info[junction_id] = (
+						float(traci.trafficlight.getPhase(junction_id)),
+						max(0.0, float(traci.trafficlight.getNextSwitch(junction_id)) - sim_time),
+					)
+				except Exception:
+					tls_info[junction_id] = None
+			info = tls_info[junction_id]
+			if info is None or not ambulance_id:
+				feats.append(None)
+				continue
+			queue_len_m = 0.0
+			try:
+				for group in self._controlled_links(junction_id):
 					for in_lane, _out_lane, _via in group:
 						if approach_edge_id and in_lane.startswith(approach_edge_id + "_"):
-							queue_len_m += float(traci.lane.getLastStepVehicleNumber(in_lane)) * 7.5
+							queue_len_m += lane_count(in_lane) * 7.5
 						elif ambulance_lane and in_lane == ambulance_lane:
-							queue_len_m += float(traci.lane.getLastStepVehicleNumber(in_lane)) * 7.5
+							queue_len_m += lane_count(in_lane) * 7.5
 			except Exception:
 				pass
-			features = {
+			dist_to_tls, v_ms = float(dist_to_tls), float(v_ms)
+			feats.append({
 				"dist_to_tls": dist_to_tls,
 				"ambulance_speed": v_ms,
 				"queue_length": queue_len_m,
 				"eta_seconds": (dist_to_tls / max(0.5, v_ms)) if v_ms > 0.01 else 9999.0,
-				"phase_index": float(traci.trafficlight.getPhase(junction_id)),
-				"phase_remaining": max(0.0, float(traci.trafficlight.getNextSwitch(junction_id)) - sim_time)
-			}
-			prob = 0.0
+				"phase_index": info[0],
+				"phase_remaining": info[1],
+			})
+		# Model (A/B varyantı) başına tek toplu çıkarım
+		groups: Dict[int, Tuple[AnfisModel, List[int]]] = {}
+		for i, f in enumerate(feats):
+			if f is None:
+				continue
+			model, _version = self._model_for(candidates[i][0])
+			groups.setdefault(id(model), (model, []))[1].append(i)
+		probs: Dict[int, float] = {}
+		for model, idxs in groups.values():
 			try:
-				prob = float(self.anfis_model.predict_trigger_prob(features)) if self.anfis_model else 0.0
+				with PROFILER.timer("anfis"):
+					if len(idxs) == 1:
+						p = [float(model.predict_trigger_prob(feats[idxs[0]]))]
+					else:
+						p = model.predict_trigger_prob_batch([feats[i] for i in idxs]).tolist()
 			except Exception:
-				prob = 0.0
+				p = [0.0] * len(idxs)
+			for i, pi in zip(idxs, p):
+				probs[i] = float(pi)
+		for i, f in enumerate(feats):
+			if f is None:
+				continue
+			junction_id, _edge, ambulance_id = candidates[i][0], candidates[i][1], candidates[i][2]
+			model, _version = self._model_for(junction_id)
+			prob = probs.get(i, 0.0)
+			dist_to_tls, v_ms = f["dist_to_tls"], f["ambulance_speed"]
 			# Eşikler: model parametrelerinden
-			thr = float(getattr(self.anfis_model, 'params', {}).get('trigger_threshold', 0.5)) if self.anfis_model else 0.5
-			near_force = float(getattr(self.anfis_model, 'params', {}).get('near_force_distance_m', 200.0)) if self.anfis_model else 200.0
+			thr = float(getattr(model, 'params', {}).get('trigger_threshold', 0.5)) if model else 0.5
+			near_force = float(getattr(model, 'params', {}).get('near_force_distance_m', 200.0)) if model else 200.0
 			# Yakınsa zorla tetikleme eşiği
+			forced = False
 			if prob <= thr and dist_to_tls <= near_force:
 				prob = thr + 1e-3
-			return prob > thr
-		except Exception:
-			return False
-
-
+				forced = True
+			self.check_stats["trigger_checks"] += 1
+			# Bir sonraki kontrol: zorlamalı tetikleme kavşak geçilene kadar değişmez;
+			# aksi halde ambulansın near_force eşiğine en erken varış anına kadar beklenir.
+			if forced:
+				delay = self.max_check_interval_s
+			else:
+				delay = next_check_delay(dist_to_tls, v_ms, near_force, self.min_check_interval_s, self.max_check_interval_s)
+			self._schedule_check(("trigger", str(junction_id), str(ambulance_id)), sim_time, delay)
+			decisions[i] = prob > thr
+		return decisions
@@ -0,0 +1 @@
+# Simulation-in-the-loop experiments (headless runs, KPI extraction, tuning)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Simülasyon koşu önbelleği.
+
+Anahtar: aday parametreleri + tohum + senaryo (sumocfg, içinde adı geçen ağ/rota/ek
+dosyalar, `--route-files`/`--load-state` argümanları, yönlendirme ağı ve temel model
+dosya içerikleri; süre/spawn/adım ayarları). Aynı anahtarla ikinci koşu SUMO başlatmadan
+önbellekten döner. Kayıtlar `<dizin>/<anahtar>.json` dosyalarıdır.
+"""
+
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+
+# `run` komutunun yönlendirme için okuduğu ağ (bkz. `cmd_run`)
+ROUTER_NET = "config/network_with_tl.net.xml"
+# Dosya yolu alan `run` argümanları (içerikleri anahtara girer)
+PATH_ARGS = ("--route-files", "--load-state")
+
+
+def _file_digest(path: Optional[str]) -> str:
+	if not path or not os.path.exists(path):
+		return ""
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			h.update(block)
+	return h.hexdigest()
+
+
+def scenario_inputs(config: Optional[str], extra_run_args: List[str]) -> List[str]:
+	"""Koşunun okuduğu girdi dosyaları: sumocfg içindeki ağ/rota/ek dosyalar ve yol argümanları."""
+	paths: List[str] = []
+	if config and os.path.exists(config):
+		base = os.path.dirname(os.path.abspath(config))
+		try:
+			root = ET.parse(config).getroot()
+		except ET.ParseError:
+			root = None
+		if root is not None:
+			for tag in ("net-file", "route-files", "additional-files"):
+				for elem in root.iter(tag):
+					for item in (elem.get("value") or "").split(","):
+						if item.strip():
+							paths.append(os.path.join(base, item.strip()))
+	args = list(extra_run_args)
+	for i, arg in enumerate(args[:-1]):
+		if arg in PATH_ARGS:
+			paths.extend(p.strip() for p in args[i + 1].split(",") if p.strip())
+	paths.append(ROUTER_NET)
+	return paths
+
+
+class RunCache:
+	def __init__(self, cache_dir: str):
+		self.cache_dir = cache_dir
+		self.hits = 0
+		self.misses = 0
+		self._digests: Dict[str, str] = {}
+		os.makedirs(cache_dir, exist_ok=True)
+
+	def _digest(self, path: Optional[str]) -> str:
+		key = path or ""
+		if key not in self._digests:
+			self._digests[key] = _file_digest(path)
+		return self._digests[key]
+
+	def key(self, job: Dict[str, Any]) -> str:
+		payload = {
+			"params": {k: round(float(v), 6) for k, v in sorted(job.get("params", {}).items())},
+			"seed": int(job.get("seed", 0)),
+			"config": self._digest(job.get("config")),
+			"model": self._digest(job.get("anfis_model")),
+			"max_sim_time": job.get("max_sim_time"),
+			"spawn_period": job.get("spawn_period"),
+			"extra": list(job.get("extra_run_args", [])),
+			"inputs": [self._digest(p) for p in scenario_inputs(job.get("config"), job.get("extra_run_args", []))],
+			"adaptive_step": bool(job.get("adaptive_step")),
+			"replan_workers": int(job.get("replan_workers") or 0),
+		}
+		return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+	def _path(self, key: str) -> str:
+		return os.path.join(self.cache_dir, f"{key}.json")
+
+	def get(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		path = self._path(self.key(job))
+		if not os.path.exists(path):
+			self.misses += 1
+			return None
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				kpis = json.load(f)
+			self.hits += 1
+			return kpis
+		except Exception:
+			self.misses += 1
+			return None
+
+	def put(self, job: Dict[str, Any], kpis: Dict[str, Any]) -> None:
+		if "error" in kpis:
+			return
+		path = self._path(self.key(job))
+		tmp = path + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(kpis, f)
+		os.replace(tmp, path)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Çok tohumlu toplu deney koşucusu.
+
+Izgara: tohumlar x spawn periyodu x yeniden planlama aralığı x ANFIS modeli x rota
+dosyası. Her hücre+tohum bir iştir; işler dosya tabanlı kuyruğa (`WorkQueue`)
+eklenir ve işçi süreç havuzunda başsız koşulur (her koşu kendi SUMO süreci, boş
+TraCI portu, etiketi ve çıktı dizini). Aynı komut paylaşılan dizini gören birden
+çok makinede çalıştırılabilir; kesilen tarama yeniden çalıştırıldığında biten
+işler atlanır.
+
+İşteki dosya yolları (yapılandırma, model, rota dosyası, anlık görüntü) depo
+köküne göre göreli saklanır ve işçide kendi kopyasının köküne çözülür; böylece
+iş kimlikleri farklı dizinlere klonlanmış makinelerde de aynıdır. Depo dışındaki
+yollar mutlak kalır (tüm makinelerde aynı konumda olmalıdır).
+
+`warm_state` verilirse tüm koşular aynı ısınmış anlık görüntüden (`run --load-state`)
+başlar; ısınma süresi her koşuda tekrar ödenmez.
+
+Sonuçlar: `results.csv` (iş başına KPI satırı) ve `summary.csv` (senaryo başına
+tohumlar üzerinden ortalama/standart sapma).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import time
+
+from src.experiments.runner import run_simulation
+from src.experiments.workqueue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# İş kimliğine giren alanlar: koşuyu değiştiren her girdi (aksi halde aynı çıktı dizininde
+# farklı ayarlı tarama eski sonuçlarla "bitti" sayılır)
+SCENARIO_KEYS = ("anfis_model", "route_file", "spawn_period", "replan_interval", "warm_state", "config", "max_sim_time", "extra_run_args", "adaptive_step", "replan_workers")
+KPI_KEYS = (
+	"amb_count", "amb_mean_travel_s", "amb_mean_timeloss_s", "amb_mean_stops",
+	"bg_count", "bg_mean_travel_s", "bg_mean_timeloss_s", "bg_mean_stops",
+	"sim_time_s", "steps",
+)
+
+
+def scenario_id(scenario: Dict[str, Any]) -> str:
+	payload = json.dumps({k: scenario.get(k) for k in SCENARIO_KEYS}, sort_keys=True)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def portable_path(path: Optional[str]) -> Optional[str]:
+	"""Depo içindeki yolu köke göre göreli ('/' ayraçlı) yaz; dışındakini mutlak bırak."""
+	if not path:
+		return None
+	full = os.path.abspath(path)
+	rel = os.path.relpath(full, REPO_ROOT)
+	if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+		return full
+	return rel.replace(os.sep, "/")
+
+
+def resolve_path(path: Optional[str]) -> Optional[str]:
+	"""`portable_path` çıktısını bu makinedeki depo köküne çöz."""
+	if not path:
+		return None
+	return path if os.path.isabs(path) else os.path.join(REPO_ROOT, *path.split("/"))
+
+
+def expand_grid(
+	seeds: List[int],
+	spawn_periods: List[Optional[float]],
+	replan_intervals: List[Optional[float]],
+	models: List[Optional[str]],
+	route_files: List[Optional[str]],
+	config: str = "config/simulation.sumocfg",
+	max_sim_time: Optional[float] = None,
+	extra_run_args: Optional[List[str]] = None,
+	warm_state: Optional[str] = None,
+	adaptive_step: bool = False,
+	replan_workers: int = 0,
+) -> List[Tuple[str, Dict[str, Any]]]:
+	"""[(iş kimliği, iş)] — kimlik senaryo + tohumdan türetilir (makineler arası kararlı)."""
+	jobs = []
+	for model, route_file, spawn_period, replan_interval in itertools.product(models or [None], route_files or [None], spawn_periods or [None], replan_intervals or [None]):
+		scenario = {
+			"anfis_model": portable_path(model),
+			"route_file": portable_path(route_file),
+			"spawn_period": spawn_period,
+			"replan_interval": replan_interval,
+			"warm_state": portable_path(warm_state),
+			"config": portable_path(config),
+			"max_sim_time": max_sim_time,
+			"extra_run_args": list(extra_run_args or []),
+			"adaptive_step": bool(adaptive_step),
+			"replan_workers": max(0, int(replan_workers)),
+		}
+		sid = scenario_id(scenario)
+		for seed in seeds:
+			extra = list(scenario["extra_run_args"])
+			if replan_interval is not None:
+				extra += ["--replan-interval", str(float(replan_interval))]
+			jobs.append((f"{sid}_s{int(seed)}", {
+				"scenario_id": sid,
+				"scenario": scenario,
+				"seed": int(seed),
+				"config": scenario["config"],
+				"anfis_model": scenario["anfis_model"],
+				"max_sim_time": max_sim_time,
+				"spawn_period": spawn_period,
+				"extra_run_args": extra,
+				"adaptive_step": scenario["adaptive_step"],
+				"replan_workers": scenario["replan_workers"],
+			}))
+	return jobs
+
+
+class ExperimentRunner:
+	def __init__(self, output_dir: str, workers: int = 4, reclaim_after_s: float = 1800.0, heartbeat_s: float = 30.0):
+		self.output_dir = output_dir
+		self.workers = max(1, int(workers))
+		self.reclaim_after_s = float(reclaim_after_s)
+		self.heartbeat_s = max(1.0, float(heartbeat_s))
+		self.queue = WorkQueue(os.path.join(output_dir, "queue"))
+		self.completed = 0
+		self.failed = 0
+
+	def enqueue(self, jobs: List[Tuple[str, Dict[str, Any]]]) -> int:
+		return sum(1 for job_id, job in jobs if self.queue.enqueue(job_id, job))
+
+	def retry_failed(self) -> int:
+		"""Hatalı biten işleri kuyruğa geri al."""
+		n = 0
+		for res in list(self.queue.results()):
+			if "error" in (res.get("kpis") or {}):
+				job = {k: v for k, v in res.items() if k not in ("id", "kpis", "finished_at", "owner", "claimed_at")}
+				os.remove(os.path.join(self.queue.root, "done", f"{res['id']}.json"))
+				n += int(self.queue.enqueue(res["id"], job))
+		return n
+
+	def _job_for_run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+		# Port verilmez: traci boş port seçer (paylaşılan dizindeki makineler çakışmaz)
+		scenario = job.get("scenario") or {}
+		extra = list(job.get("extra_run_args", []))
+		if scenario.get("route_file"):
+			extra += ["--route-files", resolve_path(scenario["route_file"])]
+		if scenario.get("warm_state"):
+			extra += ["--load-state", resolve_path(scenario["warm_state"])]
+		return {
+			**job,
+			"config": resolve_path(job.get("config")) or "config/simulation.sumocfg",
+			"anfis_model": resolve_path(job.get("anfis_model")),
+			"extra_run_args": extra,
+			"params": {},
+			"job_dir": os.path.join(self.output_dir, "runs", job["id"]),
+			"label": f"exp-{job['id']}",
+			"port": None,
+		}
+
+	def run(self) -> Dict[str, int]:
+		"""Kuyruk boşalana kadar iş al ve koş; bu süreçte biten/başarısız sayılarını döndür."""
+		in_flight: Dict[Any, Dict[str, Any]] = {}
+		t0 = time.perf_counter()
+		with ProcessPoolExecutor(max_workers=self.workers) as pool:
+			try:
+				while True:
+					while len(in_flight) < self.workers:
+						job = self.queue.claim()
+						if job is None:
+							break
+						in_flight[pool.submit(run_simulation, self._job_for_run(job))] = job
+						logger.info(f"[Experiment] başladı: {job['id']} (tohum={job['seed']}, senaryo={job['scenario']})")
+					if not in_flight:
+						if self.queue.reclaim_stale(self.reclaim_after_s):
+							continue
+						counts = self.queue.counts()
+						if counts["running"]:
+							# Başka makinelerde süren işler var; sahipleri düşerse geri alınır
+							time.sleep(self.heartbeat_s)
+							continue
+						break
+					finished, _ = wait(list(in_flight), timeout=self.heartbeat_s, return_when=FIRST_COMPLETED)
+					for job in in_flight.values():
+						self.queue.heartbeat(job["id"])
+					for fut in finished:
+						job = in_flight.pop(fut)
+						try:
+							kpis = fut.result()
+						except Exception as e:
+							kpis = {"error": str(e)}
+						self.queue.complete(job, kpis)
+						if "error" in kpis:
+							self.failed += 1
+							logger.warning(f"[Experiment] {job['id']} başarısız: {kpis['error']}")
+						else:
+							self.completed += 1
+						counts = self.queue.counts()
+						logger.info(f"[Experiment] bitti: {job['id']} ({self.completed} tamam, {self.failed} hata; kuyruk: {counts}, {time.perf_counter() - t0:.0f}s)")
+			except KeyboardInterrupt:
+				for job in in_flight.values():
+					self.queue.release(job)
+				raise
+		return {"completed": self.completed, "failed": self.failed}
+
+	# -------------------- Sonuç tabloları --------------------
+	def aggregate(self) -> Tuple[str, str]:
+		rows = []
+		for res in self.queue.results():
+			kpis = res.get("kpis") or {}
+			row = {"job_id": res["id"], "scenario_id": res.get("scenario_id"), "seed": res.get("seed")}
+			for k in SCENARIO_KEYS:
+				v = (res.get("scenario") or {}).get(k)
+				row[k] = " ".join(v) if isinstance(v, list) else v
+			row["error"] = kpis.get("error", "")
+			row.update({k: kpis.get(k) for k in KPI_KEYS})
+			rows.append(row)
+		rows.sort(key=lambda r: (str(r["scenario_id"]), int(r["seed"] or 0)))
+		results_path = os.path.join(self.output_dir, "results.csv")
+		columns = ["job_id", "scenario_id", "seed", *SCENARIO_KEYS, "error", *KPI_KEYS]
+		self._write_csv(results_path, columns, rows)
+
+		groups: Dict[str, List[Dict[str, Any]]] = {}
+		for row in rows:
+			groups.setdefault(row["scenario_id"], []).append(row)
+		summary = []
+		for sid, group in groups.items():
+			ok = [r for r in group if not r["error"]]
+			out = {"scenario_id": sid, **{k: group[0][k] for k in SCENARIO_KEYS}, "runs": len(group), "errors": len(group) - len(ok)}
+			for k in KPI_KEYS:
+				vals = [float(r[k]) for r in ok if r[k] is not None and math.isfinite(float(r[k]))]
+				mean = sum(vals) / len(vals) if vals else None
+				out[f"{k}_mean"] = mean
+				out[f"{k}_std"] = math.sqrt(sum((v - mean) ** 2 for v in vals) / (len(vals) - 1)) if len(vals) > 1 else (0.0 if vals else None)
+			summary.append(out)
+		summary.sort(key=lambda r: (r["amb_mean_travel_s_mean"] is None, r["amb_mean_travel_s_mean"] or 0.0))
+		summary_path = os.path.join(self.output_dir, "summary.csv")
+		summary_cols = ["scenario_id", *SCENARIO_KEYS, "runs", "errors"] + [f"{k}_{s}" for k in KPI_KEYS for s in ("mean", "std")]
+		self._write_csv(summary_path, summary_cols, summary)
+		return results_path, summary_path
+
+	@staticmethod
+	def _write_csv(path: str, columns: List[str], rows: List[Dict[str, Any]]) -> None:
+		tmp = path + ".tmp"
+		with open(tmp, "w", newline="", encoding="utf-8") as f:
+			w = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+			w.writeheader()
+			for row in rows:
+				w.writerow({k: ("" if row.get(k) is None else row.get(k)) for k in columns})
+		os.replace(tmp, path)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Başsız (headless) simülasyon koşucusu ve KPI çıkarımı.
+
+Her iş (job) ayrı bir süreçte `run` komutunu GUI'siz çalıştırır: kendi TraCI
+portu/etiketi, kendi çıktı dizini (tripinfo, eğitim logları, aday model) ve
+tohum. Koşu sonunda `tripinfo.xml` özetlenip `kpis.json` yazılır.
+
+KPI'lar:
+- amb_mean_travel_s: ambulansların ortalama yolculuk süresi (bitmeyenler dahil)
+- bg_mean_timeloss_s: arka plan araçlarının ortalama zaman kaybı (gecikme)
+- amb_mean_stops / bg_mean_stops: araç başına ortalama duruş sayısı (tripinfo `waitingCount`)
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+AMBULANCE_TOKENS = ("ambulance", "emergency")
+
+
+def _is_ambulance(trip_id: str, vtype: str) -> bool:
+	text = f"{trip_id} {vtype}".lower()
+	return any(k in text for k in AMBULANCE_TOKENS)
+
+
+def summarize_tripinfo(path: str) -> Dict[str, float]:
+	"""`tripinfo.xml` dosyasını akışlı okuyup ambulans/arka plan KPI'larını döndür."""
+	amb_n = bg_n = 0
+	amb_travel = amb_loss = bg_loss = bg_travel = 0.0
+	amb_stops = bg_stops = 0
+	for _ev, elem in ET.iterparse(path, events=("end",)):
+		if elem.tag != "tripinfo":
+			continue
+		duration = float(elem.get("duration", 0.0) or 0.0)
+		loss = float(elem.get("timeLoss", 0.0) or 0.0)
+		stops = int(elem.get("waitingCount", 0) or 0)
+		if _is_ambulance(elem.get("id", ""), elem.get("vType", "")):
+			amb_n += 1
+			amb_travel += duration
+			amb_loss += loss
+			amb_stops += stops
+		else:
+			bg_n += 1
+			bg_travel += duration
+			bg_loss += loss
+			bg_stops += stops
+		elem.clear()
+	return {
+		"amb_count": amb_n,
+		"amb_mean_travel_s": amb_travel / amb_n if amb_n else float("inf"),
+		"amb_mean_timeloss_s": amb_loss / amb_n if amb_n else float("inf"),
+		"amb_mean_stops": amb_stops / amb_n if amb_n else float("inf"),
+		"bg_count": bg_n,
+		"bg_mean_travel_s": bg_travel / bg_n if bg_n else 0.0,
+		"bg_mean_timeloss_s": bg_loss / bg_n if bg_n else 0.0,
+		"bg_mean_stops": bg_stops / bg_n if bg_n else 0.0,
+	}
+
+
+def write_candidate_model(base_model_path: Optional[str], params: Dict[str, float], out_path: str) -> str:
+	"""Temel modele aday ANFIS parametrelerini uygula ve `out_path`e yaz.
+
+	Tanınan anahtarlar: trigger_threshold, near_force_distance_m, release_distance_m
+	(model `params`) ve extend_scale (uzatma kuralı ağırlık çarpanı).
+	"""
+	from src.ai.anfis import AnfisModel
+	model = AnfisModel(base_model_path if base_model_path and os.path.exists(base_model_path) else None)
+	data = model.to_dict()
+	for key in ("trigger_threshold", "near_force_distance_m", "release_distance_m"):
+		if key in params:
+			data["params"][key] = float(params[key])
+	scale = float(params.get("extend_scale", 1.0))
+	for rule in data["rules_extend"]:
+		rule["w"] = float(rule["w"]) * scale
+	d = os.path.dirname(out_path)
+	if d:
+		os.makedirs(d, exist_ok=True)
+	with open(out_path, "w", encoding="utf-8") as f:
+		json.dump(data, f, ensure_ascii=False, indent=2)
+	return out_path
+
+
+def run_args(job: Dict[str, Any]) -> List[str]:
+	"""İş tanımından `main.py run` argüman listesi üret.
+
+	Uyarlamalı adım yalnızca işte `adaptive_step` açıksa kullanılır. Yeniden planlama
+	süreç havuzu varsayılan olarak kapalıdır (`replan_workers` 0): koşular zaten paralel
+	işçilerde döner, her birinin ayrıca havuz ve paylaşımlı grafik kurması gereksizdir.
+	"""
+	params = job.get("params", {})
+	job_dir = job["job_dir"]
+	argv = [
+		"run",
+		"--config", str(job.get("config", "config/simulation.sumocfg")),
+		"--anfis-model", os.path.join(job_dir, "anfis.json"),
+		"--output-dir", job_dir,
+		"--training-log-dir", job_dir,
+		"--seed", str(int(job.get("seed", 42))),
+		"--sumo-label", str(job.get("label", os.path.basename(job_dir))),
+		"--green-seconds", str(float(params.get("green_seconds", 12.0))),
+		"--release-distance", str(float(params.get("release_distance_m", 50.0))),
+		"--keep-green-seconds", str(float(params.get("keep_green_seconds", 1.5))),
+		"--replan-workers", str(int(job.get("replan_workers") or 0)),
+	]
+	if job.get("adaptive_step"):
+		argv.append("--adaptive-step")
+	if job.get("port") is not None:
+		argv += ["--port", str(int(job["port"]))]
+	if job.get("max_sim_time") is not None:
+		argv += ["--max-sim-time", str(float(job["max_sim_time"]))]
+	if job.get("spawn_period") is not None:
+		argv += ["--spawn-period", str(float(job["spawn_period"]))]
+	argv += list(job.get("extra_run_args", []))
+	return argv
+
+
+def run_simulation(job: Dict[str, Any]) -> Dict[str, Any]:
+	"""Bir işi çalıştır (işçi süreçte); KPI sözlüğü döndür.
+
+	Başarısız koşular `{"error": ...}` ile döner; ayarlayıcı bunları cezalandırır.
+	"""
+	from src.main import build_arg_parser
+	job_dir = job["job_dir"]
+	os.makedirs(job_dir, exist_ok=True)
+	write_candidate_model(job.get("anfis_model"), job.get("params", {}), os.path.join(job_dir, "anfis.json"))
+	args = build_arg_parser().parse_args(run_args(job))
+	try:
+		rc = args.func(args)
+	except Exception as e:
+		return {"error": f"run hatası: {e}"}
+	kpi_path = os.path.join(job_dir, "kpis.json")
+	if rc != 0 or not os.path.exists(kpi_path):
+		return {"error": f"run çıkış kodu {rc}, kpis.json yok"}
+	with open(kpi_path, "r", encoding="utf-8") as f:
+		return json.load(f)
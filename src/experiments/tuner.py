@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Sinyal önceliği parametreleri için simülasyon-içi (simulation-in-the-loop) ayarlayıcı.
+
+Yöntem: köşegen kovaryanslı (μ/μ_w, λ) evrim stratejisi. Parametreler [0, 1]
+aralığına normalize edilir; her nesilde λ aday örneklenir, en iyi μ adayın
+ağırlıklı ortalaması yeni merkez, çevresindeki dağılım yeni adım boyu olur.
+
+Puanlama: her aday birden çok tohumla başsız SUMO'da koşulur (işçi süreç
+havuzu, her koşuya ayrı TraCI portu/etiketi). Amaç (küçültülür):
+    amb_mean_travel_s + delay_weight * bg_mean_timeloss_s
+
+Hızlandırmalar:
+- Koşu önbelleği: aynı (aday, tohum, senaryo) tekrar koşulmaz
+- Erken eleme: tohumlar basamak (rung) halinde koşulur; bir basamaktan sonra
+  ortalama puanı o ana kadarki en iyinin (1 + prune_margin) katından kötü olan
+  adayların kalan tohumları koşulmaz
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import logging
+import math
+import os
+import time
+
+import numpy as np
+
+from src.experiments.cache import RunCache
+from src.experiments.runner import run_simulation, write_candidate_model
+
+logger = logging.getLogger(__name__)
+
+# ad -> (alt sınır, üst sınır, başlangıç)
+SEARCH_SPACE: Dict[str, Tuple[float, float, float]] = {
+	"green_seconds": (6.0, 30.0, 12.0),
+	"release_distance_m": (10.0, 150.0, 50.0),
+	"keep_green_seconds": (0.5, 5.0, 1.5),
+	"trigger_threshold": (0.2, 0.9, 0.5),
+	"near_force_distance_m": (50.0, 400.0, 200.0),
+	"extend_scale": (0.5, 2.0, 1.0),
+}
+
+
+def objective(kpis: Dict[str, Any], delay_weight: float) -> float:
+	if "error" in kpis or not kpis.get("amb_count"):
+		return float("inf")
+	return float(kpis["amb_mean_travel_s"]) + float(delay_weight) * float(kpis.get("bg_mean_timeloss_s", 0.0))
+
+
+class EvolutionStrategy:
+	"""Normalize uzayda köşegen (μ/μ_w, λ)-ES."""
+
+	def __init__(self, space: Dict[str, Tuple[float, float, float]], population: int = 8, sigma0: float = 0.2, seed: int = 0):
+		self.names = list(space.keys())
+		self.lo = np.array([space[n][0] for n in self.names], dtype=np.float64)
+		self.hi = np.array([space[n][1] for n in self.names], dtype=np.float64)
+		init = np.array([space[n][2] for n in self.names], dtype=np.float64)
+		self.mean = (init - self.lo) / np.maximum(1e-12, self.hi - self.lo)
+		self.sigma = np.full(len(self.names), float(sigma0))
+		self.population = max(2, int(population))
+		self.mu = max(1, self.population // 2)
+		w = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+		self.weights = w / w.sum()
+		self.rng = np.random.default_rng(seed)
+
+	def decode(self, u: np.ndarray) -> Dict[str, float]:
+		x = self.lo + np.clip(u, 0.0, 1.0) * (self.hi - self.lo)
+		return {n: float(v) for n, v in zip(self.names, x)}
+
+	def ask(self, include_mean: bool = False) -> List[np.ndarray]:
+		pts = [np.clip(self.mean + self.sigma * self.rng.standard_normal(len(self.names)), 0.0, 1.0) for _ in range(self.population)]
+		if include_mean:
+			pts[0] = self.mean.copy()
+		return pts
+
+	def tell(self, points: List[np.ndarray], scores: List[float]) -> None:
+		order = np.argsort(np.asarray(scores, dtype=np.float64), kind="stable")[:self.mu]
+		sel = np.array([points[i] for i in order])
+		old = self.mean
+		self.mean = self.weights @ sel
+		spread = np.sqrt(self.weights @ (sel - old) ** 2)
+		self.sigma = np.clip(spread, 0.02, 0.5)
+
+
+class Tuner:
+	def __init__(
+		self,
+		output_dir: str,
+		config: str = "config/simulation.sumocfg",
+		anfis_model: Optional[str] = "models/anfis.json",
+		population: int = 8,
+		generations: int = 10,
+		seeds: int = 3,
+		base_seed: int = 42,
+		workers: int = 4,
+		delay_weight: float = 0.5,
+		prune_margin: float = 0.25,
+		max_sim_time: Optional[float] = 600.0,
+		spawn_period: Optional[float] = None,
+		base_port: int = 8900,
+		cache_dir: Optional[str] = None,
+		extra_run_args: Optional[List[str]] = None,
+		adaptive_step: bool = False,
+		replan_workers: int = 0,
+	):
+		self.output_dir = output_dir
+		self.config = config
+		self.anfis_model = anfis_model
+		self.generations = max(1, int(generations))
+		self.seeds = [int(base_seed) + i for i in range(max(1, int(seeds)))]
+		self.workers = max(1, int(workers))
+		self.delay_weight = float(delay_weight)
+		self.prune_margin = float(prune_margin)
+		self.max_sim_time = max_sim_time
+		self.spawn_period = spawn_period
+		self.extra_run_args = list(extra_run_args or [])
+		self.adaptive_step = bool(adaptive_step)
+		self.replan_workers = max(0, int(replan_workers))
+		self.es = EvolutionStrategy(SEARCH_SPACE, population=population, seed=base_seed)
+		self.cache = RunCache(cache_dir or os.path.join(output_dir, "cache"))
+		self._ports = itertools.count(int(base_port))
+		self._job_seq = itertools.count()
+		self.best: Optional[Dict[str, Any]] = None
+		self.runs = 0
+		self.pruned_runs = 0
+		os.makedirs(output_dir, exist_ok=True)
+
+	def _job(self, gen: int, cid: int, params: Dict[str, float], seed: int) -> Dict[str, Any]:
+		seq = next(self._job_seq)
+		return {
+			"params": params,
+			"seed": seed,
+			"job_dir": os.path.join(self.output_dir, f"g{gen:03d}", f"c{cid:03d}_s{seed}"),
+			"port": next(self._ports),
+			"label": f"tune-{seq}",
+			"config": self.config,
+			"anfis_model": self.anfis_model,
+			"max_sim_time": self.max_sim_time,
+			"spawn_period": self.spawn_period,
+			"extra_run_args": self.extra_run_args,
+			"adaptive_step": self.adaptive_step,
+			"replan_workers": self.replan_workers,
+		}
+
+	def _run_jobs(self, pool: ProcessPoolExecutor, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+		results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+		futures = {}
+		for i, job in enumerate(jobs):
+			cached = self.cache.get(job)
+			if cached is not None:
+				results[i] = cached
+			else:
+				futures[pool.submit(run_simulation, job)] = i
+		for fut, i in futures.items():
+			try:
+				kpis = fut.result()
+			except Exception as e:
+				kpis = {"error": str(e)}
+			self.cache.put(jobs[i], kpis)
+			results[i] = kpis
+			self.runs += 1
+		return [r or {"error": "sonuç yok"} for r in results]
+
+	def _evaluate_generation(self, pool: ProcessPoolExecutor, gen: int, points: List[np.ndarray]) -> List[Dict[str, Any]]:
+		cands = [{"id": cid, "params": self.es.decode(u), "scores": [], "kpis": [], "pruned": False} for cid, u in enumerate(points)]
+		for rung, seed in enumerate(self.seeds):
+			alive = [c for c in cands if not c["pruned"]]
+			if not alive:
+				break
+			jobs = [self._job(gen, c["id"], c["params"], seed) for c in alive]
+			for c, kpis in zip(alive, self._run_jobs(pool, jobs)):
+				c["kpis"].append(kpis)
+				c["scores"].append(objective(kpis, self.delay_weight))
+			if rung == len(self.seeds) - 1:
+				break
+			# Erken eleme: en iyi ortalamaya göre çok kötü olanların kalan tohumları koşulmaz
+			ref = min([float(np.mean(c["scores"])) for c in alive] + ([self.best["score"]] if self.best else []))
+			if math.isfinite(ref):
+				for c in alive:
+					if float(np.mean(c["scores"])) > ref * (1.0 + self.prune_margin):
+						c["pruned"] = True
+						self.pruned_runs += len(self.seeds) - rung - 1
+		for c in cands:
+			c["score"] = float(np.mean(c["scores"])) if c["scores"] else float("inf")
+		return cands
+
+	def run(self) -> Optional[Dict[str, Any]]:
+		log_path = os.path.join(self.output_dir, "results.jsonl")
+		t0 = time.perf_counter()
+		with ProcessPoolExecutor(max_workers=self.workers) as pool, open(log_path, "a", encoding="utf-8") as log_f:
+			for gen in range(self.generations):
+				points = self.es.ask(include_mean=(gen == 0))
+				cands = self._evaluate_generation(pool, gen, points)
+				for c in cands:
+					full = not c["pruned"]
+					if full and (self.best is None or c["score"] < self.best["score"]):
+						self.best = {"generation": gen, "id": c["id"], "params": c["params"], "score": c["score"], "kpis": c["kpis"]}
+					log_f.write(json.dumps({"generation": gen, **c}, default=float) + "\n")
+				log_f.flush()
+				self.es.tell(points, [c["score"] for c in cands])
+				best_gen = min(c["score"] for c in cands)
+				logger.info(f"[Tune] nesil {gen}: en iyi={best_gen:.2f} genel en iyi={self.best['score'] if self.best else float('inf'):.2f} "
+							f"(koşu={self.runs}, önbellek isabeti={self.cache.hits}, elenen koşu={self.pruned_runs}, {time.perf_counter() - t0:.0f}s)")
+		if self.best is not None:
+			with open(os.path.join(self.output_dir, "best.json"), "w", encoding="utf-8") as f:
+				json.dump(self.best, f, ensure_ascii=False, indent=2, default=float)
+			write_candidate_model(self.anfis_model, self.best["params"], os.path.join(self.output_dir, "best_anfis.json"))
+		return self.best
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Dosya tabanlı iş kuyruğu (paylaşılan dizin üzerinden birden çok makine).
+
+Dizin düzeni:
+  todo/<iş>.json     bekleyen iş tanımı
+  running/<iş>.json  alınmış iş (sahip: içindeki "owner"; mtime = son yaşam sinyali)
+  done/<iş>.json     sonuç (iş tanımı + KPI'lar)
+
+İş alma `os.rename(todo -> running)` ile atomiktir: aynı işi yalnızca bir işçi
+alabilir. İş kimliği senaryodan türetildiği için aynı ızgarayı birden çok makine
+kuyruğa ekleyebilir (var olan iş yeniden eklenmez). Sahibi düşen işler
+`reclaim_stale` ile belirli bir sessizlikten sonra tekrar `todo`ya alınır;
+yarıda kalan bir tarama aynı komutla kaldığı yerden sürer.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import os
+import socket
+import time
+
+STATES = ("todo", "running", "done")
+
+
+class WorkQueue:
+	def __init__(self, root: str, owner: Optional[str] = None):
+		self.root = root
+		self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+		for state in STATES:
+			os.makedirs(os.path.join(root, state), exist_ok=True)
+
+	def _path(self, state: str, job_id: str) -> str:
+		return os.path.join(self.root, state, f"{job_id}.json")
+
+	def _ids(self, state: str) -> List[str]:
+		try:
+			names = os.listdir(os.path.join(self.root, state))
+		except FileNotFoundError:
+			return []
+		return sorted(n[:-5] for n in names if n.endswith(".json"))
+
+	def _write(self, path: str, data: Dict[str, Any]) -> None:
+		tmp = f"{path}.{self.owner}.tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(data, f, ensure_ascii=False, indent=2, default=float)
+		os.replace(tmp, path)
+
+	@staticmethod
+	def _read(path: str) -> Optional[Dict[str, Any]]:
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	# -------------------- Kuyruğa ekleme --------------------
+	def enqueue(self, job_id: str, job: Dict[str, Any]) -> bool:
+		"""İşi ekle; herhangi bir durumda zaten varsa False."""
+		if any(os.path.exists(self._path(s, job_id)) for s in STATES):
+			return False
+		path = self._path("todo", job_id)
+		try:
+			# O_EXCL: iki makine aynı anda eklerse yalnızca biri yazar
+			fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+		except FileExistsError:
+			return False
+		with os.fdopen(fd, "w", encoding="utf-8") as f:
+			json.dump({"id": job_id, **job}, f, ensure_ascii=False, indent=2, default=float)
+		return True
+
+	# -------------------- İşçi tarafı --------------------
+	def claim(self) -> Optional[Dict[str, Any]]:
+		"""Bekleyen bir işi atomik olarak al; yoksa None."""
+		for job_id in self._ids("todo"):
+			src = self._path("todo", job_id)
+			dst = self._path("running", job_id)
+			try:
+				os.rename(src, dst)
+			except OSError:
+				continue  # başka işçi aldı
+			# rename mtime'ı değiştirmez: taze alım `reclaim_stale`e eski görünmesin
+			self.heartbeat(job_id)
+			job = self._read(dst)
+			if job is None:
+				continue
+			job["owner"] = self.owner
+			job["claimed_at"] = time.time()
+			self._write(dst, job)
+			return job
+		return None
+
+	def heartbeat(self, job_id: str) -> None:
+		try:
+			os.utime(self._path("running", job_id), None)
+		except OSError:
+			pass
+
+	def complete(self, job: Dict[str, Any], result: Dict[str, Any]) -> None:
+		job_id = job["id"]
+		self._write(self._path("done", job_id), {**job, "kpis": result, "finished_at": time.time()})
+		try:
+			os.remove(self._path("running", job_id))
+		except OSError:
+			pass
+
+	def release(self, job: Dict[str, Any]) -> None:
+		"""Alınmış işi (ör. kesintide) kuyruğa geri bırak."""
+		try:
+			os.rename(self._path("running", job["id"]), self._path("todo", job["id"]))
+		except OSError:
+			pass
+
+	def reclaim_stale(self, max_silence_s: float) -> int:
+		"""`max_silence_s` boyunca yaşam sinyali gelmeyen işleri `todo`ya geri al."""
+		now = time.time()
+		n = 0
+		for job_id in self._ids("running"):
+			path = self._path("running", job_id)
+			try:
+				if now - os.path.getmtime(path) < max_silence_s:
+					continue
+				os.rename(path, self._path("todo", job_id))
+				n += 1
+			except OSError:
+				continue
+		return n
+
+	# -------------------- Durum --------------------
+	def counts(self) -> Dict[str, int]:
+		return {state: len(self._ids(state)) for state in STATES}
+
+	def results(self) -> Iterator[Dict[str, Any]]:
+		for job_id in self._ids("done"):
+			data = self._read(self._path("done", job_id))
+			if data is not None:
+				yield data
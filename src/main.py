@@ -4,123 +4,43 @@ Akıllı Ambulans Rota & Işık Yönetimi - Orkestratör
 
 Komutlar:
   - prep-landmarks: Network'ten landmark tabanlı Dijkstra tablolarını üretir
+  - prep-training: Eğitim loglarını tekilleştirilmiş, bölüm indeksli veri setine dönüştürür
+  - tune: ANFIS/kontrolcü parametrelerini başsız SUMO koşularıyla (evrim stratejisi) ayarlar
+  - experiment: Tohum x senaryo ızgarasını paralel başsız koşup KPI'ları results.csv/summary.csv'ye toplar
   - run: (yer tutucu) A* + ANFIS ile çevrimiçi simülasyonu çalıştırır
+  - analyze-trace: `run --trace` ile yazılan ikili olay izinden ambulans zaman çizelgelerini çıkarır
 """
 
 import os
 import sys
 import argparse
+import json
 import logging
 
 # Yerel modüller (paket-içi)
 from src.offline.landmarks import LandmarkPrecomputer
+from src.online.pqueue import QUEUE_KINDS
+from src.online.incremental import IncrementalAStar  # noqa: F401 (geriye dönük içe aktarma)
+from src.telemetry.profiler import PROFILER, ProfiledHandler
+from src.telemetry.rpc import RpcAccounting, parse_command_budgets
+from src.telemetry.trace import TRACE, parse_sample_spec
 
 
-def setup_logging() -> logging.Logger:
-	"""Basit log yapılandırması"""
+def setup_logging(level: str = "INFO") -> logging.Logger:
+	"""Basit log yapılandırması (profil açıksa log yazma süresi "log_io" fazına yazılır)"""
 	log_dir = "logs"
 	os.makedirs(log_dir, exist_ok=True)
+	handler: logging.Handler = logging.StreamHandler()
+	handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+	if PROFILER.enabled:
+		handler = ProfiledHandler(handler)
 	logging.basicConfig(
-		level=logging.DEBUG,  # DEBUG seviyesine çıkar
-		format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-		handlers=[logging.StreamHandler()]
+		level=getattr(logging, str(level).upper(), logging.INFO),
+		handlers=[handler]
 	)
 	return logging.getLogger("orchestrator")
 
 
-def _compute_replan_in_process(net_path: str, landmark_path: str, start_node: str, goal_node: str, edge_stats_snapshot: dict):
-	"""A* yeniden planlama (ayrı süreçte, GIL bloklamasız)."""
-	from src.online.router import OnlineRouter
-	# ANFIS kancaları süreç içinde no-op kalsın
-	router = OnlineRouter(
-		network_path=net_path,
-		landmark_json_path=landmark_path,
-		get_live_edge_factor=lambda e: 1.0,
-		get_signal_delay=lambda n: 0.0,
-		anfis_adjust_heuristic=lambda h, ctx: h,
-	)
-	def live_factor(edge_id: str) -> float:
-		base_t = getattr(router, 'edge_base_time', {}).get(edge_id, 0.0)
-		if base_t <= 0:
-			return 1.0
-		st = edge_stats_snapshot.get(edge_id)
-		if not st:
-			return 1.0
-		veh = st.get("veh", 0.0)
-		v = st.get("v", getattr(router, 'edge_free_speed', {}).get(edge_id, 10.0))
-		v_ref = max(1.0, getattr(router, 'edge_free_speed', {}).get(edge_id, 10.0))
-		cong = max(0.0, min(3.0, (v_ref / max(1.0, v))))
-		load = 1.0 + min(2.0, veh / 20.0)
-		return max(1.0, min(5.0, 0.5 * cong + 0.5 * load))
-	orig_live = router.get_live_edge_factor
-	router.get_live_edge_factor = live_factor
-	best_time, best_path = router.astar(start_node, goal_node)
-	router.get_live_edge_factor = orig_live
-	return best_time, best_path, edge_stats_snapshot
-
-
-class IncrementalAStar:
-	"""A*'ı adım adım çalıştırmak için artımlı arama (ana döngüyü bloklamaz)."""
-	def __init__(self, router, start_node: str, goal_node: str, edge_stats_snapshot: dict):
-		import heapq
-		self.router = router
-		self.start = start_node
-		self.goal = goal_node
-		self.edge_stats = edge_stats_snapshot
-		self.heapq = heapq
-		self.open_pq = []
-		self.heapq.heappush(self.open_pq, (0.0, start_node))
-		self.g_score = {start_node: 0.0}
-		self.parent = {start_node: None}
-		self.done = False
-		self.result = (float('inf'), [])
-	def _live_factor(self, edge_id: str) -> float:
-		base_t = getattr(self.router, 'edge_base_time', {}).get(edge_id, 0.0)
-		if base_t <= 0:
-			return 1.0
-		st = self.edge_stats.get(edge_id)
-		if not st:
-			return 1.0
-		veh = st.get("veh", 0.0)
-		v = st.get("v", getattr(self.router, 'edge_free_speed', {}).get(edge_id, 10.0))
-		v_ref = max(1.0, getattr(self.router, 'edge_free_speed', {}).get(edge_id, 10.0))
-		cong = max(0.0, min(3.0, (v_ref / max(1.0, v))))
-		load = 1.0 + min(2.0, veh / 20.0)
-		return max(1.0, min(5.0, 0.5 * cong + 0.5 * load))
-	def step(self, max_expansions: int = 500) -> None:
-		if self.done:
-			return
-		expanded = 0
-		while self.open_pq and expanded < max_expansions:
-			_, u = self.heapq.heappop(self.open_pq)
-			if u == self.goal:
-				path = []
-				cur = self.goal
-				while cur is not None:
-					path.append(cur)
-					cur = self.parent.get(cur)
-				path.reverse()
-				self.result = (self.g_score[self.goal], path)
-				self.done = True
-				return
-			for v, base_time, edge_id in self.router.out_edges.get(u, []):
-				live = self._live_factor(edge_id)
-				cand_g = self.g_score[u] + base_time * max(0.1, float(live))
-				cand_g += max(0.0, float(self.router.get_signal_delay(v)))
-				if cand_g < self.g_score.get(v, float('inf')):
-					self.g_score[v] = cand_g
-					self.parent[v] = u
-					h = self.router.heuristic(v, self.goal, context={"g": cand_g})
-					self.heapq.heappush(self.open_pq, (cand_g + h, v))
-			expanded += 1
-		if not self.open_pq:
-			self.done = True
-			self.result = (float('inf'), [])
-	def finished(self) -> bool:
-		return self.done
-	def get_result(self):
-		return self.result
-
 def cmd_prep_landmarks(args) -> int:
 	"""Offline Dijkstra (landmark) ön-hazırlığı çalıştır"""
 	logger = setup_logging()
@@ -138,7 +58,8 @@ def cmd_prep_landmarks(args) -> int:
 	pre = LandmarkPrecomputer(
 		network_path=net_path,
 		num_landmarks=args.num_landmarks,
-		seed=args.seed
+		seed=args.seed,
+		queue_kind=args.queue,
 	)
 	result = pre.compute_and_save(args.output)
 	if result:
@@ -149,9 +70,153 @@ def cmd_prep_landmarks(args) -> int:
 		return 1
 
 
+def cmd_prep_training(args) -> int:
+	"""Eğitim loglarını akışlı oku, ortak şemaya eşle ve tekilleştir"""
+	from src.offline.training_data import build_dataset, expand_log_paths
+	logger = setup_logging()
+	paths = expand_log_paths(args.inputs)
+	if not paths:
+		logger.error(f"Eğitim logu bulunamadı: {', '.join(args.inputs)}")
+		return 1
+	logger.info(f"Eğitim verisi hazırlanıyor: {len(paths)} dosya")
+	stats = build_dataset(args.inputs, args.output, chunksize=args.chunk_size, episode_gap_s=args.episode_gap)
+	if not stats["rows_out"]:
+		logger.error("Tekilleştirme sonrası satır kalmadı")
+		return 1
+	ratio = stats["rows_in"] / max(1, stats["rows_out"])
+	logger.info(f"Veri seti yazıldı: {args.output} ({stats['rows_in']} → {stats['rows_out']} satır, x{ratio:.1f}; {stats['episodes']} bölüm)")
+	return 0
+
+
+def cmd_analyze_trace(args) -> int:
+	"""İkili olay izinden ambulans zaman çizelgeleri, ışık eylemleri ve yeniden planlamalar"""
+	from src.telemetry.trace import analyze_trace, format_event, read_trace
+	logger = setup_logging()
+	if not os.path.exists(args.trace):
+		logger.error(f"İz dosyası bulunamadı: {args.trace}")
+		return 1
+	try:
+		report = analyze_trace(read_trace(args.trace))
+	except ValueError as e:
+		logger.error(str(e))
+		return 1
+	logger.info(f"[Trace] olaylar: {report['counts']}")
+	vehicles = report["vehicles"]
+	for vid in sorted(vehicles, key=lambda v: (vehicles[v]["spawn"] is None, vehicles[v]["spawn"] or 0.0, v)):
+		if args.vehicle and vid != args.vehicle:
+			continue
+		v = vehicles[vid]
+		travel = f"{v['travel_s']:.1f}s" if "travel_s" in v else "-"
+		print(f"{vid}: yolculuk={travel} öncelik={v['priorities']} replan={v['replans']} rota={v['routes']}")
+		timeline = v["timeline"]
+		shown = timeline if args.max_events <= 0 else timeline[:args.max_events]
+		for ev in shown:
+			print("  " + format_event(ev))
+		if len(shown) < len(timeline):
+			print(f"  … {len(timeline) - len(shown)} olay daha")
+	if not args.vehicle:
+		for tl_id, sig in sorted(report["signals"].items()):
+			print(f"[TL] {tl_id}: öncelik={sig['priorities']} bırakma={sig['releases']} durum değişimi={sig['state_changes']}")
+	if args.json:
+		with open(args.json, "w", encoding="utf-8") as f:
+			json.dump(report, f, ensure_ascii=False, indent=2)
+		logger.info(f"[Trace] rapor yazıldı: {args.json}")
+	return 0
+
+
+def cmd_tune(args) -> int:
+	"""Sinyal önceliği parametrelerini başsız SUMO koşularıyla ayarla"""
+	from src.experiments.tuner import Tuner
+	logger = setup_logging()
+	if not os.path.exists(args.config):
+		logger.error(f"SUMO yapılandırması bulunamadı: {args.config}")
+		return 1
+	tuner = Tuner(
+		output_dir=args.output_dir,
+		config=args.config,
+		anfis_model=args.anfis_model,
+		population=args.population,
+		generations=args.generations,
+		seeds=args.seeds,
+		base_seed=args.seed,
+		workers=args.workers,
+		delay_weight=args.delay_weight,
+		prune_margin=args.prune_margin,
+		max_sim_time=args.max_sim_time,
+		spawn_period=args.spawn_period,
+		base_port=args.base_port,
+		cache_dir=args.cache_dir,
+		adaptive_step=args.adaptive_step,
+		replan_workers=args.replan_workers,
+	)
+	best = tuner.run()
+	if best is None:
+		logger.error("Ayarlama geçerli bir aday üretmedi (tüm koşular başarısız)")
+		return 1
+	logger.info(f"[Tune] en iyi puan={best['score']:.2f} parametreler={best['params']} -> {os.path.join(args.output_dir, 'best.json')}")
+	return 0
+
+
+def cmd_experiment(args) -> int:
+	"""Tohum x senaryo ızgarasını kuyruk üzerinden paralel koş ve KPI'ları topla"""
+	from src.experiments.grid import ExperimentRunner, expand_grid
+	logger = setup_logging()
+	runner = ExperimentRunner(
+		output_dir=args.output_dir,
+		workers=args.workers,
+		reclaim_after_s=args.reclaim_after,
+	)
+	if not args.aggregate_only:
+		if not os.path.exists(args.config):
+			logger.error(f"SUMO yapılandırması bulunamadı: {args.config}")
+			return 1
+		if args.warm_state and not os.path.exists(args.warm_state):
+			logger.error(f"Anlık görüntü bulunamadı: {args.warm_state} (önce: run --save-state ... --stop-after-save)")
+			return 1
+		for route_file in args.route_files or []:
+			if not os.path.exists(route_file):
+				logger.error(f"Rota dosyası bulunamadı: {route_file}")
+				return 1
+		jobs = expand_grid(
+			seeds=list(range(args.seed, args.seed + args.seeds)),
+			spawn_periods=args.spawn_period,
+			replan_intervals=args.replan_interval,
+			models=args.anfis_model,
+			route_files=args.route_files,
+			config=args.config,
+			max_sim_time=args.max_sim_time,
+			warm_state=args.warm_state,
+			adaptive_step=args.adaptive_step,
+			replan_workers=args.replan_workers,
+		)
+		added = runner.enqueue(jobs)
+		if args.retry_failed:
+			added += runner.retry_failed()
+		logger.info(f"[Experiment] {len(jobs)} iş ({len(jobs) // max(1, args.seeds)} senaryo x {args.seeds} tohum), {added} yeni kuyruğa eklendi; kuyruk: {runner.queue.counts()}")
+		try:
+			stats = runner.run()
+		except KeyboardInterrupt:
+			logger.warning("[Experiment] kesildi; alınan işler kuyruğa geri bırakıldı")
+			return 130
+		logger.info(f"[Experiment] bu süreçte {stats['completed']} koşu tamamlandı, {stats['failed']} başarısız")
+	results_path, summary_path = runner.aggregate()
+	logger.info(f"[Experiment] sonuçlar: {results_path}, özet: {summary_path}")
+	return 0
+
+
 def cmd_run(args) -> int:
 	"""Online A* + ANFIS akışını başlatır (ilk sürüm: rota hesapla ve logla)."""
-	logger = setup_logging()
+	profile_path = getattr(args, 'profile', None)
+	if profile_path:
+		PROFILER.enable()
+	logger = setup_logging(getattr(args, 'log_level', 'INFO'))
+	trace_path = getattr(args, 'trace', None)
+	if trace_path:
+		try:
+			TRACE.open(trace_path, capacity=getattr(args, 'trace_capacity', 65536), sample=parse_sample_spec(getattr(args, 'trace_sample', None)))
+		except (OSError, ValueError) as e:
+			logger.error(f"[Trace] iz açılamadı: {e}")
+			return 1
 
 	# Bileşenler
 	from src.online.router import OnlineRouter
@@ -172,7 +237,19 @@ def cmd_run(args) -> int:
 		get_live_edge_factor=lambda edge_id: 1.0,
 		get_signal_delay=lambda node_id: 0.0,
 		anfis_adjust_heuristic=lambda base_h, ctx: base_h,
+		queue_kind=args.search_queue,
 	)
+	closures_path = getattr(args, 'closures', None)
+	if closures_path:
+		from src.online.closures import load_closures
+		try:
+			closures = load_closures(closures_path)
+		except (OSError, ValueError) as e:
+			logger.error(f"Kapatma dosyası okunamadı: {closures_path} ({e})")
+			return 1
+		for c in closures:
+			router.block(c.get("edges", ()), c.get("lanes", ()), start=c.get("start"), end=c.get("end"), reason=str(c.get("reason", "")))
+		logger.info(f"[Closure] {len(closures)} kapatma yüklendi ({closures_path})")
 
 	# Başlangıç/hedef düğümleri belirle
 	start = args.start_node
@@ -196,256 +273,345 @@ def cmd_run(args) -> int:
 
 	# SUMO entegrasyonu: bağlan, ambulans için otomatik rota oluştur ve replan yap
 	if not args.dry_run:
+		# Hastane hedefi: CLI > sabit ID > fallback
+		DEFAULT_HOSPITAL = "cluster_6762197026_6762197027_6762197028_6762197029"
+		goal_node = goal or DEFAULT_HOSPITAL
+		if goal_node not in router.nodes:
+			# fallback: önceki kestirim
+			cands = [nid for nid in router.nodes.keys() if nid.startswith('cluster_9855125')]
+			if cands:
+				goal_node = cands[0]
+			else:
+				goal_node = list(router.nodes.keys())[-1]
+		dispatcher = generator = None
+		if getattr(args, 'stations', None):
+			# Sevk kipi: rastgele spawn yerine olaylar en yakın müsait istasyon birimine atanır.
+			# SUMO'ya bağlanmadan doğrulanır (hatalı girdide bağlantı/kurulum bırakılmaz).
+			from src.online.dispatch import Dispatcher, IncidentGenerator, load_incidents, parse_stations
+			stations = parse_stations(args.stations, router)
+			if not stations:
+				logger.error("[Dispatch] geçerli istasyon yok")
+				return 1
+			try:
+				dispatcher = Dispatcher(router, stations, args.hospitals or [goal_node], turnaround_s=args.turnaround)
+				scheduled = load_incidents(args.incidents, router) if getattr(args, 'incidents', None) else []
+			except (OSError, ValueError) as e:
+				logger.error(f"[Dispatch] {e}")
+				return 1
+			incident_nodes = dispatcher.routable_nodes()
+			if not incident_nodes:
+				logger.error("[Dispatch] istasyonlardan ulaşılabilen ve hastaneye bağlı düğüm yok")
+				return 1
+			rate = args.incident_rate if args.incident_rate is not None else (0.0 if scheduled else 60.0)
+			generator = IncidentGenerator(incident_nodes, rate_per_hour=rate, scheduled=scheduled)
+		# Hata durumunda da kapatılacak kaynaklar (finally): süreç havuzu ve paylaşılan bellek,
+		# model izleme iş parçacığı, RPC sarmalayıcıları, TraCI bağlantısı, log yazıcıları
+		adapter = rpc = tlc = registry = replan_service = None
 		try:
 			from src.adapters import SumoAdapter
 			adapter = SumoAdapter()
-			if not adapter.connect(args.config, gui=args.gui):
+			output_dir = getattr(args, 'output_dir', None)
+			sumo_extra = []
+			if output_dir:
+				os.makedirs(output_dir, exist_ok=True)
+				sumo_extra += ["--tripinfo-output", os.path.join(output_dir, "tripinfo.xml"), "--tripinfo-output.write-unfinished", "true"]
+			if getattr(args, 'seed', None) is not None:
+				sumo_extra += ["--seed", str(args.seed)]
+			if getattr(args, 'route_files', None):
+				sumo_extra += ["--route-files", args.route_files]
+			replay_path = getattr(args, 'replay', None)
+			if replay_path:
+				# SUMO'suz: kayıtlı gözlemler en yüksek hızda oynatılır (tripinfo/KPI yok)
+				if not adapter.connect_replay(replay_path):
+					return 1
+				logger.info(f"[Replay] {adapter.replay.recording.num_frames} adımlık kayıt oynatılıyor: {replay_path}")
+			elif not adapter.connect(args.config, gui=args.gui, port=getattr(args, 'port', None), label=getattr(args, 'sumo_label', None), extra_args=sumo_extra, gui_delay_ms=getattr(args, 'gui_delay', 100.0)):
 				logger.warning("SUMO bağlantısı başarısız; sadece rota hesaplandı.")
 				return 0
+			elif getattr(args, 'record', None):
+				from src.online.fleet import AMBULANCE_TYPE_KEYWORDS
+				adapter.start_recording(args.record, keywords=AMBULANCE_TYPE_KEYWORDS)
+			from src.online import snapshot as snapshots
+			scenario = {
+				"config": os.path.abspath(args.config),
+				"net": os.path.abspath(net_path),
+				"route_files": os.path.abspath(args.route_files) if getattr(args, 'route_files', None) else None,
+				"seed": getattr(args, 'seed', None),
+			}
+			load_state_path = getattr(args, 'load_state', None)
+			warm = None
+			if load_state_path and not replay_path:
+				# Sıcak başlatma: SUMO durumu + yanındaki bileşen durumları
+				try:
+					warm = snapshots.read_snapshot_meta(load_state_path)
+				except (OSError, ValueError) as e:
+					logger.error(f"[State] anlık görüntü okunamadı: {e}")
+					return 1
+				if warm is not None:
+					for key, (saved_v, cur_v) in snapshots.scenario_mismatches(warm.get("scenario", {}), scenario).items():
+						logger.warning(f"[State] senaryo farkı: {key} kayıtta={saved_v} şimdi={cur_v}")
+				if not adapter.load_state(load_state_path):
+					return 1
+				logger.info(f"[State] t={adapter.get_sim_time():.1f}s anlık görüntüsünden başlandı: {load_state_path}" + ("" if warm is not None else " (bileşen durumu yok)"))
+			rpc_budget_cmds = parse_command_budgets(getattr(args, 'rpc_budget_cmd', None))
+			if getattr(args, 'rpc_accounting', False) or getattr(args, 'rpc_report', None) or getattr(args, 'rpc_budget', None) or rpc_budget_cmds:
+				rpc = RpcAccounting(budget_per_step=getattr(args, 'rpc_budget', None), command_budgets=rpc_budget_cmds, mode=getattr(args, 'rpc_budget_mode', 'warn'))
+				if not rpc.install():
+					rpc = None
 			replan_interval = float(getattr(args, 'replan_interval', 10.0))
 			logger.info(f"SUMO bağlantısı kuruldu. {replan_interval:.0f} saniyede bir yeniden planlama çalışacak.")
 			# ANFIS tabanlı trafik ışığı kontrolcüsü
 			tl_ids = adapter.get_traffic_light_ids()
 			main_tl = tl_ids[0] if tl_ids else None
-			tlc = TrafficLightController(main_tl, anfis_model_path=getattr(args, 'anfis_model', None))
-			import time
-			from threading import Thread, Lock
-			from concurrent.futures import ProcessPoolExecutor
-			router_lock = Lock()
-			acc = 0.0
+			tlc = TrafficLightController(
+				main_tl,
+				anfis_model_path=getattr(args, 'anfis_model', None),
+				event_driven_checks=not getattr(args, 'poll_every_step', False),
+				check_tick_s=adapter.get_step_length_seconds(),
+				training_log_format=getattr(args, 'training_log_format', 'csv'),
+				training_log_dir=getattr(args, 'training_log_dir', 'data'),
+				anfis_lut=({"resolution": args.anfis_lut_resolution, "error_bound": args.anfis_lut_error} if getattr(args, 'anfis_lut', False) else None),
+			)
+			if getattr(args, 'model_watch', False) or getattr(args, 'ab_model', None):
+				from src.ai.model_registry import ModelRegistry
+				variants = {"A": args.anfis_model}
+				weights = {"A": 1.0}
+				if getattr(args, 'ab_model', None):
+					variants["B"] = args.ab_model
+					weights = {"A": 1.0 - args.ab_split, "B": args.ab_split}
+				registry = ModelRegistry(
+					variants,
+					weights=weights,
+					poll_interval_s=args.model_poll_interval,
+					model_kwargs=({"use_lut": True, "lut_resolution": args.anfis_lut_resolution, "lut_error_bound": args.anfis_lut_error} if getattr(args, 'anfis_lut', False) else None),
+				)
+				tlc.attach_model_registry(registry)
+				if getattr(args, 'model_watch', False):
+					registry.start()
+			if getattr(args, 'online_learning', False):
+				tlc.enable_online_learning(
+					forgetting=args.online_forgetting,
+					checkpoint_path=args.online_checkpoint,
+					checkpoint_interval_s=args.online_checkpoint_interval,
+				)
+				logger.info(f"[ANFIS-online] çevrimiçi öğrenme açık (λ={args.online_forgetting}, checkpoint: {args.online_checkpoint})")
+			from src.online.fleet import AmbulanceFleet
+			from src.online.scheduler import SimScheduler
+			from src.online.tasks import (
+				IDLE_RECHECK_S,
+				AmbulanceSpawner,
+				ClosureTask,
+				DispatchTask,
+				FleetPriorityTask,
+				ModelSwapTask,
+				PriorityMaintenanceTask,
+				ReplanTask,
+			)
 			loops = 0
-			# Hastane hedefi: CLI > sabit ID > fallback
-			DEFAULT_HOSPITAL = "cluster_6762197026_6762197027_6762197028_6762197029"
-			goal_node = goal or DEFAULT_HOSPITAL
-			if goal_node not in router.nodes:
-				# fallback: önceki kestirim
-				cands = [nid for nid in router.nodes.keys() if nid.startswith('cluster_9855125')]
-				if cands:
-					goal_node = cands[0]
-				else:
-					goal_node = list(router.nodes.keys())[-1]
-
+			t0 = cur_t = adapter.get_sim_time()
+			TRACE.now = cur_t
+			green_seconds = float(getattr(args, 'green_seconds', 12.0))
+			release_distance_m = float(getattr(args, 'release_distance', 50.0))
+			keep_green_seconds = float(getattr(args, 'keep_green_seconds', 1.5))
 			spawn_period = max(5.0, float(args.spawn_period))
-			spawn_acc = 0.0
-			last_spawn_sim_t = 0.0
-			spawn_seq = 0
-			# İlk ambulansı hemen oluştur (kullanıcı beklemeden görsün)
 			import random
-			nodes_list_boot = router.nodes_reaching(goal_node) or list(router.nodes.keys())
-			if nodes_list_boot:
-				start_node_boot = random.choice(nodes_list_boot)
-				_, boot_path = router.astar(start_node_boot, goal_node)
-				edges_boot = []
-				for i in range(len(boot_path)-1):
-					u2, v2 = boot_path[i], boot_path[i+1]
-					ed = router.endpoints_to_edge.get((u2, v2))
-					if ed:
-						edges_boot.append(ed)
-				if edges_boot:
-					rid0 = f"amb_route_{spawn_seq}"
-					vid0 = f"ambulance_{spawn_seq}"
-					spawn_seq += 1
-					adapter.add_route(rid0, edges_boot)
-					adapter.add_vehicle(vid0, rid0, type_id='ambulance')
-					logger.info(f"İlk ambulans: {vid0}, from={start_node_boot} → {goal_node}, edges={len(edges_boot)}")
+			if getattr(args, 'seed', None) is not None:
+				random.seed(args.seed)
+			step_budget_ms = float(getattr(args, 'step_budget_ms', 0.0) or 0.0)
+			scheduler = SimScheduler(step_budget_s=(step_budget_ms / 1000.0) if step_budget_ms > 0 else None)
+			# Bileşenler: her biri yalnızca vadesi geldiğinde çalışır (küçük öncelik önce)
+			step_s = adapter.get_step_length_seconds()
+			adaptive = bool(getattr(args, 'adaptive_step', False))
+			max_jump_s = max(step_s, float(getattr(args, 'max_step_jump', 5.0)))
+			edge_routing = getattr(args, 'routing', 'node') == 'edge'
+			spawner = AmbulanceSpawner(adapter, router, goal_node, on_spawn=lambda now: scheduler.wake("fleet", now), edge_routing=edge_routing)
+			if dispatcher is not None:
+				logger.info(f"[Dispatch] {len(dispatcher.stations)} istasyon ({sum(st.units for st in dispatcher.stations)} birim), {len(dispatcher.hospitals)} hastane, olay hızı {generator.rate_per_hour:.0f}/saat, zamanlı olay {len(generator.scheduled)}, olay düğümü {len(generator.nodes)}")
+			elif warm is None:
+				# İlk ambulansı hemen oluştur (kullanıcı beklemeden görsün)
+				spawner.spawn(t0, first=True)
+			maintainer = PriorityMaintenanceTask(tlc, release_distance_m=release_distance_m, keep_green_seconds=keep_green_seconds)
+			fleet = AmbulanceFleet(adapter, step_s=step_s)
+			fleet_task = FleetPriorityTask(
+				adapter, tlc, fleet, green_seconds=green_seconds,
+				on_priority=lambda now: scheduler.wake("maintain", now),
+				influence_m=(args.influence_distance if adaptive else None),
+				max_sleep_s=max_jump_s,
+			)
+
+			def lead_start_node():
+				# Döngü içi replan: en eski ambulansın bulunduğu kenarın ucu (yoksa CLI başlangıcı)
+				lead = fleet.lead()
+				ends = router.edge_to_endpoints.get(lead.edge) if lead is not None else None
+				return ends[1] if ends else start
+
+			if int(getattr(args, 'replan_workers', 0) or 0) > 0:
+				from src.online.replan_service import ReplanService
+				replan_service = ReplanService(router, workers=args.replan_workers, max_age_s=max(2.0 * replan_interval, 5.0), edge_routing=edge_routing)
+				if not replan_service.start():
+					logger.warning("[Replan] servis yok; artımlı A* (döngü içi) kullanılacak")
+					replan_service = None
+			replanner = ReplanTask(
+				adapter, router, goal_node, lead_start_node,
+				interval_s=replan_interval,
+				time_budget_s=(step_budget_ms / 1000.0) if step_budget_ms > 0 else None,
+				service=replan_service,
+				get_vehicles=fleet.vehicle_edges,
+				max_batch=args.fleet_replan_batch,
+				route_plan=dispatcher.route_plan if dispatcher is not None else None,
+			)
+			if registry is not None:
+				# Uyarlamalı adımda her adım yoklama atlamaları engellemesin
+				scheduler.every("model_swap", 1.0 if adaptive else 0.0, ModelSwapTask(registry), priority=0)
+			scheduler.every("maintain", 0.0, maintainer, priority=10)
+			scheduler.every("fleet", 0.0, fleet_task, priority=20)
+			if closures_path:
+				scheduler.every("closures", IDLE_RECHECK_S, ClosureTask(router, on_change=lambda now: scheduler.wake("replan", now)), priority=25, start_at=t0)
+			if dispatcher is not None:
+				dispatch_task = DispatchTask(dispatcher, spawner, generator, fleet, interval_s=args.dispatch_interval)
+				scheduler.every("dispatch", args.dispatch_interval, dispatch_task, priority=30, start_at=t0)
+			else:
+				scheduler.every("spawn", spawn_period, spawner, priority=30, start_at=t0 + spawn_period)
+			scheduler.every("replan", replan_interval, replanner, priority=40, start_at=t0 + replan_interval)
+			if tlc.online_learner is not None:
+				learner = tlc.online_learner
+				def checkpoint_task(now: float):
+					learner.checkpoint()
+				scheduler.every("online_checkpoint", learner.checkpoint_interval_s, checkpoint_task, priority=90, start_at=t0 + learner.checkpoint_interval_s)
+			if profile_path:
+				profile_interval = max(step_s, float(getattr(args, 'profile_interval', 30.0)))
+				def profile_task(now: float):
+					PROFILER.gauge("sim_time_s", now)
+					PROFILER.write(profile_path)
+				scheduler.every("profile_export", profile_interval, profile_task, priority=95, start_at=t0 + profile_interval)
+			snapshot_components = {"controller": tlc, "fleet": fleet, "spawner": spawner, "replan": replanner}
+			if dispatcher is not None:
+				snapshot_components["dispatch"] = dispatch_task
+			if warm is not None:
+				comps = warm.get("components", {})
+				# --seed verildiyse tohumlar farklılaşsın diye rastgelelik yeniden kurulmaz
+				spawner.load_state_dict(comps.get("spawner", {}), restore_random=getattr(args, 'seed', None) is None)
+				tlc.load_state_dict(comps.get("controller", {}))
+				fleet.load_state_dict(comps.get("fleet", {}), now=cur_t)
+				replanner.load_state_dict(comps.get("replan", {}))
+				if dispatcher is not None:
+					dispatch_task.load_state_dict(comps.get("dispatch", {}))
+				scheduler.load_state_dict({name: due for name, due in warm.get("scheduler", {}).items() if name != "save_state"})
+				if tlc.active_priority:
+					scheduler.wake("maintain", cur_t)
+				logger.info(f"[State] bileşenler geri yüklendi: {len(fleet)} ambulans, {len(tlc.active_priority)} aktif öncelik, spawn sırası {spawner.seq}")
+			save_state_path = getattr(args, 'save_state', None)
+			state_saved = []
+			if save_state_path and not replay_path:
+				def save_state_task(now: float):
+					if snapshots.save_snapshot(save_state_path, adapter, now, scenario, snapshot_components, scheduler=scheduler):
+						state_saved.append(now)
+				scheduler.at("save_state", max(t0, float(args.save_state_at)), save_state_task, priority=99)
 			# SUMO bekleyen olduğu sürece çalış; ayrıca güvenlik için üst sınır
 			max_loops = 1000000
-			last_replan_sim_t = -1.0
-			# Asenkron replan durumu
-			replan_thread = None
-			replan_in_flight = False
-			replan_result = None  # tuple(best_time, best_path, cur_t)
-			replan_future = None
-			executor = None  # Process pool kaldırıldı
-			incr_search = None  # IncrementalAStar durumu
+			# --max-sim-time başlangıçtan (sıcak başlatmada anlık görüntü anından) itibaren
 			max_sim_time = getattr(args, 'max_sim_time', None)
-			# Eski kontrolcü kaldırıldı; doğrudan TL kontrolcüsü kullanılacak
+			if max_sim_time is not None:
+				max_sim_time = t0 + float(max_sim_time)
 
+			jumps = 0
+			jumped_s = 0.0
+			if rpc is not None:
+				rpc.begin()
 			while adapter.connected and loops < max_loops:
-				adapter.step()
+				# Uyarlamalı adım: sakin aralıklar (vadesi gelen görev yok, hiçbir ambulans
+				# TLS etki alanına giremez) tek simulationStep(hedef) çağrısıyla geçilir
+				target = None
+				if adaptive:
+					nxt = scheduler.next_due_time()
+					target = min(nxt if nxt is not None else float('inf'), cur_t + max_jump_s)
+					if max_sim_time is not None:
+						target = min(target, float(max_sim_time))
+					if target < cur_t + 1.5 * step_s:
+						target = None
+				with PROFILER.timer("step"):
+					if target is not None:
+						adapter.step_to(target)
+					else:
+						adapter.step()
+				if target is not None:
+					jumps += 1
+					jumped_s += target - cur_t
 				loops += 1
-				acc += adapter.get_step_length_seconds()
-				spawn_acc += adapter.get_step_length_seconds()
-				# Yeşil öncelik bakımını her adımda çalıştır
-				try:
-					tlc.maintain_active_priorities(release_distance_m=50.0, keep_green_seconds=1.5)
-				except Exception:
-					pass
-				# Periyodik ambulans spawn (simülasyon zamanına göre)
-				cur_t = adapter.get_sim_time()
+				TRACE.now = cur_t = adapter.get_sim_time()
+				if rpc is not None and rpc.violation is not None:
+					logger.error(f"[RPC] {rpc.violation}; koşu durduruluyor")
+					break
 				if max_sim_time is not None and cur_t >= float(max_sim_time):
 					break
-				if (cur_t - last_spawn_sim_t) >= spawn_period and cur_t > 0:
-					spawn_acc = 0.0
-					last_spawn_sim_t = cur_t
-					# rastgele bir başlangıç düğümü seç
-					import random
-					nodes_list = router.nodes_reaching(goal_node) or list(router.nodes.keys())
-					start_node_spawn = random.choice(nodes_list)
-					# spawn rotasını her zaman hastaneye (goal_node) yap
-					_, spawn_path = router.astar(start_node_spawn, goal_node)
-					edges_spawn = []
-					for i in range(len(spawn_path)-1):
-						u2, v2 = spawn_path[i], spawn_path[i+1]
-						ed = router.endpoints_to_edge.get((u2, v2))
-						if ed:
-							edges_spawn.append(ed)
-					if edges_spawn:
-						rid = f"amb_route_{spawn_seq}"
-						vid = f"ambulance_{spawn_seq}"
-						spawn_seq += 1
-						if adapter.connected:
-							adapter.add_route(rid, edges_spawn)
-							adapter.add_vehicle(vid, rid, type_id='ambulance')
-						logger.info(f"Yeni ambulans: {vid}, from={start_node_spawn} → {goal_node}, edges={len(edges_spawn)}")
-				# Replan (sabit aralık: args.replan_interval) — asenkron hesaplama
-				if last_replan_sim_t < 0:
-					last_replan_sim_t = cur_t
-				# Ambulans seçimi ve snap-to-node
-				veh_ids = adapter.get_vehicle_ids()
-				ambulance_id = next((v for v in veh_ids if any(k in adapter.get_vehicle_type(v).lower() for k in ("emergency", "ambulance"))), None)
-				start_node = start
-				if ambulance_id:
-					x, y = adapter.get_vehicle_position(ambulance_id)
-					snapped = router.nearest_node(x, y)
-					if snapped:
-						start_node = snapped
-					# ANFIS ile tetikleme ve öncelik uygula
-					cand_tl_id = None
-					approach_edge = adapter.get_vehicle_edge(ambulance_id)
-					dist_to_tls = float('inf')
-					try:
-						import traci
-					except Exception:
-						traci = None  # type: ignore
-					if traci is not None:
-						try:
-							next_tls = traci.vehicle.getNextTLS(ambulance_id)
-							if next_tls:
-								cand_tl_id = str(next_tls[0][0])
-								dist_to_tls = float(next_tls[0][2])
-						except Exception:
-							cand_tl_id = None
-					if (cand_tl_id is None) and approach_edge:
-						tl_list = []
-						if traci is not None:
-							try:
-								tl_list = adapter.get_traffic_light_ids()
-							except Exception:
-								tl_list = []
-						for tl_id in tl_list:
-							try:
-								links = traci.trafficlight.getControlledLinks(tl_id) if traci is not None else []
-								for group in links:
-									for in_lane, _out_lane, _via in group:
-										if in_lane.startswith(approach_edge + "_"):
-											cand_tl_id = tl_id
-											dist_to_tls = 150.0
-											break
-									if cand_tl_id:
-										break
-							except Exception:
-								continue
-					should_trigger = False
-					if cand_tl_id and approach_edge:
-						should_trigger = tlc.should_trigger_priority(cand_tl_id, approach_edge, cur_t, ambulance_id)
-					if cand_tl_id and approach_edge and should_trigger:
-						logger.info(f"[TL] (ANFIS) approach={approach_edge} -> tl={cand_tl_id} karar uygulanıyor (veh={ambulance_id})")
-						try:
-							ok = tlc.set_ambulance_priority(cand_tl_id, approach_edge, green_seconds=12.0, ambulance_id=ambulance_id)
-							if ok:
-								logger.info(f"[Priority] t={cur_t:.1f}s veh={ambulance_id} tl={cand_tl_id} edge={approach_edge} action=green_priority")
-						except Exception as e:
-							logger.debug(f"[Priority] set_ambulance_priority error: {e}")
-							pass
-				# Zaman temelli tetikleme: asenkron replan başlat
-				if (cur_t - last_replan_sim_t) >= replan_interval and cur_t > 0 and not replan_in_flight:
-					last_replan_sim_t = cur_t
-					# Yakın çevredeki kenarlar için sınırlı canlı metrik al (tam ağ yerine)
-					def collect_local_edges(seed_node: str, max_depth: int = 2, max_edges: int = 200):
-						from collections import deque
-						seen = set([seed_node])
-						q = deque([(seed_node, 0)])
-						edges = []
-						while q and len(edges) < max_edges:
-							n, d = q.popleft()
-							for v, base_time, eid in router.out_edges.get(n, []):
-								if eid:
-									edges.append(eid)
-								if d < max_depth and v not in seen:
-									seen.add(v)
-									q.append((v, d+1))
-						return edges[:max_edges]
-					edges_subset = collect_local_edges(start_node, max_depth=2, max_edges=200)
-					edge_stats_snapshot = adapter.get_edges_stats_subset(edges_subset) if edges_subset else {}
-					# Artımlı A* başlat (bloklamadan, her adımda sınırlı genişleme)
-					from src.online.router import OnlineRouter
-					incr_search = IncrementalAStar(router, start_node, goal_node, edge_stats_snapshot)
-					replan_in_flight = True
-				# Replan sonucu hazırsa işle ve logla (bloklamadan)
-				if incr_search is not None and replan_in_flight:
-					# Her döngüde sınırlı sayıda düğüm genişlet; simülasyon akışı durmaz
-					incr_search.step(max_expansions=50)
-					if incr_search.finished():
-						res_time, res_path = incr_search.get_result()
-						if res_time == float('inf') or not res_path:
-							# başarısız arama, sonucu atla
-							incr_search = None
-							replan_in_flight = False
-							continue
-						best_time, best_path = res_time, res_path
-						edge_stats_used = incr_search.edge_stats
-						t_mark = cur_t
-						incr_search = None
-						replan_in_flight = False
-						# Logla
-						def lf_used(edge_id: str) -> float:
-							if not edge_id:
-								return 1.0
-							base_t = getattr(router, 'edge_base_time', {}).get(edge_id, 0.0)
-							if base_t <= 0:
-								return 1.0
-							st = edge_stats_used.get(edge_id)
-							if not st:
-								return 1.0
-							veh = st.get("veh", 0.0)
-							v = st.get("v", getattr(router, 'edge_free_speed', {}).get(edge_id, 10.0))
-							v_ref = max(1.0, getattr(router, 'edge_free_speed', {}).get(edge_id, 10.0))
-							cong = max(0.0, min(3.0, (v_ref / max(1.0, v))))
-							load = 1.0 + min(2.0, veh / 20.0)
-							return max(1.0, min(5.0, 0.5 * cong + 0.5 * load))
-						# ALT-KIYAS
-						if len(best_path) >= 3:
-							uA, wA = best_path[0], best_path[1]
-							uB, wB = best_path[0], best_path[2]
-							edgeA = router.endpoints_to_edge.get((uA, wA))
-							edgeB = router.endpoints_to_edge.get((uB, wB))
-							def est(edge_id: str) -> float:
-								base = getattr(router, 'edge_base_time', {}).get(edge_id, 0.0)
-								live = lf_used(edge_id)
-								return base * live
-							if edgeA and edgeB:
-								logger.info(
-									f"[ALT-KIYAS] edgeA={edgeA} t~{est(edgeA):.2f}s vs edgeB={edgeB} t~{est(edgeB):.2f}s → seçilen={edgeA}"
-								)
-						# İlk 3 kenarın kalemleri
-						if len(best_path) >= 2:
-							items = []
-							for i in range(min(3, len(best_path)-1)):
-								u2, v2 = best_path[i], best_path[i+1]
-								eid = router.endpoints_to_edge.get((u2, v2))
-								if not eid:
-									continue
-								bt = getattr(router, 'edge_base_time', {}).get(eid, 0.0)
-								lfv = lf_used(eid)
-								items.append(f"{eid}: base={bt:.2f}s live={lfv:.2f} adj={bt*lfv:.2f}s")
-							if items:
-								logger.info("[Edges] " + " | ".join(items))
-						logger.info(f"[Replan] t={t_mark:.1f}s ETA~{best_time:.1f}s, düğüm: {len(best_path)}")
-						# (Öncelik uygulaması yukarıya taşındı; replan sonucuna bağlı olmadan her döngüde çalışır)
+				# Yalnızca vadesi gelen işler (model değişimi, öncelik bakımı, ambulans, spawn, replan)
+				scheduler.run_due(cur_t)
+				if state_saved and getattr(args, 'stop_after_save', False):
+					break
+			logger.info(f"[Scheduler] {scheduler.stats()}")
+			if adaptive:
+				logger.info(f"[Step] {loops} döngü, {jumps} atlama ({jumped_s:.1f}s sim), filo yeniden eşitleme: {fleet.resyncs}")
+			logger.info(f"[Fleet] aktif={len(fleet)} varan={fleet.arrived} spawn={len(spawner.spawned)}")
+			if dispatcher is not None:
+				logger.info(f"[Dispatch] {dispatcher.stats()}")
+			if replan_service is not None:
+				logger.info(f"[Replan] servis sayaçları: {replan_service.counts}")
+			logger.info(f"[TL] Kontrol sayaçları: {tlc.check_stats} (adım: {loops})")
+			if profile_path:
+				PROFILER.gauge("sim_time_s", cur_t)
+				PROFILER.gauge("steps", loops)
+				PROFILER.write(profile_path)
+				for name, summary in PROFILER.snapshot()["timers"].items():
+					logger.info(f"[Profile] {name}: n={summary['count']} p50={summary['p50_us']:.0f}µs p99={summary['p99_us']:.0f}µs toplam={summary['total_ms']:.0f}ms")
+				logger.info(f"[Profile] sayaçlar: {PROFILER.counters} -> {profile_path}")
+			if adapter.replay is not None:
+				replay = adapter.replay
+				logger.info(f"[Replay] {replay.frame + 1}/{replay.recording.num_frames} adım; komutlar: {replay.commands}; kayıtta olmayan sorgular: {replay.misses}")
+			if TRACE.enabled:
+				TRACE.close()
+				logger.info(f"[Trace] {TRACE.emitted} olay ({TRACE.sampled_out} örneklemeyle atlandı, {TRACE.flushes} blok) -> {trace_path}")
+			if rpc is not None:
+				rpc.uninstall()
+				for line in rpc.report():
+					logger.info(line)
+				if getattr(args, 'rpc_report', None):
+					rpc.write(args.rpc_report)
+			if tlc.online_learner is not None:
+				logger.info(f"[ANFIS-online] {tlc.online_learner.samples} gözlem, {tlc.online_learner.swaps} model değişimi")
+			if registry is not None:
+				logger.info(f"[Models] {registry.swaps} değişim, {registry.rejected} ret; A/B atamaları: {registry.assignments()}")
+			# KPI özeti (tripinfo SUMO kapanınca tamamlanır)
 			adapter.close()
+			if output_dir:
+				from src.experiments.runner import summarize_tripinfo
+				trip_path = os.path.join(output_dir, "tripinfo.xml")
+				if os.path.exists(trip_path):
+					kpis = summarize_tripinfo(trip_path)
+					kpis["sim_time_s"] = float(cur_t) if loops else 0.0
+					kpis["steps"] = loops
+					with open(os.path.join(output_dir, "kpis.json"), "w", encoding="utf-8") as f:
+						json.dump(kpis, f, ensure_ascii=False, indent=2)
+					logger.info(f"[KPI] {kpis}")
+			if rpc is not None and rpc.violation is not None:
+				return 1
 		except Exception as e:
 			logger.warning(f"SUMO entegrasyonu sırasında hata: {e}")
+		finally:
+			# Normal yolda bir kısmı zaten kapanmıştır; hepsi tekrar çağrıya dayanıklı
+			for name, close in (
+				("replan", replan_service.close if replan_service is not None else None),
+				("models", registry.stop if registry is not None else None),
+				("rpc", rpc.uninstall if rpc is not None else None),
+				("adapter", adapter.close if adapter is not None else None),
+				("controller", tlc.close if tlc is not None else None),
+			):
+				if close is None:
+					continue
+				try:
+					close()
+				except Exception as e:
+					logger.warning(f"[Run] {name} kapatılamadı: {e}")
+			TRACE.close()
 
 	return 0
 
@@ -460,8 +626,17 @@ def build_arg_parser() -> argparse.ArgumentParser:
 	prep.add_argument("--output", default="data/landmarks.json", help="Çıktı dosyası")
 	prep.add_argument("--num-landmarks", type=int, default=8, help="Landmark sayısı (6-10 arası önerilir)")
 	prep.add_argument("--seed", type=int, default=42, help="Rastgelelik tekrarlanabilirliği için tohum")
+	prep.add_argument("--queue", choices=list(QUEUE_KINDS), default="heap", help="Dijkstra öncelik kuyruğu: ikili yığın veya radix yığın (mesafeler her ikisinde de kesin)")
 	prep.set_defaults(func=cmd_prep_landmarks)
 
+	# prep-training
+	prep_tr = sub.add_parser("prep-training", help="Eğitim loglarını tekilleştirilmiş veri setine dönüştür")
+	prep_tr.add_argument("--inputs", nargs="+", default=["data/signal_training_v2.csv", "data/signal_training.csv"], help="Eğitim logları (döndürülmüş parçalar otomatik eklenir)")
+	prep_tr.add_argument("--output", default="data/training_dedup.npz", help="Çıktı veri seti (.npz)")
+	prep_tr.add_argument("--chunk-size", type=int, default=100000, help="Okuma parça boyutu (satır)")
+	prep_tr.add_argument("--episode-gap", type=float, default=1.0, help="Aynı yaklaşımda bu kadar saniyeden uzun boşluk yeni bölüm başlatır")
+	prep_tr.set_defaults(func=cmd_prep_training)
+
 	# run
 	run = sub.add_parser("run", help="Simülasyonu çalıştır (A* + ANFIS)")
 	run.add_argument("--config", default="config/simulation.sumocfg", help="SUMO .sumocfg")
@@ -471,10 +646,113 @@ def build_arg_parser() -> argparse.ArgumentParser:
 	run.add_argument("--goal-node", default="cluster_6762197026_6762197027_6762197028_6762197029", help="Hedef (hastane) junction ID")
 	run.add_argument("--spawn-period", type=float, default=60.0, help="Ambulans spawn periyodu (s)")
 	run.add_argument("--replan-interval", type=float, default=10.0, help="Yeniden planlama periyodu (s)")
+	run.add_argument("--fleet-replan-batch", type=int, default=32, help="Adım başına en fazla yeniden planlanacak ambulans (vadesi en çok geçen önce)")
+	run.add_argument("--replan-workers", type=int, default=2, help="Yeniden planlama süreç havuzu boyutu; rota araca uygulanır (0: döngü içi artımlı A*, yalnızca log)")
+	run.add_argument("--routing", choices=["node", "edge"], default="node", help="Rota arama modu: düğüm tabanlı A* veya kenar tabanlı (bağlantılardaki dönüş yasakları ve dönüş maliyetleri)")
+	run.add_argument("--stations", nargs="+", default=None, help="Sevk kipi: ambulans istasyonları `düğüm[:birim]` veya `kimlik=düğüm[:birim]`; olaylar en yakın müsait birime toplu atanır (rastgele spawn yerine)")
+	run.add_argument("--hospitals", nargs="+", default=None, help="Sevk kipi: hastane düğümleri (olaya en yakını seçilir; vars. --goal-node)")
+	run.add_argument("--incident-rate", type=float, default=None, help="Sevk kipi: rastgele olay hızı (olay/saat, Poisson; vars. 60, --incidents verilirse 0)")
+	run.add_argument("--incidents", default=None, help="Sevk kipi: zamanlı olaylar (JSON: [{time, node}] veya [{time, x, y}])")
+	run.add_argument("--dispatch-interval", type=float, default=5.0, help="Sevk kipi: toplu atama periyodu (s)")
+	run.add_argument("--turnaround", type=float, default=0.0, help="Sevk kipi: görev bitince birimin yeniden müsait olma gecikmesi (s)")
+	run.add_argument("--closures", default=None, help="Yol kapatmaları (JSON: [{edges, lanes, start, end, reason}]); rotalar kapalı kenarlardan kaçınır, rotası etkilenen ambulanslar hemen yeniden planlanır")
+	run.add_argument("--search-queue", choices=list(QUEUE_KINDS), default="heap", help="A* öncelik kuyruğu: ikili yığın veya radix yığın (0.1 s nicelemeli; rota süresi en iyiden en fazla 0.1 s sapabilir)")
 	run.add_argument("--max-sim-time", type=float, default=None, help="Maksimum simülasyon süresi (s) – aşılınca çıkılır")
+	run.add_argument("--green-seconds", type=float, default=12.0, help="Öncelik yeşil süresi (ANFIS tahmini yoksa)")
+	run.add_argument("--release-distance", type=float, default=50.0, help="Ambulans kavşaktan bu mesafe (m) uzaklaşınca öncelik bırakılır")
+	run.add_argument("--keep-green-seconds", type=float, default=1.5, help="Öncelik sürerken yeşilin her yenilemede uzatıldığı süre (s)")
+	run.add_argument("--seed", type=int, default=None, help="Spawn ve SUMO için rastgelelik tohumu")
+	run.add_argument("--route-files", default=None, help="Yapılandırmadaki arka plan trafiği rota dosyası yerine bunu kullan")
+	run.add_argument("--port", type=int, default=None, help="TraCI portu (paralel koşular için)")
+	run.add_argument("--sumo-label", default=None, help="TraCI bağlantı etiketi")
+	run.add_argument("--output-dir", default=None, help="tripinfo.xml ve kpis.json çıktı dizini")
+	run.add_argument("--training-log-dir", default="data", help="Eğitim loglarının yazılacağı dizin")
 	run.add_argument("--anfis-model", default="models/anfis.json", help="ANFIS model dosyası (.json)")
+	run.add_argument("--anfis-lut", action="store_true", help="ANFIS çıktıları için önceden hesaplanmış karar yüzeyi tablosunu kullan")
+	run.add_argument("--anfis-lut-resolution", type=int, default=8, help="LUT: her MF kenarının bölündüğü parça sayısı (başlangıç)")
+	run.add_argument("--anfis-lut-error", type=float, default=0.02, help="LUT: izin verilen en büyük interpolasyon hatası")
+	run.add_argument("--training-log-format", choices=["csv", "parquet", "npz"], default="csv", help="Eğitim logu biçimi (parquet için pyarrow gerekir)")
+	run.add_argument("--adaptive-step", action="store_true", help="Sakin aralıkları tek simulationStep(hedef) çağrısıyla atla (sonraki görev vadesine veya bir ambulansın TLS etki alanına girişine kadar)")
+	run.add_argument("--max-step-jump", type=float, default=5.0, help="Uyarlamalı adımda tek seferde en fazla ilerleme (s)")
+	run.add_argument("--influence-distance", type=float, default=300.0, help="Uyarlamalı adımda TLS etki alanı yarıçapı (m); içindeki ambulans varken tek adım")
+	run.add_argument("--gui-delay", type=float, default=100.0, help="sumo-gui oynatım gecikmesi (ms); başsız modda uygulanmaz")
+	run.add_argument("--profile", default=None, help="Faz süreleri/sayaçları bu dosyaya yaz (.prom: Prometheus metin biçimi, aksi halde JSON)")
+	run.add_argument("--profile-interval", type=float, default=30.0, help="Profil dosyasının yenilenme aralığı (simülasyon saniyesi)")
+	run.add_argument("--rpc-accounting", action="store_true", help="TraCI çağrılarını komut/çağıran başına say ve süresini ölç (koşu sonunda özet)")
+	run.add_argument("--rpc-report", default=None, help="RPC muhasebesini bu JSON dosyasına yaz (muhasebeyi açar)")
+	run.add_argument("--rpc-budget", type=int, default=None, help="Adım başına en fazla TraCI çağrısı (muhasebeyi açar)")
+	run.add_argument("--rpc-budget-cmd", action="append", default=None, metavar="ALAN.KOMUT=N", help="Komut başına adım bütçesi, ör. vehicle.getRoadID=4 (tekrarlanabilir)")
+	run.add_argument("--rpc-budget-mode", choices=["warn", "fail"], default="warn", help="Bütçe aşımında uyar veya koşuyu hata koduyla bitir (regresyon denetimi)")
+	run.add_argument("--save-state", default=None, help="--save-state-at anında SUMO durumunu ve bileşen durumlarını (yanında .json) kaydet (.xml.gz / .sbx)")
+	run.add_argument("--save-state-at", type=float, default=1800.0, help="Anlık görüntü zamanı (simülasyon s)")
+	run.add_argument("--stop-after-save", action="store_true", help="Anlık görüntü yazılınca koşuyu bitir (ısınma koşusu)")
+	run.add_argument("--load-state", default=None, help="--save-state görüntüsünden sıcak başla (--max-sim-time bu andan itibaren sayılır)")
+	run.add_argument("--record", default=None, help="Her adımın gözlemlerini (ambulanslar, ilgili TLS/şeritler, okunan kenarlar) bu .npz dosyasına kaydet")
+	run.add_argument("--replay", default=None, help="SUMO yerine --record kaydını en yüksek hızda oynat (açık çevrim; yazma komutları yalnızca sayılır)")
+	run.add_argument("--trace", default=None, help="Karar olaylarını bu ikili iz dosyasına yaz (analyze-trace ile okunur)")
+	run.add_argument("--trace-capacity", type=int, default=65536, help="İz halka tamponu kapasitesi (olay); dolunca dosyaya boşaltılır")
+	run.add_argument("--trace-sample", action="append", default=None, metavar="TÜR=N", help="Bu türden her N olayın birini yaz, ör. trigger=10 (tekrarlanabilir)")
+	run.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Log seviyesi")
+	run.add_argument("--step-budget-ms", type=float, default=0.0, help="Adım başına görev bütçesi (ms, gerçek zaman); aşılırsa kritik olmayan görevler ertelenir (0: sınırsız)")
+	run.add_argument("--poll-every-step", action="store_true", help="Olay güdümlü TLS kontrolünü kapat; her adımda yokla")
+	run.add_argument("--model-watch", action="store_true", help="Model dosyasını izle; yeni sürümü arka planda doğrulayıp adımlar arasında devreye al")
+	run.add_argument("--model-poll-interval", type=float, default=2.0, help="Model dosyası kontrol aralığı (s, gerçek zaman)")
+	run.add_argument("--ab-model", default=None, help="A/B için ikinci model (B varyantı); TLS'ler kimlik özetine göre atanır")
+	run.add_argument("--ab-split", type=float, default=0.5, help="B varyantına atanacak TLS oranı")
+	run.add_argument("--online-learning", action="store_true", help="Uzatma kurallarını simülasyon sırasında RLS ile güncelle")
+	run.add_argument("--online-forgetting", type=float, default=0.999, help="RLS unutma çarpanı (0.9-1.0)")
+	run.add_argument("--online-checkpoint", default="models/anfis.online.json", help="Çevrimiçi modelin periyodik kayıt yolu")
+	run.add_argument("--online-checkpoint-interval", type=float, default=300.0, help="Checkpoint aralığı (simülasyon saniyesi)")
 	run.set_defaults(func=cmd_run)
 
+	# tune
+	tune = sub.add_parser("tune", help="Öncelik parametrelerini başsız SUMO koşularıyla ayarla (evrim stratejisi)")
+	tune.add_argument("--config", default="config/simulation.sumocfg", help="SUMO .sumocfg")
+	tune.add_argument("--anfis-model", default="models/anfis.json", help="Temel ANFIS modeli")
+	tune.add_argument("--generations", type=int, default=10, help="Nesil sayısı")
+	tune.add_argument("--population", type=int, default=8, help="Nesil başına aday sayısı (λ)")
+	tune.add_argument("--seeds", type=int, default=3, help="Aday başına tohum (koşu) sayısı")
+	tune.add_argument("--seed", type=int, default=42, help="Temel tohum")
+	tune.add_argument("--workers", type=int, default=4, help="Paralel SUMO koşusu sayısı")
+	tune.add_argument("--delay-weight", type=float, default=0.5, help="Amaçta arka plan gecikmesinin ağırlığı")
+	tune.add_argument("--prune-margin", type=float, default=0.25, help="En iyiden bu oran kadar kötü adayların kalan tohumları koşulmaz")
+	tune.add_argument("--max-sim-time", type=float, default=600.0, help="Koşu başına simülasyon süresi (s)")
+	tune.add_argument("--spawn-period", type=float, default=60.0, help="Ambulans spawn periyodu (s)")
+	tune.add_argument("--base-port", type=int, default=8900, help="İlk TraCI portu (her koşu ayrı port alır)")
+	tune.add_argument("--output-dir", default="runs/tune", help="Koşu dizinleri, results.jsonl, best.json")
+	tune.add_argument("--cache-dir", default="runs/cache", help="Koşu önbelleği dizini")
+	tune.add_argument("--adaptive-step", action="store_true", help="Koşular uyarlamalı adımla (`run --adaptive-step`) çalışsın")
+	tune.add_argument("--replan-workers", type=int, default=0, help="Koşu başına yeniden planlama süreç havuzu (vars. 0: paralel işçilerde iç içe havuz kurulmaz)")
+	tune.set_defaults(func=cmd_tune)
+
+	# experiment
+	exp = sub.add_parser("experiment", help="Tohum x senaryo ızgarasını paralel başsız koşup KPI'ları topla")
+	exp.add_argument("--config", default="config/simulation.sumocfg", help="SUMO .sumocfg")
+	exp.add_argument("--seeds", type=int, default=5, help="Senaryo başına tohum sayısı")
+	exp.add_argument("--seed", type=int, default=1, help="İlk tohum")
+	exp.add_argument("--spawn-period", type=float, nargs="+", default=[60.0], help="Ambulans spawn periyotları (s)")
+	exp.add_argument("--replan-interval", type=float, nargs="+", default=[10.0], help="Yeniden planlama periyotları (s)")
+	exp.add_argument("--anfis-model", nargs="+", default=["models/anfis.json"], help="Karşılaştırılacak ANFIS modelleri")
+	exp.add_argument("--route-files", nargs="+", default=None, help="Arka plan trafiği rota dosyaları (talep seviyeleri; verilmezse yapılandırmadaki)")
+	exp.add_argument("--warm-state", default=None, help="Tüm koşuları bu run --save-state anlık görüntüsünden başlat")
+	exp.add_argument("--max-sim-time", type=float, default=1800.0, help="Koşu başına simülasyon süresi (s)")
+	exp.add_argument("--workers", type=int, default=4, help="Bu makinedeki paralel SUMO koşusu sayısı")
+	exp.add_argument("--reclaim-after", type=float, default=1800.0, help="Bu kadar saniye yaşam sinyali gelmeyen işler yeniden kuyruğa alınır")
+	exp.add_argument("--retry-failed", action="store_true", help="Hatayla biten işleri yeniden koş")
+	exp.add_argument("--adaptive-step", action="store_true", help="Koşular uyarlamalı adımla (`run --adaptive-step`) çalışsın")
+	exp.add_argument("--replan-workers", type=int, default=0, help="Koşu başına yeniden planlama süreç havuzu (vars. 0: paralel işçilerde iç içe havuz kurulmaz)")
+	exp.add_argument("--aggregate-only", action="store_true", help="Koşmadan yalnızca results.csv/summary.csv üret")
+	exp.add_argument("--output-dir", default="runs/experiment", help="Kuyruk, koşu dizinleri ve sonuç tabloları (makineler arası paylaşılabilir)")
+	exp.set_defaults(func=cmd_experiment)
+
+	# analyze-trace
+	atr = sub.add_parser("analyze-trace", help="run --trace ile yazılan olay izini çözümle")
+	atr.add_argument("trace", help="İz dosyası")
+	atr.add_argument("--vehicle", default=None, help="Yalnızca bu ambulansın zaman çizelgesi")
+	atr.add_argument("--max-events", type=int, default=50, help="Araç başına gösterilecek en fazla olay (0: hepsi)")
+	atr.add_argument("--json", default=None, help="Tam raporu (olaylar dahil) JSON olarak yaz")
+	atr.set_defaults(func=cmd_analyze_trace)
+
 	return parser
 
 
@@ -7,6 +7,8 @@ Amaç:
 - 6-10 adet landmark düğümü seçmek (basit strateji: derece/merkeziyet karması)
 - Her landmark için tek-kaynaklı en kısa yol (mesafe/süre) tablolarını üretmek
 - A* için admissible alt-sınır: max_i |L_i(goal) - L_i(n)|
+- Öncelik kuyruğu seçilebilir (`queue_kind`: "heap" / "radix"); radix yığında
+  da mesafeler kesindir (iyileşen düğüm yeniden kuyruğa girer)
 """
 
 import os
@@ -15,13 +17,17 @@ import random
 import xml.etree.ElementTree as ET
 from typing import Dict, List, Tuple
 
+from src.online.pqueue import make_queue
+
 
 class LandmarkPrecomputer:
 	"""Landmark seçimi ve çok-kaynaklı Dijkstra tabloları üretimi"""
 
-	def __init__(self, network_path: str, num_landmarks: int = 8, seed: int = 42):
+	def __init__(self, network_path: str, num_landmarks: int = 8, seed: int = 42, queue_kind: str = "heap"):
 		self.network_path = network_path
 		self.num_landmarks = max(1, num_landmarks)
+		make_queue(queue_kind)
+		self.queue_kind = queue_kind
 		random.seed(seed)
 
 		self.nodes: Dict[str, Tuple[float, float]] = {}
@@ -88,6 +94,8 @@ class LandmarkPrecomputer:
 	def _dijkstra(self, source: str) -> Dict[str, float]:
 		"""Basit Dijkstra: travel_time ağırlıklarıyla tek-kaynaklı en kısa süre"""
 		import heapq
+		if self.queue_kind != "heap":
+			return self._dijkstra_queue(source)
 		dist = {n: float('inf') for n in self.nodes.keys()}
 		dist[source] = 0.0
 		pq = [(0.0, source)]
@@ -102,6 +110,21 @@ class LandmarkPrecomputer:
 					heapq.heappush(pq, (alt, v))
 		return dist
 
+	def _dijkstra_queue(self, source: str) -> Dict[str, float]:
+		"""`_dijkstra`ın seçilen kuyruk türüyle (decrease-key) sürümü."""
+		dist = {n: float('inf') for n in self.nodes.keys()}
+		dist[source] = 0.0
+		pq = make_queue(self.queue_kind)
+		pq.push(source, 0.0)
+		while pq:
+			du, u = pq.pop()
+			for v, w in self.out_edges.get(u, []):
+				alt = du + w
+				if alt < dist[v]:
+					dist[v] = alt
+					pq.push(v, alt)
+		return dist
+
 	def compute_and_save(self, output_path: str) -> bool:
 		"""Landmark tablolarını üretir ve JSON olarak kaydeder."""
 		self._parse_network()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Eğitim verisi için akışlı ön-işleme (ingest).
+
+Amaç:
+- `data/signal_training_v2.csv` (yeni şema) ve eski `data/signal_training.csv`
+  dosyalarını parça parça (chunk) okumak; döndürülmüş parçaları da (`.1.csv`,
+  `.00000.npz`, `.parquet`) dahil etmek
+- İki şemayı tek bir ortak şemaya eşlemek
+- Aynı (junction_id, approach_edge_id) bölümündeki (episode) ardışık, neredeyse
+  aynı satırları tek satırda toplamak (`weight` = toplanan satır sayısı)
+- Sıkıştırılmış, bölüm indeksli bir veri seti (`data/training_dedup.npz`) yazmak
+
+Bellek kullanımı ham simülasyon uzunluğuyla değil, tekilleştirilmiş satır
+sayısıyla büyür.
+"""
+
+import glob
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Ortak şema
+NUMERIC_COLUMNS: Tuple[str, ...] = (
+	"dist_to_tls",
+	"ambulance_speed",
+	"queue_length",
+	"eta_seconds",
+	"phase_index",
+	"phase_remaining",
+	"y_extend",
+)
+STRING_COLUMNS: Tuple[str, ...] = ("action", "junction_id", "approach_edge_id", "source", "model_version")
+TIME_COLUMN = "t"
+
+# Ardışık satırların "aynı" sayılması için sütun başına mutlak tolerans
+DEFAULT_TOLERANCES: Dict[str, float] = {
+	"dist_to_tls": 2.0,
+	"ambulance_speed": 0.5,
+	"queue_length": 0.0,
+	"eta_seconds": 0.5,
+	"phase_index": 0.0,
+	"phase_remaining": 0.5,
+	"y_extend": 0.25,
+}
+
+# v1 (signal_training.csv) kuyruk tahmini: araç sayısı * 7.5 m (kontrolcüdeki gibi)
+VEH_LENGTH_M = 7.5
+
+
+def expand_log_paths(paths: List[str]) -> List[str]:
+	"""Log yollarını döndürülmüş parçalarıyla birlikte genişlet (sıralı)."""
+	out: List[str] = []
+	for p in paths:
+		root, ext = os.path.splitext(p)
+		rotated = []
+		for cand in glob.glob(f"{glob.escape(root)}.*{ext}"):
+			m = re.match(re.escape(root) + r"\.(\d+)" + re.escape(ext) + "$", cand)
+			if m:
+				rotated.append((int(m.group(1)), cand))
+		# Döndürülen (daha eski) parçalar önce, aktif dosya en son
+		out.extend(c for _i, c in sorted(rotated))
+		if os.path.exists(p):
+			out.append(p)
+		out.extend(sorted(glob.glob(f"{glob.escape(root)}.[0-9][0-9][0-9][0-9][0-9].npz")))
+		if os.path.exists(root + ".parquet"):
+			out.append(root + ".parquet")
+	seen = set()
+	return [p for p in out if not (p in seen or seen.add(p))]
+
+
+def unify_frame(df: pd.DataFrame) -> pd.DataFrame:
+	"""v1 veya v2 şemasındaki çerçeveyi ortak şemaya eşle."""
+	n = len(df)
+	out = pd.DataFrame(index=df.index)
+	is_v2 = "dist_to_tls" in df.columns
+	for col in NUMERIC_COLUMNS:
+		if col in df.columns:
+			out[col] = pd.to_numeric(df[col], errors="coerce")
+		else:
+			out[col] = np.nan
+	if not is_v2:
+		# v1: yaklaşan araç sayısından kuyruk uzunluğu; mesafe/hız/ETA kaydedilmemiş
+		if "veh_approach" in df.columns:
+			out["queue_length"] = pd.to_numeric(df["veh_approach"], errors="coerce") * VEH_LENGTH_M
+	out[TIME_COLUMN] = pd.to_numeric(df[TIME_COLUMN], errors="coerce") if TIME_COLUMN in df.columns else np.arange(n, dtype=np.float64)
+	for col in ("action", "junction_id", "approach_edge_id"):
+		out[col] = df[col].astype(str) if col in df.columns else ""
+	out["source"] = "v2" if is_v2 else "v1"
+	# Kararı veren model sürümü (eski loglarda yok)
+	out["model_version"] = df["model_version"].fillna("").astype(str) if "model_version" in df.columns else ""
+	return out
+
+
+def _read_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+	if path.endswith(".npz"):
+		with np.load(path, allow_pickle=False) as data:
+			yield pd.DataFrame({k: data[k] for k in data.files})
+	elif path.endswith(".parquet"):
+		import pyarrow.parquet as pq
+		pf = pq.ParquetFile(path)
+		for batch in pf.iter_batches(batch_size=chunksize):
+			yield batch.to_pandas()
+	else:
+		for chunk in pd.read_csv(path, chunksize=chunksize):
+			yield chunk
+
+
+def iter_unified_chunks(paths: List[str], chunksize: int = 100000) -> Iterator[pd.DataFrame]:
+	"""Tüm log dosyalarından ortak şemada parçalar üret."""
+	for path in expand_log_paths(paths):
+		for chunk in _read_chunks(path, chunksize):
+			if len(chunk):
+				yield unify_frame(chunk)
+
+
+class EpisodeDeduplicator:
+	"""Bölüm bazında ardışık, neredeyse aynı satırları toplar.
+
+	Bölüm (episode): aynı (junction_id, approach_edge_id) için zaman boşluğu
+	`episode_gap_s`i aşmayan ardışık satırlar. Bir satır, bölümün son *tutulan*
+	satırından tüm sayısal sütunlarda tolerans içinde, aynı `action` ve aynı
+	`model_version` ise atılır; tutulan satırın `weight` değeri bir artar
+	(kayan sapma birikmez).
+	"""
+
+	def __init__(self, tolerances: Optional[Dict[str, float]] = None, episode_gap_s: float = 1.0):
+		self.tolerances = dict(DEFAULT_TOLERANCES)
+		if tolerances:
+			self.tolerances.update(tolerances)
+		self._tol = np.array([self.tolerances.get(c, 0.0) for c in NUMERIC_COLUMNS], dtype=np.float64)
+		self.episode_gap_s = float(episode_gap_s)
+		# anahtar -> [episode_id, son_t, tutulan_satır(dict), sayısal_vektör]
+		self._open: Dict[Tuple[str, str], list] = {}
+		self._next_episode = 0
+		self._episodes: Dict[int, Dict[str, object]] = {}
+		self.rows_in = 0
+		self.rows_out = 0
+
+	def _emit(self, state: list, out: List[dict]) -> None:
+		row = state[2]
+		if row is not None:
+			out.append(row)
+			self.rows_out += 1
+			state[2] = None
+
+	def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+		"""Bir parçayı işle; kesinleşen (artık toplanmayacak) satırları döndür."""
+		out: List[dict] = []
+		num = chunk[list(NUMERIC_COLUMNS)].to_numpy(dtype=np.float64)
+		ts = chunk[TIME_COLUMN].to_numpy(dtype=np.float64)
+		actions = chunk["action"].tolist()
+		junctions = chunk["junction_id"].tolist()
+		approaches = chunk["approach_edge_id"].tolist()
+		sources = chunk["source"].tolist()
+		versions = chunk["model_version"].tolist()
+		tol = self._tol
+		for i in range(len(chunk)):
+			self.rows_in += 1
+			key = (junctions[i], approaches[i])
+			t = ts[i]
+			vec = num[i]
+			state = self._open.get(key)
+			new_episode = state is None or not (t - state[1] <= self.episode_gap_s) or t < state[1]
+			if new_episode:
+				if state is not None:
+					self._emit(state, out)
+				ep = self._next_episode
+				self._next_episode += 1
+				self._episodes[ep] = {"junction_id": key[0], "approach_edge_id": key[1], "t0": t, "t1": t, "raw_rows": 0}
+				state = [ep, t, None, None]
+				self._open[key] = state
+			ep = state[0]
+			info = self._episodes[ep]
+			info["t1"] = t
+			info["raw_rows"] = int(info["raw_rows"]) + 1
+			state[1] = t
+			kept = state[2]
+			if kept is not None and kept["action"] == actions[i] and kept["model_version"] == versions[i]:
+				diff = np.abs(vec - state[3])
+				same = (diff <= tol) | (np.isnan(vec) & np.isnan(state[3]))
+				if same.all():
+					kept["weight"] += 1
+					continue
+			if kept is not None:
+				self._emit(state, out)
+			row = {c: vec[j] for j, c in enumerate(NUMERIC_COLUMNS)}
+			row.update({TIME_COLUMN: t, "action": actions[i], "junction_id": key[0], "approach_edge_id": key[1], "source": sources[i], "model_version": versions[i], "episode": ep, "weight": 1})
+			state[2] = row
+			state[3] = vec.copy()
+		return pd.DataFrame(out)
+
+	def finish(self) -> pd.DataFrame:
+		out: List[dict] = []
+		for state in self._open.values():
+			self._emit(state, out)
+		self._open.clear()
+		return pd.DataFrame(out)
+
+	def episodes(self) -> Dict[int, Dict[str, object]]:
+		return self._episodes
+
+
+def _encode_strings(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	vocab, codes = np.unique(values.astype(str), return_inverse=True)
+	return codes.astype(np.int32), vocab.astype(str)
+
+
+def build_dataset(paths: List[str], output_path: str, chunksize: int = 100000, episode_gap_s: float = 1.0, tolerances: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+	"""Logları akışlı oku, tekilleştir ve bölüm indeksli `.npz` veri seti yaz."""
+	dedup = EpisodeDeduplicator(tolerances=tolerances, episode_gap_s=episode_gap_s)
+	parts: List[pd.DataFrame] = []
+	for chunk in iter_unified_chunks(paths, chunksize=chunksize):
+		kept = dedup.process(chunk)
+		if len(kept):
+			parts.append(kept)
+	tail = dedup.finish()
+	if len(tail):
+		parts.append(tail)
+	if not parts:
+		return {"rows_in": dedup.rows_in, "rows_out": 0, "episodes": 0}
+	df = pd.concat(parts, ignore_index=True)
+	df.sort_values(["episode", TIME_COLUMN], kind="stable", inplace=True, ignore_index=True)
+	arrays: Dict[str, np.ndarray] = {}
+	for col in NUMERIC_COLUMNS:
+		arrays[col] = df[col].to_numpy(dtype=np.float32)
+	arrays[TIME_COLUMN] = df[TIME_COLUMN].to_numpy(dtype=np.float64)
+	arrays["weight"] = df["weight"].to_numpy(dtype=np.int32)
+	arrays["episode"] = df["episode"].to_numpy(dtype=np.int32)
+	for col in STRING_COLUMNS:
+		codes, vocab = _encode_strings(df[col].to_numpy())
+		arrays[col] = codes
+		arrays[f"vocab_{col}"] = vocab
+	# Bölüm indeksi: her bölümün satır aralığı [start, end) ve meta verisi
+	ep_ids, starts = np.unique(arrays["episode"], return_index=True)
+	ends = np.append(starts[1:], len(df))
+	eps = dedup.episodes()
+	arrays["ep_id"] = ep_ids.astype(np.int32)
+	arrays["ep_start"] = starts.astype(np.int64)
+	arrays["ep_end"] = ends.astype(np.int64)
+	arrays["ep_t0"] = np.array([eps[int(e)]["t0"] for e in ep_ids], dtype=np.float64)
+	arrays["ep_t1"] = np.array([eps[int(e)]["t1"] for e in ep_ids], dtype=np.float64)
+	arrays["ep_raw_rows"] = np.array([eps[int(e)]["raw_rows"] for e in ep_ids], dtype=np.int64)
+	out_dir = os.path.dirname(output_path)
+	if out_dir:
+		os.makedirs(out_dir, exist_ok=True)
+	tmp = output_path + ".tmp"
+	with open(tmp, "wb") as f:
+		np.savez_compressed(f, **arrays)
+	os.replace(tmp, output_path)
+	return {"rows_in": dedup.rows_in, "rows_out": len(df), "episodes": len(ep_ids)}
+
+
+def load_dataset(path: str) -> Dict[str, np.ndarray]:
+	"""`build_dataset` çıktısını oku; metin sütunlarını sözlükten geri çöz."""
+	with np.load(path, allow_pickle=False) as data:
+		arrays = {k: data[k] for k in data.files}
+	for col in STRING_COLUMNS:
+		vocab = arrays.pop(f"vocab_{col}", None)
+		if vocab is not None and col in arrays:
+			arrays[col] = vocab[arrays[col]]
+	return arrays
+
+
+def dataset_frame(path: str) -> pd.DataFrame:
+	"""Veri setini ortak şemada tek bir DataFrame olarak döndür (bölüm indeksi hariç)."""
+	arrays = load_dataset(path)
+	n = len(arrays[TIME_COLUMN])
+	return pd.DataFrame({k: v for k, v in arrays.items() if not k.startswith("ep_") and len(v) == n})
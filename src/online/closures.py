@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Yol kapatmaları: derlenmiş kenar dizileri üzerinde kenar maskesi.
+
+`EdgeMask`, `CompiledGraph.edge_mask` dizisini (kenar başına bir bayt; 1: kapalı)
+yönetir. Kapatma (`Closure`) bir kenar ve/veya şerit kümesidir; isteğe bağlı
+zaman penceresi [start, end) simülasyon saniyesidir. Kenar başına kapatma sayacı
+tutulur, böylece çakışan kapatmalar birbirini bozmaz; şerit kapatmalarında kenar
+ancak tüm şeritleri kapalıysa kapanır. Değişiklikler vektörel yapılır (1000
+kenar ~milisaniye) ve yalnızca durumu değişen kenarlar dinleyicilere bildirilir.
+
+Aramalara etkisi:
+- A* (sözlük, artımlı, CSR ve kenar tabanlı) kapalı kenarları atlar; maske
+  paylaşımlı bellekteyse (`ReplanService`) işçiler değişikliği hemen görür
+- Landmark alt-sınırları geçerli kalır: kenar kapatmak mesafeleri yalnızca artırır
+- SCC indeksi ağın tamamına göre kalır: "ulaşılamaz" yanıtı kapatmalarla da
+  doğrudur (hızlı eleme geçerli); `nodes_reaching` üst küme olabilir
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MaskListener = Callable[[List[str], List[str]], None]
+
+
+class Closure:
+	def __init__(self, closure_id: int, edges: np.ndarray, lanes: List[str], start: Optional[float], end: Optional[float], reason: str = ""):
+		self.closure_id = closure_id
+		self.edges = edges
+		self.lanes = lanes
+		self.start = start
+		self.end = end
+		self.reason = reason
+		self.active = False
+
+	def in_window(self, now: float) -> bool:
+		return (self.start is None or self.start <= now) and (self.end is None or now < self.end)
+
+
+class EdgeMask:
+	def __init__(self, graph, edge_lanes: Dict[str, List[str]], listeners: Optional[List[MaskListener]] = None):
+		self.graph = graph
+		n = graph.num_edges
+		self.edge_count = np.zeros(n, dtype=np.int32)
+		self.lane_total = np.zeros(n, dtype=np.int16)
+		self.lane_closed = np.zeros(n, dtype=np.int16)
+		self.lane_edge: Dict[str, int] = {}
+		for eid, lanes in edge_lanes.items():
+			k = graph.edge_index.get(eid)
+			if k is None:
+				continue
+			self.lane_total[k] = len(lanes)
+			for lane in lanes:
+				self.lane_edge[lane] = k
+		self._lane_count: Dict[str, int] = {}
+		self.closures: Dict[int, Closure] = {}
+		self._next_id = 1
+		self.blocked_ids: Set[str] = set()
+		self.version = 0
+		self.listeners: List[MaskListener] = listeners if listeners is not None else []
+
+	@property
+	def num_blocked(self) -> int:
+		return len(self.blocked_ids)
+
+	def is_blocked(self, edge_id: str) -> bool:
+		return edge_id in self.blocked_ids
+
+	# -------------------- Kapatmalar --------------------
+	def add(self, edges: Iterable[str] = (), lanes: Iterable[str] = (), start: Optional[float] = None, end: Optional[float] = None, now: Optional[float] = None, reason: str = "") -> int:
+		"""Kapatma ekle; kimliğini döndür. Pencere verilmişse `now` (veya `update`) ile etkinleşir."""
+		edge_index = self.graph.edge_index
+		edges = list(edges)
+		idx = np.unique(np.fromiter((edge_index[e] for e in edges if e in edge_index), dtype=np.int32))
+		lanes = [lane for lane in dict.fromkeys(lanes) if lane in self.lane_edge]
+		if len(idx) < len(set(edges)):
+			logger.debug(f"[Closure] ağda olmayan {len(set(edges)) - len(idx)} kenar yok sayıldı")
+		cid = self._next_id
+		self._next_id += 1
+		closure = Closure(cid, idx, lanes, None if start is None else float(start), None if end is None else float(end), reason)
+		self.closures[cid] = closure
+		if (start is None and end is None) or (now is not None and closure.in_window(now)):
+			self._set_active(closure, True)
+		return cid
+
+	def remove(self, closure_id: int) -> bool:
+		closure = self.closures.pop(closure_id, None)
+		if closure is None:
+			return False
+		if closure.active:
+			self._set_active(closure, False)
+		return True
+
+	def update(self, now: float) -> Optional[float]:
+		"""Pencereleri `now` anına göre uygula; bir sonraki pencere sınırını (s) döndür (yoksa None)."""
+		nxt: Optional[float] = None
+		for closure in list(self.closures.values()):
+			want = closure.in_window(now)
+			if want != closure.active:
+				self._set_active(closure, want)
+			if closure.end is not None and closure.end <= now:
+				del self.closures[closure.closure_id]
+				continue
+			for t in (closure.start, closure.end):
+				if t is not None and t > now and (nxt is None or t < nxt):
+					nxt = t
+		return nxt
+
+	# -------------------- Maske --------------------
+	def _set_active(self, closure: Closure, active: bool) -> None:
+		closure.active = active
+		sign = 1 if active else -1
+		if len(closure.edges):
+			self.edge_count[closure.edges] += sign
+		lane_edges = []
+		for lane in closure.lanes:
+			c = self._lane_count.get(lane, 0)
+			k = self.lane_edge[lane]
+			if active and c == 0:
+				self.lane_closed[k] += 1
+			elif not active and c == 1:
+				self.lane_closed[k] -= 1
+			self._lane_count[lane] = c + sign
+			if not self._lane_count[lane]:
+				del self._lane_count[lane]
+			lane_edges.append(k)
+		affected = np.union1d(closure.edges, np.asarray(lane_edges, dtype=np.int32)) if lane_edges else closure.edges
+		self._refresh(affected)
+		state = "etkin" if active else "kalktı"
+		logger.info(f"[Closure] #{closure.closure_id} {state}: {len(closure.edges)} kenar, {len(closure.lanes)} şerit{(' (' + closure.reason + ')') if closure.reason else ''}; kapalı kenar={self.num_blocked}")
+
+	def _refresh(self, idx: np.ndarray) -> None:
+		if not len(idx):
+			return
+		mask = self.graph.edge_mask
+		total = self.lane_total[idx]
+		new = (self.edge_count[idx] > 0) | ((total > 0) & (self.lane_closed[idx] >= total))
+		old = mask[idx] != 0
+		mask[idx] = new
+		edge_ids = self.graph.edge_ids
+		blocked = [edge_ids[k] for k in idx[new & ~old]]
+		freed = [edge_ids[k] for k in idx[old & ~new]]
+		if not blocked and not freed:
+			return
+		self.blocked_ids.update(blocked)
+		self.blocked_ids.difference_update(freed)
+		self.version += 1
+		for fn in self.listeners:
+			try:
+				fn(blocked, freed)
+			except Exception as e:
+				logger.debug(f"[Closure] dinleyici hatası: {e}")
+
+
+def load_closures(path: str) -> List[Dict[str, object]]:
+	"""JSON kapatma listesi: [{edges?, lanes?, start?, end?, reason?}] veya {"closures": [...]}."""
+	import json
+	with open(path, "r", encoding="utf-8") as f:
+		data = json.load(f)
+	if isinstance(data, dict):
+		data = data.get("closures", [])
+	return [dict(c) for c in data]
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Ambulans sevki: istasyonlar, olaylar ve toplu atama.
+
+- Süre matrisi (istasyon x olay): istasyon başına derlenmiş CSR grafiğinde bir
+  kez tam Dijkstra ağacı kurulur ve önbelleğe alınır; her turun matrisi bu
+  ağaçlardan tek dizi indekslemesiyle okunur (yüzlerce olay mikro saniyeler).
+  Kapalı kenarlar (kenar maskesi) atlanır; maske değişince ağaçlar yenilenir.
+- Atama: müsait birimler (istasyon başına birim sayısı kadar satır) x bekleyen
+  olaylar maliyet matrisi Macar algoritmasıyla (numpy, O(n^3)) en küçük toplam
+  süreyle eşlenir; matrisin küçük kenarı `HUNGARIAN_MAX`ı aşarsa en ucuz çiftten başlayan
+  açgözlü eşleme kullanılır (olay başına yalnızca en yakın `GREEDY_TOP_K` birim aday;
+  adaylarının hepsi başka olaylara giden olay sonraki turu bekler). Birim kalmazsa
+  olaylar kuyrukta bekler; hiçbir istasyondan ulaşılamayan veya hiçbir hastaneye
+  ulaşamayan olaylar kuyruktan atılır (`unroutable`).
+- Hastane: olaya en yakın hastane (hastane başına ters tam Dijkstra ağacı;
+  kenar maskesi değişince yeniden kurulur).
+
+Sevk edilen ambulansın rotası istasyon -> olay -> hastane iki bacaktır; yeniden
+planlama birinci bacakta olayı hedefler ve ikinci bacağı korur (`route_plan`).
+Araç simülasyondan çıkınca birim istasyonuna döner (`turnaround_s` sonra).
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import heapq
+import logging
+import random
+
+import numpy as np
+
+from src.telemetry.profiler import PROFILER
+
+logger = logging.getLogger(__name__)
+
+# Matrisin küçük kenarı bunu aşarsa açgözlü eşleme (Macar O(n^2 m): 100 x 300 ~ 15 ms)
+HUNGARIAN_MAX = 100
+# Açgözlü eşlemede olay başına aday birim sayısı (sıralama n*m yerine k*m çift)
+GREEDY_TOP_K = 8
+# Rotası kurulamayan (spawn başarısız) olay bu kadar denemeden sonra atılır
+MAX_DISPATCH_ATTEMPTS = 3
+# Sevk edilen aracın simülasyonda görünmesi için en uzun bekleme (s); aşılırsa birim geri döner
+INSERT_TIMEOUT_S = 120.0
+
+
+# -------------------- Arama --------------------
+def reverse_csr(graph) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+	"""Ters yaylar: (indptr, kaynak düğüm, süre, kenar) — hedef düğüme göre gruplu."""
+	n = graph.num_nodes
+	tails = np.repeat(np.arange(n, dtype=np.int32), np.diff(graph.indptr))
+	order = np.argsort(graph.arc_to, kind="stable")
+	indptr = np.zeros(n + 1, dtype=np.int32)
+	np.cumsum(np.bincount(graph.arc_to, minlength=n), out=indptr[1:])
+	return indptr, tails[order].astype(np.int32), graph.arc_time[order], graph.arc_edge[order].astype(np.int32)
+
+
+def one_to_many(source: int, targets: Sequence[int], indptr, arc_to, arc_time, arc_edge, mask) -> Dict[int, float]:
+	"""`source`tan hedeflere en kısa süreler (ulaşılamayan: inf); hedefler kesinleşince durur."""
+	inf = float("inf")
+	remaining = set(targets)
+	out = {t: inf for t in remaining}
+	dist: Dict[int, float] = {source: 0.0}
+	pq = [(0.0, source)]
+	while pq and remaining:
+		d, u = heapq.heappop(pq)
+		if d > dist[u]:
+			continue
+		if u in remaining:
+			out[u] = d
+			remaining.discard(u)
+		for a in range(indptr[u], indptr[u + 1]):
+			if mask[arc_edge[a]]:
+				continue
+			v = arc_to[a]
+			nd = d + arc_time[a]
+			if nd < dist.get(v, inf):
+				dist[v] = nd
+				heapq.heappush(pq, (nd, v))
+	return out
+
+
+class TravelTimes:
+	"""Derlenmiş grafik üzerinde süre ağaçları ve matrisleri (serbest akış süreleri).
+
+	İstasyon ve hastane düğümleri sabit olduğundan her biri için tek bir tam Dijkstra
+	ağacı tutulur (ileri: düğümden herkese, ters: herkesten düğüme); kenar maskesi
+	sürümü değişince ağaçlar atılır. Matris satırları bu ağaçlardan dizi indekslemesiyle
+	okunur, böylece tur başına maliyet olay sayısıyla doğrusal kalır.
+	"""
+
+	def __init__(self, graph):
+		self.graph = graph
+		self._fwd = (
+			memoryview(graph.indptr).cast("B").cast("i"),
+			memoryview(graph.arc_to).cast("B").cast("i"),
+			memoryview(graph.arc_time).cast("B").cast("d"),
+			memoryview(graph.arc_edge).cast("B").cast("i"),
+		)
+		self._rev = None
+		self._trees: Dict[Tuple[int, bool], np.ndarray] = {}
+		self._trees_version = -1
+		self.searches = 0
+
+	def _reverse(self):
+		if self._rev is None:
+			indptr, tails, times, edges = reverse_csr(self.graph)
+			self._rev_arrays = (indptr, tails, times, edges)
+			self._rev = tuple(memoryview(a).cast("B").cast(f) for a, f in zip(self._rev_arrays, ("i", "i", "d", "i")))
+		return self._rev
+
+	def _tree(self, node: int, reverse: bool, version: int) -> np.ndarray:
+		if version != self._trees_version:
+			self._trees.clear()
+			self._trees_version = version
+		tree = self._trees.get((node, reverse))
+		if tree is None:
+			n = self.graph.num_nodes
+			arrays = self._reverse() if reverse else self._fwd
+			dist = one_to_many(node, range(n), *arrays, self.graph._edge_mask)
+			tree = np.fromiter((dist[i] for i in range(n)), dtype=np.float64, count=n)
+			self._trees[(node, reverse)] = tree
+			self.searches += 1
+		return tree
+
+	def tree_from(self, node: int, version: int = 0) -> np.ndarray:
+		"""`node`dan tüm düğümlere süreler."""
+		return self._tree(node, False, version)
+
+	def tree_to(self, node: int, version: int = 0) -> np.ndarray:
+		"""Tüm düğümlerden `node`a süreler."""
+		return self._tree(node, True, version)
+
+	def matrix(self, sources: Sequence[int], targets: Sequence[int], version: int = 0) -> np.ndarray:
+		"""len(sources) x len(targets) süre matrisi (s); ulaşılamayan çiftler inf."""
+		if not len(sources):
+			return np.full((0, len(targets)), np.inf)
+		cols = np.asarray(targets, dtype=np.int64)
+		return np.vstack([self.tree_from(s, version)[cols] for s in sources])
+
+
+# -------------------- Atama --------------------
+def hungarian(cost: np.ndarray) -> List[Tuple[int, int]]:
+	"""En küçük toplam maliyetli eşleme [(satır, sütun)]; dikdörtgen matris, sonsuz = yasak."""
+	cost = np.asarray(cost, dtype=np.float64)
+	if cost.size == 0:
+		return []
+	transposed = cost.shape[0] > cost.shape[1]
+	if transposed:
+		cost = cost.T
+	finite = np.isfinite(cost)
+	big = (float(cost[finite].max()) + 1.0) * (cost.shape[0] + 1) if finite.any() else 1.0
+	c = np.where(finite, cost, big)
+	n, m = c.shape
+	inf = float("inf")
+	u = np.zeros(n + 1)
+	v = np.zeros(m + 1)
+	p = np.zeros(m + 1, dtype=np.int64)    # sütun -> satır (1 tabanlı; 0: boş)
+	way = np.zeros(m + 1, dtype=np.int64)
+	for i in range(1, n + 1):
+		p[0] = i
+		j0 = 0
+		minv = np.full(m + 1, inf)
+		used = np.zeros(m + 1, dtype=bool)
+		while True:
+			used[j0] = True
+			i0 = p[j0]
+			free = ~used[1:]
+			cur = c[i0 - 1] - u[i0] - v[1:]
+			upd = free & (cur < minv[1:])
+			minv[1:][upd] = cur[upd]
+			way[1:][upd] = j0
+			cand = np.where(free, minv[1:], inf)
+			j1 = int(np.argmin(cand)) + 1
+			delta = cand[j1 - 1]
+			u[p[used]] += delta
+			v[used] -= delta
+			minv[1:][free] -= delta
+			j0 = j1
+			if p[j0] == 0:
+				break
+		while j0:
+			j1 = way[j0]
+			p[j0] = p[j1]
+			j0 = j1
+	pairs = []
+	for j in range(1, m + 1):
+		i = int(p[j])
+		if i and finite[i - 1, j - 1]:
+			pairs.append((j - 1, i - 1) if transposed else (i - 1, j - 1))
+	return sorted(pairs)
+
+
+def greedy_assign(cost: np.ndarray, top_k: int = GREEDY_TOP_K) -> List[Tuple[int, int]]:
+	"""En ucuz çiftten başlayarak eşle (büyük matrisler için).
+
+	Her sütun (olay) için yalnızca en ucuz `top_k` satır aday olur; adaylarının hepsi
+	başka olaylara giden sütun eşlenmeden kalır (kuyrukta sonraki turu bekler).
+	"""
+	cost = np.asarray(cost, dtype=np.float64)
+	if top_k and cost.shape[0] > top_k:
+		cand = np.argpartition(cost, top_k - 1, axis=0)[:top_k]
+		vals = np.take_along_axis(cost, cand, axis=0)
+		order = np.argsort(vals, axis=None, kind="stable")
+		order = order[:int(np.isfinite(vals).sum())]
+		k_idx, cols = np.unravel_index(order, vals.shape)
+		rows = cand[k_idx, cols]
+	else:
+		order = np.argsort(cost, axis=None, kind="stable")
+		order = order[:int(np.isfinite(cost).sum())]
+		rows, cols = np.unravel_index(order, cost.shape)
+	used_r, used_c = set(), set()
+	pairs = []
+	limit = min(cost.shape)
+	for r, c in zip(rows.tolist(), cols.tolist()):
+		if r in used_r or c in used_c:
+			continue
+		used_r.add(r)
+		used_c.add(c)
+		pairs.append((r, c))
+		if len(pairs) == limit:
+			break
+	return sorted(pairs)
+
+
+def assign(cost: np.ndarray) -> List[Tuple[int, int]]:
+	if min(cost.shape, default=0) > HUNGARIAN_MAX:
+		return greedy_assign(cost)
+	return hungarian(cost)
+
+
+# -------------------- Sevk --------------------
+class Station:
+	def __init__(self, station_id: str, node: str, units: int = 1):
+		self.station_id = station_id
+		self.node = node
+		self.units = max(1, int(units))
+		self.available = self.units
+
+
+class Incident:
+	def __init__(self, incident_id: str, node: str, time: float):
+		self.incident_id = incident_id
+		self.node = node
+		self.time = float(time)
+		self.assigned_at: Optional[float] = None
+		self.attempts = 0
+		self.reached_at: Optional[float] = None
+
+
+class Unit:
+	"""Sevk edilmiş birim: araç, istasyon, olay ve rota bacakları."""
+
+	def __init__(self, vehicle_id: str, station: Station, incident: Incident, hospital: str, leg1: List[str], leg2: List[str], dispatched_at: float):
+		self.vehicle_id = vehicle_id
+		self.station = station
+		self.incident = incident
+		self.hospital = hospital
+		self.leg1 = leg1
+		self.set_leg2(hospital, leg2)
+		self.dispatched_at = float(dispatched_at)
+		self.seen = False
+
+	def set_leg2(self, hospital: str, leg2: List[str]) -> None:
+		self.hospital = hospital
+		self.leg2 = leg2
+		self._leg2_set = set(leg2)
+
+	def past_incident(self, edge: str) -> bool:
+		return bool(edge) and (edge in self._leg2_set or (not self.leg2 and bool(self.leg1) and edge == self.leg1[-1]))
+
+
+class Dispatcher:
+	def __init__(self, router, stations: List[Station], hospitals: List[str], turnaround_s: float = 0.0):
+		self.router = router
+		self.stations = stations
+		self.hospitals = [h for h in hospitals if h in router.nodes]
+		if not self.hospitals:
+			raise ValueError("Ağda hastane düğümü yok")
+		self.turnaround_s = float(turnaround_s)
+		self.graph = router.compiled()
+		self.times = TravelTimes(self.graph)
+		self.queue: List[Incident] = []
+		self.units: Dict[str, Unit] = {}
+		self._returning: List[Tuple[float, Station]] = []
+		self.seq = 0
+		# Hastane bacağını yeniden kuran geri çağırım (başlangıç, hedef) -> kenarlar (bkz. DispatchTask)
+		self.plan_leg: Optional[Callable[[str, str], List[str]]] = None
+		self.stats_counts = {"incidents": 0, "dispatched": 0, "unroutable": 0, "spawn_retries": 0, "reached": 0, "leg_replans": 0}
+		self.wait_s: List[float] = []
+		self.response_s: List[float] = []
+
+	# -------------------- Olaylar --------------------
+	def report(self, node: str, now: float) -> Optional[Incident]:
+		if node not in self.router.nodes:
+			return None
+		inc = Incident(f"inc_{self.seq}", node, now)
+		self.seq += 1
+		self.queue.append(inc)
+		self.stats_counts["incidents"] += 1
+		return inc
+
+	def nearest_hospital(self, node: str) -> Tuple[str, float]:
+		i = self.graph.node_index[node]
+		version = getattr(self.router, "mask_version", 0)
+		best = min(self.hospitals, key=lambda h: self.times.tree_to(self.graph.node_index[h], version)[i])
+		return best, float(self.times.tree_to(self.graph.node_index[best], version)[i])
+
+	def _routable(self, cols: np.ndarray, version: int) -> np.ndarray:
+		"""Düğüm indeksleri için: en az bir istasyondan ulaşılabilir ve bir hastaneye ulaşabilir mi."""
+		idx = self.graph.node_index
+		from_station = np.zeros(len(cols), dtype=bool)
+		for node in {st.node for st in self.stations}:
+			from_station |= np.isfinite(self.times.tree_from(idx[node], version)[cols])
+		to_hospital = np.zeros(len(cols), dtype=bool)
+		for h in self.hospitals:
+			to_hospital |= np.isfinite(self.times.tree_to(idx[h], version)[cols])
+		return from_station & to_hospital
+
+	def routable_nodes(self) -> List[str]:
+		"""Olay üretimi için aday düğümler (bkz. `_routable`; başlangıçtaki kapatmalarla)."""
+		version = getattr(self.router, "mask_version", 0)
+		ok = self._routable(np.arange(self.graph.num_nodes), version)
+		return [self.graph.node_ids[i] for i in np.flatnonzero(ok).tolist()]
+
+	def _drop_unroutable(self, version: int) -> None:
+		"""Hiçbir birimin ulaşamayacağı olayları at (aksi halde kuyrukta sonsuza dek bekler)."""
+		idx = self.graph.node_index
+		cols = np.fromiter((idx[inc.node] for inc in self.queue), dtype=np.int64, count=len(self.queue))
+		ok = self._routable(cols, version)
+		if ok.all():
+			return
+		keep = []
+		for inc, good in zip(self.queue, ok.tolist()):
+			if good:
+				keep.append(inc)
+			else:
+				self.stats_counts["unroutable"] += 1
+				logger.warning(f"[Dispatch] {inc.incident_id} @ {inc.node}: istasyondan/hastaneye rota yok, olay atıldı")
+		self.queue = keep
+
+	# -------------------- Atama --------------------
+	def match(self, now: float) -> List[Tuple[Station, Incident, float]]:
+		"""Bekleyen olayları müsait birimlere toplu ata; [(istasyon, olay, süre)] (kuyruktan çıkarılır)."""
+		self._release_returning(now)
+		if not self.queue:
+			return []
+		version = getattr(self.router, "mask_version", 0)
+		self._drop_unroutable(version)
+		rows = [st for st in self.stations for _ in range(min(st.available, len(self.queue)))]
+		if not rows or not self.queue:
+			return []
+		with PROFILER.timer("dispatch_match"):
+			idx = self.graph.node_index
+			avail = [st for st in self.stations if st.available > 0]
+			m = self.times.matrix([idx[st.node] for st in avail], [idx[inc.node] for inc in self.queue], version)
+			row_of = {id(st): r for r, st in enumerate(avail)}
+			cost = m[[row_of[id(st)] for st in rows]]
+			pairs = assign(cost)
+		out = []
+		taken = set()
+		for r, c in pairs:
+			out.append((rows[r], self.queue[c], float(cost[r, c])))
+			taken.add(c)
+		self.queue = [inc for c, inc in enumerate(self.queue) if c not in taken]
+		return out
+
+	def dispatched(self, vehicle_id: str, station: Station, incident: Incident, hospital: str, leg1: List[str], leg2: List[str], now: float) -> Unit:
+		station.available -= 1
+		incident.assigned_at = float(now)
+		unit = Unit(vehicle_id, station, incident, hospital, leg1, leg2, now)
+		self.units[vehicle_id] = unit
+		self.stats_counts["dispatched"] += 1
+		self.wait_s.append(now - incident.time)
+		return unit
+
+	def requeue(self, incident: Incident) -> None:
+		"""Aracı eklenemeyen olay: sonraki turda yeniden denenir (`MAX_DISPATCH_ATTEMPTS`a kadar)."""
+		incident.attempts += 1
+		if incident.attempts >= MAX_DISPATCH_ATTEMPTS:
+			self.stats_counts["unroutable"] += 1
+			logger.warning(f"[Dispatch] {incident.incident_id} @ {incident.node}: {incident.attempts} denemede araç eklenemedi, olay atıldı")
+			return
+		self.stats_counts["spawn_retries"] += 1
+		self.queue.append(incident)
+
+	# -------------------- Birim durumu --------------------
+	def update_units(self, active: Dict[str, object], now: float) -> None:
+		"""Filo durumuna göre olaya varışları ve biten görevleri işle (`active`: araç -> durum)."""
+		for vid, unit in list(self.units.items()):
+			st = active.get(vid)
+			if st is not None:
+				unit.seen = True
+				if unit.incident.reached_at is None and unit.past_incident(getattr(st, "edge", "")):
+					unit.incident.reached_at = float(now)
+					self.response_s.append(now - unit.incident.time)
+					self.stats_counts["reached"] += 1
+				continue
+			if unit.seen or now - unit.dispatched_at > INSERT_TIMEOUT_S:
+				del self.units[vid]
+				self._returning.append((now + self.turnaround_s, unit.station))
+
+	def _release_returning(self, now: float) -> None:
+		still = []
+		for t, st in self._returning:
+			if t <= now:
+				st.available = min(st.units, st.available + 1)
+			else:
+				still.append((t, st))
+		self._returning = still
+
+	def route_plan(self, vehicle_id: str, edge: str) -> Optional[Tuple[str, List[str]]]:
+		"""Yeniden planlama hedefi: olaya varılmadıysa (olay, kalan hastane bacağı), sonra (hastane, [])."""
+		unit = self.units.get(vehicle_id)
+		if unit is None:
+			return None
+		if unit.incident.reached_at is not None or unit.past_incident(edge):
+			return unit.hospital, []
+		blocked = getattr(self.router, "blocked_edges", ())
+		if blocked and self.plan_leg is not None and any(e in blocked for e in unit.leg2):
+			# Hastane bacağı kapatmaya denk geldi: en yakın hastaneye yeniden kur
+			hospital, _t = self.nearest_hospital(unit.incident.node)
+			leg2 = self.plan_leg(unit.incident.node, hospital)
+			if leg2:
+				unit.set_leg2(hospital, leg2)
+				self.stats_counts["leg_replans"] += 1
+		return unit.incident.node, list(unit.leg2)
+
+	@property
+	def idle(self) -> bool:
+		"""Bekleyen olay, yoldaki veya dönmekte olan birim yok."""
+		return not (self.queue or self.units or self._returning)
+
+	def stats(self) -> Dict[str, float]:
+		out: Dict[str, float] = dict(self.stats_counts)
+		out["queued"] = len(self.queue)
+		out["busy"] = len(self.units)
+		out["mean_wait_s"] = round(float(np.mean(self.wait_s)), 1) if self.wait_s else 0.0
+		out["mean_response_s"] = round(float(np.mean(self.response_s)), 1) if self.response_s else 0.0
+		return out
+
+	def state_dict(self) -> Dict[str, object]:
+		return {
+			"seq": self.seq,
+			"queue": [(inc.incident_id, inc.node, inc.time) for inc in self.queue],
+			"available": {st.station_id: st.available for st in self.stations},
+		}
+
+	def load_state_dict(self, state: Dict[str, object]) -> None:
+		"""Sıra, bekleyen olaylar ve müsaitlik (yoldaki birimler kaydedilmez; istasyonlarına dönmüş sayılır)."""
+		self.seq = max(self.seq, int(state.get("seq", 0)))
+		self.queue = [Incident(iid, node, t) for iid, node, t in state.get("queue", []) if node in self.router.nodes]
+		avail = state.get("available") or {}
+		for st in self.stations:
+			if st.station_id in avail:
+				st.available = max(0, min(st.units, int(avail[st.station_id])))
+
+
+class IncidentGenerator:
+	"""Poisson olay akışı (`rate_per_hour`) ve/veya zamanlı olay listesi [(zaman, düğüm)]."""
+
+	def __init__(self, nodes: List[str], rate_per_hour: float = 0.0, scheduled: Optional[List[Tuple[float, str]]] = None, rng: Optional[random.Random] = None):
+		self.nodes = nodes
+		self.rate_per_hour = max(0.0, float(rate_per_hour))
+		self.scheduled = sorted(scheduled or [])
+		self.rng = rng or random
+		self.next_at: Optional[float] = None
+
+	def due(self, now: float) -> List[str]:
+		"""`now` anına kadar gelen olay düğümleri."""
+		out = []
+		while self.scheduled and self.scheduled[0][0] <= now:
+			out.append(self.scheduled.pop(0)[1])
+		if self.rate_per_hour > 0 and self.nodes:
+			if self.next_at is None:
+				self.next_at = now + self.rng.expovariate(self.rate_per_hour / 3600.0)
+			while self.next_at <= now:
+				out.append(self.rng.choice(self.nodes))
+				self.next_at += self.rng.expovariate(self.rate_per_hour / 3600.0)
+		return out
+
+	def next_time(self) -> Optional[float]:
+		times = [t for t in (self.next_at, self.scheduled[0][0] if self.scheduled else None) if t is not None]
+		return min(times) if times else None
+
+
+def parse_stations(specs: List[str], router) -> List[Station]:
+	"""`düğüm[:birim]` veya `kimlik=düğüm[:birim]` listesinden istasyonlar."""
+	stations = []
+	for i, spec in enumerate(specs):
+		sid, _, rest = spec.rpartition("=")
+		node, _, units = rest.partition(":")
+		if node not in router.nodes:
+			logger.warning(f"[Dispatch] istasyon düğümü ağda yok: {node}")
+			continue
+		stations.append(Station(sid or f"st_{i}", node, int(units) if units else 1))
+	return stations
+
+
+def load_incidents(path: str, router) -> List[Tuple[float, str]]:
+	"""JSON: [{time, node}] veya [{time, x, y}] (en yakın düğüm)."""
+	import json
+	with open(path, "r", encoding="utf-8") as f:
+		data = json.load(f)
+	if isinstance(data, dict):
+		data = data.get("incidents", [])
+	out = []
+	for item in data:
+		node = item.get("node") or router.nearest_node(float(item.get("x", 0.0)), float(item.get("y", 0.0)))
+		if node in router.nodes:
+			out.append((float(item.get("time", 0.0)), node))
+	return out
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Ambulans filosu durumu.
+
+Üyelik artımlı tutulur: yalnızca adımda giren/çıkan araçlara bakılır (tüm araç
+listesi yalnızca ilk adımda ve adım atlamalarından sonra taranır); araç tipi araç
+başına bir kez sorgulanır.
+Her ambulansa kenar/şerit/konum/hız/sonraki TLS aboneliği açılır ve tüm filo
+her adımda tek `getAllSubscriptionResults` çağrısıyla güncellenir. Abonelik
+kullanılamıyorsa araç başına sorgulara düşülür.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+from src.telemetry import trace
+from src.telemetry.profiler import PROFILER
+from src.telemetry.trace import TRACE
+
+logger = logging.getLogger(__name__)
+
+AMBULANCE_TYPE_KEYWORDS = ("emergency", "ambulance")
+
+
+class AmbulanceState:
+	def __init__(self, vehicle_id: str, first_seen: float):
+		self.vehicle_id = vehicle_id
+		self.first_seen = float(first_seen)
+		self.edge = ""
+		self.lane = ""
+		self.pos: Tuple[float, float] = (0.0, 0.0)
+		self.speed = 0.0
+		self.next_tls: Optional[Tuple[str, float]] = None  # (tl_id, mesafe m)
+		self.priorities = 0
+		self.replans = 0
+
+	@property
+	def on_junction(self) -> bool:
+		return (not self.edge) or self.edge.startswith(":")
+
+	def eta_to_tls(self) -> float:
+		if self.next_tls is None:
+			return float("inf")
+		return self.next_tls[1] / max(0.5, self.speed)
+
+
+class AmbulanceFleet:
+	def __init__(self, adapter, keywords: Tuple[str, ...] = AMBULANCE_TYPE_KEYWORDS, use_subscriptions: bool = True, step_s: float = 0.1):
+		self.adapter = adapter
+		self.keywords = tuple(k.lower() for k in keywords)
+		self.use_subscriptions = bool(use_subscriptions)
+		self.step_s = float(step_s)
+		self.states: Dict[str, AmbulanceState] = {}
+		self.arrived = 0
+		self.resyncs = 0
+		self._others = set()  # ambulans olmadığı bilinen araçlar (tip bir kez sorgulanır)
+		self._bootstrapped = False
+		self._updated_at: Optional[float] = None
+
+	def __len__(self) -> int:
+		return len(self.states)
+
+	def __iter__(self) -> Iterator[AmbulanceState]:
+		return iter(list(self.states.values()))
+
+	def get(self, vehicle_id: Optional[str]) -> Optional[AmbulanceState]:
+		return self.states.get(vehicle_id) if vehicle_id else None
+
+	def lead(self) -> Optional[AmbulanceState]:
+		"""En eski ambulans (tek araçlı akışlar için)."""
+		return min(self.states.values(), key=lambda s: s.first_seen) if self.states else None
+
+	def _is_ambulance(self, vehicle_id: str) -> bool:
+		vtype = self.adapter.get_vehicle_type(vehicle_id).lower()
+		return any(k in vtype for k in self.keywords)
+
+	def _add(self, vehicle_id: str, now: float) -> None:
+		if vehicle_id in self.states or vehicle_id in self._others:
+			return
+		if not self._is_ambulance(vehicle_id):
+			self._others.add(vehicle_id)
+			return
+		self.states[vehicle_id] = AmbulanceState(vehicle_id, now)
+		if self.use_subscriptions and not self.adapter.subscribe_vehicle(vehicle_id):
+			logger.info("[Fleet] abonelik kullanılamıyor; araç başına sorgulara geçiliyor")
+			self.use_subscriptions = False
+
+	def _drop(self, vehicle_id: str) -> None:
+		"""Ambulansı filodan çıkar; nedeni ne olursa olsun (varış, ışınlanma, kaldırma) varış sayılır."""
+		if self.states.pop(vehicle_id, None) is not None:
+			self.arrived += 1
+			TRACE.emit(trace.ARRIVED, veh=vehicle_id)
+
+	def update(self, now: float) -> None:
+		"""Üyeliği ve ambulans durumlarını güncelle (adım başına bir kez)."""
+		if self._updated_at == now:
+			return
+		with PROFILER.timer("fleet"):
+			self._update(now)
+		PROFILER.gauge("ambulances", len(self.states))
+
+	def _update(self, now: float) -> None:
+		# Giren/çıkan listeleri yalnızca son adımı kapsar; birden çok adım atlandıysa
+		# (uyarlamalı adım) tam tarama ile yeniden eşitle
+		gap = (now - self._updated_at) if self._updated_at is not None else 0.0
+		self._updated_at = now
+		if not self._bootstrapped or gap > 1.5 * self.step_s:
+			if self._bootstrapped:
+				self.resyncs += 1
+			self._bootstrapped = True
+			live = set(self.adapter.get_vehicle_ids())
+			for vid in [vid for vid in self.states if vid not in live]:
+				self._drop(vid)
+			self._others &= live
+			for vid in live:
+				self._add(vid, now)
+		else:
+			for vid in self.adapter.get_departed_ids():
+				self._add(vid, now)
+			for vid in self.adapter.get_arrived_ids():
+				self._others.discard(vid)
+				self._drop(vid)
+		if not self.states:
+			return
+		if self.use_subscriptions:
+			data = self.adapter.get_vehicle_subscriptions()
+			for vid, st in list(self.states.items()):
+				d = data.get(vid)
+				if d is None:
+					# Bu adım abone olunan araç: sonuç bir sonraki adımda gelir.
+					# Aksi halde (ışınlanma/kaldırma) araç artık yok.
+					if st.first_seen < now:
+						self._drop(vid)
+					continue
+				st.edge, st.lane, st.pos, st.speed = d["edge"], d["lane"], d["pos"], d["speed"]
+				nt = d["next_tls"]
+				st.next_tls = (str(nt[0][0]), float(nt[0][2])) if nt else None
+			return
+		live = set(self.adapter.get_vehicle_ids())
+		for vid, st in list(self.states.items()):
+			if vid not in live:
+				self._drop(vid)
+				continue
+			st.edge = self.adapter.get_vehicle_edge(vid)
+			st.lane = self.adapter.get_vehicle_lane_id(vid)
+			st.pos = self.adapter.get_vehicle_position(vid)
+			st.speed = self.adapter.get_vehicle_speed(vid)
+			nt = self.adapter.get_vehicle_next_tls(vid)
+			st.next_tls = (str(nt[0][0]), float(nt[0][2])) if nt else None
+
+	def state_dict(self) -> Dict[str, object]:
+		return {
+			"arrived": self.arrived,
+			"vehicles": {vid: {"first_seen": st.first_seen, "priorities": st.priorities, "replans": st.replans} for vid, st in self.states.items()},
+		}
+
+	def load_state_dict(self, state: Dict[str, object], now: float) -> None:
+		"""Sayaçları geri yükle; üyelik ve abonelikler ilk `update`te tam taramayla yeniden kurulur."""
+		self.arrived = int(state.get("arrived", 0))
+		self.states.clear()
+		self._others.clear()
+		self._bootstrapped = False
+		self._updated_at = None
+		self.update(now)
+		for vid, info in (state.get("vehicles") or {}).items():
+			st = self.states.get(vid)
+			if st is None:
+				continue
+			st.first_seen = float(info.get("first_seen", st.first_seen))
+			st.priorities = int(info.get("priorities", 0))
+			st.replans = int(info.get("replans", 0))
+
+	def quiet_horizon(self, influence_m: float, max_speed_ms: float) -> float:
+		"""Hiçbir ambulansın bir TLS etki alanına (`influence_m`) giremeyeceği en uzun süre (s).
+
+		Kavşak içindeki (veya henüz verisi gelmemiş) ya da zaten alan içindeki
+		ambulans varsa 0 (ince kontrol gerekir). Hız üst sınırı `max_speed_ms`
+		ile kötümser tahmin yapılır.
+		"""
+		horizon = float("inf")
+		for st in self.states.values():
+			if st.on_junction:
+				return 0.0
+			if st.next_tls is None:
+				continue  # rotada TLS kalmadı
+			gap = st.next_tls[1] - float(influence_m)
+			if gap <= 0.0:
+				return 0.0
+			horizon = min(horizon, gap / max(st.speed, float(max_speed_ms)))
+		return horizon
+
+	def vehicle_edges(self) -> List[Tuple[str, str]]:
+		"""[(araç, bulunduğu kenar)] — yeniden planlama için."""
+		return [(s.vehicle_id, s.edge) for s in self.states.values()]
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Sıkıştırılmış (CSR) yol grafiği ve paylaşımlı bellek üzerinden süreçler arası paylaşım.
+
+`OnlineRouter`'ın sözlük tabanlı komşuluğu bir kez düz dizilere çevrilir:
+- indptr[u] .. indptr[u+1]: u düğümünün çıkış yayları
+- arc_to / arc_edge / arc_time: hedef düğüm, kenar indeksi, taban süre (s)
+- lm: landmark uzaklık matrisi (L x N, ulaşılamayan: inf)
+- edge_tail / edge_head / edge_time: kenar başına uç düğümler ve taban süre
+- turn_indptr[e] .. turn_indptr[e+1]: e kenarından izinli dönüşler (çizgi grafiği);
+  turn_to / turn_cost: hedef kenar ve dönüş maliyeti (s, `TURN_COSTS`)
+- edge_mask: kenar başına kapatma baytı (1: kapalı; bkz. `src/online/closures.py`);
+  aramalar kapalı kenarları atlar
+
+`SharedGraph.create` sayısal dizileri tek bir `SharedMemory` bloğuna yazar;
+işçi süreçler `attach_graph` ile ağı yeniden ayrıştırmadan aynı belleği görür.
+Düğüm/kenar kimlikleri (metin) işçiye yalnızca başlangıçta bir kez gönderilir.
+
+`queue_kind` "heap" iken aramalar satır içi `heapq` kullanır; başka bir tür
+(`src/online/pqueue.py`, ör. "radix") seçilirse aynı aramalar o kuyrukla yürür.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from multiprocessing import shared_memory
+import heapq
+import logging
+
+import numpy as np
+
+from src.online.pqueue import make_queue
+
+logger = logging.getLogger(__name__)
+
+# ad -> dtype; blok içinde bu sırayla, 8 bayt hizalı yerleşir
+_ARRAYS: Tuple[Tuple[str, str], ...] = (
+	("indptr", "int32"),
+	("arc_to", "int32"),
+	("arc_edge", "int32"),
+	("arc_time", "float64"),
+	("lm", "float64"),
+	("edge_tail", "int32"),
+	("edge_head", "int32"),
+	("edge_time", "float64"),
+	("turn_indptr", "int32"),
+	("turn_to", "int32"),
+	("turn_cost", "float64"),
+	("edge_mask", "uint8"),
+)
+
+# Dönüş maliyeti (s): bağlantı yönü (`dir`) + bağlantı önceliği (`state`)
+TURN_COSTS: Dict[str, float] = {
+	"s": 0.0, "r": 1.0, "R": 1.0, "l": 3.0, "L": 3.0, "t": 15.0,
+	# yol ver / dur / her yönden dur bağlantıları
+	"m": 1.5, "s_state": 4.0, "w": 4.0,
+}
+
+
+def turn_cost(direction: str, state: str, costs: Optional[Dict[str, float]] = None) -> float:
+	costs = costs or TURN_COSTS
+	c = costs.get(direction, 0.0)
+	if state == "s":
+		c += costs.get("s_state", 0.0)
+	elif state in ("m", "w"):
+		c += costs.get(state, 0.0)
+	return float(c)
+
+
+class CompiledGraph:
+	"""CSR grafiği; A* sıcak döngüsü memoryview üzerinden (kopyasız) yürür."""
+
+	def __init__(self, node_ids: List[str], edge_ids: List[str], arrays: Dict[str, np.ndarray]):
+		self.node_ids = node_ids
+		self.edge_ids = edge_ids
+		self.node_index = {n: i for i, n in enumerate(node_ids)}
+		self.edge_index = {e: i for i, e in enumerate(edge_ids)}
+		self.arrays = arrays
+		self.indptr = arrays["indptr"]
+		self.arc_to = arrays["arc_to"]
+		self.arc_edge = arrays["arc_edge"]
+		self.arc_time = arrays["arc_time"]
+		self.lm = arrays["lm"]
+		self.edge_tail = arrays["edge_tail"]
+		self.edge_head = arrays["edge_head"]
+		self.edge_time = arrays["edge_time"]
+		# numpy skaler erişimi yavaş; döngü için tipli memoryview
+		self._indptr = memoryview(self.indptr).cast("B").cast("i")
+		self._arc_to = memoryview(self.arc_to).cast("B").cast("i")
+		self._arc_edge = memoryview(self.arc_edge).cast("B").cast("i")
+		self._arc_time = memoryview(self.arc_time).cast("B").cast("d")
+		self._edge_head = memoryview(arrays["edge_head"]).cast("B").cast("i")
+		self._edge_time = memoryview(arrays["edge_time"]).cast("B").cast("d")
+		self._turn_indptr = memoryview(arrays["turn_indptr"]).cast("B").cast("i")
+		self._turn_to = memoryview(arrays["turn_to"]).cast("B").cast("i")
+		self._turn_cost = memoryview(arrays["turn_cost"]).cast("B").cast("d")
+		self.edge_mask = arrays["edge_mask"]
+		self._edge_mask = memoryview(self.edge_mask).cast("B")
+		self.last_expansions = 0
+		self.queue_kind = "heap"
+		# Ana süreçte derlenen grafikte SCC indeksi (işçi kopyasında None)
+		self.reach = None
+
+	@property
+	def num_nodes(self) -> int:
+		return len(self.node_ids)
+
+	@property
+	def num_edges(self) -> int:
+		return len(self.edge_ids)
+
+	def set_mask_buffer(self, buf: np.ndarray) -> None:
+		"""Kenar maskesini `buf` dizisine taşı (ör. paylaşımlı bellek); mevcut durum kopyalanır."""
+		buf[...] = self.edge_mask
+		self.edge_mask = self.arrays["edge_mask"] = buf
+		self._edge_mask = memoryview(buf).cast("B")
+
+	@classmethod
+	def from_router(cls, router, turn_costs: Optional[Dict[str, float]] = None) -> "CompiledGraph":
+		node_ids = list(router.nodes.keys())
+		node_index = {n: i for i, n in enumerate(node_ids)}
+		edge_ids = list(router.edge_base_time.keys())
+		edge_index = {e: i for i, e in enumerate(edge_ids)}
+		indptr = np.zeros(len(node_ids) + 1, dtype=np.int32)
+		arc_to: List[int] = []
+		arc_edge: List[int] = []
+		arc_time: List[float] = []
+		for i, u in enumerate(node_ids):
+			for v, base_time, eid in router.out_edges.get(u, []):
+				j = node_index.get(v)
+				k = edge_index.get(eid)
+				if j is None or k is None:
+					continue
+				arc_to.append(j)
+				arc_edge.append(k)
+				arc_time.append(float(base_time))
+			indptr[i + 1] = len(arc_to)
+		lm_ids = [lm for lm in getattr(router, "landmarks", []) if lm in getattr(router, "tables", {})]
+		lm = np.full((len(lm_ids), len(node_ids)), np.inf, dtype=np.float64)
+		for r, lm_id in enumerate(lm_ids):
+			for n, d in router.tables[lm_id].items():
+				i = node_index.get(n)
+				if i is not None:
+					lm[r, i] = float(d)
+		# Kenar tabanlı görünüm: paralel kenarlar ayrı durumlardır, dönüşler bağlantılardan
+		edge_tail = np.zeros(len(edge_ids), dtype=np.int32)
+		edge_head = np.zeros(len(edge_ids), dtype=np.int32)
+		edge_time = np.zeros(len(edge_ids), dtype=np.float64)
+		turn_indptr = np.zeros(len(edge_ids) + 1, dtype=np.int32)
+		turn_to: List[int] = []
+		turn_cost_l: List[float] = []
+		turns = getattr(router, "turns", {})
+		for k, eid in enumerate(edge_ids):
+			u, v = router.edge_to_endpoints[eid]
+			edge_tail[k] = node_index[u]
+			edge_head[k] = node_index[v]
+			edge_time[k] = float(router.edge_base_time[eid])
+			best: Dict[int, float] = {}
+			for dst, direction, state in turns.get(eid, []):
+				j = edge_index.get(dst)
+				if j is None:
+					continue
+				c = turn_cost(direction, state, turn_costs)
+				if c < best.get(j, float("inf")):
+					best[j] = c  # şerit bağlantılarından en ucuzu
+			for j, c in best.items():
+				turn_to.append(j)
+				turn_cost_l.append(c)
+			turn_indptr[k + 1] = len(turn_to)
+		arrays = {
+			"indptr": indptr,
+			"arc_to": np.asarray(arc_to, dtype=np.int32),
+			"arc_edge": np.asarray(arc_edge, dtype=np.int32),
+			"arc_time": np.asarray(arc_time, dtype=np.float64),
+			"lm": lm,
+			"edge_tail": edge_tail,
+			"edge_head": edge_head,
+			"edge_time": edge_time,
+			"turn_indptr": turn_indptr,
+			"turn_to": np.asarray(turn_to, dtype=np.int32),
+			"turn_cost": np.asarray(turn_cost_l, dtype=np.float64),
+			"edge_mask": np.zeros(len(edge_ids), dtype=np.uint8),
+		}
+		graph = cls(node_ids, edge_ids, arrays)
+		graph.queue_kind = getattr(router, "queue_kind", "heap")
+		reach = getattr(router, "reach", None)
+		graph.reach = reach if reach is not None and reach.node_ids == node_ids else None
+		return graph
+
+	# -------------------- Arama --------------------
+	def heuristic_to(self, goal: int) -> List[float]:
+		"""ALT alt-sınırı: max_i |L_i(goal) - L_i(v)| (tüm düğümler için, vektörel)."""
+		if not self.lm.size:
+			return [0.0] * self.num_nodes
+		g = self.lm[:, goal:goal + 1]
+		with np.errstate(invalid="ignore"):
+			diff = np.abs(g - self.lm)
+		diff[~(np.isfinite(g) & np.isfinite(self.lm))] = 0.0
+		return diff.max(axis=0).tolist()
+
+	def astar(self, start: int, goal: int, edge_factor: Optional[Dict[int, float]] = None) -> Tuple[float, List[int], List[int]]:
+		"""(süre, düğüm indeksleri, kenar indeksleri); yol yoksa (inf, [], [])."""
+		if self.reach is not None and not self.reach.can_reach_index(start, goal):
+			self.last_expansions = 0
+			return float("inf"), [], []
+		if self.queue_kind != "heap":
+			return self._astar_queue(start, goal, edge_factor)
+		indptr, arc_to, arc_edge, arc_time = self._indptr, self._arc_to, self._arc_edge, self._arc_time
+		mask = self._edge_mask
+		factor = edge_factor or {}
+		h = self.heuristic_to(goal)
+		inf = float("inf")
+		g_score: Dict[int, float] = {start: 0.0}
+		parent: Dict[int, Tuple[int, int]] = {}
+		open_pq: List[Tuple[float, int]] = [(h[start], start)]
+		expanded = 0
+		while open_pq:
+			_f, u = heapq.heappop(open_pq)
+			if u == goal:
+				nodes, edges = [goal], []
+				cur = goal
+				while cur != start:
+					prev, e = parent[cur]
+					edges.append(e)
+					nodes.append(prev)
+					cur = prev
+				nodes.reverse()
+				edges.reverse()
+				self.last_expansions = expanded
+				return g_score[goal], nodes, edges
+			gu = g_score[u]
+			if _f > gu + h[u]:
+				continue  # eski kuyruk girdisi; aynı g ile yeniden genişletme sonuç değiştirmez
+			expanded += 1
+			for a in range(indptr[u], indptr[u + 1]):
+				e = arc_edge[a]
+				if mask[e]:
+					continue
+				v = arc_to[a]
+				cand = gu + arc_time[a] * max(0.1, factor.get(e, 1.0))
+				if cand < g_score.get(v, inf):
+					g_score[v] = cand
+					parent[v] = (u, e)
+					heapq.heappush(open_pq, (cand + h[v], v))
+		self.last_expansions = expanded
+		return inf, [], []
+
+	def _astar_queue(self, start: int, goal: int, edge_factor: Optional[Dict[int, float]] = None) -> Tuple[float, List[int], List[int]]:
+		"""`astar`ın seçilen kuyruk türüyle (decrease-key; eski girdi yok) sürümü."""
+		indptr, arc_to, arc_edge, arc_time = self._indptr, self._arc_to, self._arc_edge, self._arc_time
+		mask = self._edge_mask
+		factor = edge_factor or {}
+		h = self.heuristic_to(goal)
+		inf = float("inf")
+		g_score: Dict[int, float] = {start: 0.0}
+		parent: Dict[int, Tuple[int, int]] = {}
+		open_pq = make_queue(self.queue_kind)
+		open_pq.push(start, h[start])
+		push, pop = open_pq.push, open_pq.pop
+		expanded = 0
+		while open_pq:
+			_f, u = pop()
+			if u == goal:
+				nodes, edges = [goal], []
+				cur = goal
+				while cur != start:
+					prev, e = parent[cur]
+					edges.append(e)
+					nodes.append(prev)
+					cur = prev
+				nodes.reverse()
+				edges.reverse()
+				self.last_expansions = expanded
+				return g_score[goal], nodes, edges
+			gu = g_score[u]
+			expanded += 1
+			for a in range(indptr[u], indptr[u + 1]):
+				e = arc_edge[a]
+				if mask[e]:
+					continue
+				v = arc_to[a]
+				cand = gu + arc_time[a] * max(0.1, factor.get(e, 1.0))
+				if cand < g_score.get(v, inf):
+					g_score[v] = cand
+					parent[v] = (u, e)
+					push(v, cand + h[v])
+		self.last_expansions = expanded
+		return inf, [], []
+
+	def sources_from_node(self, node: int, edge_factor: Optional[Dict[int, float]] = None) -> List[Tuple[int, float]]:
+		"""Düğümden çıkan açık kenarlar, kenar tabanlı aramanın kaynakları olarak (kenar, süre)."""
+		if node < 0 or node >= self.num_nodes:
+			return []
+		factor = edge_factor or {}
+		return [
+			(self._arc_edge[a], self._arc_time[a] * max(0.1, factor.get(self._arc_edge[a], 1.0)))
+			for a in range(self._indptr[node], self._indptr[node + 1])
+			if not self._edge_mask[self._arc_edge[a]]
+		]
+
+	def astar_edges(self, sources: List[Tuple[int, float]], goal: int, edge_factor: Optional[Dict[int, float]] = None) -> Tuple[float, List[int]]:
+		"""Kenar tabanlı A* (çizgi grafiği): (süre, kenar indeksleri; ilk kaynak kenar dahil).
+
+		Durum kenardır; e -> e2 geçişinin maliyeti dönüş maliyeti + e2'nin süresidir,
+		bağlantısı olmayan dönüşler yasaktır. Başı `goal` düğümü olan ilk kenarda biter.
+		Düğüm landmark sınırı kenarın başından hesaplanır (dönüş kısıtları ve
+		maliyetleri mesafeyi yalnızca artırdığından kabul edilebilir kalır).
+		Kaynak kenar kapalı olsa da kullanılır (araç zaten üzerinde); sonrası atlanır.
+		"""
+		inf = float("inf")
+		if not sources:
+			self.last_expansions = 0
+			return inf, []
+		head, etime, mask = self._edge_head, self._edge_time, self._edge_mask
+		tptr, tto, tcost = self._turn_indptr, self._turn_to, self._turn_cost
+		if self.reach is not None and not any(self.reach.can_reach_index(head[e], goal) for e, _c in sources):
+			self.last_expansions = 0
+			return inf, []
+		factor = edge_factor or {}
+		h = self.heuristic_to(goal)
+		g_score: Dict[int, float] = {}
+		parent: Dict[int, int] = {}
+		if self.queue_kind == "heap":
+			open_pq: List[Tuple[float, int]] = []
+			push = lambda item, key: heapq.heappush(open_pq, (key, item))
+			pop = lambda: heapq.heappop(open_pq)
+		else:
+			open_pq = make_queue(self.queue_kind)
+			push, pop = open_pq.push, open_pq.pop
+		for e, c in sources:
+			if c < g_score.get(e, inf):
+				g_score[e] = float(c)
+				parent[e] = -1
+				push(e, c + h[head[e]])
+		expanded = 0
+		while open_pq:
+			_f, e = pop()
+			ge = g_score[e]
+			if _f > ge + h[head[e]]:
+				continue
+			if head[e] == goal:
+				edges = [e]
+				while parent[edges[-1]] != -1:
+					edges.append(parent[edges[-1]])
+				edges.reverse()
+				self.last_expansions = expanded
+				return ge, edges
+			expanded += 1
+			for a in range(tptr[e], tptr[e + 1]):
+				e2 = tto[a]
+				if mask[e2]:
+					continue
+				cand = ge + tcost[a] + etime[e2] * max(0.1, factor.get(e2, 1.0))
+				if cand < g_score.get(e2, inf):
+					g_score[e2] = cand
+					parent[e2] = e
+					push(e2, cand + h[head[e2]])
+		self.last_expansions = expanded
+		return inf, []
+
+	def edge_path_nodes(self, edges: List[int]) -> List[int]:
+		if not edges:
+			return []
+		return [int(self.edge_tail[edges[0]])] + [int(self.edge_head[e]) for e in edges]
+
+
+class SharedGraph:
+	"""`CompiledGraph` dizilerini taşıyan paylaşımlı bellek bloğu (sahip süreç tarafı)."""
+
+	def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Tuple[int, str, Tuple[int, ...]]]):
+		self.shm = shm
+		self.layout = layout
+
+	@classmethod
+	def create(cls, graph: CompiledGraph) -> "SharedGraph":
+		layout: Dict[str, Tuple[int, str, Tuple[int, ...]]] = {}
+		offset = 0
+		for name, dtype in _ARRAYS:
+			arr = graph.arrays[name]
+			layout[name] = (offset, dtype, tuple(arr.shape))
+			offset += (arr.nbytes + 7) // 8 * 8
+		shm = shared_memory.SharedMemory(create=True, size=max(8, offset))
+		for name, (off, dtype, shape) in layout.items():
+			dst = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off)
+			dst[...] = graph.arrays[name]
+		logger.info(f"[Graph] paylaşımlı bellek: {shm.name} ({offset / 1024:.0f} KiB, {graph.num_nodes} düğüm, {len(graph.arc_to)} yay)")
+		return cls(shm, layout)
+
+	def array(self, name: str) -> np.ndarray:
+		off, dtype, shape = self.layout[name]
+		return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=off)
+
+	def descriptor(self) -> Dict[str, Any]:
+		return {"name": self.shm.name, "layout": self.layout}
+
+	def close(self) -> None:
+		try:
+			self.shm.close()
+			self.shm.unlink()
+		except Exception:
+			pass
+
+
+def attach_graph(descriptor: Dict[str, Any], node_ids: List[str], edge_ids: List[str]) -> Tuple[CompiledGraph, shared_memory.SharedMemory]:
+	"""İşçi süreç tarafı: bloğa bağlan, diziler kopyalanmadan görünür."""
+	# Kaynak izleyici ana süreçle ortak; silme (unlink) yalnızca sahip tarafta yapılır
+	shm = shared_memory.SharedMemory(name=descriptor["name"])
+	arrays = {
+		name: np.ndarray(tuple(shape), dtype=dtype, buffer=shm.buf, offset=off)
+		for name, (off, dtype, shape) in descriptor["layout"].items()
+	}
+	return CompiledGraph(node_ids, edge_ids, arrays), shm
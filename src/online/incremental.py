@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Artımlı (adım adım) A* ve canlı kenar çarpanı.
+
+`IncrementalAStar`, aramayı simülasyon adımlarına bölerek ana döngüyü
+bloklamadan yeniden planlama yapar. Her `step` çağrısı en fazla
+`max_expansions` düğüm (ve verilirse `time_budget_s` gerçek zaman) harcar.
+Öncelik kuyruğu rotalayıcının `queue_kind` seçimine uyar (bkz. `src/online/pqueue.py`).
+Kapalı kenarlar (`router.blocked_edges`) her genişletmede güncel haliyle atlanır.
+"""
+
+from typing import Dict, Optional
+import heapq
+import time
+
+from src.online.pqueue import make_queue
+
+
+def live_edge_factor(router, edge_stats: Dict[str, Dict[str, float]], edge_id: str) -> float:
+	"""Kenar istatistiklerinden (araç sayısı, ortalama hız) süre çarpanı [1, 5]."""
+	if not edge_id:
+		return 1.0
+	base_t = getattr(router, 'edge_base_time', {}).get(edge_id, 0.0)
+	if base_t <= 0:
+		return 1.0
+	st = edge_stats.get(edge_id)
+	if not st:
+		return 1.0
+	veh = st.get("veh", 0.0)
+	v = st.get("v", getattr(router, 'edge_free_speed', {}).get(edge_id, 10.0))
+	v_ref = max(1.0, getattr(router, 'edge_free_speed', {}).get(edge_id, 10.0))
+	cong = max(0.0, min(3.0, (v_ref / max(1.0, v))))
+	load = 1.0 + min(2.0, veh / 20.0)
+	return max(1.0, min(5.0, 0.5 * cong + 0.5 * load))
+
+
+class IncrementalAStar:
+	"""A*'ı adım adım çalıştırmak için artımlı arama (ana döngüyü bloklamaz)."""
+	def __init__(self, router, start_node: str, goal_node: str, edge_stats_snapshot: dict):
+		self.router = router
+		self.start = start_node
+		self.goal = goal_node
+		self.edge_stats = edge_stats_snapshot
+		# Varsayılan: satır içi heapq listesi; "radix" için kuyruk nesnesi
+		kind = getattr(router, 'queue_kind', 'heap')
+		self._heap = kind == "heap"
+		if self._heap:
+			self.open_pq = [(0.0, start_node)]
+		else:
+			self.open_pq = make_queue(kind)
+			self.open_pq.push(start_node, 0.0)
+		self.g_score = {start_node: 0.0}
+		self.parent = {start_node: None}
+		self.done = False
+		self.result = (float('inf'), [])
+		self.expansions = 0
+		reach = getattr(router, 'reach', None)
+		if reach is not None and not reach.can_reach(start_node, goal_node):
+			self.open_pq = []
+			self.done = True
+	def _live_factor(self, edge_id: str) -> float:
+		return live_edge_factor(self.router, self.edge_stats, edge_id)
+	def step(self, max_expansions: int = 500, time_budget_s: Optional[float] = None) -> int:
+		"""En fazla `max_expansions` düğüm genişlet; bu çağrıdaki genişletme sayısını döndür."""
+		if self.done:
+			return 0
+		expanded = 0
+		deadline = (time.perf_counter() + time_budget_s) if time_budget_s else None
+		blocked = getattr(self.router, 'blocked_edges', ())
+		while self.open_pq and expanded < max_expansions:
+			if deadline is not None and (expanded & 15) == 15 and time.perf_counter() >= deadline:
+				break
+			_, u = heapq.heappop(self.open_pq) if self._heap else self.open_pq.pop()
+			if u == self.goal:
+				path = []
+				cur = self.goal
+				while cur is not None:
+					path.append(cur)
+					cur = self.parent.get(cur)
+				path.reverse()
+				self.result = (self.g_score[self.goal], path)
+				self.done = True
+				break
+			for v, base_time, edge_id in self.router.out_edges.get(u, []):
+				if edge_id in blocked:
+					continue
+				live = self._live_factor(edge_id)
+				cand_g = self.g_score[u] + base_time * max(0.1, float(live))
+				cand_g += max(0.0, float(self.router.get_signal_delay(v)))
+				if cand_g < self.g_score.get(v, float('inf')):
+					self.g_score[v] = cand_g
+					self.parent[v] = u
+					h = self.router.heuristic(v, self.goal, context={"g": cand_g})
+					if self._heap:
+						heapq.heappush(self.open_pq, (cand_g + h, v))
+					else:
+						self.open_pq.push(v, cand_g + h)
+			expanded += 1
+		if not self.open_pq and not self.done:
+			self.done = True
+			self.result = (float('inf'), [])
+		self.expansions += expanded
+		return expanded
+	def touches(self, nodes) -> bool:
+		"""Arama ağacı verilen düğümlerden birine ulaştı mı (kapatma sonrası geçersizlik için)?"""
+		return any(n in self.g_score for n in nodes)
+	def finished(self) -> bool:
+		return self.done
+	def get_result(self):
+		return self.result
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Arama öncelik kuyrukları (seçilebilir): ikili yığın ve monoton radix yığın.
+
+Ortak arayüz: `push(öğe, anahtar)` ekler veya anahtarı düşürür (decrease-key;
+daha büyük anahtarla tekrar ekleme yok sayılır), `pop() -> (anahtar, öğe)`,
+`len()`. Öğeler düğüm kimlikleridir (tamsayı indeks veya metin).
+
+- `HeapQueue`: `heapq` üzerinde tembel silme (eski girdiler atlanır)
+- `RadixHeap`: anahtarlar `resolution` (vars. 0.1 s, simülasyon adımı) ile tamsayıya
+  nicelenir; son çekilen anahtardan küçük anahtar eklenemeyen (monoton) aramalarda
+  (Dijkstra, tutarlı sezgisel ile A*) kova indeksi `bit_length(k ^ son)` olur, her
+  öğe en fazla log2(C) kez kova değiştirir. Kovalar sözlüktür (en küçük kova
+  liste); decrease-key O(1).
+  Aynı nicelenmiş kovadaki öğeler sırasız çıkar: A* sonucu en fazla bir
+  `resolution` kadar en iyiden sapabilir; Dijkstra mesafeleri (etiket düzeltme)
+  kesin kalır. Monotonluğu bozan anahtar geçerli kovaya kıstırılır.
+"""
+
+from typing import Dict, Hashable, List, Tuple
+import heapq
+
+QUEUE_KINDS = ("heap", "radix")
+
+
+class HeapQueue:
+	def __init__(self):
+		self._heap: List[Tuple[float, int, Hashable]] = []
+		self._key: Dict[Hashable, float] = {}
+		self._seq = 0
+
+	def __len__(self) -> int:
+		return len(self._key)
+
+	def push(self, item: Hashable, key: float) -> None:
+		old = self._key.get(item)
+		if old is not None and old <= key:
+			return
+		self._key[item] = key
+		self._seq += 1
+		heapq.heappush(self._heap, (key, self._seq, item))
+
+	def pop(self) -> Tuple[float, Hashable]:
+		heap, keys = self._heap, self._key
+		while True:
+			key, _s, item = heapq.heappop(heap)
+			if keys.get(item) == key:
+				del keys[item]
+				return key, item
+
+
+class RadixHeap:
+	def __init__(self, resolution: float = 0.1):
+		self.resolution = float(resolution)
+		self._inv = 1.0 / self.resolution
+		# Kova 0: anahtarı `_last` olan öğeler (liste; burada decrease-key kova değiştirmez)
+		self._bucket0: List[Hashable] = []
+		self._buckets: List[Dict[Hashable, None]] = [{} for _ in range(65)]
+		self._key: Dict[Hashable, float] = {}
+		self._slot: Dict[Hashable, int] = {}
+		self._last = 0
+		self._size = 0
+
+	def __len__(self) -> int:
+		return self._size
+
+	def push(self, item: Hashable, key: float) -> None:
+		keys = self._key
+		old = keys.get(item)
+		if old is not None:
+			if old <= key:
+				return
+			b = self._slot[item]
+			if b == 0:
+				keys[item] = key
+				return
+			del self._buckets[b][item]
+		else:
+			self._size += 1
+		keys[item] = key
+		last = self._last
+		k = int(key * self._inv)
+		b = (k ^ last).bit_length() if k > last else 0
+		self._slot[item] = b
+		if b:
+			self._buckets[b][item] = None
+		else:
+			self._bucket0.append(item)
+
+	def pop(self) -> Tuple[float, Hashable]:
+		bucket0 = self._bucket0
+		if not bucket0:
+			buckets = self._buckets
+			i = 1
+			while not buckets[i]:
+				i += 1
+			moved = buckets[i]
+			buckets[i] = {}
+			inv = self._inv
+			keys = self._key
+			ik = {it: int(keys[it] * inv) for it in moved}
+			last = min(ik.values())
+			if last > self._last:
+				self._last = last
+			else:
+				last = self._last
+			slot = self._slot
+			for it, k in ik.items():
+				b = (k ^ last).bit_length() if k > last else 0
+				slot[it] = b
+				if b:
+					buckets[b][it] = None
+				else:
+					bucket0.append(it)
+		item = bucket0.pop()
+		del self._slot[item]
+		self._size -= 1
+		return self._key.pop(item), item
+
+
+def make_queue(kind: str = "heap", resolution: float = 0.1):
+	if kind == "radix":
+		return RadixHeap(resolution)
+	if kind == "heap":
+		return HeapQueue()
+	raise ValueError(f"Bilinmeyen kuyruk türü: {kind} (geçerli: {', '.join(QUEUE_KINDS)})")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Güçlü bağlı bileşen (SCC) indeksi ve erişilebilirlik sorguları.
+
+Ağ derlenirken Tarjan algoritması (yinelemeli) ile her düğümün bileşeni bulunur;
+bileşenler bitiş sırasıyla numaralanır, bu da yoğunlaştırılmış DAG'ın ters
+topolojik sırasıdır (u -> v yayı için comp[u] >= comp[v]). Buna göre:
+- aynı bileşen: ulaşılır; comp[u] < comp[v]: ulaşılamaz (O(1))
+- diğer durumlar: hedef bileşene ulaşan bileşenler kümesi (ters DAG üzerinde bir
+  kez gezinti) hedef başına önbelleğe alınır, sonraki sorgular O(1)
+
+OSM kaynaklı ağlardaki çıkmaz parçalar (yalnızca girilebilen/çıkılabilen kısımlar)
+böylece A* bütün erişilebilir grafiği taramadan elenir.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Hedef başına önbelleğe alınan "ulaşan bileşenler" kümesi sayısı
+GOAL_CACHE_SIZE = 256
+
+
+def _tarjan(n: int, indptr: Sequence[int], arc_to: Sequence[int]) -> List[int]:
+	"""Düğüm -> bileşen; bileşenler bitiş (ters topolojik) sırasıyla numaralı."""
+	index = [-1] * n
+	low = [0] * n
+	on_stack = [False] * n
+	comp = [-1] * n
+	stack: List[int] = []
+	counter = 0
+	num_comp = 0
+	for root in range(n):
+		if index[root] != -1:
+			continue
+		# (düğüm, sıradaki yay) çerçeveleri
+		work = [(root, indptr[root])]
+		index[root] = low[root] = counter
+		counter += 1
+		stack.append(root)
+		on_stack[root] = True
+		while work:
+			u, a = work[-1]
+			end = indptr[u + 1]
+			pushed = False
+			while a < end:
+				v = arc_to[a]
+				a += 1
+				if index[v] == -1:
+					work[-1] = (u, a)
+					index[v] = low[v] = counter
+					counter += 1
+					stack.append(v)
+					on_stack[v] = True
+					work.append((v, indptr[v]))
+					pushed = True
+					break
+				if on_stack[v] and index[v] < low[u]:
+					low[u] = index[v]
+			if pushed:
+				continue
+			work.pop()
+			if work:
+				p = work[-1][0]
+				if low[u] < low[p]:
+					low[p] = low[u]
+			if low[u] == index[u]:
+				while True:
+					w = stack.pop()
+					on_stack[w] = False
+					comp[w] = num_comp
+					if w == u:
+						break
+				num_comp += 1
+	return comp
+
+
+class ReachabilityIndex:
+	def __init__(self, node_ids: List[str], indptr: Sequence[int], arc_to: Sequence[int]):
+		self.node_ids = node_ids
+		self.node_index = {nid: i for i, nid in enumerate(node_ids)}
+		indptr = [int(x) for x in indptr]
+		arc_to = [int(x) for x in arc_to]
+		comp = _tarjan(len(node_ids), indptr, arc_to)
+		self.comp = np.asarray(comp, dtype=np.int32)
+		self.num_components = int(self.comp.max()) + 1 if len(comp) else 0
+		self.comp_size = np.bincount(self.comp, minlength=self.num_components) if len(comp) else np.zeros(0, dtype=np.int64)
+		# Yoğunlaştırılmış DAG'ın ters yayları: bileşen -> ona yay veren bileşenler
+		preds: List[set] = [set() for _ in range(self.num_components)]
+		out_deg = [0] * self.num_components
+		for u in range(len(node_ids)):
+			cu = comp[u]
+			for a in range(indptr[u], indptr[u + 1]):
+				cv = comp[arc_to[a]]
+				if cv != cu and cu not in preds[cv]:
+					preds[cv].add(cu)
+					out_deg[cu] += 1
+		self._preds = [sorted(p) for p in preds]
+		self.is_sink = np.asarray([d == 0 for d in out_deg], dtype=bool)
+		self._reaching: Dict[int, np.ndarray] = {}
+		self._nodes_reaching: Dict[str, List[str]] = {}
+
+	@classmethod
+	def from_router(cls, router) -> "ReachabilityIndex":
+		node_ids = list(router.nodes.keys())
+		node_index = {n: i for i, n in enumerate(node_ids)}
+		indptr = [0]
+		arc_to: List[int] = []
+		for u in node_ids:
+			for v, _base_time, _eid in router.out_edges.get(u, []):
+				j = node_index.get(v)
+				if j is not None:
+					arc_to.append(j)
+			indptr.append(len(arc_to))
+		return cls(node_ids, indptr, arc_to)
+
+	@property
+	def largest_component_size(self) -> int:
+		return int(self.comp_size.max()) if self.num_components else 0
+
+	def stats(self) -> Dict[str, int]:
+		return {
+			"nodes": len(self.node_ids),
+			"components": self.num_components,
+			"largest": self.largest_component_size,
+			"nontrivial": int((self.comp_size > 1).sum()),
+			"sinks": int(self.is_sink.sum()),
+		}
+
+	# -------------------- Sorgular --------------------
+	def _reaching_components(self, cg: int) -> np.ndarray:
+		"""`cg` bileşenine ulaşan bileşenler (bool dizi; hedef başına önbellekli)."""
+		mask = self._reaching.get(cg)
+		if mask is not None:
+			return mask
+		mask = np.zeros(self.num_components, dtype=bool)
+		mask[cg] = True
+		stack = [cg]
+		preds = self._preds
+		while stack:
+			c = stack.pop()
+			for p in preds[c]:
+				if not mask[p]:
+					mask[p] = True
+					stack.append(p)
+		if len(self._reaching) >= GOAL_CACHE_SIZE:
+			self._reaching.pop(next(iter(self._reaching)))
+		self._reaching[cg] = mask
+		return mask
+
+	def can_reach_index(self, u: int, v: int) -> bool:
+		cu = int(self.comp[u])
+		cv = int(self.comp[v])
+		if cu == cv:
+			return True
+		if cu < cv or self.is_sink[cu]:
+			return False
+		return bool(self._reaching_components(cv)[cu])
+
+	def can_reach(self, u: str, v: str) -> bool:
+		i = self.node_index.get(u)
+		j = self.node_index.get(v)
+		if i is None or j is None:
+			return False
+		return self.can_reach_index(i, j)
+
+	def nodes_reaching(self, goal: str) -> List[str]:
+		"""Hedefe ulaşabilen düğümler (hedef dahil; önbellekli, değiştirilmemeli)."""
+		cached = self._nodes_reaching.get(goal)
+		if cached is not None:
+			return cached
+		j = self.node_index.get(goal)
+		if j is None:
+			return []
+		mask = self._reaching_components(int(self.comp[j]))
+		nodes = [self.node_ids[i] for i in np.flatnonzero(mask[self.comp])]
+		if len(self._nodes_reaching) >= GOAL_CACHE_SIZE:
+			self._nodes_reaching.pop(next(iter(self._nodes_reaching)))
+		self._nodes_reaching[goal] = nodes
+		return nodes
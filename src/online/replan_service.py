@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Süreç havuzunda yeniden planlama servisi.
+
+- Grafik bir kez CSR'a derlenip paylaşımlı belleğe yazılır; işçiler başlangıçta
+  bağlanır (görev başına ağ ayrıştırma veya grafik aktarımı yok).
+- `submit_batch` yalnızca (başlangıç, hedef, canlı kenar çarpanları) gönderir ve
+  hemen döner; istekler işçi başına bir parti halinde gider, araç başına en
+  fazla bir istek uçuştadır.
+- `poll` tamamlanan sonuçları toplar; rota hâlâ geçerliyse (araç mevcut ve
+  bulunduğu kenar rotada) aracın konumundan itibaren `set_route` ile uygulanır.
+  Araç kavşak içindeyse (iç kenar) sonuç `max_age_s` boyunca bekletilir.
+- `edge_routing`: arama kenar tabanlıdır (dönüş yasakları/maliyetleri); araç
+  kenarından başlar ve kenar listesi doğrudan rota olur.
+- Kenar maskesi (yol kapatmaları) paylaşımlı bloktadır: işçiler kapatmaları hemen
+  görür; kapatmadan önce hesaplanıp kapalı kenar içeren sonuçlar uygulanmaz.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+import logging
+
+import numpy as np
+
+from src.online.graph import CompiledGraph, SharedGraph, attach_graph
+from src.online.incremental import live_edge_factor
+from src.telemetry import trace
+from src.telemetry.profiler import PROFILER
+from src.telemetry.trace import TRACE
+
+logger = logging.getLogger(__name__)
+
+_WORKER_GRAPH: Optional[CompiledGraph] = None
+_WORKER_SHM = None
+
+
+def _init_worker(descriptor: Dict[str, Any], node_ids: List[str], edge_ids: List[str], queue_kind: str = "heap") -> None:
+	global _WORKER_GRAPH, _WORKER_SHM
+	_WORKER_GRAPH, _WORKER_SHM = attach_graph(descriptor, node_ids, edge_ids)
+	_WORKER_GRAPH.queue_kind = queue_kind
+
+
+def _solve_batch(queries: List[Tuple[int, int, Dict[int, float], int]]) -> List[Tuple[float, List[int], List[int], int]]:
+	"""Sorgu: (başlangıç düğümü, hedef, kenar çarpanları, başlangıç kenarı veya -1)."""
+	g = _WORKER_GRAPH
+	out = []
+	for start, goal, edge_factor, start_edge in queries:
+		if start_edge >= 0:
+			t, edges = g.astar_edges([(start_edge, 0.0)], goal, edge_factor)
+			nodes = g.edge_path_nodes(edges)
+		else:
+			t, nodes, edges = g.astar(start, goal, edge_factor)
+		out.append((t, nodes, edges, g.last_expansions))
+	return out
+
+
+class ReplanRequest:
+	def __init__(self, vehicle_id: Optional[str], from_edge: Optional[str], start_node: str, goal_node: str, submitted_at: float, edge_stats: Dict[str, Dict[str, float]], future: Future, slot: int = 0, suffix: Optional[List[str]] = None):
+		self.vehicle_id = vehicle_id
+		self.from_edge = from_edge
+		self.start_node = start_node
+		self.goal_node = goal_node
+		self.submitted_at = submitted_at
+		self.edge_stats = edge_stats
+		self.future = future
+		self.slot = slot  # parti sonucundaki sıra
+		self.suffix = list(suffix or [])  # hedeften sonra sürecek kenarlar (ör. hastane bacağı)
+		self.result: Optional[Tuple[float, List[str], List[str]]] = None
+		self.applied_route: Optional[List[str]] = None
+
+
+class ReplanService:
+	def __init__(self, router, workers: int = 2, max_age_s: float = 30.0, edge_routing: bool = False):
+		self.router = router
+		self.edge_routing = bool(edge_routing)
+		self.workers = max(1, int(workers))
+		self.max_age_s = float(max_age_s)
+		self.graph: Optional[CompiledGraph] = None
+		self.shared: Optional[SharedGraph] = None
+		self.pool: Optional[ProcessPoolExecutor] = None
+		self._pending: Dict[str, ReplanRequest] = {}
+		self.counts = {"submitted": 0, "applied": 0, "stale": 0, "failed": 0, "dropped": 0, "unreachable": 0, "blocked": 0}
+
+	def start(self) -> bool:
+		try:
+			self.graph = self.router.compiled() if hasattr(self.router, "compiled") else CompiledGraph.from_router(self.router)
+			self.shared = SharedGraph.create(self.graph)
+			# Kapatmalar bundan sonra doğrudan paylaşımlı maskeye yazılır
+			self.graph.set_mask_buffer(self.shared.array("edge_mask"))
+			self.pool = ProcessPoolExecutor(
+				max_workers=self.workers,
+				initializer=_init_worker,
+				initargs=(self.shared.descriptor(), self.graph.node_ids, self.graph.edge_ids, self.graph.queue_kind),
+			)
+			logger.info(f"[Replan] servis başladı: {self.workers} işçi")
+			return True
+		except Exception as e:
+			logger.warning(f"[Replan] servis başlatılamadı: {e}")
+			self.close()
+			return False
+
+	@property
+	def busy(self) -> bool:
+		return bool(self._pending)
+
+	def in_flight(self, vehicle_id: Optional[str]) -> bool:
+		return (vehicle_id or "") in self._pending
+
+	def submit(self, goal_node: str, edge_stats: Dict[str, Dict[str, float]], now: float, vehicle_id: Optional[str] = None, from_edge: Optional[str] = None, start_node: Optional[str] = None) -> bool:
+		"""Tek araç için aramayı kuyruğa al (bloklamaz)."""
+		job = {"goal_node": goal_node, "edge_stats": edge_stats, "vehicle_id": vehicle_id, "from_edge": from_edge, "start_node": start_node}
+		return self.submit_batch([job], now) == 1
+
+	def submit_batch(self, jobs: List[Dict[str, Any]], now: float) -> int:
+		"""Aramaları işçi başına bir parti olacak şekilde gönder; gönderilen sayısını döndür.
+
+		job: {goal_node, edge_stats, vehicle_id?, from_edge?, start_node?, suffix?}. Araç kenar
+		üzerindeyse arama kenarın ucundan başlar; araç başına tek istek uçuşta olur.
+		"""
+		if self.pool is None or self.graph is None:
+			return 0
+		node_index, edge_index = self.graph.node_index, self.graph.edge_index
+		prepared = []
+		for job in jobs:
+			vehicle_id = job.get("vehicle_id")
+			key = vehicle_id or ""
+			if key in self._pending or any(p[0] == key for p in prepared):
+				self.counts["dropped"] += 1
+				continue
+			from_edge = job.get("from_edge")
+			start_node = job.get("start_node")
+			ends = self.router.edge_to_endpoints.get(from_edge) if from_edge else None
+			if ends:
+				start_node = ends[1]
+			else:
+				from_edge = None
+			start = node_index.get(start_node) if start_node else None
+			goal = node_index.get(job["goal_node"])
+			if start is None or goal is None:
+				continue
+			if self.graph.reach is not None and not self.graph.reach.can_reach_index(start, goal):
+				# Hedefe ulaşmayan parça: işçiye gönderilmeden reddedilir
+				self.counts["unreachable"] += 1
+				continue
+			edge_stats = job.get("edge_stats") or {}
+			factors = {edge_index[e]: live_edge_factor(self.router, edge_stats, e) for e in edge_stats if e in edge_index}
+			start_edge = edge_index.get(from_edge, -1) if (self.edge_routing and from_edge) else -1
+			prepared.append((key, vehicle_id, from_edge, start_node, job["goal_node"], edge_stats, (start, goal, factors, start_edge), job.get("suffix")))
+		if not prepared:
+			return 0
+		chunk = max(1, -(-len(prepared) // self.workers))
+		sent = 0
+		for i in range(0, len(prepared), chunk):
+			part = prepared[i:i + chunk]
+			try:
+				fut = self.pool.submit(_solve_batch, [p[6] for p in part])
+			except Exception as e:
+				logger.warning(f"[Replan] gönderilemedi: {e}")
+				break
+			for slot, (key, vehicle_id, from_edge, start_node, goal_node, edge_stats, _q, suffix) in enumerate(part):
+				self._pending[key] = ReplanRequest(vehicle_id, from_edge, start_node, goal_node, float(now), edge_stats, fut, slot, suffix)
+				sent += 1
+		self.counts["submitted"] += sent
+		return sent
+
+	def _route_from(self, req: ReplanRequest, current_edge: str) -> Optional[List[str]]:
+		"""Aracın bulunduğu kenardan başlayan geçerli rota; geçersizse None."""
+		_t, _nodes, edges = req.result
+		# Kenar tabanlı arama rotayı aracın kenarıyla başlatır
+		route = edges if (edges and edges[0] == req.from_edge) else ([req.from_edge] if req.from_edge else []) + edges
+		if req.suffix:
+			route = route + (req.suffix[1:] if route and req.suffix[0] == route[-1] else req.suffix)
+		if current_edge in route:
+			return route[route.index(current_edge):]
+		return None
+
+	def poll(self, adapter, now: float, vehicles: Optional[Dict[str, str]] = None) -> List[ReplanRequest]:
+		"""Tamamlanan aramaları topla ve geçerli rotaları uygula (bloklamaz).
+
+		`vehicles` (araç -> bulunduğu kenar, ör. filo abonelik durumu) verilirse araç
+		varlığı ve kenarı ondan okunur; verilmezse çağrı başına bir kez `getIDList`
+		yapılır ve kenar araç başına sorgulanır.
+		"""
+		finished: List[ReplanRequest] = []
+		live: Optional[set] = None
+		for key, req in list(self._pending.items()):
+			if req.result is None:
+				if not req.future.done():
+					continue
+				try:
+					t, node_idx, edge_idx, expanded = req.future.result()[req.slot]
+					PROFILER.count("astar_expansions", expanded)
+				except Exception as e:
+					logger.debug(f"[Replan] arama hatası: {e}")
+					self.counts["failed"] += 1
+					del self._pending[key]
+					continue
+				if t == float("inf") or not node_idx:
+					self.counts["failed"] += 1
+					del self._pending[key]
+					continue
+				g = self.graph
+				if self._uses_blocked(edge_idx, req.from_edge):
+					self.counts["blocked"] += 1
+					del self._pending[key]
+					continue
+				req.result = (t, [g.node_ids[i] for i in node_idx], [g.edge_ids[i] for i in edge_idx])
+			if req.vehicle_id and adapter is not None and adapter.connected:
+				if vehicles is None and live is None:
+					live = set(adapter.get_vehicle_ids())
+				state = self._apply(adapter, req, now, vehicles, live)
+				if state == "wait":
+					continue
+				self.counts[state] += 1
+			del self._pending[key]
+			finished.append(req)
+		return finished
+
+	def _uses_blocked(self, edge_idx: List[int], from_edge: Optional[str]) -> bool:
+		"""Rota (aracın bulunduğu kenar hariç) kapalı kenar içeriyor mu?"""
+		if not edge_idx:
+			return False
+		mask = self.graph.edge_mask
+		start = self.graph.edge_index.get(from_edge, -1) if from_edge else -1
+		return any(mask[e] and e != start for e in edge_idx)
+
+	def _apply(self, adapter, req: ReplanRequest, now: float, vehicles: Optional[Dict[str, str]] = None, live: Optional[set] = None) -> str:
+		if float(now) - req.submitted_at > self.max_age_s:
+			return "stale"
+		if vehicles is not None:
+			if req.vehicle_id not in vehicles:
+				return "stale"
+			current = vehicles[req.vehicle_id]
+		else:
+			if live is not None and req.vehicle_id not in live:
+				return "stale"
+			current = adapter.get_vehicle_edge(req.vehicle_id)
+		if not current or current.startswith(":"):
+			return "wait"
+		route = self._route_from(req, current)
+		if not route:
+			return "stale"
+		if not adapter.set_route(req.vehicle_id, route):
+			return "failed"
+		req.applied_route = route
+		TRACE.emit(trace.ROUTE, veh=req.vehicle_id, edge=current, a=float(now) - req.submitted_at, c=len(route))
+		logger.info(f"[Route] t={now:.1f}s veh={req.vehicle_id} yeni rota uygulandı: {len(route)} kenar (istek t={req.submitted_at:.1f}s)")
+		return "applied"
+
+	def close(self) -> None:
+		if self.pool is not None:
+			self.pool.shutdown(wait=True, cancel_futures=True)
+			self.pool = None
+		if self.shared is not None:
+			if self.graph is not None:
+				self.graph.set_mask_buffer(np.zeros(self.graph.num_edges, dtype=np.uint8))
+			self.shared.close()
+			self.shared = None
+		self._pending.clear()
@@ -1,13 +1,36 @@
 #!/usr/bin/env python3
 """
 Online A* Rotalayıcı (landmark tabanlı alt-sınır + ANFIS düzeltme için kancalar)
+
+Ağ ayrıştırılınca güçlü bağlı bileşen indeksi (`reach`) kurulur: ulaşılamayan
+başlangıç/hedef çiftleri aramadan önce reddedilir.
+
+`<connection>` öğeleri kenar -> kenar dönüşleri olarak (`turns`) okunur;
+`route_edges` kenar tabanlı (çizgi grafiği) aramayla dönüş yasaklarına ve dönüş
+maliyetlerine uyan kenar listesini doğrudan döndürür (bkz. `CompiledGraph.astar_edges`).
+
+Yol kapatmaları (`block` / `unblock`, isteğe bağlı zaman penceresi) derlenmiş
+kenar dizileri üzerindeki maskeye (`src/online/closures.py`) yazılır; tüm A*
+biçimleri kapalı kenarları atlar, landmark tabloları ve SCC indeksi yeniden
+kurulmaz. `add_mask_listener` ile yeni kapanan/açılan kenarlar bildirilir.
+
+`queue_kind` aramaların öncelik kuyruğunu seçer: "heap" (ikili yığın) veya "radix"
+(monoton radix yığın; bkz. `src/online/pqueue.py`).
 """
 
+import heapq
 import json
+import logging
 import xml.etree.ElementTree as ET
 from typing import Dict, List, Tuple, Callable, Optional
 import math
 
+from src.online.closures import EdgeMask, MaskListener
+from src.online.pqueue import make_queue
+from src.online.reachability import ReachabilityIndex
+
+logger = logging.getLogger(__name__)
+
 
 class OnlineRouter:
 	"""A* yönlendirme motoru (gerçek zamanlı)
@@ -23,12 +46,15 @@ class OnlineRouter:
 		get_live_edge_factor: Optional[Callable[[str], float]] = None,
 		get_signal_delay: Optional[Callable[[str], float]] = None,
 		anfis_adjust_heuristic: Optional[Callable[[float, Dict], float]] = None,
+		queue_kind: str = "heap",
 	):
 		self.network_path = network_path
 		self.landmark_json_path = landmark_json_path
 		self.get_live_edge_factor = get_live_edge_factor or (lambda edge_id: 1.0)
 		self.get_signal_delay = get_signal_delay or (lambda node_id: 0.0)
 		self.anfis_adjust_heuristic = anfis_adjust_heuristic or (lambda base_h, ctx: base_h)
+		make_queue(queue_kind)  # geçersiz türü erken reddet
+		self.queue_kind = queue_kind
 
 		self.nodes: Dict[str, Tuple[float, float]] = {}
 		self.out_edges: Dict[str, List[Tuple[str, float, str]]] = {}  # u -> [(v, base_time, edge_id)]
@@ -38,11 +64,19 @@ class OnlineRouter:
 		self.edge_base_time: Dict[str, float] = {}
 		self.edge_to_endpoints: Dict[str, Tuple[str, str]] = {}       # edge_id -> (u, v)
 		self.endpoints_to_edge: Dict[Tuple[str, str], str] = {}       # (u, v) -> edge_id
+		self.turns: Dict[str, List[Tuple[str, str, str]]] = {}        # from_edge -> [(to_edge, dir, state)]
+		self.edge_lanes: Dict[str, List[str]] = {}                    # edge_id -> [lane_id]
 		self.landmarks: List[str] = []
 		self.tables: Dict[str, Dict[str, float]] = {}
+		self._compiled = None
+		self._mask: Optional[EdgeMask] = None
+		self._mask_listeners: List[MaskListener] = []
 
 		self._parse_network()
 		self._load_landmarks()
+		self.reach = ReachabilityIndex.from_router(self)
+		st = self.reach.stats()
+		logger.info(f"[Graph] {st['nodes']} düğüm, {st['components']} güçlü bağlı bileşen (en büyük {st['largest']}, çıkışsız {st['sinks']})")
 
 	def nearest_node(self, x: float, y: float) -> Optional[str]:
 		"""Verilen SUMO düzlemi (x,y) için en yakın düğüm ID'si."""
@@ -56,18 +90,11 @@ class OnlineRouter:
 		return best_id
 
 	def nodes_reaching(self, goal: str) -> List[str]:
-		"""Hedefe ulaşabilen düğümler (geri komşuluk ile)."""
-		if goal not in self.nodes:
-			return []
-		seen: Dict[str, bool] = {goal: True}
-		stack: List[str] = [goal]
-		while stack:
-			v = stack.pop()
-			for u in self.in_neighbors.get(v, []):
-				if u not in seen:
-					seen[u] = True
-					stack.append(u)
-		return list(seen.keys())
+		"""Hedefe ulaşabilen düğümler (SCC indeksinden, hedef başına önbellekli)."""
+		return self.reach.nodes_reaching(goal)
+
+	def can_reach(self, start: str, goal: str) -> bool:
+		return self.reach.can_reach(start, goal)
 
 	def _parse_network(self) -> None:
 		root = ET.parse(self.network_path).getroot()
@@ -88,17 +115,19 @@ class OnlineRouter:
 				continue
 			length_sum = 0.0
 			speed_sum = 0.0
-			lane_count = 0
+			lane_ids = []
 			for lane in edge.findall('lane'):
-				lane_count += 1
+				lane_ids.append(lane.get('id', ''))
 				length_sum += float(lane.get('length', '0'))
 				speed_sum += float(lane.get('speed', '13.9'))
+			lane_count = len(lane_ids)
 			if lane_count == 0:
 				continue
 			avg_len = length_sum / lane_count
 			avg_speed = max(0.1, speed_sum / lane_count)
 			base_time = avg_len / avg_speed
 			edge_id = edge.get('id', f"{u}>{v}")
+			self.edge_lanes[edge_id] = [lid for lid in lane_ids if lid]
 			self.out_edges.setdefault(u, []).append((v, base_time, edge_id))
 			self.in_neighbors.setdefault(v, []).append(u)
 			self.edge_length[edge_id] = avg_len
@@ -106,6 +135,13 @@ class OnlineRouter:
 			self.edge_base_time[edge_id] = base_time
 			self.edge_to_endpoints[edge_id] = (u, v)
 			self.endpoints_to_edge[(u, v)] = edge_id
+		# Şerit bağlantıları -> kenar dönüşleri (iç kenarlardan çıkanlar hariç)
+		for conn in root.findall('connection'):
+			src = conn.get('from', '')
+			dst = conn.get('to', '')
+			if src.startswith(':') or src not in self.edge_base_time or dst not in self.edge_base_time:
+				continue
+			self.turns.setdefault(src, []).append((dst, conn.get('dir', 's'), conn.get('state', 'M')))
 
 	def _load_landmarks(self) -> None:
 		with open(self.landmark_json_path, 'r', encoding='utf-8') as f:
@@ -130,16 +166,80 @@ class OnlineRouter:
 			base = max(base, abs(g_goal - g_node))
 		return float(self.anfis_adjust_heuristic(base, {**context, "node": node, "goal": goal}))
 
+	def compiled(self):
+		"""Bu ağın CSR derlemesi (ilk çağrıda kurulur)."""
+		if self._compiled is None:
+			from src.online.graph import CompiledGraph
+			self._compiled = CompiledGraph.from_router(self)
+			self._compiled.queue_kind = self.queue_kind
+		return self._compiled
+
+	# -------------------- Yol kapatmaları --------------------
+	@property
+	def edge_mask(self) -> EdgeMask:
+		"""Kenar maskesi (ilk çağrıda derlenmiş grafik üzerinde kurulur)."""
+		if self._mask is None:
+			self._mask = EdgeMask(self.compiled(), self.edge_lanes, listeners=self._mask_listeners)
+		return self._mask
+
+	@property
+	def blocked_edges(self):
+		return self._mask.blocked_ids if self._mask is not None else frozenset()
+
+	@property
+	def mask_version(self) -> int:
+		return self._mask.version if self._mask is not None else 0
+
+	def add_mask_listener(self, fn: MaskListener) -> None:
+		"""`fn(yeni kapanan kenarlar, yeni açılan kenarlar)` — yalnızca durumu değişenler."""
+		self._mask_listeners.append(fn)
+
+	def block(self, edges=(), lanes=(), start: Optional[float] = None, end: Optional[float] = None, now: Optional[float] = None, reason: str = "") -> int:
+		"""Kenarları/şeritleri kapat; kapatma kimliğini döndür. `start`/`end` verilirse
+		pencere `now` veya `update_closures` ile uygulanır (pencere yoksa hemen)."""
+		return self.edge_mask.add(edges, lanes, start=start, end=end, now=now, reason=reason)
+
+	def unblock(self, closure_id: int) -> bool:
+		return self._mask.remove(closure_id) if self._mask is not None else False
+
+	def update_closures(self, now: float) -> Optional[float]:
+		"""Zaman pencerelerini uygula; bir sonraki pencere sınırı (sim. s) veya None."""
+		return self._mask.update(now) if self._mask is not None else None
+
+	def is_blocked(self, edge_id: str) -> bool:
+		return edge_id in self.blocked_edges
+
+	def route_edges(self, goal: str, start_node: Optional[str] = None, from_edge: Optional[str] = None, edge_factor: Optional[Dict[str, float]] = None) -> Tuple[float, List[str]]:
+		"""Kenar tabanlı A*: (süre, kenar listesi). `from_edge` verilirse rota o kenarla başlar,
+		aksi halde `start_node`dan çıkan kenarlardan biriyle. Yol yoksa (inf, [])."""
+		g = self.compiled()
+		goal_i = g.node_index.get(goal)
+		if goal_i is None:
+			return float('inf'), []
+		if from_edge is not None:
+			e = g.edge_index.get(from_edge)
+			sources = [(e, 0.0)] if e is not None else []
+		else:
+			sources = g.sources_from_node(g.node_index.get(start_node, -1))
+		factors = {g.edge_index[e]: f for e, f in (edge_factor or {}).items() if e in g.edge_index}
+		t, edges = g.astar_edges(sources, goal_i, factors)
+		return t, [g.edge_ids[e] for e in edges]
+
 	def astar(self, start: str, goal: str) -> Tuple[float, List[str]]:
 		"""A* ile start→goal rota üretir; (toplam_süre, düğüm_listesi) döner."""
-		import heapq
-		open_pq: List[Tuple[float, str]] = []
-		heapq.heappush(open_pq, (0.0, start))
+		if not self.reach.can_reach(start, goal):
+			return float('inf'), []
+		blocked = self.blocked_edges
+		# Varsayılan: satır içi heapq (sarmalayıcı çağrısı yok); "radix" için kuyruk nesnesi
+		heap = self.queue_kind == "heap"
+		open_pq = [(0.0, start)] if heap else make_queue(self.queue_kind)
+		if not heap:
+			open_pq.push(start, 0.0)
 		g_score: Dict[str, float] = {start: 0.0}
 		parent: Dict[str, Optional[str]] = {start: None}
 
 		while open_pq:
-			_, u = heapq.heappop(open_pq)
+			_, u = heapq.heappop(open_pq) if heap else open_pq.pop()
 			if u == goal:
 				# yol oluştur
 				path = []
@@ -150,6 +250,8 @@ class OnlineRouter:
 				path.reverse()
 				return g_score[goal], path
 			for v, base_time, edge_id in self.out_edges.get(u, []):
+				if edge_id in blocked:
+					continue
 				live = self.get_live_edge_factor(edge_id)
 				cand_g = g_score[u] + base_time * max(0.1, float(live))
 				# sinyal gecikmesini düğümde uygula (hedef düğüme girişte)
@@ -158,7 +260,8 @@ class OnlineRouter:
 					g_score[v] = cand_g
 					parent[v] = u
 					h = self.heuristic(v, goal, context={"g": cand_g})
-					heapq.heappush(open_pq, (cand_g + h, v))
+					if heap:
+						heapq.heappush(open_pq, (cand_g + h, v))
+					else:
+						open_pq.push(v, cand_g + h)
 		return float('inf'), []
-
-
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Simülasyon zamanlı görev zamanlayıcı.
+
+Bileşenler periyodik (`every`) veya tek seferlik son tarihli (`at`) görevleri
+simülasyon zamanında kaydeder. Ana döngü her adımda yalnızca `run_due(now)`
+çağırır; vadesi gelmemiş görevler hiç dokunulmaz (boşta bileşen maliyeti yok).
+
+- Öncelik: aynı adımda vadesi gelen görevler küçük öncelik değerinden büyüğe çalışır
+- Adım bütçesi: `step_budget_s` (gerçek zaman) aşılırsa, önceliği
+  `critical_priority`den büyük görevler bir sonraki adıma ertelenir
+- Görev bütçesi: `budget_s` aşan çalışmalar `overruns` sayacına yazılır
+- Görev fonksiyonu `fn(now) -> Optional[float]`: sayı döndürürse bir sonraki
+  çalışma için gecikme (s) olarak kullanılır (0: sonraki adım), None ise periyot;
+  tek seferlik görev sayı döndürerek kendini yeniden planlayabilir
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import time
+
+from src.telemetry.profiler import PROFILER
+
+logger = logging.getLogger(__name__)
+
+TaskFn = Callable[[float], Optional[float]]
+
+
+class SimTask:
+	def __init__(self, name: str, fn: TaskFn, period_s: Optional[float], priority: int, budget_s: Optional[float]):
+		self.name = name
+		self.fn = fn
+		self.period_s = period_s
+		self.priority = int(priority)
+		self.budget_s = budget_s
+		self.due: Optional[float] = None
+		self.generation = 0
+		self.runs = 0
+		self.deferred = 0
+		self.overruns = 0
+		self.errors = 0
+		self.wall_s = 0.0
+		self.max_wall_s = 0.0
+
+	def stats(self) -> Dict[str, float]:
+		return {
+			"runs": self.runs,
+			"deferred": self.deferred,
+			"overruns": self.overruns,
+			"errors": self.errors,
+			"wall_ms": round(self.wall_s * 1000.0, 3),
+			"max_ms": round(self.max_wall_s * 1000.0, 3),
+		}
+
+
+class SimScheduler:
+	def __init__(self, step_budget_s: Optional[float] = None, critical_priority: int = 10):
+		self.step_budget_s = step_budget_s if step_budget_s and step_budget_s > 0 else None
+		self.critical_priority = int(critical_priority)
+		self.tasks: Dict[str, SimTask] = {}
+		self._heap: List[Tuple[float, int, int, int, SimTask]] = []
+		self._seq = itertools.count()
+		self.steps = 0
+		self.idle_steps = 0
+
+	# -------------------- Kayıt --------------------
+	def _push(self, task: SimTask, due: float) -> None:
+		task.due = float(due)
+		heapq.heappush(self._heap, (task.due, task.priority, next(self._seq), task.generation, task))
+
+	def every(self, name: str, period_s: float, fn: TaskFn, priority: int = 50, start_at: float = 0.0, budget_s: Optional[float] = None) -> SimTask:
+		"""Periyodik görev; `period_s=0` her adım çalışır."""
+		task = SimTask(name, fn, max(0.0, float(period_s)), priority, budget_s)
+		self.cancel(name)
+		self.tasks[name] = task
+		self._push(task, start_at)
+		return task
+
+	def at(self, name: str, due_time: float, fn: TaskFn, priority: int = 50, budget_s: Optional[float] = None) -> SimTask:
+		"""Tek seferlik son tarihli görev."""
+		task = SimTask(name, fn, None, priority, budget_s)
+		self.cancel(name)
+		self.tasks[name] = task
+		self._push(task, due_time)
+		return task
+
+	def cancel(self, name: str) -> bool:
+		task = self.tasks.pop(name, None)
+		if task is None:
+			return False
+		task.generation += 1  # yığındaki eski girdiler tembel olarak atlanır
+		task.due = None
+		return True
+
+	def wake(self, name: str, now: float) -> None:
+		"""Görevi vadesinden önce (şimdi) çalışacak şekilde öne çek."""
+		task = self.tasks.get(name)
+		if task is None or (task.due is not None and task.due <= now):
+			return
+		task.generation += 1
+		self._push(task, now)
+
+	def next_due_time(self) -> Optional[float]:
+		while self._heap:
+			due, _p, _s, gen, task = self._heap[0]
+			if gen == task.generation and self.tasks.get(task.name) is task:
+				return due
+			heapq.heappop(self._heap)
+		return None
+
+	# -------------------- Çalıştırma --------------------
+	def run_due(self, now: float) -> int:
+		"""Vadesi gelmiş görevleri öncelik sırasıyla çalıştır; çalışan görev sayısını döndür."""
+		self.steps += 1
+		due: List[SimTask] = []
+		while self._heap and self._heap[0][0] <= now:
+			_d, _p, _s, gen, task = heapq.heappop(self._heap)
+			if gen == task.generation and self.tasks.get(task.name) is task:
+				due.append(task)
+		if not due:
+			self.idle_steps += 1
+			return 0
+		due.sort(key=lambda t: t.priority)
+		t_start = time.perf_counter()
+		ran = 0
+		for task in due:
+			if (self.step_budget_s is not None and task.priority > self.critical_priority
+					and time.perf_counter() - t_start >= self.step_budget_s):
+				task.deferred += 1
+				self._push(task, task.due)
+				continue
+			t0 = time.perf_counter()
+			delay: Optional[float] = None
+			try:
+				delay = task.fn(now)
+			except Exception as e:
+				task.errors += 1
+				logger.debug(f"[Scheduler] {task.name} hatası: {e}")
+			dt = time.perf_counter() - t0
+			PROFILER.observe("task." + task.name, dt)
+			task.runs += 1
+			ran += 1
+			task.wall_s += dt
+			task.max_wall_s = max(task.max_wall_s, dt)
+			if task.budget_s is not None and dt > task.budget_s:
+				task.overruns += 1
+			if self.tasks.get(task.name) is not task:
+				continue  # görev kendini iptal etti veya değiştirildi
+			if task.due is not None and task.due > now:
+				continue  # görev çalışırken `wake`/yeniden planlama yapıldı
+			if delay is not None:
+				self._push(task, now + max(0.0, float(delay)))
+			elif task.period_s is not None:
+				nxt = (task.due or now) + task.period_s
+				self._push(task, nxt if nxt > now else now + task.period_s)
+			else:
+				self.tasks.pop(task.name, None)
+		return ran
+
+	# -------------------- Anlık görüntü --------------------
+	def state_dict(self) -> Dict[str, float]:
+		"""Görev adı -> vade (simülasyon s)."""
+		return {name: task.due for name, task in self.tasks.items() if task.due is not None}
+
+	def load_state_dict(self, dues: Dict[str, float]) -> None:
+		"""Kayıtlı vadeleri aynı adlı görevlere uygula (kayıtta olmayan görevler olduğu gibi kalır)."""
+		for name, due in dues.items():
+			task = self.tasks.get(name)
+			if task is None:
+				continue
+			task.generation += 1
+			self._push(task, float(due))
+
+	def stats(self) -> Dict[str, Dict[str, float]]:
+		out = {name: task.stats() for name, task in self.tasks.items()}
+		out["_loop"] = {"steps": self.steps, "idle_steps": self.idle_steps}
+		return out
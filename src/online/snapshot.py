@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Sıcak başlatma için simülasyon anlık görüntüleri.
+
+Bir anlık görüntü iki dosyadır:
+- `<yol>`: SUMO durum dosyası (`traci.simulation.saveState`; araçlar, rotalar,
+  ışık fazları). Uzantı `.xml.gz` ise sıkıştırılır, `.sbx` ikili biçimdir.
+- `<yol>.json`: yanındaki orkestratör durumu — senaryo (yapılandırma, ağ, rota
+  dosyası, tohum), zamanlayıcı vadeleri ve bileşen durumları (ışık kontrolcüsü
+  öncelikleri, filo sayaçları, spawn sırası ve rastgelelik durumu, araç başına
+  yeniden planlama vadeleri).
+
+Bileşenler `state_dict()` / `load_state_dict(...)` arayüzünü uygular; ısınma koşusu
+bir kez yapılıp kaydedilir, deneyler aynı görüntüden başlar.
+"""
+
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def meta_path(path: str) -> str:
+	return f"{path}.json"
+
+
+def save_snapshot(path: str, adapter, sim_time: float, scenario: Dict[str, Any], components: Dict[str, Any], scheduler=None) -> bool:
+	"""SUMO durumunu ve bileşen durumlarını `path` (+ `.json`) olarak yaz."""
+	d = os.path.dirname(path)
+	if d:
+		os.makedirs(d, exist_ok=True)
+	if not adapter.save_state(path):
+		return False
+	meta = {
+		"version": SNAPSHOT_VERSION,
+		"sim_time": float(sim_time),
+		"saved_at": time.time(),
+		"scenario": scenario,
+		"scheduler": scheduler.state_dict() if scheduler is not None else {},
+		"components": {name: comp.state_dict() for name, comp in components.items()},
+	}
+	tmp = meta_path(path) + ".tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(meta, f, ensure_ascii=False, indent=2)
+	os.replace(tmp, meta_path(path))
+	logger.info(f"[State] t={sim_time:.1f}s anlık görüntü yazıldı: {path}")
+	return True
+
+
+def read_snapshot_meta(path: str) -> Optional[Dict[str, Any]]:
+	"""Yan dosyayı oku; yoksa (yalnızca SUMO durumu) None."""
+	try:
+		with open(meta_path(path), "r", encoding="utf-8") as f:
+			meta = json.load(f)
+	except FileNotFoundError:
+		return None
+	if int(meta.get("version", 0)) != SNAPSHOT_VERSION:
+		raise ValueError(f"Desteklenmeyen anlık görüntü sürümü: {meta.get('version')} ({meta_path(path)})")
+	return meta
+
+
+def scenario_mismatches(saved: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+	"""Kayıttaki ve şimdiki senaryo arasında farklı olan anahtarlar: {anahtar: (kayıt, şimdi)}."""
+	return {k: (saved.get(k), current.get(k)) for k in ("config", "net", "route_files") if saved.get(k) != current.get(k)}
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+`run` döngüsünün bileşenleri: zamanlayıcıya (`SimScheduler`) kaydedilen görevler.
+
+Her bileşen `__call__(now) -> Optional[float]` arayüzünü uygular (bkz.
+scheduler.py) ve ayrı ayrı kurulup çalıştırılabilir:
+
+- ModelSwapTask: bekleyen model sürümlerini adımlar arasında devreye alır
+- PriorityMaintenanceTask: aktif yeşil öncelikleri korur/bırakır
+- FleetPriorityTask: tüm ambulans filosu için toplu ANFIS tetiklemesi ve yeşil öncelik
+- AmbulanceSpawner: periyodik ambulans üretimi (hastaneye rota)
+- ReplanTask: periyodik yeniden planlama (süreç havuzu servisi veya artımlı A*) ve loglama;
+  yol kapatılınca kalan rotası kapalı kenardan geçen ambulanslar hemen yeniden planlanır
+- ClosureTask: zaman pencereli yol kapatmalarını pencere sınırlarında uygular
+- DispatchTask: olayları toplar, müsait istasyon birimlerine toplu atar ve
+  istasyon -> olay -> hastane rotalı ambulansları `AmbulanceSpawner` ile ekler
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import deque
+import logging
+import random
+
+from src.online.incremental import IncrementalAStar, live_edge_factor
+from src.telemetry import trace
+from src.telemetry.profiler import PROFILER
+from src.telemetry.trace import TRACE
+
+logger = logging.getLogger("orchestrator")
+
+# Boşta bileşenin bir sonraki kontrolüne kadar en uzun bekleme (s)
+IDLE_RECHECK_S = 3600.0
+
+
+def _random_state() -> list:
+	version, internal, gauss = random.getstate()
+	return [version, list(internal), gauss]
+
+
+def path_to_edges(router, path: List[str]) -> List[str]:
+	edges = []
+	for i in range(len(path) - 1):
+		ed = router.endpoints_to_edge.get((path[i], path[i + 1]))
+		if ed:
+			edges.append(ed)
+	return edges
+
+
+class ModelSwapTask:
+	def __init__(self, registry):
+		self.registry = registry
+
+	def __call__(self, now: float) -> Optional[float]:
+		for variant, old_v, new_v in self.registry.swap_pending():
+			logger.info(f"[Models] {variant}: {old_v} -> {new_v} (t={now:.1f}s)")
+		return None
+
+
+class PriorityMaintenanceTask:
+	"""Öncelik bakımı; aktif öncelik yokken uyur, `FleetPriorityTask` uyandırır."""
+
+	def __init__(self, tlc, release_distance_m: float = 50.0, keep_green_seconds: float = 1.5):
+		self.tlc = tlc
+		self.release_distance_m = float(release_distance_m)
+		self.keep_green_seconds = float(keep_green_seconds)
+
+	def __call__(self, now: float) -> Optional[float]:
+		with PROFILER.timer("maintain"):
+			self.tlc.maintain_active_priorities(release_distance_m=self.release_distance_m, keep_green_seconds=self.keep_green_seconds, sim_time=now)
+		if not self.tlc.active_priority:
+			return IDLE_RECHECK_S
+		if not self.tlc.event_driven_checks:
+			return 0.0
+		# En erken bakım vadesine kadar uyu (planlanmamış TLS: bir sonraki adım)
+		wheel = self.tlc.check_wheel
+		dues = [wheel.due_time(("maintain", str(tl_id))) for tl_id in self.tlc.active_priority]
+		if any(d is None for d in dues):
+			return 0.0
+		return max(0.0, min(dues) - now)
+
+
+class AmbulanceSpawner:
+	def __init__(self, adapter, router, goal_node: str, seq_start: int = 0, on_spawn: Optional[Callable[[float], None]] = None, edge_routing: bool = False):
+		self.adapter = adapter
+		self.edge_routing = bool(edge_routing)
+		self.router = router
+		self.goal_node = goal_node
+		self.seq = seq_start
+		self.on_spawn = on_spawn
+		self.spawned: List[str] = []
+
+	def plan_route(self, start_node: str, goal_node: str, via_node: Optional[str] = None) -> Tuple[List[str], List[str]]:
+		"""(başlangıç -> ara düğüm, ara düğüm -> hedef) kenar bacakları; ara düğüm yoksa ikincisi boş.
+
+		Bacak kurulamazsa ([], [])."""
+		if via_node is None:
+			return self._leg(start_node, goal_node), []
+		leg1 = self._leg(start_node, via_node) if via_node != start_node else []
+		if via_node != start_node and not leg1:
+			return [], []
+		if self.edge_routing and leg1:
+			# İkinci bacak birincinin son kenarından döner (dönüş yasakları korunur)
+			_, edges = self.router.route_edges(goal_node, from_edge=leg1[-1])
+			leg2 = edges[1:]
+		else:
+			leg2 = self._leg(via_node, goal_node) if via_node != goal_node else []
+		if via_node != goal_node and not leg2:
+			return [], []
+		return leg1, leg2
+
+	def _leg(self, start_node: str, goal_node: str) -> List[str]:
+		if self.edge_routing:
+			# Kenar tabanlı: dönüş yasaklarına uyan kenar listesi doğrudan
+			_, edges = self.router.route_edges(goal_node, start_node=start_node)
+			return edges
+		_, path = self.router.astar(start_node, goal_node)
+		return path_to_edges(self.router, path)
+
+	def spawn_route(self, now: float, edges: List[str]) -> Optional[str]:
+		"""Verilen kenar listesiyle yeni ambulans ekle; araç kimliğini döndür."""
+		if not edges:
+			return None
+		rid = f"amb_route_{self.seq}"
+		vid = f"ambulance_{self.seq}"
+		self.seq += 1
+		if self.adapter.connected:
+			self.adapter.add_route(rid, edges)
+			self.adapter.add_vehicle(vid, rid, type_id='ambulance')
+		self.spawned.append(vid)
+		TRACE.emit(trace.SPAWN, veh=vid, edge=edges[0], c=len(edges))
+		if self.on_spawn is not None:
+			self.on_spawn(now)
+		return vid
+
+	def spawn(self, now: float, first: bool = False) -> Optional[str]:
+		nodes_list = self.router.nodes_reaching(self.goal_node) or list(self.router.nodes.keys())
+		if not nodes_list:
+			return None
+		start_node = random.choice(nodes_list)
+		# spawn rotasını her zaman hastaneye (goal_node) yap
+		edges, _ = self.plan_route(start_node, self.goal_node)
+		vid = self.spawn_route(now, edges)
+		if vid is not None:
+			label = "İlk ambulans" if first else "Yeni ambulans"
+			logger.info(f"{label}: {vid}, from={start_node} → {self.goal_node}, edges={len(edges)}")
+		return vid
+
+	def __call__(self, now: float) -> Optional[float]:
+		if now > 0:
+			self.spawn(now)
+		return None
+
+	def state_dict(self) -> Dict[str, object]:
+		return {"seq": self.seq, "spawned": list(self.spawned), "random": _random_state()}
+
+	def load_state_dict(self, state: Dict[str, object], restore_random: bool = True) -> None:
+		# Sıra numarası korunur: kayıttaki ambulans/rota kimlikleriyle çakışma olmaz
+		self.seq = max(self.seq, int(state.get("seq", 0)))
+		self.spawned = list(state.get("spawned") or [])
+		if restore_random and state.get("random"):
+			version, internal, gauss = state["random"]
+			random.setstate((version, tuple(internal), gauss))
+
+
+class FleetPriorityTask:
+	"""Her adım: filo güncellemesi ve vadesi gelen (TLS, ambulans) çiftleri için toplu ANFIS tetiklemesi.
+
+	Aynı TLS'ye birden çok ambulans tetiklenirse ETA'sı en kısa olan kazanır;
+	başka ambulans için süren öncelik, o ambulans filoda olduğu sürece bozulmaz.
+	"""
+
+	def __init__(self, adapter, tlc, fleet, green_seconds: float = 12.0, on_priority: Optional[Callable[[float], None]] = None, influence_m: Optional[float] = None, max_speed_ms: float = 25.0, max_sleep_s: float = IDLE_RECHECK_S):
+		self.adapter = adapter
+		self.tlc = tlc
+		self.fleet = fleet
+		self.green_seconds = float(green_seconds)
+		self.on_priority = on_priority
+		# Uyarlamalı adım: verilirse görev, hiçbir ambulans bir TLS'nin etki alanına
+		# giremeyecekken uyur (aksi halde her adım çalışır)
+		self.influence_m = influence_m
+		self.max_speed_ms = float(max_speed_ms)
+		self.max_sleep_s = float(max_sleep_s)
+		self._edge_to_tls: Optional[Dict[str, str]] = None
+
+	def _tls_for_edge(self, edge_id: str) -> Optional[str]:
+		"""getNextTLS boşsa: yaklaşım kenarını kontrol eden TLS (indeks bir kez kurulur)."""
+		if self._edge_to_tls is None:
+			self._edge_to_tls = {}
+			try:
+				tl_list = self.adapter.get_traffic_light_ids()
+			except Exception:
+				tl_list = []
+			for tl_id in tl_list:
+				try:
+					for group in self.tlc._controlled_links(tl_id):
+						for in_lane, _out_lane, _via in group:
+							self._edge_to_tls.setdefault(in_lane.rsplit("_", 1)[0], tl_id)
+				except Exception:
+					continue
+		return self._edge_to_tls.get(edge_id)
+
+	def __call__(self, now: float) -> Optional[float]:
+		self.fleet.update(now)
+		cands = []
+		for st in self.fleet:
+			if st.on_junction:
+				continue
+			if st.next_tls is not None:
+				tl_id, dist = st.next_tls
+			else:
+				tl_id, dist = self._tls_for_edge(st.edge), 150.0
+			if not tl_id or not self.tlc.is_trigger_check_due(tl_id, st.vehicle_id, now):
+				continue
+			cands.append((tl_id, st.edge, st.vehicle_id, dist, st.speed, st.lane))
+		if not cands:
+			return self._sleep()
+		with PROFILER.timer("trigger"):
+			decisions = self.tlc.should_trigger_priority_batch(cands, now)
+		# TLS başına en kısa ETA'lı ambulans
+		winners: Dict[str, Tuple[float, tuple]] = {}
+		for cand, ok in zip(cands, decisions):
+			TRACE.emit(trace.TRIGGER, veh=cand[2], tl=cand[0], edge=cand[1], a=cand[3], b=cand[4], c=int(bool(ok)))
+			if not ok:
+				continue
+			eta = cand[3] / max(0.5, cand[4])
+			if cand[0] not in winners or eta < winners[cand[0]][0]:
+				winners[cand[0]] = (eta, cand)
+		for tl_id, (_eta, (_tl, approach_edge, ambulance_id, _d, _v, _lane)) in winners.items():
+			holder = str(self.tlc.active_priority.get(tl_id, {}).get("ambulance_id") or "")
+			if holder and holder != ambulance_id and holder in self.fleet.states:
+				continue
+			logger.info(f"[TL] (ANFIS) approach={approach_edge} -> tl={tl_id} karar uygulanıyor (veh={ambulance_id})")
+			try:
+				with PROFILER.timer("apply"):
+					ok = self.tlc.set_ambulance_priority(tl_id, approach_edge, green_seconds=self.green_seconds, ambulance_id=ambulance_id)
+				if ok:
+					logger.info(f"[Priority] t={now:.1f}s veh={ambulance_id} tl={tl_id} edge={approach_edge} action=green_priority")
+					st = self.fleet.get(ambulance_id)
+					if st is not None:
+						st.priorities += 1
+					if self.on_priority is not None:
+						self.on_priority(now)
+			except Exception as e:
+				logger.debug(f"[Priority] set_ambulance_priority error: {e}")
+		return self._sleep()
+
+	def _sleep(self) -> Optional[float]:
+		if self.influence_m is None:
+			return None
+		return min(self.max_sleep_s, self.fleet.quiet_horizon(self.influence_m, self.max_speed_ms))
+
+
+class ReplanTask:
+	"""Periyodik yeniden planlama.
+
+	`service` verilirse arama süreç havuzunda yürür ve sonuç araca uygulanır:
+	her ambulansın kendi son tarihi (son gönderim + aralık) vardır; vadesi geçenler
+	en çok gecikenden başlayarak adım başına en fazla `max_batch` araçlık partiler
+	halinde gönderilir, canlı kenar metrikleri parti için tek sorguyla okunur.
+	Aksi halde artımlı A* başlatıldığı adımdan itibaren her adımda sınırlı
+	genişlemeyle ilerler (yalnızca loglama).
+	"""
+
+	def __init__(self, adapter, router, goal_node: str, get_start: Callable[[], Optional[str]], interval_s: float = 10.0, max_expansions: int = 50, time_budget_s: Optional[float] = None, service=None, get_vehicles: Optional[Callable[[], List[Tuple[str, str]]]] = None, max_batch: int = 32, route_plan: Optional[Callable[[str, str], Optional[Tuple[str, List[str]]]]] = None):
+		self.adapter = adapter
+		self.router = router
+		self.goal_node = goal_node
+		self.get_start = get_start
+		self.service = service
+		self.get_vehicles = get_vehicles or (lambda: [])
+		self._fleet_view = get_vehicles is not None
+		self.max_batch = max(1, int(max_batch))
+		# Araç başına hedef ve rotanın sonuna eklenecek kenarlar (ör. sevkte hastane bacağı)
+		self.route_plan = route_plan
+		self.next_submit_at = 0.0
+		self._due: Dict[str, float] = {}
+		self.interval_s = float(interval_s)
+		self.max_expansions = int(max_expansions)
+		self.time_budget_s = time_budget_s
+		self.search: Optional[IncrementalAStar] = None
+		self.started_at = 0.0
+		self.last_result = None
+		self.closure_replans = 0
+		self._newly_blocked = set()
+		if hasattr(router, 'add_mask_listener'):
+			router.add_mask_listener(self._on_mask_change)
+
+	def _on_mask_change(self, blocked: List[str], freed: List[str]) -> None:
+		# Yalnızca yeni kapananlar rotaları geçersiz kılar; açılanlar bir sonraki periyotta değerlendirilir
+		self._newly_blocked.update(blocked)
+
+	def _invalidate_blocked(self, now: float, vehicles: List[Tuple[str, str]]) -> None:
+		"""Kalan rotası yeni kapanan kenardan geçen araçları hemen vadeye çek; etkilenen artımlı aramayı at."""
+		blocked, self._newly_blocked = self._newly_blocked, set()
+		if self.search is not None:
+			tails = [self.router.edge_to_endpoints[e][0] for e in blocked if e in self.router.edge_to_endpoints]
+			if self.search.touches(tails):
+				self.search = None
+		for vid, edge in vehicles:
+			route = self.adapter.get_vehicle_route(vid)
+			rest = route[route.index(edge) + 1:] if edge in route else route
+			if any(e in blocked for e in rest):
+				self._due[vid] = now
+				self.closure_replans += 1
+				logger.info(f"[Closure] t={now:.1f}s {vid} rotası kapalı kenardan geçiyor; yeniden planlanıyor")
+
+	def state_dict(self) -> Dict[str, object]:
+		"""Araç başına yeniden planlama vadeleri (uçuştaki istekler ve artımlı arama kaydedilmez)."""
+		return {"due": dict(self._due), "next_submit_at": self.next_submit_at}
+
+	def load_state_dict(self, state: Dict[str, object]) -> None:
+		self._due = {str(k): float(v) for k, v in (state.get("due") or {}).items()}
+		self.next_submit_at = float(state.get("next_submit_at", 0.0))
+		self.search = None
+
+	def collect_local_edges(self, seed_node: str, max_depth: int = 2, max_edges: int = 200) -> List[str]:
+		"""Yakın çevredeki kenarlar (tam ağ yerine sınırlı canlı metrik için)."""
+		seen = set([seed_node])
+		q = deque([(seed_node, 0)])
+		edges = []
+		while q and len(edges) < max_edges:
+			n, d = q.popleft()
+			for v, _base_time, eid in self.router.out_edges.get(n, []):
+				if eid:
+					edges.append(eid)
+				if d < max_depth and v not in seen:
+					seen.add(v)
+					q.append((v, d + 1))
+		return edges[:max_edges]
+
+	def _call_service(self, now: float) -> Optional[float]:
+		vehicles = self.get_vehicles()
+		with PROFILER.timer("replan_poll"):
+			# Filo abonelik durumu: sonuç uygularken ek getIDList/getRoadID yok
+			finished = self.service.poll(self.adapter, now, vehicles=dict(vehicles) if self._fleet_view else None)
+		for req in finished:
+			res_time, res_path, _edges = req.result
+			self.last_result = (res_time, res_path, now)
+			self._log_result(res_time, res_path, req.edge_stats, now, vehicle_id=req.vehicle_id)
+		if self._newly_blocked:
+			self._invalidate_blocked(now, vehicles)
+		due = []
+		for vid, edge in vehicles:
+			t = self._due.get(vid)
+			if t is None:
+				# Yeni ambulansın rotası spawn'da hesaplandı; ilk yeniden planlama bir aralık sonra
+				t = self._due[vid] = now + self.interval_s
+			if t <= now and edge and not edge.startswith(":") and not self.service.in_flight(vid):
+				due.append((t, vid, edge))
+		if len(self._due) > len(vehicles):
+			live = set(vid for vid, _e in vehicles)
+			self._due = {vid: t for vid, t in self._due.items() if vid in live}
+		due.sort()
+		batch = due[:self.max_batch]
+		if batch:
+			local: List[Tuple[str, str, List[str]]] = []
+			union = set()
+			with PROFILER.timer("snap"):
+				# Araç kenarı -> arama başlangıç düğümü ve çevresindeki kenarlar
+				for _t, vid, edge in batch:
+					ends = self.router.edge_to_endpoints.get(edge)
+					edges_subset = self.collect_local_edges(ends[1], max_depth=2, max_edges=200) if ends else []
+					local.append((vid, edge, edges_subset))
+					union.update(edges_subset)
+			with PROFILER.timer("snapshot"):
+				snapshot = self.adapter.get_edges_stats_subset(sorted(union)) if union else {}
+			jobs = []
+			for vid, edge, edges_subset in local:
+				plan = self.route_plan(vid, edge) if self.route_plan is not None else None
+				jobs.append({
+					"vehicle_id": vid,
+					"from_edge": edge,
+					"goal_node": plan[0] if plan else self.goal_node,
+					"suffix": plan[1] if plan else [],
+					"edge_stats": {e: snapshot[e] for e in edges_subset if e in snapshot},
+				})
+			with PROFILER.timer("replan_submit"):
+				self.service.submit_batch(jobs, now)
+			for _t, vid, _edge in batch:
+				self._due[vid] = now + self.interval_s
+		elif not vehicles and now >= self.next_submit_at:
+			# Ambulans yokken varsayılan başlangıçtan (yalnızca log) planla
+			start_node = self.get_start()
+			if start_node and not self.service.in_flight(None):
+				edges_subset = self.collect_local_edges(start_node, max_depth=2, max_edges=200)
+				snapshot = self.adapter.get_edges_stats_subset(edges_subset) if edges_subset else {}
+				self.service.submit_batch([{"start_node": start_node, "goal_node": self.goal_node, "edge_stats": snapshot}], now)
+			self.next_submit_at = now + self.interval_s
+		# Uçuşta istek veya birikmiş iş varken her adım; yoksa en yakın son tarihe kadar uyu
+		if self.service.busy or len(due) > len(batch):
+			return 0.0
+		nxt = min(self._due.values()) if self._due else self.next_submit_at
+		return max(0.0, nxt - now)
+
+	def __call__(self, now: float) -> Optional[float]:
+		if self.service is not None:
+			return self._call_service(now)
+		if self._newly_blocked:
+			self._invalidate_blocked(now, [])
+		if self.search is None:
+			start_node = self.get_start()
+			if not start_node:
+				return self.interval_s
+			edges_subset = self.collect_local_edges(start_node, max_depth=2, max_edges=200)
+			with PROFILER.timer("snapshot"):
+				snapshot = self.adapter.get_edges_stats_subset(edges_subset) if edges_subset else {}
+			self.search = IncrementalAStar(self.router, start_node, self.goal_node, snapshot)
+			self.started_at = now
+		# Her adımda sınırlı sayıda düğüm genişlet; simülasyon akışı durmaz
+		with PROFILER.timer("replan"):
+			expanded = self.search.step(max_expansions=self.max_expansions, time_budget_s=self.time_budget_s)
+		PROFILER.count("astar_expansions", expanded)
+		if not self.search.finished():
+			return 0.0
+		search, self.search = self.search, None
+		res_time, res_path = search.get_result()
+		if res_time != float('inf') and res_path:
+			self.last_result = (res_time, res_path, now)
+			self._log_result(res_time, res_path, search.edge_stats, now)
+		return max(0.0, self.started_at + self.interval_s - now)
+
+	def _log_result(self, best_time: float, best_path: List[str], edge_stats: Dict, t_mark: float, vehicle_id: Optional[str] = None) -> None:
+		router = self.router
+
+		def est(edge_id: str) -> float:
+			return getattr(router, 'edge_base_time', {}).get(edge_id, 0.0) * live_edge_factor(router, edge_stats, edge_id)
+
+		# ALT-KIYAS: ilk kenar ile bir atlamalı alternatifin tahmini süre farkı
+		edgeA = edgeB = None
+		if len(best_path) >= 3:
+			edgeA = router.endpoints_to_edge.get((best_path[0], best_path[1]))
+			edgeB = router.endpoints_to_edge.get((best_path[0], best_path[2]))
+		if TRACE.enabled:
+			first = edgeA or (router.endpoints_to_edge.get((best_path[0], best_path[1])) if len(best_path) >= 2 else None)
+			margin = (est(edgeB) - est(edgeA)) if (edgeA and edgeB) else 0.0
+			TRACE.emit(trace.REPLAN, veh=vehicle_id, edge=first, a=float(best_time), b=float(margin), c=len(best_path))
+		if not logger.isEnabledFor(logging.INFO):
+			return
+		if edgeA and edgeB:
+			logger.info(f"[ALT-KIYAS] edgeA={edgeA} t~{est(edgeA):.2f}s vs edgeB={edgeB} t~{est(edgeB):.2f}s → seçilen={edgeA}")
+		# İlk 3 kenarın kalemleri
+		items = []
+		for i in range(min(3, len(best_path) - 1)):
+			eid = router.endpoints_to_edge.get((best_path[i], best_path[i + 1]))
+			if not eid:
+				continue
+			bt = getattr(router, 'edge_base_time', {}).get(eid, 0.0)
+			lfv = live_edge_factor(router, edge_stats, eid)
+			items.append(f"{eid}: base={bt:.2f}s live={lfv:.2f} adj={bt*lfv:.2f}s")
+		if items:
+			logger.info("[Edges] " + " | ".join(items))
+		veh = f" veh={vehicle_id}" if vehicle_id else ""
+		logger.info(f"[Replan] t={t_mark:.1f}s ETA~{best_time:.1f}s, düğüm: {len(best_path)}{veh}")
+
+
+class ClosureTask:
+	"""Zaman pencereli yol kapatmaları: yalnızca pencere sınırlarında uyanır.
+
+	Maske değişirse `on_change(now)` çağrılır (ör. yeniden planlamayı hemen uyandırmak için).
+	"""
+
+	def __init__(self, router, on_change: Optional[Callable[[float], None]] = None):
+		self.router = router
+		self.on_change = on_change
+
+	def __call__(self, now: float) -> Optional[float]:
+		version = self.router.mask_version
+		nxt = self.router.update_closures(now)
+		if self.router.mask_version != version and self.on_change is not None:
+			self.on_change(now)
+		return IDLE_RECHECK_S if nxt is None else max(0.0, nxt - now)
+
+
+class DispatchTask:
+	"""Olay sevki: gelen olayları kuyruğa alır ve her `interval_s`te toplu atama yapar.
+
+	Birim durumları filo (`fleet`) verisinden okunur; ek TraCI sorgusu yapılmaz.
+	"""
+
+	def __init__(self, dispatcher, spawner, generator, fleet, interval_s: float = 5.0):
+		self.dispatcher = dispatcher
+		self.spawner = spawner
+		self.generator = generator
+		self.fleet = fleet
+		self.interval_s = max(0.1, float(interval_s))
+		dispatcher.plan_leg = lambda start, goal: spawner.plan_route(start, goal)[0]
+
+	def __call__(self, now: float) -> Optional[float]:
+		d = self.dispatcher
+		for node in self.generator.due(now):
+			inc = d.report(node, now)
+			if inc is not None:
+				logger.info(f"[Dispatch] t={now:.1f}s olay {inc.incident_id} @ {node} (kuyruk={len(d.queue)})")
+		d.update_units(self.fleet.states, now)
+		for station, incident, eta in d.match(now):
+			hospital, _t = d.nearest_hospital(incident.node)
+			with PROFILER.timer("dispatch_route"):
+				leg1, leg2 = self.spawner.plan_route(station.node, hospital, via_node=incident.node)
+			vid = self.spawner.spawn_route(now, leg1 + leg2)
+			if vid is None:
+				d.requeue(incident)
+				continue
+			d.dispatched(vid, station, incident, hospital, leg1, leg2, now)
+			logger.info(f"[Dispatch] t={now:.1f}s {incident.incident_id} -> {station.station_id} ({vid}, tahmini varış {eta:.0f}s, hastane {hospital})")
+		if not d.idle:
+			return self.interval_s
+		# Boşta: bir sonraki olaya kadar uyu
+		nxt = self.generator.next_time()
+		return IDLE_RECHECK_S if nxt is None else max(self.interval_s, nxt - now)
+
+	def state_dict(self) -> Dict[str, object]:
+		return {"dispatcher": self.dispatcher.state_dict(), "next_at": self.generator.next_at}
+
+	def load_state_dict(self, state: Dict[str, object]) -> None:
+		self.dispatcher.load_state_dict(state.get("dispatcher") or {})
+		if state.get("next_at") is not None:
+			self.generator.next_at = float(state["next_at"])
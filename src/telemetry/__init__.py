@@ -0,0 +1 @@
+# Run instrumentation (per-phase timers, counters, metrics export)
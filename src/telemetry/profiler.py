@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Orkestratör için düşük maliyetli faz zamanlayıcıları ve sayaçlar.
+
+Kullanım (sıcak yolda):
+    from src.telemetry.profiler import PROFILER
+    with PROFILER.timer("trigger"):
+        ...
+    PROFILER.count("astar_expansions", n)
+
+`PROFILER` varsayılan olarak kapalıdır: `timer` paylaşılan boş bir bağlam
+yöneticisi döndürür, `count`/`observe` hemen döner (tahsis yok). `--profile`
+ile `enable()` çağrılınca süreler log-kovalı histogramlara (oktav başına 4 kova,
+1 µs .. ~1 saat) yazılır; yüzdelikler kovalardan hesaplanır.
+
+Dışa aktarım: `write(path)` — uzantı `.prom` ise Prometheus metin biçimi,
+aksi halde JSON; geçici dosya + `os.replace` ile atomik.
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import math
+import os
+import time
+
+SUB_BUCKETS = 4
+NUM_BUCKETS = 1 + 32 * SUB_BUCKETS  # 2^32 µs ≈ 71 dk üst sınır
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+	"""Log-kovalı süre histogramı (saniye girer, µs kovalarında tutulur)."""
+
+	def __init__(self):
+		self.buckets: List[int] = [0] * NUM_BUCKETS
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+	def observe(self, seconds: float) -> None:
+		us = seconds * 1e6
+		idx = 0 if us <= 1.0 else min(NUM_BUCKETS - 1, int(math.log2(us) * SUB_BUCKETS) + 1)
+		self.buckets[idx] += 1
+		self.count += 1
+		self.total += seconds
+		if seconds > self.max:
+			self.max = seconds
+
+	def percentile(self, q: float) -> float:
+		"""Yüzdelik (s); kova üst sınırı döner (en fazla gözlenen maksimum)."""
+		if not self.count:
+			return 0.0
+		rank = q * self.count
+		acc = 0
+		for idx, n in enumerate(self.buckets):
+			acc += n
+			if n and acc >= rank:
+				return min(self.max, (2.0 ** (idx / SUB_BUCKETS)) * 1e-6)
+		return self.max
+
+	def summary(self) -> Dict[str, float]:
+		out = {
+			"count": self.count,
+			"total_ms": round(self.total * 1e3, 3),
+			"mean_us": round(self.total / self.count * 1e6, 2) if self.count else 0.0,
+			"max_us": round(self.max * 1e6, 2),
+		}
+		for q in QUANTILES:
+			out[f"p{int(q * 100)}_us"] = round(self.percentile(q) * 1e6, 2)
+		return out
+
+
+class _NullTimer:
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc) -> bool:
+		return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+	__slots__ = ("hist", "t0")
+
+	def __init__(self, hist: Histogram):
+		self.hist = hist
+
+	def __enter__(self):
+		self.t0 = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc) -> bool:
+		self.hist.observe(time.perf_counter() - self.t0)
+		return False
+
+
+class Profiler:
+	def __init__(self, enabled: bool = False):
+		self.enabled = bool(enabled)
+		self.timers: Dict[str, Histogram] = {}
+		self.counters: Dict[str, float] = {}
+		self.gauges: Dict[str, float] = {}
+		self.started = time.perf_counter()
+
+	def enable(self) -> None:
+		self.enabled = True
+		self.reset()
+
+	def disable(self) -> None:
+		self.enabled = False
+
+	def reset(self) -> None:
+		self.timers = {}
+		self.counters = {}
+		self.gauges = {}
+		self.started = time.perf_counter()
+
+	# -------------------- Sıcak yol --------------------
+	def _hist(self, name: str) -> Histogram:
+		h = self.timers.get(name)
+		if h is None:
+			h = self.timers[name] = Histogram()
+		return h
+
+	def timer(self, name: str):
+		if not self.enabled:
+			return _NULL_TIMER
+		return _Timer(self._hist(name))
+
+	def observe(self, name: str, seconds: float) -> None:
+		if self.enabled:
+			self._hist(name).observe(seconds)
+
+	def count(self, name: str, n: float = 1) -> None:
+		if self.enabled:
+			self.counters[name] = self.counters.get(name, 0) + n
+
+	def gauge(self, name: str, value: float) -> None:
+		if self.enabled:
+			self.gauges[name] = float(value)
+
+	# -------------------- Dışa aktarım --------------------
+	def snapshot(self) -> Dict[str, Any]:
+		return {
+			"wall_s": round(time.perf_counter() - self.started, 3),
+			"timers": {name: h.summary() for name, h in sorted(self.timers.items())},
+			"counters": dict(sorted(self.counters.items())),
+			"gauges": dict(sorted(self.gauges.items())),
+		}
+
+	def to_prometheus(self, prefix: str = "orchestrator") -> str:
+		lines = [f"# TYPE {prefix}_phase_seconds summary"]
+		for name, h in sorted(self.timers.items()):
+			for q in QUANTILES:
+				lines.append(f'{prefix}_phase_seconds{{phase="{name}",quantile="{q}"}} {h.percentile(q):.9f}')
+			lines.append(f'{prefix}_phase_seconds_sum{{phase="{name}"}} {h.total:.9f}')
+			lines.append(f'{prefix}_phase_seconds_count{{phase="{name}"}} {h.count}')
+		lines.append(f"# TYPE {prefix}_events_total counter")
+		for name, v in sorted(self.counters.items()):
+			lines.append(f'{prefix}_events_total{{name="{name}"}} {v:g}')
+		lines.append(f"# TYPE {prefix}_gauge gauge")
+		for name, v in sorted(self.gauges.items()):
+			lines.append(f'{prefix}_gauge{{name="{name}"}} {v:g}')
+		return "\n".join(lines) + "\n"
+
+	def write(self, path: str) -> None:
+		d = os.path.dirname(path)
+		if d:
+			os.makedirs(d, exist_ok=True)
+		tmp = path + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			if path.endswith(".prom"):
+				f.write(self.to_prometheus())
+			else:
+				json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+		os.replace(tmp, path)
+
+
+class ProfiledHandler(logging.Handler):
+	"""Sarılan log handler'ının `emit` süresini "log_io" fazına yazar."""
+
+	def __init__(self, inner: logging.Handler, profiler: Optional[Profiler] = None):
+		super().__init__(inner.level)
+		self.inner = inner
+		self.profiler = profiler or PROFILER
+		self.setFormatter(inner.formatter)
+
+	def emit(self, record: logging.LogRecord) -> None:
+		with self.profiler.timer("log_io"):
+			self.inner.handle(record)
+
+
+# Süreç geneli örnek; `--profile` verilmedikçe kapalı
+PROFILER = Profiler(enabled=False)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+TraCI RPC muhasebesi ve adım başına bütçe denetimi.
+
+`install()` traci modülündeki alan nesnelerini (`traci.vehicle`, `traci.trafficlight`,
+...) ve `traci.simulationStep`'i sayan vekillerle değiştirir. Böylece `SumoAdapter`,
+`TrafficLightController` ve `cmd_run` içindeki doğrudan `traci.*` çağrıları kod
+değişmeden sayılır: komut başına ve çağıran (ilk adaptör dışı fonksiyon) başına
+çağrı sayısı ve gecikme tutulur.
+
+Adım sınırı `simulationStep` çağrısıdır: iki adım arasındaki (adım çağrısı dahil)
+RPC'ler o adıma yazılır. Bütçe (toplam ve/veya komut başına) aşılırsa "warn" kipinde
+uyarı loglanır, "fail" kipinde ilk ihlal `violation`'a yazılır ve koşu hata koduyla
+biter — sıcak döngüye RPC ekleyen bir değişiklik sabit senaryoda koşuyu başarısız kılar.
+Alan (komutun "alan." öneki; adım çağrısı için `simulationStep`) başına adım
+maksimumu da tutulur (`max_step_by_domain`); `scripts/check_rpc_budget.py` bunu
+kayıtlı bir senaryoda depodaki bütçe dosyasıyla karşılaştırır.
+
+Abonelik sonuçları (`*.getAllSubscriptionResults`) da sayılır ve bütçeye dahildir:
+her biri gerçek bir TraCI gidiş-dönüşüdür. Araç başına sorguların yerini aldığı için
+adım başına sabit (alan başına bir) kalmaları beklenir; araç sayısıyla büyümeleri
+regresyondur.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sarılan traci alanları (yoksa atlanır)
+DOMAINS = (
+	"simulation", "vehicle", "trafficlight", "lane", "edge", "junction",
+	"person", "route", "vehicletype", "inductionloop", "lanearea", "poi", "polygon", "gui",
+)
+# Çağıran olarak sayılmayan (sarıcı) modüller
+WRAPPER_MODULES = frozenset({"src.adapters.sumo_adapter", __name__})
+
+
+class RpcStat:
+	__slots__ = ("count", "total", "max")
+
+	def __init__(self):
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+	def add(self, dt: float) -> None:
+		self.count += 1
+		self.total += dt
+		if dt > self.max:
+			self.max = dt
+
+	def summary(self) -> Dict[str, float]:
+		return {
+			"count": self.count,
+			"total_ms": round(self.total * 1e3, 3),
+			"mean_us": round(self.total / self.count * 1e6, 2) if self.count else 0.0,
+			"max_us": round(self.max * 1e6, 2),
+		}
+
+
+def _caller() -> str:
+	f = sys._getframe(2)
+	while f is not None and f.f_globals.get("__name__") in WRAPPER_MODULES:
+		f = f.f_back
+	if f is None:
+		return "?"
+	code = f.f_code
+	return getattr(code, "co_qualname", code.co_name)
+
+
+class _DomainProxy:
+	"""traci alan nesnesi vekili; çağrılabilir öznitelikler ilk erişimde sarılıp önbelleğe alınır."""
+
+	def __init__(self, domain, name: str, accounting: "RpcAccounting"):
+		self._domain = domain
+		self._name = name
+		self._accounting = accounting
+
+	def __getattr__(self, attr: str):
+		target = getattr(self._domain, attr)
+		if not callable(target) or attr.startswith("_"):
+			return target
+		wrapped = self._accounting.wrap(f"{self._name}.{attr}", target)
+		self.__dict__[attr] = wrapped
+		return wrapped
+
+
+class RpcAccounting:
+	def __init__(self, budget_per_step: Optional[int] = None, command_budgets: Optional[Dict[str, int]] = None, mode: str = "warn", max_warnings: int = 20):
+		if mode not in ("warn", "fail"):
+			raise ValueError(f"Geçersiz bütçe kipi: {mode}")
+		self.budget_per_step = int(budget_per_step) if budget_per_step else None
+		self.command_budgets = {str(k): int(v) for k, v in (command_budgets or {}).items()}
+		self.mode = mode
+		self.max_warnings = int(max_warnings)
+		self.stats: Dict[Tuple[str, str], RpcStat] = {}
+		self.steps = 0
+		self.step_calls = 0
+		self.max_step_calls = 0
+		self.total_step_calls = 0
+		self.over_budget_steps = 0
+		self.violation: Optional[str] = None
+		self._step_by_cmd: Dict[str, int] = {}
+		self._step_by_domain: Dict[str, int] = {}
+		self.max_step_by_domain: Dict[str, int] = {}
+		self._warnings = 0
+		self._traci = None
+		self._originals: Dict[str, Any] = {}
+
+	# -------------------- Kurulum --------------------
+	def install(self, traci_module=None) -> bool:
+		"""traci alanlarını ve `simulationStep`'i sayan vekillerle değiştir."""
+		if self._traci is not None:
+			return True
+		try:
+			if traci_module is None:
+				import traci as traci_module
+		except Exception as e:
+			logger.warning(f"[RPC] traci yüklenemedi; muhasebe kapalı: {e}")
+			return False
+		self._traci = traci_module
+		for name in DOMAINS:
+			domain = getattr(traci_module, name, None)
+			if domain is None or isinstance(domain, _DomainProxy):
+				continue
+			self._originals[name] = domain
+			setattr(traci_module, name, _DomainProxy(domain, name, self))
+		step_fn = getattr(traci_module, "simulationStep", None)
+		if step_fn is not None:
+			self._originals["simulationStep"] = step_fn
+			setattr(traci_module, "simulationStep", self._wrap_step(step_fn))
+		return True
+
+	def uninstall(self) -> None:
+		if self._traci is None:
+			return
+		for name, original in self._originals.items():
+			setattr(self._traci, name, original)
+		self._originals = {}
+		self._traci = None
+
+	# -------------------- Sıcak yol --------------------
+	def wrap(self, command: str, fn):
+		def call(*args, **kwargs):
+			t0 = time.perf_counter()
+			try:
+				return fn(*args, **kwargs)
+			finally:
+				self.record(command, _caller(), time.perf_counter() - t0)
+		call.__name__ = getattr(fn, "__name__", command)
+		call.__doc__ = getattr(fn, "__doc__", None)
+		return call
+
+	def _wrap_step(self, fn):
+		inner = self.wrap("simulationStep", fn)
+
+		def simulation_step(*args, **kwargs):
+			try:
+				return inner(*args, **kwargs)
+			finally:
+				self.end_step()
+		return simulation_step
+
+	def record(self, command: str, caller: str, dt: float) -> None:
+		key = (command, caller)
+		st = self.stats.get(key)
+		if st is None:
+			st = self.stats[key] = RpcStat()
+		st.add(dt)
+		self.step_calls += 1
+		domain = command.partition(".")[0]
+		self._step_by_domain[domain] = self._step_by_domain.get(domain, 0) + 1
+		if self.command_budgets:
+			self._step_by_cmd[command] = self._step_by_cmd.get(command, 0) + 1
+
+	def end_step(self) -> None:
+		"""Adımı kapat: bütçeyi denetle, adım sayaçlarını sıfırla."""
+		self.steps += 1
+		n = self.step_calls
+		self.total_step_calls += n
+		if n > self.max_step_calls:
+			self.max_step_calls = n
+		problems = []
+		if self.budget_per_step is not None and n > self.budget_per_step:
+			problems.append(f"toplam {n} > {self.budget_per_step}")
+		for cmd, limit in self.command_budgets.items():
+			used = self._step_by_cmd.get(cmd, 0)
+			if used > limit:
+				problems.append(f"{cmd} {used} > {limit}")
+		for domain, used in self._step_by_domain.items():
+			if used > self.max_step_by_domain.get(domain, 0):
+				self.max_step_by_domain[domain] = used
+		self.step_calls = 0
+		self._step_by_cmd = {}
+		self._step_by_domain = {}
+		if not problems:
+			return
+		self.over_budget_steps += 1
+		msg = f"adım {self.steps}: RPC bütçesi aşıldı ({', '.join(problems)})"
+		if self.mode == "fail":
+			if self.violation is None:
+				self.violation = msg
+		elif self._warnings < self.max_warnings:
+			self._warnings += 1
+			logger.warning(f"[RPC] {msg}")
+
+	def begin(self) -> None:
+		"""Kurulum çağrılarını (bağlantı sonrası, döngü öncesi) ilk adımın bütçesinden çıkar."""
+		self.step_calls = 0
+		self._step_by_cmd = {}
+		self._step_by_domain = {}
+
+	# -------------------- Rapor --------------------
+	def by_command(self) -> Dict[str, RpcStat]:
+		out: Dict[str, RpcStat] = {}
+		for (cmd, _caller_name), st in self.stats.items():
+			agg = out.setdefault(cmd, RpcStat())
+			agg.count += st.count
+			agg.total += st.total
+			agg.max = max(agg.max, st.max)
+		return out
+
+	def by_domain(self) -> Dict[str, int]:
+		"""Alan başına toplam çağrı sayısı."""
+		out: Dict[str, int] = {}
+		for (cmd, _caller_name), st in self.stats.items():
+			domain = cmd.partition(".")[0]
+			out[domain] = out.get(domain, 0) + st.count
+		return out
+
+	def by_caller(self) -> Dict[str, RpcStat]:
+		out: Dict[str, RpcStat] = {}
+		for (_cmd, caller), st in self.stats.items():
+			agg = out.setdefault(caller, RpcStat())
+			agg.count += st.count
+			agg.total += st.total
+			agg.max = max(agg.max, st.max)
+		return out
+
+	def summary(self) -> Dict[str, Any]:
+		calls = sum(st.count for st in self.stats.values())
+		return {
+			"calls": calls,
+			"total_ms": round(sum(st.total for st in self.stats.values()) * 1e3, 3),
+			"steps": self.steps,
+			"mean_per_step": round(self.total_step_calls / self.steps, 2) if self.steps else 0.0,
+			"max_per_step": self.max_step_calls,
+			"over_budget_steps": self.over_budget_steps,
+		}
+
+	def report(self, top: int = 10) -> List[str]:
+		lines = [f"[RPC] {self.summary()}"]
+		for title, table in (("komut", self.by_command()), ("çağıran", self.by_caller())):
+			ranked = sorted(table.items(), key=lambda kv: kv[1].total, reverse=True)[:top]
+			for name, st in ranked:
+				s = st.summary()
+				lines.append(f"[RPC] {title} {name}: n={s['count']} toplam={s['total_ms']:.1f}ms ort={s['mean_us']:.0f}µs")
+		return lines
+
+	def write(self, path: str) -> None:
+		d = os.path.dirname(path)
+		if d:
+			os.makedirs(d, exist_ok=True)
+		data = {
+			"summary": self.summary(),
+			"by_domain": {k: {"count": n, "max_per_step": self.max_step_by_domain.get(k, 0)} for k, n in sorted(self.by_domain().items())},
+			"by_command": {k: v.summary() for k, v in sorted(self.by_command().items())},
+			"by_caller": {k: v.summary() for k, v in sorted(self.by_caller().items())},
+			"by_command_caller": [
+				{"command": cmd, "caller": caller, **st.summary()}
+				for (cmd, caller), st in sorted(self.stats.items())
+			],
+		}
+		tmp = path + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(data, f, ensure_ascii=False, indent=2)
+		os.replace(tmp, path)
+
+
+def parse_command_budgets(items: Optional[List[str]]) -> Dict[str, int]:
+	"""["vehicle.getRoadID=5", ...] -> {"vehicle.getRoadID": 5}"""
+	out: Dict[str, int] = {}
+	for item in items or []:
+		name, sep, value = str(item).partition("=")
+		if not sep or not name.strip():
+			raise ValueError(f"Geçersiz komut bütçesi: {item} (beklenen: alan.komut=N)")
+		out[name.strip()] = int(value)
+	return out
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Sabit şemalı ikili olay izi.
+
+Karar noktaları (spawn, tetikleme kararı, öncelik, ışık durumu değişimi, bırakma,
+yeniden planlama, rota uygulama, varış) metin log satırı yerine sabit boyutlu
+kayıt olarak önceden ayrılmış düz (doğrusal) bir tampona sırayla yazılır; tampon
+dolunca veya kapanışta dosyaya tek blok olarak boşaltılır ve baştan doldurulur
+(eski kayıtların üzerine yazılmaz, olay kaybolmaz). Metinler (araç/TLS/kenar kimliği,
+ışık durumu) dosyada bir kez tanımlanıp indeksle anılır.
+
+Dosya biçimi:
+  başlık: b"EVTR" + <HH> (sürüm, kayıt boyutu)
+  b"S" + <IH> (indeks, uzunluk) + utf-8 baytlar   — metin tanımı
+  b"E" + <I> (kayıt sayısı) + kayıtlar             — olay bloğu
+Kayıt (`RECORD`): t (f64, sim s), tür (u8), veh, tl, edge (u32 metin indeksi), a, b (f32), c (i32).
+
+Tür başına alan anlamları `KINDS` içinde; örnekleme tür başına "her N olaydan biri"dir.
+`TRACE` varsayılan olarak kapalıdır (`emit` hemen döner).
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"EVTR"
+VERSION = 1
+HEADER = struct.Struct("<HH")
+RECORD = struct.Struct("<dBxxxIIIffi")
+STRING_DEF = struct.Struct("<IH")
+BLOCK = struct.Struct("<I")
+
+SPAWN = 1
+TRIGGER = 2
+PRIORITY = 3
+TL_STATE = 4
+RELEASE = 5
+REPLAN = 6
+ROUTE = 7
+ARRIVED = 8
+
+# tür -> (ad, {alan: anlam}); yalnızca anlamlı alanlar listelenir
+KINDS: Dict[int, Tuple[str, Dict[str, str]]] = {
+	SPAWN: ("spawn", {"veh": "veh", "edge": "first_edge", "c": "route_edges"}),
+	TRIGGER: ("trigger", {"veh": "veh", "tl": "tl", "edge": "approach", "a": "dist_m", "b": "speed_ms", "c": "decision"}),
+	PRIORITY: ("priority", {"veh": "veh", "tl": "tl", "edge": "approach", "a": "green_s"}),
+	TL_STATE: ("tl_state", {"tl": "tl", "edge": "state", "a": "greens_on", "b": "reds_on"}),
+	RELEASE: ("release", {"veh": "veh", "tl": "tl", "c": "restored"}),
+	REPLAN: ("replan", {"veh": "veh", "edge": "first_edge", "a": "eta_s", "b": "alt_margin_s", "c": "nodes"}),
+	ROUTE: ("route", {"veh": "veh", "edge": "from_edge", "a": "age_s", "c": "route_edges"}),
+	ARRIVED: ("arrived", {"veh": "veh"}),
+}
+KIND_BY_NAME = {name: kind for kind, (name, _fields) in KINDS.items()}
+
+
+class EventTrace:
+	def __init__(self, capacity: int = 65536):
+		self.enabled = False
+		self.now = 0.0
+		self.capacity = max(16, int(capacity))
+		self.path: Optional[str] = None
+		self.emitted = 0
+		self.sampled_out = 0
+		self.flushes = 0
+		self._buf = bytearray()
+		self._n = 0
+		self._fh = None
+		self._strings: Dict[str, int] = {"": 0}
+		self._every: List[int] = [1] * 256
+		self._seen: List[int] = [0] * 256
+
+	def open(self, path: str, capacity: Optional[int] = None, sample: Optional[Dict[str, int]] = None) -> None:
+		"""İzi `path` dosyasına aç (var olan dosyanın üzerine yazar)."""
+		self.close()
+		if capacity is not None:
+			self.capacity = max(16, int(capacity))
+		d = os.path.dirname(path)
+		if d:
+			os.makedirs(d, exist_ok=True)
+		self._fh = open(path, "wb")
+		self._fh.write(MAGIC + HEADER.pack(VERSION, RECORD.size))
+		self.path = path
+		self._buf = bytearray(self.capacity * RECORD.size)
+		self._n = 0
+		self._strings = {"": 0}
+		self._every = [1] * 256
+		self._seen = [0] * 256
+		for name, every in (sample or {}).items():
+			kind = KIND_BY_NAME.get(name)
+			if kind is None:
+				raise ValueError(f"Bilinmeyen olay türü: {name} (geçerli: {', '.join(KIND_BY_NAME)})")
+			self._every[kind] = max(1, int(every))
+		self.emitted = self.sampled_out = self.flushes = 0
+		self.enabled = True
+
+	# -------------------- Sıcak yol --------------------
+	def _intern(self, s: str) -> int:
+		idx = self._strings.get(s)
+		if idx is None:
+			idx = self._strings[s] = len(self._strings)
+			raw = s.encode("utf-8")[:65535]
+			self._fh.write(b"S" + STRING_DEF.pack(idx, len(raw)) + raw)
+		return idx
+
+	def emit(self, kind: int, veh: Optional[str] = "", tl: Optional[str] = "", edge: Optional[str] = "", a: float = 0.0, b: float = 0.0, c: int = 0) -> None:
+		if not self.enabled:
+			return
+		every = self._every[kind]
+		if every > 1:
+			self._seen[kind] += 1
+			if self._seen[kind] % every:
+				self.sampled_out += 1
+				return
+		strings = self._strings
+		vi = strings.get(veh or "")
+		if vi is None:
+			vi = self._intern(veh)
+		ti = strings.get(tl or "")
+		if ti is None:
+			ti = self._intern(tl)
+		ei = strings.get(edge or "")
+		if ei is None:
+			ei = self._intern(edge)
+		RECORD.pack_into(self._buf, self._n * RECORD.size, self.now, kind, vi, ti, ei, a, b, int(c))
+		self._n += 1
+		self.emitted += 1
+		if self._n >= self.capacity:
+			self.flush()
+
+	# -------------------- Boşaltma --------------------
+	def flush(self) -> None:
+		if self._fh is None or not self._n:
+			return
+		self._fh.write(b"E" + BLOCK.pack(self._n))
+		self._fh.write(memoryview(self._buf)[:self._n * RECORD.size])
+		self._fh.flush()
+		self._n = 0
+		self.flushes += 1
+
+	def close(self) -> None:
+		if self._fh is None:
+			return
+		try:
+			self.flush()
+			self._fh.close()
+		finally:
+			self._fh = None
+			self.enabled = False
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+	"""İz dosyasındaki olaylar (tür adı ve alan anlamlarıyla) sırayla."""
+	strings: Dict[int, str] = {0: ""}
+	with open(path, "rb") as f:
+		if f.read(4) != MAGIC:
+			raise ValueError(f"İz dosyası değil: {path}")
+		version, rec_size = HEADER.unpack(f.read(HEADER.size))
+		if version != VERSION or rec_size != RECORD.size:
+			raise ValueError(f"Desteklenmeyen iz sürümü: {version} (kayıt {rec_size} bayt)")
+		while True:
+			tag = f.read(1)
+			if not tag:
+				return
+			if tag == b"S":
+				idx, n = STRING_DEF.unpack(f.read(STRING_DEF.size))
+				strings[idx] = f.read(n).decode("utf-8", errors="replace")
+			elif tag == b"E":
+				(count,) = BLOCK.unpack(f.read(BLOCK.size))
+				data = f.read(count * RECORD.size)
+				for t, kind, vi, ti, ei, a, b, c in RECORD.iter_unpack(data[:len(data) // RECORD.size * RECORD.size]):
+					name, fields = KINDS.get(kind, (f"kind{kind}", {}))
+					raw = {"veh": strings.get(vi, ""), "tl": strings.get(ti, ""), "edge": strings.get(ei, ""), "a": a, "b": b, "c": c}
+					ev = {"t": t, "kind": name}
+					for key, label in fields.items():
+						ev[label] = raw[key]
+					yield ev
+			else:
+				raise ValueError(f"Bozuk iz dosyası (beklenmeyen etiket {tag!r})")
+
+
+def analyze_trace(events) -> Dict[str, Any]:
+	"""Ambulans zaman çizelgeleri, TLS eylemleri ve yeniden planlama özetleri."""
+	vehicles: Dict[str, Dict[str, Any]] = {}
+	signals: Dict[str, Dict[str, Any]] = {}
+	counts: Dict[str, int] = {}
+
+	def veh(vid: str) -> Dict[str, Any]:
+		v = vehicles.get(vid)
+		if v is None:
+			v = vehicles[vid] = {"spawn": None, "arrived": None, "priorities": 0, "replans": 0, "routes": 0, "timeline": []}
+		return v
+
+	for ev in events:
+		kind = ev["kind"]
+		counts[kind] = counts.get(kind, 0) + 1
+		vid = ev.get("veh") or ""
+		if kind == "tl_state":
+			sig = signals.setdefault(ev["tl"], {"state_changes": 0, "priorities": 0, "releases": 0})
+			sig["state_changes"] += 1
+			continue
+		if kind in ("priority", "release"):
+			sig = signals.setdefault(ev["tl"], {"state_changes": 0, "priorities": 0, "releases": 0})
+			sig["priorities" if kind == "priority" else "releases"] += 1
+		if not vid:
+			continue
+		v = veh(vid)
+		if kind == "spawn":
+			v["spawn"] = ev["t"]
+		elif kind == "arrived":
+			v["arrived"] = ev["t"]
+		elif kind == "priority":
+			v["priorities"] += 1
+		elif kind == "replan":
+			v["replans"] += 1
+		elif kind == "route":
+			v["routes"] += 1
+		if kind != "trigger" or ev.get("decision"):
+			v["timeline"].append(ev)
+	for v in vehicles.values():
+		if v["spawn"] is not None and v["arrived"] is not None:
+			v["travel_s"] = v["arrived"] - v["spawn"]
+	return {"counts": counts, "vehicles": vehicles, "signals": signals}
+
+
+def format_event(ev: Dict[str, Any]) -> str:
+	extra = " ".join(
+		f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+		for k, v in ev.items() if k not in ("t", "kind", "veh") and v not in ("", None)
+	)
+	return f"t={ev['t']:.1f}s {ev['kind']:<8} {extra}".rstrip()
+
+
+def parse_sample_spec(items: Optional[List[str]]) -> Dict[str, int]:
+	"""["trigger=10", ...] -> {"trigger": 10}"""
+	out: Dict[str, int] = {}
+	for item in items or []:
+		name, sep, value = str(item).partition("=")
+		if not sep or name.strip() not in KIND_BY_NAME:
+			raise ValueError(f"Geçersiz örnekleme: {item} (beklenen: tür=N, tür: {', '.join(KIND_BY_NAME)})")
+		out[name.strip()] = int(value)
+	return out
+
+
+# Süreç geneli iz; `--trace` verilmedikçe kapalı
+TRACE = EventTrace()